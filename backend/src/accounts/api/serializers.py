@@ -2,8 +2,6 @@ from typing import Any
 
 from django.contrib.auth import authenticate
 from django.contrib.auth.password_validation import validate_password
-from drf_spectacular.types import OpenApiTypes
-from drf_spectacular.utils import extend_schema_field
 from rest_framework import serializers
 
 from accounts.models import User
@@ -74,8 +72,6 @@ class UserProfileSerializer(serializers.ModelSerializer[User]):
     """Serializer for user profile"""
 
     full_name = serializers.ReadOnlyField()
-    posts_count = serializers.SerializerMethodField()
-    comments_count = serializers.SerializerMethodField()
 
     class Meta:
         model = User
@@ -95,20 +91,6 @@ class UserProfileSerializer(serializers.ModelSerializer[User]):
         )
         read_only_fields = ("id", "created", "modified")
 
-    @extend_schema_field(OpenApiTypes.INT)
-    def get_posts_count(self, obj: User) -> int:
-        try:
-            return obj.posts.count()
-        except AttributeError:
-            return 0
-
-    @extend_schema_field(OpenApiTypes.INT)
-    def get_comments_count(self, obj: User) -> int:
-        try:
-            return obj.comments.count()
-        except AttributeError:
-            return 0
-
 
 class UserUpdateSerializer(serializers.ModelSerializer[User]):
     """Serializer for updating user profile"""
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-17 07:52
+
+from django.db import migrations, models
+
+# Filling counter caches of existing rows
+FILL_COUNTERS = """
+UPDATE users AS u SET
+    posts_count = (SELECT count(*) FROM posts AS p WHERE p.author_id = u.id),
+    comments_count = (SELECT count(*) FROM comments AS c WHERE c.author_id = u.id);
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0001_initial"),
+        ("main", "0001_initial"),
+        ("comments", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="user",
+            name="comments_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="user",
+            name="posts_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunSQL(FILL_COUNTERS, migrations.RunSQL.noop),
+    ]
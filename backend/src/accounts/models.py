@@ -3,7 +3,9 @@ import uuid
 from django.contrib.auth.models import AbstractUser
 from django.db import models
 
+from app.images import ImageDerivatives
 from app.models import TimeStampedModel
+from app.query_cache import QueryCacheOptions
 
 
 class User(AbstractUser, TimeStampedModel):
@@ -16,11 +18,24 @@ class User(AbstractUser, TimeStampedModel):
     avatar = models.ImageField(
         upload_to="avatars", blank=True, null=True, verbose_name="Аватар"
     )
+    # Resized avatars, generated in background
+    avatar_variants = models.JSONField(default=dict, blank=True, editable=False)
     bio = models.TextField(blank=True, verbose_name="О себе")
+    # Counter caches of authored posts and comments
+    posts_count = models.PositiveIntegerField(default=0, editable=False)
+    comments_count = models.PositiveIntegerField(default=0, editable=False)
 
     USERNAME_FIELD = "email"
     REQUIRED_FIELDS = ["username"]
 
+    image_derivatives = (
+        ImageDerivatives("avatar", {"thumb": 96, "large": 320}, resources=("users",)),
+    )
+    # Login doesn't change user info, shown in cached posts and comments
+    query_cache_options = QueryCacheOptions(
+        volatile=("last_login", "posts_count", "comments_count")
+    )
+
     class Meta:
         db_table = "users"
         verbose_name = "User"
@@ -0,0 +1,196 @@
+import functools
+import hashlib
+import time
+from typing import Any, Callable, ClassVar, Iterable, NamedTuple
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.http import HttpRequest, HttpResponse
+from django.utils.cache import (
+    get_conditional_response,
+    patch_cache_control,
+    patch_vary_headers,
+)
+from django.utils.http import http_date, quote_etag
+
+from app.db import is_replica_read
+
+
+class ResourceVersions:
+    """
+    Versions of resources, e.g. "posts" or "post:<slug>", kept in cache.
+    Version is time of the last change, so it gives both ETag and Last-Modified
+    of responses without querying the resources.
+    """
+
+    KEY = "resource:version:{}"
+    # Functions returning seconds, after which version of resource changes
+    # without writes, e.g. when pinned posts expire
+    timeouts: ClassVar[dict[str, Callable[[], int | None]]] = {}
+
+    @staticmethod
+    def get(names: Iterable[str]) -> dict[str, float]:
+        """Returns versions of resources, unknown ones are started from now"""
+        keys = {ResourceVersions.KEY.format(name): name for name in names}
+        versions = {keys[key]: version for key, version in cache.get_many(keys).items()}
+
+        now = time.time()
+        for key, name in keys.items():
+            if name not in versions:
+                cache.add(key, now, timeout=ResourceVersions.get_timeout(name))
+                versions[name] = now
+        return versions
+
+    @staticmethod
+    def get_timeout(name: str) -> int | None:
+        """Returns seconds until version of resource expires, None for never"""
+        get_timeout = ResourceVersions.timeouts.get(name)
+        return get_timeout() if get_timeout is not None else None
+
+    @staticmethod
+    def touch(*names: str) -> None:
+        """Marks resources as changed"""
+        now = time.time()
+        for name in names:
+            cache.set(
+                ResourceVersions.KEY.format(name),
+                now,
+                timeout=ResourceVersions.get_timeout(name),
+            )
+
+    @staticmethod
+    def touch_on_commit(*names: str) -> None:
+        """
+        Marks resources as changed now and after commit,
+        so response built by concurrent request from old data gets new version.
+        """
+        ResourceVersions.touch(*names)
+        transaction.on_commit(functools.partial(ResourceVersions.touch, *names))
+
+
+def get_etag(request: HttpRequest, versions: dict[str, float]) -> str:
+    """
+    Returns strong ETag of response by versions of its resources.
+    Response also depends on URL, user and format.
+    """
+    user = request.user.pk if request.user.is_authenticated else ""
+    parts = [
+        request.get_full_path(),
+        str(user),
+        getattr(request, "accepted_media_type", ""),
+        *(f"{name}={versions[name]!r}" for name in sorted(versions)),
+    ]
+    return hashlib.sha256("|".join(parts).encode()).hexdigest()[:32]
+
+
+class Validators(NamedTuple):
+    """ETag and Last-Modified of response"""
+
+    etag: str
+    last_modified: int
+
+
+def get_validators(request: HttpRequest, names: Iterable[str]) -> Validators | None:
+    """
+    Returns validators of response by versions of resources.
+    Returns None, if replica may lag behind new version.
+    """
+    versions = ResourceVersions.get(names)
+    last_changed = max(versions.values())
+    if (
+        is_replica_read()
+        and time.time() - last_changed < settings.READ_YOUR_WRITES_WINDOW
+    ):
+        return None
+    return Validators(quote_etag(get_etag(request, versions)), int(last_changed))
+
+
+def patch_validated_response(
+    request: HttpRequest,
+    response: HttpResponse,
+    validators: Validators | None,
+    max_age: int,
+) -> HttpResponse:
+    """Sets validators and Cache-Control of response"""
+    if validators is None:
+        patch_cache_control(response, no_cache=True)
+        return response
+    if response.status_code == 200:
+        response["ETag"] = validators.etag
+        response["Last-Modified"] = http_date(validators.last_modified)
+    elif response.status_code != 304:
+        return response
+
+    if request.user.is_authenticated:
+        patch_cache_control(response, private=True, no_cache=True)
+    else:
+        patch_cache_control(response, public=True, max_age=max_age)
+    patch_vary_headers(response, ["Authorization"])
+    return response
+
+
+def conditional_get(
+    resources: Callable[..., Iterable[str]],
+    max_age: int = 0,
+    on_not_modified: Callable[..., None] | None = None,
+) -> Callable:
+    """
+    Decorator of view for conditional GET by versions of resources,
+    returned by resources(request, *args, **kwargs).
+    Returns 304 Not Modified for matching If-None-Match or If-Modified-Since
+    without calling view. Anonymous responses may be cached for max_age
+    seconds by shared caches, personal ones are revalidated every time.
+    Async views are supported too.
+    """
+
+    def get_not_modified(
+        request: HttpRequest, *args: Any, **kwargs: Any
+    ) -> tuple[HttpResponse | None, Validators | None]:
+        validators = get_validators(request, resources(request, *args, **kwargs))
+        if validators is None:
+            return None, None
+
+        response = get_conditional_response(
+            request, etag=validators.etag, last_modified=validators.last_modified
+        )
+        if response is not None and on_not_modified is not None:
+            on_not_modified(request, *args, **kwargs)
+        return response, validators
+
+    def decorator(view: Callable) -> Callable:
+        if iscoroutinefunction(view):
+
+            @functools.wraps(view)
+            async def async_wrapper(
+                request: HttpRequest, *args: Any, **kwargs: Any
+            ) -> HttpResponse:
+                if request.method not in ("GET", "HEAD"):
+                    return await view(request, *args, **kwargs)
+
+                response, validators = await sync_to_async(get_not_modified)(
+                    request, *args, **kwargs
+                )
+                if response is None:
+                    response = await view(request, *args, **kwargs)
+                # User of request may be loaded from session
+                return await sync_to_async(patch_validated_response)(
+                    request, response, validators, max_age
+                )
+
+            return async_wrapper
+
+        @functools.wraps(view)
+        def wrapper(request: HttpRequest, *args: Any, **kwargs: Any) -> HttpResponse:
+            if request.method not in ("GET", "HEAD"):
+                return view(request, *args, **kwargs)
+
+            response, validators = get_not_modified(request, *args, **kwargs)
+            if response is None:
+                response = view(request, *args, **kwargs)
+            return patch_validated_response(request, response, validators, max_age)
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,229 @@
+import dataclasses
+import logging
+from collections import defaultdict
+from typing import Any, ClassVar, Iterable, cast
+
+from django.apps import apps
+from django.db import models, transaction
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest
+from django.db.models.signals import class_prepared, pre_delete
+from django.dispatch import receiver
+
+logger = logging.getLogger(__name__)
+
+
+@dataclasses.dataclass(frozen=True)
+class CounterCache:
+    """
+    Declares denormalized number of rows of counted model, stored on related model.
+    E.g. CounterCache("post", "comments_count", {"is_active": True}) on Comment
+    keeps Post.comments_count equal to number of active comments of the post.
+    Conditions are compared by equality only.
+    """
+
+    relation: str
+    field: str
+    conditions: dict[str, Any] = dataclasses.field(default_factory=dict)
+
+    def get_relation(self, model: type[models.Model]) -> models.ForeignKey:
+        """Returns foreign key of counted model to model, that stores the counter"""
+        return cast(models.ForeignKey, model._meta.get_field(self.relation))
+
+    def get_target_model(self, model: type[models.Model]) -> type[models.Model]:
+        """Returns model, that stores the counter"""
+        return self.get_relation(model).related_model
+
+    def get_state_fields(self, model: type[models.Model]) -> set[str]:
+        """Returns fields of counted model, that counter depends on"""
+        return {self.get_relation(model).attname, *self.conditions}
+
+    def get_target_id(
+        self, model: type[models.Model], state: dict[str, Any] | None
+    ) -> Any:
+        """Returns id of related object, that counts row in given state"""
+        if state is None:
+            return None
+        if any(state[name] != value for name, value in self.conditions.items()):
+            return None
+        return state[self.get_relation(model).attname]
+
+    def reconcile(self, model: type[models.Model]) -> int:
+        """
+        Sets counter to actual number of rows where it drifted, with one UPDATE.
+        Returns number of fixed objects.
+        """
+        actual = Coalesce(
+            Subquery(
+                model._base_manager.filter(
+                    **{self.relation: OuterRef("pk")}, **self.conditions
+                )
+                .order_by()
+                .values(self.relation)
+                .annotate(count=Count("*"))
+                .values("count")
+            ),
+            0,
+        )
+        target_model = self.get_target_model(model)
+        drifted = (
+            target_model._base_manager.annotate(actual=actual)
+            .exclude(**{self.field: F("actual")})
+            .values("pk")
+        )
+        return target_model._base_manager.filter(pk__in=drifted).update(
+            **{self.field: actual}
+        )
+
+    def __str__(self) -> str:
+        return f"{self.field} ({self.relation})"
+
+
+class CounterCachedModel(models.Model):
+    """
+    Model, which rows are counted by counter caches of related models.
+    Counters are updated in the same transaction on save and delete,
+    bulk operations (QuerySet.update, bulk_create) are fixed by reconciliation.
+    """
+
+    counter_caches: ClassVar[tuple[CounterCache, ...]] = ()
+    _counter_state: dict[str, Any] | None
+
+    class Meta:
+        abstract = True
+
+    @classmethod
+    def get_counter_state_fields(cls) -> set[str]:
+        """Returns fields, that counters depend on"""
+        return {
+            name
+            for counter in cls.counter_caches
+            for name in counter.get_state_fields(cls)
+        }
+
+    @classmethod
+    def from_db(cls, *args: Any, **kwargs: Any) -> "CounterCachedModel":
+        instance = super().from_db(*args, **kwargs)
+        # Values as they are in DB, for finding counters to change on save
+        instance._counter_state = instance._get_counter_state()
+        return instance
+
+    def refresh_from_db(self, *args: Any, **kwargs: Any) -> None:
+        super().refresh_from_db(*args, **kwargs)
+        self._counter_state = self._get_counter_state()
+
+    def _get_counter_state(
+        self,
+        saved_state: dict[str, Any] | None = None,
+        update_fields: Iterable[str] | None = None,
+    ) -> dict[str, Any] | None:
+        """
+        Returns values of fields, that counters depend on.
+        Values of deferred or not updated fields are taken from saved state.
+        """
+        names = self.get_counter_state_fields()
+        unchanged = self.get_deferred_fields() & names
+        if update_fields is not None:
+            updated = {
+                getattr(self._meta.get_field(name), "attname", name)
+                for name in update_fields
+            }
+            unchanged |= names - updated - set(update_fields)
+        if unchanged and saved_state is None:
+            return None
+
+        state = {name: getattr(self, name) for name in names - unchanged}
+        if saved_state is not None:
+            state |= {name: saved_state[name] for name in unchanged}
+        return state
+
+    def get_saved_counter_state(self) -> dict[str, Any] | None:
+        """Returns values of fields, that counters depend on, as they are in DB"""
+        if self._state.adding:
+            return None
+        state = getattr(self, "_counter_state", None)
+        if state is None:
+            state = (
+                type(self)
+                ._base_manager.filter(pk=self.pk)
+                .values(*self.get_counter_state_fields())
+                .first()
+            )
+        return state
+
+    def save(self, *args: Any, **kwargs: Any) -> None:
+        with transaction.atomic(using=kwargs.get("using")):
+            saved_state = self.get_saved_counter_state()
+            super().save(*args, **kwargs)
+            state = self._get_counter_state(saved_state, kwargs.get("update_fields"))
+            update_counters(type(self), saved_state, state)
+            self._counter_state = state
+
+
+def decrement_counters_on_delete(
+    sender: type[CounterCachedModel], instance: CounterCachedModel, **kwargs: Any
+) -> None:
+    """Decrements counters of deleted row, also for cascade and QuerySet deletes"""
+    update_counters(sender, instance.get_saved_counter_state(), None)
+
+
+@receiver(class_prepared)
+def connect_counter_caches(sender: type[models.Model], **kwargs: Any) -> None:
+    """
+    Connects decrement of counters to counted models only,
+    so deletes of other models keep fast delete without fetching rows
+    """
+    if issubclass(sender, CounterCachedModel) and sender.counter_caches:
+        pre_delete.connect(decrement_counters_on_delete, sender=sender)
+
+
+def update_counters(
+    model: type[models.Model],
+    old_state: dict[str, Any] | None,
+    new_state: dict[str, Any] | None,
+) -> None:
+    """Moves row between counters of related objects, depending on its state change"""
+    deltas: dict[tuple[type[models.Model], str, Any], int] = defaultdict(int)
+    for counter in getattr(model, "counter_caches", ()):
+        old_target = counter.get_target_id(model, old_state)
+        new_target = counter.get_target_id(model, new_state)
+        if old_target == new_target:
+            continue
+
+        target_model = counter.get_target_model(model)
+        if old_target is not None:
+            deltas[(target_model, counter.field, old_target)] -= 1
+        if new_target is not None:
+            deltas[(target_model, counter.field, new_target)] += 1
+
+    for (target_model, counter_field, target_id), delta in deltas.items():
+        if delta:
+            target_model._base_manager.filter(pk=target_id).update(
+                **{counter_field: Greatest(F(counter_field) + delta, 0)}
+            )
+
+
+def get_counter_caches() -> list[tuple[type[models.Model], CounterCache]]:
+    """Returns all declared counters with their counted models"""
+    return [
+        (model, counter)
+        for model in apps.get_models()
+        if issubclass(model, CounterCachedModel)
+        for counter in model.counter_caches
+    ]
+
+
+def reconcile_counters(targets: Iterable[str] | None = None) -> dict[str, int]:
+    """
+    Fixes drift of counters, e.g. "main.Post.comments_count".
+    Returns number of fixed objects by counter.
+    """
+    targets = set(targets) if targets else None
+    fixed: dict[str, int] = {}
+    for model, counter in get_counter_caches():
+        label = f"{counter.get_target_model(model)._meta.label}.{counter.field}"
+        if targets is not None and label not in targets:
+            continue
+        fixed[label] = fixed.get(label, 0) + counter.reconcile(model)
+        logger.info("Reconciled %s: %s fixed", label, fixed[label])
+    return fixed
@@ -0,0 +1,246 @@
+import asyncio
+import contextlib
+import contextvars
+import random
+import time
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Iterator, TypeVar
+
+from asgiref.sync import (
+    iscoroutinefunction,
+    markcoroutinefunction,
+    sync_to_async,
+)
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections, models, transaction
+from django.http import HttpRequest, HttpResponse, HttpResponseBase
+from rest_framework.views import APIView
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+
+if TYPE_CHECKING:
+    from rest_framework.views import AsView, GenericView
+
+T = TypeVar("T")
+
+PRIMARY = "default"
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+# Client reads from primary until time in cookie or in cache key of user
+STICKY_COOKIE = "read_primary_until"
+STICKY_USER_KEY = "db:primary:user:{}"
+
+# Alias of database for reads in current request, task or block
+_database_for_read: contextvars.ContextVar[str | None] = contextvars.ContextVar(
+    "database_for_read", default=None
+)
+
+
+def get_replica() -> str | None:
+    """Returns alias of random replica or None, if replicas are not configured"""
+    replicas = settings.DATABASE_REPLICAS
+    return random.choice(replicas) if replicas else None  # noqa: S311
+
+
+def is_replica_read() -> bool:
+    """Returns True, if reads of current request or block go to replica"""
+    return _database_for_read.get() is not None
+
+
+@contextlib.contextmanager
+def use_replica() -> Iterator[None]:
+    """
+    Sends reads of block to replica, e.g. in read-only Celery task.
+    Can also be used as decorator.
+    """
+    token = _database_for_read.set(get_replica())
+    try:
+        yield
+    finally:
+        _database_for_read.reset(token)
+
+
+@contextlib.contextmanager
+def use_primary() -> Iterator[None]:
+    """Sends reads of block to primary, e.g. right after write"""
+    token = _database_for_read.set(None)
+    try:
+        yield
+    finally:
+        _database_for_read.reset(token)
+
+
+def close_connections(func: Callable[..., T]) -> Callable[..., T]:
+    """Wraps function, which opens DB connections in its own thread"""
+
+    def wrapper(*args: Any, **kwargs: Any) -> T:
+        try:
+            return func(*args, **kwargs)
+        finally:
+            # Connections of worker thread are returned to pool
+            connections.close_all()
+
+    return wrapper
+
+
+async def run_query(func: Callable[..., T], *args: Any) -> T:
+    """
+    Runs sync ORM code in worker thread with its own DB connection.
+    Async ORM runs all queries of request in one thread, so independent
+    queries, awaited with asyncio.gather(), are not concurrent there.
+    """
+    return await sync_to_async(close_connections(func), thread_sensitive=False)(*args)
+
+
+async def gather_queries(*calls: Callable[[], Any]) -> list[Any]:
+    """Runs independent queries concurrently on separate connections"""
+    return list(await asyncio.gather(*(run_query(call) for call in calls)))
+
+
+class ReplicaRouter:
+    """
+    Router of reads to replica, chosen for current request or block.
+    Writes, reads in transactions and reads outside of use_replica()
+    go to primary, so tasks and commands read their writes by default.
+    """
+
+    def db_for_read(self, model: type[models.Model], **hints: Any) -> str:
+        database = _database_for_read.get()
+        if database is None or connections[PRIMARY].in_atomic_block:
+            return PRIMARY
+        return database
+
+    def db_for_write(self, model: type[models.Model], **hints: Any) -> str:
+        return PRIMARY
+
+    def allow_relation(
+        self, obj1: models.Model, obj2: models.Model, **hints: Any
+    ) -> bool:
+        # Replicas have the same data as primary
+        return True
+
+    def allow_migrate(self, db: str, app_label: str, **hints: Any) -> bool:
+        return db == PRIMARY
+
+
+class NonAtomicReadsMixin(APIView):
+    """
+    Mixin of API view, which serves safe methods without transaction,
+    so their reads can go to replica, and keeps writes in transaction
+    like ATOMIC_REQUESTS does.
+    """
+
+    @classmethod
+    def as_view(cls, **initkwargs: Any) -> "AsView[GenericView]":
+        return transaction.non_atomic_requests(super().as_view(**initkwargs))
+
+    def dispatch(
+        self, request: HttpRequest, *args: Any, **kwargs: Any
+    ) -> HttpResponseBase:
+        if request.method in SAFE_METHODS:
+            return super().dispatch(request, *args, **kwargs)
+        with transaction.atomic():
+            return super().dispatch(request, *args, **kwargs)
+
+
+def get_jwt_user_id(request: HttpRequest) -> Any:
+    """Returns user id claim of valid access token of request without DB query"""
+    authentication = JWTAuthentication()
+    header = authentication.get_header(request)  # type: ignore[arg-type]
+    raw_token = authentication.get_raw_token(header) if header else None
+    if raw_token is None:
+        return None
+    try:
+        token = authentication.get_validated_token(raw_token)
+    except (InvalidToken, TokenError):
+        return None
+    return token.get(jwt_settings.USER_ID_CLAIM)
+
+
+def get_writer_id(request: HttpRequest) -> Any:
+    """Returns id of user, authenticated by DRF or session"""
+    user = getattr(request, "user", None)
+    if user is not None and user.is_authenticated:
+        return user.pk
+    return None
+
+
+def is_sticky(request: HttpRequest) -> bool:
+    """Returns True, if client wrote recently and must read from primary"""
+    try:
+        if float(request.COOKIES.get(STICKY_COOKIE, 0)) > time.time():
+            return True
+    except ValueError:
+        pass
+
+    user_id = get_jwt_user_id(request)
+    return user_id is not None and bool(cache.get(STICKY_USER_KEY.format(user_id)))
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Sends reads of safe-method requests to replica.
+    After unsafe request, reads of client stick to primary for
+    READ_YOUR_WRITES_WINDOW seconds by cookie and, for authenticated user,
+    by cache key, found by user id claim of JWT.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response: Callable[[HttpRequest], Any]) -> None:
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request: HttpRequest) -> Any:
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not settings.DATABASE_REPLICAS:
+            return self.get_response(request)
+
+        if request.method not in SAFE_METHODS:
+            response = self.get_response(request)
+            if response.status_code < 400:
+                self.stick_to_primary(request, response)
+            return response
+
+        if is_sticky(request):
+            return self.get_response(request)
+
+        with use_replica():
+            return self.get_response(request)
+
+    async def __acall__(self, request: HttpRequest) -> HttpResponse:
+        get_response: Callable[[HttpRequest], Awaitable[HttpResponse]]
+        get_response = self.get_response
+        if not settings.DATABASE_REPLICAS:
+            return await get_response(request)
+
+        if request.method not in SAFE_METHODS:
+            response = await get_response(request)
+            if response.status_code < 400:
+                await sync_to_async(self.stick_to_primary)(request, response)
+            return response
+
+        if await sync_to_async(is_sticky)(request):
+            return await get_response(request)
+
+        with use_replica():
+            return await get_response(request)
+
+    @staticmethod
+    def stick_to_primary(request: HttpRequest, response: HttpResponse) -> None:
+        """Makes next reads of client go to primary"""
+        window = settings.READ_YOUR_WRITES_WINDOW
+        response.set_cookie(
+            STICKY_COOKIE,
+            str(time.time() + window),
+            max_age=window,
+            httponly=True,
+            samesite="Lax",
+        )
+
+        user_id = get_writer_id(request)
+        if user_id is not None:
+            cache.set(STICKY_USER_KEY.format(user_id), True, window)
@@ -0,0 +1,122 @@
+import functools
+import time
+from typing import Any, Callable, Hashable, Iterable, Mapping
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, models, transaction
+from rest_framework.request import Request
+
+from app.db import is_replica_read
+
+
+def get_fragment_name(model: type[models.Model], pk: Any) -> str:
+    """Returns name of object, which fragments depend on, e.g. "post:1" """
+    return f"{model._meta.model_name}:{pk}"
+
+
+class FragmentCache:
+    """
+    Cache of serialized representations of single objects, e.g. post cards,
+    shared by all lists, which show them.
+    Fragment is kept with versions of objects it shows, e.g. post and its author.
+    Version is time of the last save of object, so a change makes outdated
+    only fragments, which show the changed object.
+    """
+
+    KEY = "fragment:{}:{}:{}"
+    VERSION_KEY = "fragment:version:{}"
+
+    @staticmethod
+    def is_enabled() -> bool:
+        """
+        Returns True, if fragments can be used.
+        Reads in transaction may see uncommitted changes, so they are not cached.
+        """
+        return settings.FRAGMENT_CACHE_ENABLED and not connection.in_atomic_block
+
+    @staticmethod
+    def touch(*names: str) -> None:
+        """Marks objects as changed"""
+        now = time.time()
+        cache.set_many(
+            {FragmentCache.VERSION_KEY.format(name): now for name in names},
+            timeout=settings.FRAGMENT_CACHE_TIMEOUT,
+        )
+
+    @staticmethod
+    def touch_on_commit(*names: str) -> None:
+        """
+        Marks objects as changed now and after commit,
+        so fragment built by concurrent request from old data gets new version.
+        """
+        FragmentCache.touch(*names)
+        transaction.on_commit(functools.partial(FragmentCache.touch, *names))
+
+    @staticmethod
+    def get_many(
+        request: Request | None,
+        kind: str,
+        dependencies: Mapping[Hashable, Iterable[str]],
+        build: Callable[[list[Hashable]], dict[Hashable, Any]],
+        started: float,
+    ) -> dict[Hashable, Any]:
+        """
+        Returns fragments of objects by their ids, e.g. post cards.
+        Fragments are fetched with versions of objects they depend on by one
+        get_many, missing and outdated ones are built together by one call.
+        Built fragments are stored, only if their objects were not changed
+        since query of rows started, otherwise they may be built from old rows.
+        """
+        # Fragments may contain absolute URLs
+        host = request.get_host() if request is not None else ""
+        keys = {pk: FragmentCache.KEY.format(kind, host, pk) for pk in dependencies}
+        version_keys = {
+            FragmentCache.VERSION_KEY.format(name): name
+            for names in dependencies.values()
+            for name in names
+        }
+        cached = cache.get_many([*keys.values(), *version_keys])
+
+        now = time.time()
+        # Replica may lag behind recent writes, which were already marked
+        changed_before = started
+        if is_replica_read():
+            changed_before -= settings.READ_YOUR_WRITES_WINDOW
+        versions = {}
+        changed = set()
+        for key, name in version_keys.items():
+            if key in cached:
+                versions[name] = cached[key]
+                if versions[name] >= changed_before:
+                    changed.add(name)
+            else:
+                # Unknown versions are started from now. Writes keep versions,
+                # so object was not changed since query, unless read is lagging.
+                cache.add(key, now, timeout=settings.FRAGMENT_CACHE_TIMEOUT)
+                versions[name] = now
+                if is_replica_read():
+                    changed.add(name)
+
+        data = {}
+        fragment_versions = {}
+        for pk, key in keys.items():
+            fragment_versions[pk] = [versions[name] for name in dependencies[pk]]
+            fragment = cached.get(key)
+            if fragment is not None and fragment[0] == fragment_versions[pk]:
+                data[pk] = fragment[1]
+
+        missing = [pk for pk in keys if pk not in data]
+        if missing:
+            built = build(missing)
+            # Fragment of object changed since query may be built from old row
+            cache.set_many(
+                {
+                    keys[pk]: (fragment_versions[pk], built[pk])
+                    for pk in missing
+                    if changed.isdisjoint(dependencies[pk])
+                },
+                timeout=settings.FRAGMENT_CACHE_TIMEOUT,
+            )
+            data.update(built)
+        return data
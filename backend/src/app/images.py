@@ -0,0 +1,195 @@
+import dataclasses
+import io
+import logging
+import posixpath
+from functools import partial
+from typing import Any
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import models, transaction
+from django.db.models.signals import class_prepared, post_save
+from django.dispatch import receiver
+from PIL import Image, ImageOps
+
+from app.conditional import ResourceVersions
+from app.fragments import FragmentCache, get_fragment_name
+from app.query_cache import QueryCache, get_object_key, get_options, get_table_key
+
+logger = logging.getLogger(__name__)
+
+# Extensions and Pillow save options of derivatives formats
+FORMATS: dict[str, tuple[str, dict[str, Any]]] = {
+    "WEBP": ("webp", {"method": 4}),
+    "JPEG": ("jpg", {"optimize": True, "progressive": True}),
+}
+
+
+@dataclasses.dataclass(frozen=True)
+class ImageDerivatives:
+    """
+    Declares resized variants of image field, e.g.
+    ImageDerivatives("image", {"thumb": 640, "large": 1600}) on Post.
+    Variant fits into square of given size, smaller images are not upscaled.
+    Names of generated files are stored in "<field>_variants" JSON field
+    with name of source image, so variants of replaced image are not used.
+    Resources, e.g. "post:{instance.slug}", are marked as changed,
+    when variants are recorded.
+    """
+
+    field: str
+    sizes: dict[str, int]
+    resources: tuple[str, ...] = ()
+
+    @property
+    def variants_field(self) -> str:
+        return f"{self.field}_variants"
+
+    def is_outdated(self, instance: models.Model) -> bool:
+        """Returns True if image has no generated variants yet"""
+        name = getattr(instance, self.field).name
+        variants = getattr(instance, self.variants_field) or {}
+        return bool(name) and variants.get("source") != name
+
+    def get_variant_path(self, name: str, variant: str, extension: str) -> str:
+        """Returns storage path of variant, next to source image"""
+        directory, filename = posixpath.split(name)
+        stem = posixpath.splitext(filename)[0]
+        return posixpath.join(directory, "variants", f"{stem}_{variant}.{extension}")
+
+
+def get_image_variant(
+    name: str | None, variants: dict[str, str] | None, variant: str
+) -> str | None:
+    """Returns name of image variant if it was generated for the image, else name"""
+    if name and variants and variants.get("source") == name:
+        return variants.get(variant, name)
+    return name
+
+
+def render_variants(
+    content: bytes, sizes: dict[str, int], image_format: str, quality: int
+) -> dict[str, bytes]:
+    """
+    Returns resized and encoded variants of image.
+    Works with bytes only, so it can be run in process pool.
+    """
+    extension, options = FORMATS[image_format]
+    with Image.open(io.BytesIO(content)) as source:
+        # Photos from cameras are rotated by EXIF orientation
+        image = ImageOps.exif_transpose(source)
+        if image_format == "JPEG" and image.mode != "RGB":
+            image = image.convert("RGB")
+        elif image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA")
+
+        rendered = {}
+        for variant, size in sizes.items():
+            resized = image.copy()
+            resized.thumbnail((size, size), Image.Resampling.LANCZOS)
+            output = io.BytesIO()
+            resized.save(output, image_format, quality=quality, **options)
+            rendered[variant] = output.getvalue()
+        return rendered
+
+
+def read_image(instance: models.Model, derivatives: ImageDerivatives) -> bytes:
+    """Returns content of source image"""
+    with getattr(instance, derivatives.field).open("rb") as image:
+        return image.read()
+
+
+def save_variants(
+    instance: models.Model,
+    derivatives: ImageDerivatives,
+    source: str,
+    rendered: dict[str, bytes],
+) -> dict[str, str]:
+    """
+    Writes rendered variants to storage of image field
+    and records them on the model without calling save().
+    """
+    field = getattr(instance, derivatives.field).field
+    extension = FORMATS[settings.IMAGE_DERIVATIVES_FORMAT][0]
+
+    variants = {"source": source}
+    for variant, content in rendered.items():
+        path = derivatives.get_variant_path(source, variant, extension)
+        if field.storage.exists(path):
+            field.storage.delete(path)
+        variants[variant] = field.storage.save(path, ContentFile(content))
+
+    # Image could be replaced, while variants were generated
+    model = type(instance)
+    model._base_manager.filter(pk=instance.pk, **{derivatives.field: source}).update(
+        **{derivatives.variants_field: variants}
+    )
+    setattr(instance, derivatives.variants_field, variants)
+    # Update sends no signals, so cached rows and representations are outdated here
+    if settings.QUERY_CACHE_ENABLED and get_options(model) is not None:
+        QueryCache.touch_on_commit(
+            [get_object_key(model, instance.pk), get_table_key(model)]
+        )
+    FragmentCache.touch_on_commit(get_fragment_name(model, instance.pk))
+    ResourceVersions.touch_on_commit(
+        *(name.format(instance=instance) for name in derivatives.resources)
+    )
+    return variants
+
+
+def generate_derivatives(
+    instance: models.Model, derivatives: ImageDerivatives
+) -> dict[str, str] | None:
+    """Generates and records variants of image, returns their names"""
+    source = getattr(instance, derivatives.field).name
+    if not source:
+        return None
+
+    try:
+        content = read_image(instance, derivatives)
+        rendered = render_variants(
+            content,
+            derivatives.sizes,
+            settings.IMAGE_DERIVATIVES_FORMAT,
+            settings.IMAGE_DERIVATIVES_QUALITY,
+        )
+    except (OSError, Image.DecompressionBombError):
+        # Missing or not an image file, original is served as is
+        logger.warning("Can't generate variants of %s", source, exc_info=True)
+        return None
+
+    return save_variants(instance, derivatives, source, rendered)
+
+
+def get_image_derivatives(
+    model: type[models.Model], field: str
+) -> ImageDerivatives | None:
+    """Returns declared derivatives of model image field"""
+    for derivatives in getattr(model, "image_derivatives", ()):
+        if derivatives.field == field:
+            return derivatives
+    return None
+
+
+def schedule_derivatives_on_save(
+    sender: type[models.Model], instance: models.Model, **kwargs: Any
+) -> None:
+    """Schedules generation of variants, when image is uploaded or replaced"""
+    if not settings.USE_CELERY:
+        # Variants are generated by "generate_image_derivatives" command
+        return
+
+    from main.tasks import generate_image_derivatives  # noqa
+
+    for derivatives in sender.image_derivatives:  # type: ignore[attr-defined]
+        if derivatives.is_outdated(instance):
+            # UUID keys are sent as strings in JSON
+            args = (sender._meta.label, str(instance.pk), derivatives.field)
+            transaction.on_commit(partial(generate_image_derivatives.delay, *args))
+
+
+@receiver(class_prepared)
+def connect_image_derivatives(sender: type[models.Model], **kwargs: Any) -> None:
+    """Connects scheduling of variants to models, which declare image_derivatives"""
+    if getattr(sender, "image_derivatives", ()):
+        post_save.connect(schedule_derivatives_on_save, sender=sender)
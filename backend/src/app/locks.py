@@ -0,0 +1,39 @@
+import contextlib
+import secrets
+import threading
+from typing import Any, Iterator
+
+# Deletes lock, only if it is still held by the same token
+RELEASE_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+
+@contextlib.contextmanager
+def redis_lock(client: Any, key: str, timeout: int) -> Iterator[bool]:
+    """
+    Holds lock in Redis by SET NX for at most timeout seconds,
+    yields False without waiting, if lock is held by another process.
+    Holder, which outlived timeout, doesn't release lock of the next one.
+    """
+    token = secrets.token_hex(16)
+    acquired = bool(client.set(key, token, nx=True, ex=timeout))
+    try:
+        yield acquired
+    finally:
+        if acquired:
+            client.eval(RELEASE_SCRIPT, 1, key, token)
+
+
+@contextlib.contextmanager
+def thread_lock(lock: threading.Lock) -> Iterator[bool]:
+    """Holds lock, yields False without waiting, if it is held by another thread"""
+    acquired = lock.acquire(blocking=False)
+    try:
+        yield acquired
+    finally:
+        if acquired:
+            lock.release()
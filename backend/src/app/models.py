@@ -1,6 +1,20 @@
+from typing import Iterable, TypeVar
+
 from behaviors.behaviors import Published, Slugged, Timestamped
 from django.db import models
 
+M = TypeVar("M", bound=models.Model)
+
+
+def project(queryset: models.QuerySet[M], lookups: Iterable[str]) -> models.QuerySet[M]:
+    """
+    Returns a queryset loading only given columns, e.g. "author__email".
+    Relations of columns are joined, other related rows are not loaded.
+    """
+    lookups = list(lookups)
+    relations = {lookup.rsplit("__", 1)[0] for lookup in lookups if "__" in lookup}
+    return queryset.select_related(None).select_related(*relations).only(*lookups)
+
 
 class TimeStampedModel(Timestamped, models.Model):
     class Meta:
@@ -0,0 +1,217 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from datetime import datetime
+from typing import Any
+from uuid import UUID
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Model, Q, QuerySet
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination
+from rest_framework.request import Request
+from rest_framework.utils.urls import replace_query_param
+from rest_framework.views import APIView
+
+
+class KeysetPagination(CursorPagination):
+    """
+    Cursor pagination by composite keyset, e.g. (created, id).
+    Cursor stores values of the last row, so page is fetched
+    with "WHERE (created, id) < (...) LIMIT n" and no OFFSET or COUNT(*),
+    page N costs the same as page 1.
+    Ordering applied by OrderingFilter is respected, pk is added as tie-breaker.
+    """
+
+    ordering = ("-created", "-id")
+    page_size_query_param = "page_size"
+    max_page_size = 100
+
+    def paginate_queryset(  # type: ignore[override]
+        self, queryset: QuerySet, request: Request, view: APIView | None = None
+    ) -> list[Any] | None:
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.key_ordering = self.get_key_ordering(queryset)
+
+        position, reverse = self.decode_keyset_cursor(request)
+
+        order_by = self._directed(self.key_ordering, reverse)
+        queryset = self.load_keys(queryset).order_by(*order_by)
+        if position is not None:
+            try:
+                queryset = queryset.filter(self.get_keyset_filter(order_by, position))
+            except (TypeError, ValueError, ValidationError):
+                # Values of crafted cursor don't match types of fields
+                raise NotFound(self.invalid_cursor_message)
+
+        # Fetching one more row to know if there is next page
+        results = list(queryset[: self.page_size + 1])
+        has_more = len(results) > self.page_size
+        self.page = results[: self.page_size]
+        # Rows, which cursors are built from
+        self.keyset_page = self.page
+
+        if reverse:
+            self.page.reverse()
+            self.has_next = True
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = position is not None
+
+        return self.page
+
+    def get_key_ordering(self, queryset: QuerySet) -> tuple[str, ...]:
+        """Returns ordering of queryset by model fields with pk tie-breaker"""
+        order_by = queryset.query.order_by
+        ordering = tuple(
+            field
+            for field in order_by
+            if isinstance(field, str) and self._is_model_field(queryset.model, field)
+        )
+        if not ordering or len(ordering) != len(order_by):
+            ordering = tuple(self.ordering)
+
+        if not any(field.lstrip("-") in ("id", "pk") for field in ordering):
+            ordering += ("-id",) if ordering[0].startswith("-") else ("id",)
+        return ordering
+
+    def load_keys(self, queryset: QuerySet) -> QuerySet:
+        """
+        Returns queryset, which loads keys of cursor,
+        when it selects only some columns, e.g. of sparse fieldset
+        """
+        keys = [field.lstrip("-") for field in self.key_ordering]
+        values_fields = queryset._fields  # type: ignore[attr-defined]
+        if values_fields is not None:
+            # Rows of .values()
+            missing = [key for key in keys if key not in values_fields]
+            return queryset.values(*values_fields, *missing) if missing else queryset
+
+        fields, defer = queryset.query.deferred_loading
+        if fields and not defer:
+            # Instances of .only()
+            return queryset.only(*fields, *keys)
+        return queryset
+
+    @staticmethod
+    def _is_model_field(model: type[Model], field: str) -> bool:
+        if "__" in field:
+            return False
+        try:
+            model._meta.get_field(field.lstrip("-"))
+        except FieldDoesNotExist:
+            return False
+        return True
+
+    @staticmethod
+    def _directed(ordering: tuple[str, ...], reverse: bool) -> tuple[str, ...]:
+        if not reverse:
+            return ordering
+        return tuple(
+            field[1:] if field.startswith("-") else f"-{field}" for field in ordering
+        )
+
+    @staticmethod
+    def get_keyset_filter(order_by: tuple[str, ...], position: list[Any]) -> Q:
+        """
+        Builds filter for rows after position:
+        (a < x) OR (a = x AND b < y) OR ...
+        """
+        keyset_filter = Q()
+        for i, field in enumerate(order_by):
+            lookup = "lt" if field.startswith("-") else "gt"
+            condition = Q(**{f"{field.lstrip('-')}__{lookup}": position[i]})
+            for prev_field, prev_value in zip(order_by[:i], position[:i]):
+                condition &= Q(**{prev_field.lstrip("-"): prev_value})
+            keyset_filter |= condition
+        return keyset_filter
+
+    def decode_keyset_cursor(self, request: Request) -> tuple[list[Any] | None, bool]:
+        """Returns position and direction from cursor"""
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None, False
+
+        try:
+            tokens = json.loads(urlsafe_b64decode(encoded.encode("ascii")))
+            position, reverse, ordering = tokens["p"], tokens["r"], tokens["o"]
+            if not isinstance(position, list) or reverse not in (0, 1):
+                raise ValueError("Invalid cursor tokens")
+        except (TypeError, ValueError, KeyError):
+            raise NotFound(self.invalid_cursor_message)
+
+        # Cursor from another ordering can't be applied
+        if ordering != list(self.key_ordering) or len(position) != len(ordering):
+            raise NotFound(self.invalid_cursor_message)
+
+        return position, bool(reverse)
+
+    def encode_keyset_cursor(self, instance: Any, reverse: bool) -> str:
+        """Returns url with cursor, pointing to instance"""
+        tokens = {
+            "p": [
+                self._get_value(instance, field.lstrip("-"))
+                for field in self.key_ordering
+            ],
+            "r": int(reverse),
+            "o": list(self.key_ordering),
+        }
+        encoded = urlsafe_b64encode(json.dumps(tokens).encode()).decode("ascii")
+        return replace_query_param(str(self.base_url), self.cursor_query_param, encoded)
+
+    @staticmethod
+    def _get_value(instance: Any, field: str) -> Any:
+        value = (
+            instance[field] if isinstance(instance, dict) else getattr(instance, field)
+        )
+        if isinstance(value, datetime):
+            return value.isoformat()
+        if isinstance(value, UUID):
+            return str(value)
+        return value
+
+    def get_next_link(self) -> str | None:
+        if not self.has_next or not self.keyset_page:
+            return None
+        return self.encode_keyset_cursor(self.keyset_page[-1], reverse=False)
+
+    def get_previous_link(self) -> str | None:
+        if not self.has_previous or not self.keyset_page:
+            return None
+        return self.encode_keyset_cursor(self.keyset_page[0], reverse=True)
+
+
+class FeedKeysetPagination(KeysetPagination):
+    """
+    Keyset pagination for posts feed, where pinned posts go first.
+    Pinned block is shown on the first page only in "pinned_at" order,
+    other posts are paginated by (created, id) keyset in requested direction.
+    View can disable pinned block with show_pinned_first(), e.g. for other ordering.
+    """
+
+    def paginate_queryset(  # type: ignore[override]
+        self, queryset: QuerySet, request: Request, view: APIView | None = None
+    ) -> list[Any] | None:
+        show_pinned_first = getattr(view, "show_pinned_first", None)
+        if show_pinned_first is not None and not show_pinned_first():
+            return super().paginate_queryset(queryset, request, view)
+
+        # Regular posts keep requested direction, e.g. of "?ordering=created"
+        regular_posts = queryset.filter(pin_info__isnull=True)
+        regular_posts = regular_posts.order_by(*self.get_key_ordering(regular_posts))
+        page = super().paginate_queryset(regular_posts, request, view)
+
+        if page is not None and not self.has_previous:
+            pinned_posts = queryset.filter(pin_info__isnull=False).order_by(
+                "pin_info__pinned_at"
+            )
+            # Pinned block is not paginated, cursors are built from regular posts
+            self.page = list(pinned_posts) + page
+            return self.page
+
+        return page
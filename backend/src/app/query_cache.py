@@ -0,0 +1,443 @@
+import dataclasses
+import functools
+import hashlib
+import threading
+import time
+from collections import Counter
+from typing import Any, Iterable, Iterator, Self, TypeVar, cast
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import EmptyResultSet
+from django.db import connections, models, transaction
+from django.db.models.expressions import Col, RawSQL, Subquery
+from django.db.models.lookups import Exact, In, IsNull
+from django.db.models.signals import class_prepared, post_delete, post_save, pre_save
+from django.db.models.sql import Query
+from django.db.models.sql.datastructures import Join
+from django.db.models.sql.where import AND, WhereNode
+from django.dispatch import receiver
+
+from app.db import is_replica_read
+
+T = TypeVar("T", bound=models.Model)
+
+RESULT_KEY = "querycache:result:{}:{}"
+DEPENDENCY_KEY = "querycache:dependency:{}"
+# Version of dependency, stored when it was unknown, older than any query
+INITIAL_VERSION = 0.0
+
+
+@dataclasses.dataclass(frozen=True)
+class QueryCacheOptions:
+    """
+    Declares, how cached queries depend on rows of model.
+    Changes of key fields move rows between results, filtered or ordered by them,
+    e.g. QueryCacheOptions(("post_id", "is_active")) on Comment lets
+    comments of a post be invalidated by comments of the post only.
+    First key field of query filter is its dependency, so more selective go first.
+    Changes of volatile fields, e.g. counters, don't invalidate results,
+    which show them stale for QUERY_CACHE_TIMEOUT at most.
+    """
+
+    keys: tuple[str, ...] = ()
+    volatile: tuple[str, ...] = ()
+
+
+def get_options(model: type[models.Model]) -> QueryCacheOptions | None:
+    return getattr(model, "query_cache_options", None)
+
+
+def get_object_key(model: type[models.Model], pk: Any) -> str:
+    """Returns dependency of results, containing the row"""
+    return f"obj:{model._meta.label_lower}:{pk!r}"
+
+
+def get_set_key(model: type[models.Model], field: str, value: Any) -> str:
+    """Returns dependency of results, filtered by key field value, "*" for any"""
+    if field == "*":
+        return f"set:{model._meta.label_lower}:*"
+    return f"set:{model._meta.label_lower}:{field}={value!r}"
+
+
+def get_table_key(model: type[models.Model]) -> str:
+    """Returns dependency of results, that depend on any row of model"""
+    return f"any:{model._meta.label_lower}"
+
+
+def get_version_key(dependency: str) -> str:
+    """Returns cache key of dependency version, safe for any field value"""
+    return DEPENDENCY_KEY.format(hashlib.sha256(dependency.encode()).hexdigest()[:32])
+
+
+@functools.cache
+def get_table_models() -> dict[str, type[models.Model]]:
+    return {model._meta.db_table: model for model in apps.get_models()}
+
+
+class QueryCacheMetrics:
+    """In-process counters of query cache, e.g. for benchmarks"""
+
+    def __init__(self) -> None:
+        self._counters: Counter[str] = Counter()
+        self._lock = threading.Lock()
+
+    def add(self, name: str, count: int = 1) -> None:
+        with self._lock:
+            self._counters[name] += count
+
+    def snapshot(self) -> dict[str, int]:
+        """Returns hits, misses, stale results, bypassed queries and invalidations"""
+        with self._lock:
+            return {
+                name: self._counters[name]
+                for name in ("hits", "misses", "stale", "bypassed", "invalidations")
+            }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counters.clear()
+
+
+metrics = QueryCacheMetrics()
+
+
+class QueryCache:
+    """
+    Cache of queryset results, invalidated by rows they depend on.
+    Result is stored with its dependencies: ids of its rows, key of its filter
+    and joined tables. Writes of rows mark their dependencies as changed,
+    so only results, which contain them or may contain them, are refetched.
+    Version of dependency is time of the last change, result is valid,
+    if its query started later than all its dependencies were changed.
+    """
+
+    @staticmethod
+    def is_enabled(queryset: models.QuerySet) -> bool:
+        """
+        Returns True, if results of queryset may be cached.
+        Reads in transaction may see its uncommitted writes, so they are not cached.
+        """
+        return (
+            settings.QUERY_CACHE_ENABLED
+            and not connections[queryset.db].in_atomic_block
+        )
+
+    @staticmethod
+    def fetch(queryset: models.QuerySet) -> list[Any]:
+        """Returns results of queryset from cache, fetching and caching them on miss"""
+        iterable_class: Any = queryset._iterable_class
+        try:
+            sql, params = queryset.query.get_compiler(using=queryset.db).as_sql()
+        except EmptyResultSet:
+            return list(iterable_class(queryset))
+        digest = hashlib.sha256(
+            "|".join((queryset.db, iterable_class.__name__, sql, repr(params))).encode()
+        ).hexdigest()
+        key = RESULT_KEY.format(queryset.model._meta.label_lower, digest)
+
+        entry = cache.get(key)
+        if entry is not None:
+            started, dependencies, results = entry
+            if QueryCache.is_valid(started, dependencies):
+                metrics.add("hits")
+                return results
+            metrics.add("stale")
+        metrics.add("misses")
+
+        started = time.time()
+        results = list(iterable_class(queryset))
+        dependencies = get_dependencies(queryset, results)
+        if dependencies is None:
+            metrics.add("bypassed")
+        else:
+            QueryCache.store(key, started, dependencies, results)
+        return results
+
+    @staticmethod
+    def is_valid(started: float, dependencies: list[str]) -> bool:
+        """Returns True, if no dependency changed since query started"""
+        keys = [get_version_key(name) for name in dependencies]
+        versions = cache.get_many(keys)
+        # Lost version is unknown, so it is considered changed
+        return len(versions) == len(keys) and all(
+            version < started for version in versions.values()
+        )
+
+    @staticmethod
+    def store(
+        key: str, started: float, dependencies: list[str], results: list[Any]
+    ) -> None:
+        timeout = settings.QUERY_CACHE_TIMEOUT
+        keys = [get_version_key(name) for name in dependencies]
+        versions = cache.get_many(keys)
+        # Replica may lag behind recent writes, which were already marked
+        changed_before = started
+        if is_replica_read():
+            changed_before -= settings.READ_YOUR_WRITES_WINDOW
+        if any(version >= changed_before for version in versions.values()):
+            return
+        for dependency_key in keys:
+            if dependency_key not in versions:
+                # Not overwriting version of concurrent write
+                cache.add(dependency_key, INITIAL_VERSION, timeout=timeout)
+        cache.set(key, (started, dependencies, results), timeout=timeout)
+
+    @staticmethod
+    def touch(dependencies: Iterable[str]) -> None:
+        """Marks dependencies as changed"""
+        now = time.time()
+        cache.set_many(
+            {get_version_key(name): now for name in dependencies},
+            timeout=settings.QUERY_CACHE_TIMEOUT,
+        )
+
+    @staticmethod
+    def touch_on_commit(dependencies: Iterable[str]) -> None:
+        """
+        Marks dependencies as changed now and after commit,
+        so result fetched by concurrent query from old data is not valid.
+        """
+        dependencies = list(dependencies)
+        metrics.add("invalidations")
+        QueryCache.touch(dependencies)
+        transaction.on_commit(functools.partial(QueryCache.touch, dependencies))
+
+
+def get_dependencies(queryset: models.QuerySet, results: list[Any]) -> list[str] | None:
+    """
+    Returns dependencies of query results.
+    Returns None, if query can't be cached, e.g. it joins unregistered tables
+    or has subqueries.
+    """
+    query = queryset.query
+    model = queryset.model
+    options = get_options(model)
+    if options is None or query.combinator or query.extra or query.extra_tables:
+        return None
+
+    # Joins of selected relations and order are counted during compilation
+    refcounts = query.alias_refcount.copy()
+    try:
+        _, order_by, _ = query.get_compiler(using=queryset.db).pre_sql_setup()
+        joins = [
+            table
+            for alias, table in query.alias_map.items()
+            if query.alias_refcount[alias]
+        ]
+    finally:
+        query.reset_refcounts(refcounts)
+
+    # Fields of model, which filter, order and joins are based on
+    attnames = {field.column: field.attname for field in model._meta.concrete_fields}
+    fields: set[str] = set()
+    dependencies: set[str] = set()
+    base_alias = query.base_table
+    for table in joins:
+        if table.table_alias == base_alias:
+            continue
+        joined_model = get_table_models().get(table.table_name)
+        if joined_model is None or get_options(joined_model) is None:
+            return None
+        dependencies.add(get_table_key(joined_model))
+        if isinstance(table, Join) and table.parent_alias == base_alias:
+            fields.update(attnames[column] for column, _ in table.join_cols)
+
+    expressions = [query.where, *(expression for expression, _ in order_by)]
+    for expression in flatten(expressions):
+        if isinstance(expression, (Subquery, RawSQL, Query)):
+            return None
+        if isinstance(expression, Col) and expression.alias == base_alias:
+            fields.add(expression.target.attname)
+
+    pk = model._meta.pk
+    assert pk is not None
+    if fields - {pk.attname, *options.keys, *options.volatile}:
+        # Any change of row may move it into results
+        dependencies.add(get_table_key(model))
+    else:
+        dependencies.update(get_filter_dependencies(query, options))
+
+    for row in results:
+        if isinstance(row, models.Model):
+            dependencies.add(get_object_key(model, row.pk))
+        elif isinstance(row, dict) and pk.attname in row:
+            dependencies.add(get_object_key(model, row[pk.attname]))
+        else:
+            # Rows can't be told apart, so they are invalidated by any change
+            dependencies.add(get_table_key(model))
+            break
+    return sorted(dependencies)
+
+
+def flatten(expressions: Iterable[Any]) -> Iterator[Any]:
+    """Yields expressions and conditions with all their source expressions"""
+    for expression in expressions:
+        yield expression
+        if isinstance(expression, WhereNode):
+            yield from flatten(expression.children)
+        elif hasattr(expression, "get_source_expressions"):
+            yield from flatten(expression.get_source_expressions())
+
+
+def get_filter_dependencies(query: Query, options: QueryCacheOptions) -> list[str]:
+    """
+    Returns dependencies of rows set, filtered by query:
+    its ids, values of the most selective key field or any row of model.
+    Only conditions, required for all rows, are used, e.g. not ones of OR.
+    """
+    model = query.model
+    assert model is not None
+    pk = model._meta.pk
+    assert pk is not None
+    conditions: dict[str, list[Any]] = {}
+    if query.where.connector == AND and not query.where.negated:
+        for lookup in query.where.children:
+            if not isinstance(lookup, (Exact, In, IsNull)) or not (
+                isinstance(lookup.lhs, Col) and lookup.lhs.alias == query.base_table
+            ):
+                continue
+            if isinstance(lookup, IsNull):
+                if lookup.rhs is True:
+                    conditions[lookup.lhs.target.attname] = [None]
+            elif not hasattr(lookup.rhs, "resolve_expression"):
+                values = lookup.rhs if isinstance(lookup, In) else [lookup.rhs]
+                conditions[lookup.lhs.target.attname] = list(values)
+
+    if pk.attname in conditions:
+        return [get_object_key(model, value) for value in conditions[pk.attname]]
+    for field in options.keys:
+        if field in conditions:
+            return [get_set_key(model, field, value) for value in conditions[field]]
+    return [get_set_key(model, "*", None)]
+
+
+class CachedQuerySet(models.QuerySet[T]):
+    """
+    QuerySet, which results can be cached with cached(),
+    if its model and joined models declare query_cache_options.
+    """
+
+    _query_cached: bool = False
+
+    def cached(self) -> Self:
+        """Returns a queryset, which results are cached for QUERY_CACHE_TIMEOUT"""
+        clone = self._chain()  # type: ignore[attr-defined]
+        clone._query_cached = True
+        return clone
+
+    def _clone(self) -> Self:
+        clone = super()._clone()  # type: ignore[misc]
+        clone._query_cached = self._query_cached
+        return clone
+
+    def _fetch_all(self) -> None:
+        if (
+            self._result_cache is None
+            and self._query_cached
+            and QueryCache.is_enabled(self)
+        ):
+            self._result_cache = QueryCache.fetch(self)
+        super()._fetch_all()
+
+
+def get_key_values(
+    model: type[models.Model], options: QueryCacheOptions, values: dict[str, Any]
+) -> dict[str, Any]:
+    """Returns prepared values of loaded key fields"""
+    return {
+        name: cast(models.Field, model._meta.get_field(name)).get_prep_value(
+            values[name]
+        )
+        for name in options.keys
+        if name in values
+    }
+
+
+def remember_saved_keys(
+    sender: type[models.Model],
+    instance: models.Model,
+    update_fields: Iterable[str] | None = None,
+    raw: bool = False,
+    **kwargs: Any,
+) -> None:
+    """Loads values of key fields from DB, so results of old values are invalidated"""
+    options = cast(QueryCacheOptions, get_options(sender))
+    if not settings.QUERY_CACHE_ENABLED or raw:
+        return
+    if instance._state.adding:
+        return
+    if update_fields is not None and set(update_fields) <= set(options.volatile):
+        return
+    saved = (
+        sender._base_manager.filter(pk=instance.pk).values(*options.keys).first()
+        if options.keys
+        else {}
+    )
+    instance._query_cache_keys = (  # type: ignore[attr-defined]
+        get_key_values(sender, options, saved) if saved is not None else None
+    )
+
+
+def invalidate_saved_row(
+    sender: type[models.Model],
+    instance: models.Model,
+    created: bool,
+    update_fields: Iterable[str] | None = None,
+    raw: bool = False,
+    **kwargs: Any,
+) -> None:
+    """Marks results, which contain row or may contain it now, as changed"""
+    options = cast(QueryCacheOptions, get_options(sender))
+    if not settings.QUERY_CACHE_ENABLED or raw:
+        return
+    if update_fields is not None and set(update_fields) <= set(options.volatile):
+        return
+
+    old_keys = instance.__dict__.pop("_query_cache_keys", None)
+    new_keys = get_key_values(sender, options, instance.__dict__)
+    dependencies = {get_object_key(sender, instance.pk), get_table_key(sender)}
+    changed = {
+        name
+        for name in options.keys
+        if created
+        or old_keys is None
+        or old_keys.get(name) != new_keys.get(name, old_keys.get(name))
+    }
+    if changed:
+        dependencies.add(get_set_key(sender, "*", None))
+    for name in changed:
+        for keys in (old_keys or {}, new_keys):
+            if name in keys:
+                dependencies.add(get_set_key(sender, name, keys[name]))
+    QueryCache.touch_on_commit(dependencies)
+
+
+def invalidate_deleted_row(
+    sender: type[models.Model], instance: models.Model, **kwargs: Any
+) -> None:
+    """Marks results, which contain row, as changed"""
+    options = cast(QueryCacheOptions, get_options(sender))
+    if not settings.QUERY_CACHE_ENABLED:
+        return
+    dependencies = {
+        get_object_key(sender, instance.pk),
+        get_table_key(sender),
+        get_set_key(sender, "*", None),
+    }
+    for name, value in get_key_values(sender, options, instance.__dict__).items():
+        dependencies.add(get_set_key(sender, name, value))
+    QueryCache.touch_on_commit(dependencies)
+
+
+@receiver(class_prepared)
+def connect_query_cache(sender: type[models.Model], **kwargs: Any) -> None:
+    """
+    Connects invalidation to models with query_cache_options only,
+    so saves and deletes of other models don't run receivers
+    """
+    if get_options(sender) is not None:
+        pre_save.connect(remember_saved_keys, sender=sender)
+        post_save.connect(invalidate_saved_row, sender=sender)
+        post_delete.connect(invalidate_deleted_row, sender=sender)
@@ -1,19 +1,246 @@
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Callable, ClassVar, Iterable, Mapping
+
+from django.db import models
+from django.db.models import F, QuerySet
 from drf_spectacular.types import OpenApiTypes
 from drf_spectacular.utils import extend_schema_field
 from rest_framework import serializers
 
 from accounts.models import User
+from app.fragments import FragmentCache
+from app.images import get_image_variant
 from main.models import Category, Post
 
+# DRF output of datetime, e.g. "2025-01-01T10:00:00Z"
+format_datetime = serializers.DateTimeField().to_representation
+
+
+class RowSerializer(ABC):
+    """
+    Read-only serializer of .values() rows into plain dicts for hot read endpoints.
+    Only needed columns are selected and DRF fields machinery is skipped,
+    output matches schema of schema_serializer.
+    """
+
+    schema_serializer: ClassVar[type[serializers.Serializer]]
+    # Output alias -> field lookup or expression
+    values: ClassVar[dict[str, Any]] = {}
+    # Output field -> aliases, which it is built from, if they differ from field
+    field_values: ClassVar[dict[str, tuple[str, ...]]] = {}
+    # Kind of cached representations of rows, e.g. "post", None for not cached
+    fragment_kind: ClassVar[str | None] = None
+
+    def __init__(
+        self,
+        context: Mapping[str, Any] | None = None,
+        fields: Iterable[str] | None = None,
+    ) -> None:
+        self.context = context or {}
+        self.request = self.context.get("request")
+        # Rendered fields, None for all fields
+        self.fields = list(fields) if fields is not None else None
+        # Time of the first get_rows, before which rows could not be fetched
+        self.started: float | None = None
+
+    def get_values(self) -> dict[str, Any]:
+        return self.values
+
+    def get_selected_values(self) -> dict[str, Any]:
+        """Returns values, which rendered fields are built from"""
+        values = self.get_values()
+        if self.fields is None:
+            return values
+        aliases = {
+            alias
+            for field in self.fields
+            for alias in self.field_values.get(field, (field,))
+        }
+        return {alias: value for alias, value in values.items() if alias in aliases}
+
+    def get_rows(self, queryset: QuerySet) -> QuerySet:
+        """Returns queryset of rows with only needed columns"""
+        if self.started is None:
+            self.started = time.time()
+        values = self.get_selected_values()
+        fields = [alias for alias, value in values.items() if alias == value]
+        expressions = {
+            alias: F(value) if isinstance(value, str) else value
+            for alias, value in values.items()
+            if alias != value
+        }
+        return queryset.values(*fields, **expressions)
+
+    @abstractmethod
+    def to_representation(self, row: dict[str, Any]) -> dict[str, Any]:
+        """Returns representation of row"""
+
+    def get_dependencies(self, row: dict[str, Any]) -> list[str]:
+        """Returns names of objects, shown in cached representation of row"""
+        return []
+
+    def get_live_representation(self, row: dict[str, Any]) -> dict[str, Any]:
+        """Returns fields, rendered from row over cached representation, e.g. counters"""
+        return {}
+
+    def serialize(
+        self, rows: Iterable[dict[str, Any]], started: float | None = None
+    ) -> list[dict[str, Any]]:
+        """
+        Returns list of representations of rows.
+        Started is time before rows were fetched, time of get_rows by default.
+        """
+        to_representation = self.to_representation
+        if self.fields is None:
+            if self.fragment_kind is not None and FragmentCache.is_enabled():
+                if started is None:
+                    started = self.started if self.started is not None else time.time()
+                return self.serialize_fragments(list(rows), started)
+            return [to_representation(row) for row in rows]
+
+        # Values of not rendered fields were not selected
+        fields = self.fields
+        omitted = dict.fromkeys(self.get_values().keys() - self.get_selected_values())
+        return [
+            {field: data[field] for field in fields}
+            for data in (to_representation({**omitted, **row}) for row in rows)
+        ]
+
+    def serialize_fragments(
+        self, rows: list[dict[str, Any]], started: float
+    ) -> list[dict[str, Any]]:
+        """Returns list of representations of rows, serializing only not cached ones"""
+        assert self.fragment_kind is not None
+        by_id = {row["id"]: row for row in rows}
+        fragments = FragmentCache.get_many(
+            self.request,
+            self.fragment_kind,
+            {pk: self.get_dependencies(row) for pk, row in by_id.items()},
+            lambda ids: {pk: self.to_representation(by_id[pk]) for pk in ids},
+            started,
+        )
+        return [
+            fragments[row["id"]] | self.get_live_representation(row) for row in rows
+        ]
+
+    def get_file_url(self, field: models.FileField, name: str | None) -> str | None:
+        """Returns URL of file the same way as DRF FileField does"""
+        if not name:
+            return None
+        url = field.storage.url(name)
+        if self.request is not None:
+            return self.request.build_absolute_uri(url)
+        return url
+
+
+class SideLoadingMixin:
+    """
+    Mixin of row serializer for compact representation of API v2.
+    Related objects, e.g. authors, are referenced by id and serialized
+    once per response into "included" objects of their kind.
+    """
+
+    # Kinds of related objects, e.g. "users"
+    included_kinds: ClassVar[tuple[str, ...]] = ()
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self.included: dict[str, dict[str, Any]] = {
+            kind: {} for kind in self.included_kinds
+        }
+
+    def include(self, kind: str, pk: Any, build: Callable[[], dict[str, Any]]) -> Any:
+        """Returns reference to related object, serializing it on first reference"""
+        if pk is None:
+            return None
+        objects = self.included[kind]
+        # Keys of JSON objects are strings
+        key = str(pk)
+        if key not in objects:
+            objects[key] = build()
+        return pk
+
+    def get_response_data(self, data: Any, key: str = "results") -> dict[str, Any]:
+        """Returns response with items under "data" and related objects under "included" """
+        if isinstance(data, dict):
+            # Paginated response keeps its links
+            rest = {name: value for name, value in data.items() if name != key}
+            return {**rest, "data": data[key], "included": self.included}
+        return {"data": data, "included": self.included}
+
+
+class ImageVariantField(serializers.ImageField):
+    """
+    Image field, returning URL of resized variant of image, e.g. "thumb".
+    Original image is returned, until variants are generated.
+    """
+
+    def __init__(self, variant: str, **kwargs: Any) -> None:
+        self.variant = variant
+        super().__init__(**kwargs)
+
+    def to_representation(self, value: Any) -> Any:
+        if value:
+            variants = getattr(value.instance, f"{value.field.name}_variants", None)
+            name = get_image_variant(value.name, variants, self.variant)
+            if name != value.name:
+                value = value.field.attr_class(value.instance, value.field, name)
+        return super().to_representation(value)
+
 
 class AuthorInfoSerializer(serializers.ModelSerializer):
     """Serializer for correct display of author info in OpenAPI."""
 
+    avatar = ImageVariantField("thumb", read_only=True)
+
     class Meta:
         model = User
         fields = ["id", "username", "full_name", "avatar"]
 
 
+class AuthorInfoRowSerializer(RowSerializer):
+    """Row serializer of author info, embedded by relation name, e.g. "author" """
+
+    schema_serializer = AuthorInfoSerializer
+
+    avatar_field = User._meta.get_field("avatar")
+
+    columns = ("id", "username", "first_name", "last_name", "avatar", "avatar_variants")
+
+    def __init__(
+        self,
+        context: Mapping[str, Any] | None = None,
+        relation: str = "author",
+        alias: str | None = None,
+    ) -> None:
+        super().__init__(context)
+        self.relation = relation
+        # Prefix of aliases, relation name by default
+        self.alias = alias or relation
+
+    def get_values(self) -> dict[str, Any]:
+        # Aliases are prefixed, as "author_id" would conflict with model field
+        return {
+            f"{self.alias}_info_{name}": f"{self.relation}__{name}"
+            for name in self.columns
+        }
+
+    def to_representation(self, row: dict[str, Any]) -> dict[str, Any]:
+        prefix = f"{self.alias}_info"
+        return {
+            "id": row[f"{prefix}_id"],
+            "username": row[f"{prefix}_username"],
+            "full_name": f"{row[f'{prefix}_first_name']} {row[f'{prefix}_last_name']}".strip(),
+            "avatar": self.get_file_url(
+                self.avatar_field,
+                get_image_variant(
+                    row[f"{prefix}_avatar"], row[f"{prefix}_avatar_variants"], "thumb"
+                ),
+            ),
+        }
+
+
 class CategoryInfoSerializer(serializers.ModelSerializer):
     """Serializer for correct display of category info in OpenAPI."""
 
@@ -23,6 +23,7 @@ DJANGO_APPS = [
     "django.contrib.contenttypes",
     "django.contrib.sessions",
     "django.contrib.messages",
+    "django.contrib.postgres",
     "whitenoise.runserver_nostatic",  # whitenoise should be upper then static, only for dev
     "django.contrib.staticfiles",
 ]
@@ -47,6 +48,7 @@ LOCAL_APPS = [
     "comments",
     "subscribe",
     "payments",
+    "pages",
 ]
 
 INSTALLED_APPS = DJANGO_APPS + THIRD_PARTY_APPS + LOCAL_APPS
@@ -60,6 +62,7 @@ MIDDLEWARE = [
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "app.db.ReplicaRoutingMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
@@ -95,6 +98,26 @@ DATABASES = {
     }
 }
 
+# Read replicas
+# Comma separated URLs of replicas, safe-method requests read from one of them
+DATABASE_REPLICAS = []
+for number, url in enumerate(env.list("DATABASE_REPLICA_URLS", default=[]), 1):
+    DATABASES[f"replica_{number}"] = {
+        **env.db_url_config(url),
+        "OPTIONS": {
+            "pool": True,
+        },
+        # Tests read data of primary
+        "TEST": {"MIRROR": "default"},
+    }
+    DATABASE_REPLICAS.append(f"replica_{number}")
+DATABASE_ROUTERS = ["app.db.ReplicaRouter"]
+# After write, reads of client stick to primary for these seconds,
+# so replication lag doesn't hide client's own changes
+READ_YOUR_WRITES_WINDOW = env("READ_YOUR_WRITES_WINDOW", cast=int, default=10)
+# Writes invalidate cachalot keys of primary only, so replica reads are not cached
+CACHALOT_DATABASES = ["default"]
+
 CACHES = {
     "default": env.cache_url("REDIS_URL"),
 }
@@ -187,6 +210,11 @@ if SECURITY_MODE == "prod":
     SECURE_CONTENT_TYPE_NOSNIFF = True
     X_FRAME_OPTIONS = "DENY"
 
+# Reverse proxies
+# Number of proxies in front of backend, which append client address
+# to X-Forwarded-For, e.g. nginx. 0 uses address of connection
+TRUSTED_PROXY_COUNT = env("TRUSTED_PROXY_COUNT", cast=int, default=1)
+
 # Mailing
 MAILING_MODE = env("MAILING_MODE", cast=str, default="test")
 # Testing (Console) Mailing
@@ -273,6 +301,7 @@ REST_FRAMEWORK = {
     ),
     "DEFAULT_THROTTLE_RATES": {
         "anon": "200/hour",  # Request limitation for anonymous users
+        "autocomplete": "120/minute",  # Autocomplete is requested on each keystroke
     },
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",  # drf-spectacular documentation (swagger)
     "DEFAULT_VERSIONING_CLASS": "rest_framework.versioning.URLPathVersioning",
@@ -346,6 +375,122 @@ SIMPLE_JWT = {
     "USER_ID_CLAIM": "user_id",
 }
 
+# Post views counting
+# Views are buffered (Redis or in-process) and written to DB in periodic batches
+POST_VIEWS_FLUSH_INTERVAL = env("POST_VIEWS_FLUSH_INTERVAL", cast=int, default=60)
+# Flush of views or stats, running longer, may be repeated by the next flush
+POST_VIEWS_FLUSH_LOCK_TIMEOUT = env(
+    "POST_VIEWS_FLUSH_LOCK_TIMEOUT", cast=int, default=600
+)
+# If False, views are counted only by POST beacon, so post detail GET is side-effect free
+POST_VIEWS_COUNT_ON_GET = env("POST_VIEWS_COUNT_ON_GET", cast=bool, default=True)
+
+# Posts daily stats
+# Max number of days in one stats request
+POST_STATS_MAX_DAYS = env("POST_STATS_MAX_DAYS", cast=int, default=366)
+# Number of days in stats request without dates
+POST_STATS_DEFAULT_DAYS = env("POST_STATS_DEFAULT_DAYS", cast=int, default=30)
+
+# Posts batch lookup
+# Max number of ids and slugs in one request, e.g. of bookmarked posts
+POST_BATCH_MAX_SIZE = env("POST_BATCH_MAX_SIZE", cast=int, default=100)
+
+# Posts autocomplete
+# Suggestions for prefixes up to this length are cached for timeout seconds
+POSTS_AUTOCOMPLETE_CACHE_MAX_LENGTH = env(
+    "POSTS_AUTOCOMPLETE_CACHE_MAX_LENGTH", cast=int, default=3
+)
+POSTS_AUTOCOMPLETE_CACHE_TIMEOUT = env(
+    "POSTS_AUTOCOMPLETE_CACHE_TIMEOUT", cast=int, default=60
+)
+
+# Related posts
+# Number of precomputed related posts of each post
+RELATED_POSTS_COUNT = env("RELATED_POSTS_COUNT", cast=int, default=10)
+# Share of similarity score, given to posts of the same category, rest is text similarity
+RELATED_POSTS_CATEGORY_WEIGHT = env(
+    "RELATED_POSTS_CATEGORY_WEIGHT", cast=float, default=0.2
+)
+# Post change reads only this number of heaviest postings of each of its terms
+RELATED_POSTS_MAX_POSTINGS = env("RELATED_POSTS_MAX_POSTINGS", cast=int, default=200)
+
+# Query cache
+# Lists of posts and comments are cached with dependencies on their rows,
+# so a write invalidates only results, which contain the row or may contain it.
+# Cachalot invalidates whole tables on any write, so it skips their tables
+QUERY_CACHE_ENABLED = env("QUERY_CACHE_ENABLED", cast=bool, default=True)
+# Lifetime of results and versions of rows. Writes of volatile fields don't
+# invalidate results, so e.g. views_count lags behind by this time at most
+QUERY_CACHE_TIMEOUT = env("QUERY_CACHE_TIMEOUT", cast=int, default=60)
+if QUERY_CACHE_ENABLED:
+    CACHALOT_UNCACHABLE_TABLES = frozenset(("django_migrations", "posts", "comments"))
+
+# Fragment cache
+# Cards of posts and comments are cached one by one with versions of objects
+# they show, so lists render only cards of changed objects.
+# Counters are rendered from rows over cached cards, so the timeout only drops
+# cards and versions of objects, which are not listed anymore
+FRAGMENT_CACHE_ENABLED = env("FRAGMENT_CACHE_ENABLED", cast=bool, default=True)
+FRAGMENT_CACHE_TIMEOUT = env("FRAGMENT_CACHE_TIMEOUT", cast=int, default=3600)
+
+# Pinned posts blocks cache
+# Blocks live until the earliest subscription of pinning users ends, but not
+# longer than this timeout, as views and comments counters don't invalidate them
+PINNED_POSTS_CACHE_TIMEOUT = env("PINNED_POSTS_CACHE_TIMEOUT", cast=int, default=3600)
+
+# Page bundles cache
+# Sections of home and post pages are cached by versions of resources they show.
+# Counters in sections are updated without new versions, so they are refreshed
+# with this timeout, popular and featured sections follow ranking boards timeout
+PAGE_SECTIONS_CACHE_TIMEOUT = env("PAGE_SECTIONS_CACHE_TIMEOUT", cast=int, default=300)
+
+# Posts ranking
+# Scores of view and comment for popular, weekly and trending posts
+POST_RANKING_VIEW_SCORE = env("POST_RANKING_VIEW_SCORE", cast=float, default=1.0)
+POST_RANKING_COMMENT_SCORE = env("POST_RANKING_COMMENT_SCORE", cast=float, default=5.0)
+# Trending score of activity halves every this number of hours
+POST_RANKING_TRENDING_HALF_LIFE = env(
+    "POST_RANKING_TRENDING_HALF_LIFE", cast=int, default=6
+)
+# Weekly and trending boards are rebuilt from hour buckets not more often
+POST_RANKING_BOARD_TIMEOUT = env("POST_RANKING_BOARD_TIMEOUT", cast=int, default=60)
+# Hour buckets are saved to DB, so Redis restart doesn't lose them
+POST_RANKING_CHECKPOINT_INTERVAL = env(
+    "POST_RANKING_CHECKPOINT_INTERVAL", cast=int, default=300
+)
+
+# Sitemaps and feeds
+# Generated into default storage under this path and served from this URL
+SYNDICATION_PATH = env("SYNDICATION_PATH", cast=str, default="syndication")
+SYNDICATION_URL = env(
+    "SYNDICATION_URL", cast=str, default=f"{FRONTEND_URL}/{SYNDICATION_PATH}/"
+)
+# Changed sitemap chunks and feeds are rewritten every this number of seconds
+SYNDICATION_INTERVAL = env("SYNDICATION_INTERVAL", cast=int, default=600)
+# Sitemap of posts is split into chunks by ranges of ids of this size
+SITEMAP_CHUNK_SIZE = env("SITEMAP_CHUNK_SIZE", cast=int, default=50000)
+# Number of latest posts in RSS and Atom feeds
+FEEDS_SIZE = env("FEEDS_SIZE", cast=int, default=50)
+FEEDS_TITLE = env("FEEDS_TITLE", cast=str, default="TechNews")
+
+# Image derivatives
+# Resized post images and avatars are encoded in this format: WEBP or JPEG
+IMAGE_DERIVATIVES_FORMAT = env("IMAGE_DERIVATIVES_FORMAT", cast=str, default="WEBP")
+IMAGE_DERIVATIVES_QUALITY = env("IMAGE_DERIVATIVES_QUALITY", cast=int, default=80)
+
+# Async views
+# Serve homepage endpoints (categories, recent, popular, featured posts)
+# by async views, running independent queries concurrently under ASGI server
+ASYNC_HOMEPAGE_VIEWS = env("ASYNC_HOMEPAGE_VIEWS", cast=bool, default=False)
+
+# HTTP caching
+# Anonymous responses may be kept by browsers and proxies for these seconds,
+# after which they are revalidated with ETag
+FEED_CACHE_MAX_AGE = env("FEED_CACHE_MAX_AGE", cast=int, default=30)
+POST_CACHE_MAX_AGE = env("POST_CACHE_MAX_AGE", cast=int, default=60)
+CATEGORIES_CACHE_MAX_AGE = env("CATEGORIES_CACHE_MAX_AGE", cast=int, default=300)
+COMMENTS_CACHE_MAX_AGE = env("COMMENTS_CACHE_MAX_AGE", cast=int, default=30)
+
 # Celery
 USE_CELERY = env("USE_CELERY", cast=bool, default=False)
 if USE_CELERY:
@@ -382,6 +527,30 @@ if USE_CELERY:
             "task": "src.payment.tasks.retry_failed_webhook_events",
             "schedule": 3600.0,  # Every day
         },
+        "flush-post-views": {
+            "task": "main.tasks.flush_post_views",
+            "schedule": float(POST_VIEWS_FLUSH_INTERVAL),
+        },
+        "flush-post-stats": {
+            "task": "main.tasks.flush_post_stats",
+            "schedule": float(POST_VIEWS_FLUSH_INTERVAL),
+        },
+        "reconcile-counter-caches": {
+            "task": "main.tasks.reconcile_counter_caches",
+            "schedule": 86400.0,  # Every day
+        },
+        "checkpoint-post-ranking": {
+            "task": "main.tasks.checkpoint_post_ranking",
+            "schedule": float(POST_RANKING_CHECKPOINT_INTERVAL),
+        },
+        "rebuild-related-posts": {
+            "task": "main.tasks.rebuild_related_posts",
+            "schedule": 86400.0,  # Every day
+        },
+        "generate-syndication": {
+            "task": "main.tasks.generate_syndication",
+            "schedule": float(SYNDICATION_INTERVAL),
+        },
     }
 
 
@@ -0,0 +1,145 @@
+from typing import Any, Iterable, Mapping, Sequence, TypeVar
+
+from django.db.models import Model, QuerySet
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import OpenApiParameter
+from rest_framework import generics, serializers
+from rest_framework.exceptions import ValidationError
+from rest_framework.request import Request
+
+from app.models import project
+
+M = TypeVar("M", bound=Model)
+
+# Query params of sparse fieldsets, e.g. "?fields=id,title" or "?omit=content"
+FIELDS_PARAM = "fields"
+OMIT_PARAM = "omit"
+
+
+def get_serializer_fields(
+    serializer_class: type[serializers.BaseSerializer],
+) -> list[str]:
+    """Returns names of fields of serializer in output order"""
+    return list(dict.fromkeys(serializer_class.Meta.fields))  # type: ignore[attr-defined]
+
+
+def parse_fields(value: str) -> list[str]:
+    return [field.strip() for field in value.split(",") if field.strip()]
+
+
+def get_sparse_fields(request: Request, available: Sequence[str]) -> list[str] | None:
+    """
+    Returns fields, selected by "fields" and "omit" query params, in order
+    of available ones, or None, if all fields are requested
+    """
+    selected = parse_fields(request.query_params.get(FIELDS_PARAM, ""))
+    omitted = parse_fields(request.query_params.get(OMIT_PARAM, ""))
+    if not selected and not omitted:
+        return None
+
+    unknown = [field for field in selected + omitted if field not in available]
+    if unknown:
+        raise ValidationError(
+            {FIELDS_PARAM: f"Unknown fields: {', '.join(dict.fromkeys(unknown))}"}
+        )
+    return [
+        field
+        for field in available
+        if (not selected or field in selected) and field not in omitted
+    ]
+
+
+def get_projection(
+    serializer_class: type[serializers.BaseSerializer], fields: Iterable[str]
+) -> list[str]:
+    """
+    Returns lookups of columns, which fields of serializer are rendered from.
+    Columns of field are listed in Meta.field_projections, e.g.
+    {"author": ("author__email",)}, by default it is column of the same name.
+    """
+    projections: Mapping[str, Sequence[str]] = getattr(
+        serializer_class.Meta, "field_projections", {}  # type: ignore[attr-defined]
+    )
+    lookups: dict[str, None] = {}
+    for field in fields:
+        lookups.update(dict.fromkeys(projections.get(field, (field,))))
+    return list(lookups)
+
+
+def sparse_fields_parameters(
+    serializer_class: type[serializers.BaseSerializer],
+) -> list[OpenApiParameter]:
+    """Returns OpenAPI parameters of sparse fieldsets of serializer"""
+    fields = get_serializer_fields(serializer_class)
+    return [
+        OpenApiParameter(
+            FIELDS_PARAM,
+            OpenApiTypes.STR,
+            many=True,
+            explode=False,
+            enum=fields,
+            description="Comma-separated fields to return, all by default",
+        ),
+        OpenApiParameter(
+            OMIT_PARAM,
+            OpenApiTypes.STR,
+            many=True,
+            explode=False,
+            enum=fields,
+            description="Comma-separated fields not to return",
+        ),
+    ]
+
+
+class SparseFieldsSerializer(serializers.ModelSerializer[M]):
+    """Model serializer, rendering only fields, given by "fields" argument"""
+
+    def __init__(
+        self, *args: Any, fields: Iterable[str] | None = None, **kwargs: Any
+    ) -> None:
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+
+class SparseFieldsMixin(generics.GenericAPIView):
+    """
+    Mixin of API view, which renders only fields of "fields" query param
+    or all fields except "omit" ones in GET responses.
+    get_queryset() loads only columns of these fields with project_fields().
+    """
+
+    def get_sparse_fields(self) -> list[str] | None:
+        """Returns requested fields of GET response, None for all fields"""
+        if self.request.method not in ("GET", "HEAD"):
+            return None
+        if not hasattr(self, "_sparse_fields"):
+            self._sparse_fields = get_sparse_fields(
+                self.request, get_serializer_fields(self.get_serializer_class())
+            )
+        return self._sparse_fields
+
+    def is_field_requested(self, field: str) -> bool:
+        fields = self.get_sparse_fields()
+        return fields is None or field in fields
+
+    def project_fields(
+        self, queryset: QuerySet[M], extra: Iterable[str] = ()
+    ) -> QuerySet[M]:
+        """
+        Returns queryset, loading only columns of requested fields
+        and extra columns, used by view
+        """
+        fields = self.get_sparse_fields()
+        if fields is None:
+            return queryset
+        return project(
+            queryset, [*extra, *get_projection(self.get_serializer_class(), fields)]
+        )
+
+    def get_serializer(self, *args: Any, **kwargs: Any) -> Any:
+        fields = self.get_sparse_fields()
+        if fields is not None:
+            kwargs.setdefault("fields", fields)
+        return super().get_serializer(*args, **kwargs)
@@ -0,0 +1,112 @@
+import pytest
+from django.core.management import call_command
+from django.db.models.signals import pre_delete
+
+from app.counters import reconcile_counters
+from comments.models import Comment
+from main.models import Category, Post, RelatedPost
+
+pytestmark = [pytest.mark.django_db]
+
+
+def refreshed(*instances):
+    for instance in instances:
+        instance.refresh_from_db()
+    return instances
+
+
+class TestCounterCaches:
+    def test_create_and_soft_delete(self, post, user, mixer):
+        comment = mixer.blend(Comment, post=post, author=user, is_active=True)
+        mixer.blend(Comment, post=post, parent=comment, is_active=True)
+        mixer.blend(Comment, post=post, author=user, is_active=False)
+
+        refreshed(post, comment, user)
+        assert post.comments_count == 2
+        assert comment.replies_count == 1
+        assert user.comments_count == 2
+
+        comment.is_active = False
+        comment.save()
+
+        refreshed(post, user)
+        assert post.comments_count == 1
+        # Authored comments are counted regardless of activity
+        assert user.comments_count == 2
+
+    def test_publication_status_and_category_change(self, user, category, mixer):
+        other_category = mixer.blend(Category)
+        post = mixer.blend(
+            Post, author=user, category=category, publication_status=Post.DRAFT
+        )
+        refreshed(category, user)
+        assert category.posts_count == 0
+        assert user.posts_count == 1
+
+        post.publication_status = Post.PUBLISHED
+        post.save()
+        assert refreshed(category)[0].posts_count == 1
+
+        post.category = other_category
+        post.save()
+        refreshed(category, other_category)
+        assert category.posts_count == 0
+        assert other_category.posts_count == 1
+
+    def test_deferred_and_update_fields(self, post, mixer):
+        comment = mixer.blend(Comment, post=post, is_active=True)
+
+        # Not saved field doesn't change counters
+        comment.is_active = False
+        comment.save(update_fields=["content"])
+        assert refreshed(post)[0].comments_count == 1
+
+        # Deferred state is fetched from DB
+        comment = Comment.objects.only("id", "content").get(pk=comment.pk)
+        comment.content = "Edited"
+        comment.save()
+        assert refreshed(post)[0].comments_count == 1
+
+    def test_delete(self, post, user, mixer):
+        comment = mixer.blend(Comment, post=post, author=user, is_active=True)
+        mixer.blend(Comment, post=post, parent=comment, is_active=True)
+
+        comment.delete()  # Reply is deleted by cascade
+        refreshed(post, user)
+        assert post.comments_count == 0
+        assert user.comments_count == 0
+
+        Post.objects.filter(pk=post.pk).delete()
+        assert refreshed(user)[0].posts_count == 0
+
+    def test_delete_receiver_of_counted_models_only(self):
+        assert pre_delete.has_listeners(Comment)
+        # Not counted rows are deleted without fetching them
+        assert not pre_delete.has_listeners(RelatedPost)
+
+
+class TestReconcileCounters:
+    def test_drift_fixed(self, post, user, mixer):
+        mixer.blend(Comment, post=post, is_active=True)
+        # Bulk operations skip counters
+        Comment.objects.bulk_create(
+            [Comment(post=post, author=user, content="Bulk") for _ in range(2)]
+        )
+        Post.objects.filter(pk=post.pk).update(comments_count=10)
+
+        fixed = reconcile_counters()
+
+        assert fixed["main.Post.comments_count"] == 1
+        assert fixed["accounts.User.comments_count"] == 1
+        assert fixed["main.Category.posts_count"] == 0
+        refreshed(post, user)
+        assert post.comments_count == 3
+        assert user.comments_count == 2
+
+    def test_command(self, post, capsys):
+        Post.objects.filter(pk=post.pk).update(comments_count=5)
+
+        call_command("reconcile_counters", "main.Post.comments_count")
+
+        assert "main.Post.comments_count: 1 fixed" in capsys.readouterr().out
+        assert refreshed(post)[0].comments_count == 0
@@ -0,0 +1,107 @@
+import pytest
+from django.http import HttpResponse
+from django.test import RequestFactory
+from rest_framework_simplejwt.tokens import AccessToken
+
+from app.db import (
+    STICKY_COOKIE,
+    ReplicaRouter,
+    ReplicaRoutingMiddleware,
+    is_replica_read,
+    use_primary,
+    use_replica,
+)
+from main.api.views import PostListCreateView
+from main.models import Post
+from main.tasks import (
+    checkpoint_post_ranking,
+    generate_syndication,
+    rebuild_related_posts,
+)
+
+
+@pytest.fixture(autouse=True)
+def replicas(settings):
+    settings.DATABASE_REPLICAS = ["replica_1"]
+    settings.READ_YOUR_WRITES_WINDOW = 10
+
+
+def record_database(request):
+    response = HttpResponse()
+    response["X-Replica-Read"] = str(is_replica_read())
+    return response
+
+
+class TestReplicaRouter:
+    def test_reads(self):
+        router = ReplicaRouter()
+        assert router.db_for_read(Post) == "default"
+
+        with use_replica():
+            assert router.db_for_read(Post) == "replica_1"
+            assert router.db_for_write(Post) == "default"
+
+            with use_primary():
+                assert router.db_for_read(Post) == "default"
+
+    def test_migrations_on_primary_only(self):
+        router = ReplicaRouter()
+        assert router.allow_migrate("default", "main")
+        assert not router.allow_migrate("replica_1", "main")
+
+    def test_non_atomic_reads_view(self):
+        view = PostListCreateView.as_view()
+        assert "default" in view._non_atomic_requests
+
+
+@pytest.mark.django_db
+class TestReplicaRoutingMiddleware:
+    def test_safe_request_reads_from_replica(self):
+        middleware = ReplicaRoutingMiddleware(record_database)
+        response = middleware(RequestFactory().get("/"))
+        assert response["X-Replica-Read"] == "True"
+
+    def test_sticky_cookie_after_write(self):
+        middleware = ReplicaRoutingMiddleware(record_database)
+        response = middleware(RequestFactory().post("/"))
+        assert response["X-Replica-Read"] == "False"
+        assert STICKY_COOKIE in response.cookies
+
+        request = RequestFactory().get("/")
+        request.COOKIES[STICKY_COOKIE] = response.cookies[STICKY_COOKIE].value
+        assert middleware(request)["X-Replica-Read"] == "False"
+
+    def test_sticky_user_after_write(self, user):
+        middleware = ReplicaRoutingMiddleware(record_database)
+        authorization = f"Bearer {AccessToken.for_user(user)}"
+        assert (
+            middleware(RequestFactory().get("/", HTTP_AUTHORIZATION=authorization))[
+                "X-Replica-Read"
+            ]
+            == "True"
+        )
+
+        request = RequestFactory().post("/")
+        request.user = user
+        middleware(request)
+
+        # Other device without cookie
+        request = RequestFactory().get("/", HTTP_AUTHORIZATION=authorization)
+        assert middleware(request)["X-Replica-Read"] == "False"
+
+
+@pytest.mark.parametrize(
+    "task, target, replica_read",
+    [
+        (rebuild_related_posts, "main.tasks.RelatedPostsService.rebuild", True),
+        (generate_syndication, "main.tasks.SyndicationService.generate", True),
+        (checkpoint_post_ranking, "main.tasks.PostRankingService.checkpoint", False),
+    ],
+)
+def test_task_reads(mocker, task, target, replica_read):
+    reads = []
+    mocker.patch(target, side_effect=lambda: reads.append(is_replica_read()))
+
+    task()
+
+    assert reads == [replica_read]
@@ -0,0 +1,177 @@
+import io
+from unittest import mock
+
+import pytest
+from django.core.files.base import ContentFile
+from django.urls import reverse
+from PIL import Image
+
+from accounts.models import User
+from app.fragments import FragmentCache, get_fragment_name
+from comments.api.serializers import CommentRowSerializer
+from comments.models import Comment
+from main.api.serializers import PostListRowSerializer
+from main.models import Post
+from main.tasks import generate_image_derivatives
+
+# Reads in transaction are not cached
+pytestmark = [pytest.mark.django_db(transaction=True)]
+
+
+@pytest.fixture(autouse=True)
+def disable_query_cache(settings):
+    # Rows are read from DB, so only fragments may be stale
+    settings.QUERY_CACHE_ENABLED = False
+
+
+@pytest.fixture
+def posts(mixer, user, category):
+    return mixer.cycle(3).blend(
+        Post, author=user, category=category, publication_status=Post.PUBLISHED
+    )
+
+
+def count_serialized(serializer_class):
+    return mock.patch.object(
+        serializer_class,
+        "to_representation",
+        autospec=True,
+        side_effect=serializer_class.to_representation,
+    )
+
+
+def get_titles(api):
+    return {
+        post["id"]: post["title"] for post in api.get(reverse("v1:posts:recent-posts"))
+    }
+
+
+class TestPostCards:
+    def test_only_changed_serialized(self, api, posts):
+        url = reverse("v1:posts:post-list")
+        first = api.get(url)
+
+        with count_serialized(PostListRowSerializer) as to_representation:
+            assert api.get(url) == first
+            posts[0].title = "Renamed"
+            posts[0].save()
+            response = api.get(url)
+
+        assert to_representation.call_count == 1
+        assert response["results"][-1]["title"] == "Renamed"
+
+    def test_shared_by_lists(self, api, posts, category):
+        api.get(reverse("v1:posts:recent-posts"))
+        # Update without signals shows, that card is taken from cache
+        Post.objects.filter(pk=posts[0].pk).update(title="Not shown")
+
+        response = api.get(
+            reverse(
+                "v1:posts:posts-by-category", kwargs={"category_slug": category.slug}
+            )
+        )
+
+        assert response["posts"][-1]["title"] == posts[0].title
+
+    def test_live_fields(self, api, posts):
+        api.get(reverse("v1:posts:recent-posts"))
+        Post.objects.filter(pk=posts[0].pk).update(views_count=10, comments_count=2)
+
+        response = api.get(reverse("v1:posts:recent-posts"))
+
+        assert response[-1]["views_count"] == 10
+        assert response[-1]["comments_count"] == 2
+
+    def test_pinned_info(self, api, mixer, subscription, user, post):
+        api.get(reverse("v1:posts:recent-posts"))
+        mixer.blend("subscribe.PinnedPost", user=user, post=post)
+
+        response = api.get(reverse("v1:posts:recent-posts"))
+
+        assert response[0]["pinned_info"]["pinned_by"]["username"] == user.username
+
+    def test_author_change(self, api, posts, user):
+        api.get(reverse("v1:posts:recent-posts"))
+
+        user.email = "renamed@example.com"
+        user.save()
+
+        assert {
+            post["author"] for post in api.get(reverse("v1:posts:recent-posts"))
+        } == {"renamed@example.com"}
+
+    def test_volatile_save(self, api, posts, user):
+        titles = get_titles(api)
+        Post.objects.filter(pk=posts[0].pk).update(title="Not shown")
+
+        posts[0].views_count = 5
+        posts[0].save(update_fields=["views_count"])
+        user.save(update_fields=["last_login"])
+
+        assert get_titles(api) == titles
+
+    def test_changed_after_fetch_not_stored(self, posts):
+        serializer = PostListRowSerializer()
+        rows = list(serializer.get_rows(Post.objects.filter(pk=posts[0].pk)))
+        # Write commits between fetch of old row and lookup of its card
+        FragmentCache.touch(get_fragment_name(Post, posts[0].pk))
+
+        with mock.patch("app.fragments.cache.set_many") as set_many:
+            serializer.serialize(rows)
+
+        set_many.assert_called_once_with({}, timeout=mock.ANY)
+
+    def test_disabled(self, api, settings, posts):
+        settings.FRAGMENT_CACHE_ENABLED = False
+        get_titles(api)
+        Post.objects.filter(pk=posts[0].pk).update(title="Shown")
+
+        assert get_titles(api)[posts[0].pk] == "Shown"
+
+    def test_sparse_fields_not_cached(self, api, posts):
+        url = reverse("v1:posts:post-list")
+        api.get(url)
+        Post.objects.filter(pk=posts[0].pk).update(title="Shown")
+
+        response = api.get(url, data={"fields": "id,title"})
+
+        assert response["results"][-1] == {"id": posts[0].pk, "title": "Shown"}
+
+
+def test_derivatives_generated_after_card_cached(api, settings, tmp_path, posts):
+    settings.MEDIA_ROOT = tmp_path
+    settings.QUERY_CACHE_ENABLED = True
+    image = io.BytesIO()
+    Image.new("RGB", (2000, 1000), "red").save(image, "PNG")
+    posts[0].image.save("photo.png", ContentFile(image.getvalue()))
+    api.get(reverse("v1:posts:recent-posts"))
+    etag = api.api_client.get(reverse("v1:posts:post-list"))["ETag"]
+
+    variants = generate_image_derivatives("main.Post", posts[0].pk, "image")
+
+    response = api.get(reverse("v1:posts:recent-posts"))
+    assert response[-1]["image"].endswith(variants["thumb"])
+    assert api.api_client.get(reverse("v1:posts:post-list"))["ETag"] != etag
+
+
+class TestCommentFragments:
+    def test_author_change(self, api, mixer, post):
+        author = mixer.blend(User)
+        mixer.cycle(2).blend(
+            Comment, post=post, author=author, is_active=True, parent=None
+        )
+        url = reverse("v1:comments:post-comments", kwargs={"post_id": post.pk})
+        api.get(url)
+
+        with count_serialized(CommentRowSerializer) as to_representation:
+            api.get(url)
+            assert to_representation.call_count == 0
+
+            author.username = "renamed"
+            author.save()
+            response = api.get(url)
+            assert to_representation.call_count == 2
+
+        assert {
+            comment["author_info"]["username"] for comment in response["comments"]
+        } == {"renamed"}
@@ -0,0 +1,101 @@
+import io
+
+import pytest
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.db.models.signals import post_save
+from PIL import Image
+
+from app.images import render_variants
+from main.api.serializers import (
+    PostDetailSerializer,
+    PostListRowSerializer,
+    PostListSerializer,
+)
+from main.models import Post, RelatedPost
+from main.tasks import generate_image_derivatives
+
+pytestmark = [pytest.mark.django_db]
+
+
+def make_image(size=(2000, 1000), mode="RGBA") -> bytes:
+    output = io.BytesIO()
+    Image.new(mode, size, "red").save(output, "PNG")
+    return output.getvalue()
+
+
+@pytest.fixture(autouse=True)
+def media_root(settings, tmp_path):
+    settings.MEDIA_ROOT = tmp_path
+    settings.IMAGE_DERIVATIVES_FORMAT = "WEBP"
+
+
+@pytest.fixture
+def post_with_image(post):
+    post.image.save("photo.png", ContentFile(make_image()))
+    return post
+
+
+def test_render_variants():
+    rendered = render_variants(make_image(), {"thumb": 100, "large": 4000}, "JPEG", 80)
+
+    with Image.open(io.BytesIO(rendered["thumb"])) as thumb:
+        assert (thumb.format, thumb.size) == ("JPEG", (100, 50))
+    # Smaller image is not upscaled
+    with Image.open(io.BytesIO(rendered["large"])) as large:
+        assert large.size == (2000, 1000)
+
+
+class TestImageDerivatives:
+    def test_generated_and_served(self, post_with_image):
+        original = post_with_image.image.name
+        assert PostListSerializer(post_with_image).data["image"].endswith(original)
+
+        variants = generate_image_derivatives("main.Post", post_with_image.pk, "image")
+
+        post = Post.objects.for_detail().get(pk=post_with_image.pk)
+        assert post.image_variants == variants
+        assert variants["source"] == original
+        assert PostListSerializer(post).data["image"].endswith(variants["thumb"])
+        assert PostDetailSerializer(post).data["image"].endswith(variants["large"])
+        row_serializer = PostListRowSerializer()
+        [row] = row_serializer.get_rows(Post.objects.filter(pk=post.pk))
+        assert row_serializer.to_representation(row)["image"].endswith(
+            variants["thumb"]
+        )
+        with post.image.storage.open(variants["thumb"]) as thumb:
+            assert Image.open(thumb).size == (640, 320)
+
+    def test_replaced_image_served_as_is(self, post_with_image):
+        generate_image_derivatives("main.Post", post_with_image.pk, "image")
+        post = Post.objects.get(pk=post_with_image.pk)
+
+        post.image.save("other.png", ContentFile(make_image()))
+
+        assert PostListSerializer(post).data["image"].endswith(post.image.name)
+
+    def test_missing_file(self, post):
+        Post.objects.filter(pk=post.pk).update(image="posts/missing.png")
+
+        assert generate_image_derivatives("main.Post", post.pk, "image") is None
+
+    def test_command(self, post_with_image, capsys):
+        call_command("generate_image_derivatives", workers=1)
+
+        assert "main.Post.image: 1 generated" in capsys.readouterr().out
+        post_with_image.refresh_from_db()
+        assert post_with_image.image_variants["source"] == post_with_image.image.name
+
+    def test_scheduled_on_upload(
+        self, settings, mocker, post, django_capture_on_commit_callbacks
+    ):
+        settings.USE_CELERY = True
+        mocker.patch("main.tasks.update_related_posts.delay")
+        delay = mocker.patch("main.tasks.generate_image_derivatives.delay")
+
+        with django_capture_on_commit_callbacks(execute=True):
+            post.image.save("photo.png", ContentFile(make_image()))
+
+        delay.assert_called_once_with("main.Post", str(post.pk), "image")
+        # Models without images are saved without the receiver
+        assert not post_save.has_listeners(RelatedPost)
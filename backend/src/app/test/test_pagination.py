@@ -0,0 +1,125 @@
+import json
+from base64 import urlsafe_b64encode
+
+import pytest
+from django.urls import reverse
+from django.utils import timezone
+
+from comments.models import Comment
+from main.models import Post
+from subscribe.models import PinnedPost
+
+pytestmark = [pytest.mark.django_db]
+
+
+def collect_pages(api, url, direction="next"):
+    """Follows pagination links and returns ids of all pages"""
+    pages = []
+    while url:
+        response = api.get(url)
+        pages.append([item["id"] for item in response["results"]])
+        url = response[direction]
+    return pages
+
+
+class TestKeysetPagination:
+    def test_pages(self, api, auth_user, post, mixer):
+        comments = mixer.cycle(5).blend(Comment, post=post, author=auth_user)
+        expected = [comment.id for comment in reversed(comments)]
+
+        pages = collect_pages(api, reverse("v1:comments:my-comments") + "?page_size=2")
+
+        assert pages == [expected[0:2], expected[2:4], expected[4:]]
+
+    def test_previous(self, api, auth_user, post, mixer):
+        comments = mixer.cycle(5).blend(Comment, post=post, author=auth_user)
+        expected = [comment.id for comment in reversed(comments)]
+
+        url = reverse("v1:comments:my-comments") + "?page_size=2"
+        last_page_url = api.get(api.get(url)["next"])["next"]
+        last_page = api.get(last_page_url)
+
+        pages = collect_pages(api, last_page["previous"], direction="previous")
+
+        assert pages == [expected[2:4], expected[0:2]]
+
+    def test_same_created(self, api, auth_user, post, mixer):
+        created = timezone.now()
+        comments = mixer.cycle(3).blend(Comment, post=post, author=auth_user)
+        Comment.objects.update(created=created)
+
+        pages = collect_pages(api, reverse("v1:comments:my-comments") + "?page_size=1")
+
+        # Rows with equal "created" are ordered by id
+        assert pages == [[comment.id] for comment in reversed(comments)]
+
+    def test_ordering(self, api, auth_user, mixer):
+        posts = [mixer.blend(Post, author=auth_user, title=title) for title in "cab"]
+
+        pages = collect_pages(
+            api, reverse("v1:posts:my-posts") + "?ordering=title&page_size=2"
+        )
+
+        assert pages == [[posts[1].id, posts[2].id], [posts[0].id]]
+
+    def test_invalid_cursor(self, api, auth_user):
+        api.get(
+            reverse("v1:comments:my-comments") + "?cursor=invalid",
+            expected_status_code=404,
+        )
+
+    @pytest.mark.parametrize(
+        "tokens",
+        [
+            {"p": 5, "r": 0, "o": ["-created", "-id"]},
+            {"p": ["abc", 1], "r": 0, "o": ["-created", "-id"]},
+            {
+                "p": ["2025-01-01T00:00:00+00:00", 1],
+                "r": "yes",
+                "o": ["-created", "-id"],
+            },
+        ],
+    )
+    def test_crafted_cursor(self, api, auth_user, tokens):
+        cursor = urlsafe_b64encode(json.dumps(tokens).encode()).decode("ascii")
+
+        api.get(
+            reverse("v1:comments:my-comments") + f"?cursor={cursor}",
+            expected_status_code=404,
+        )
+
+
+class TestFeedKeysetPagination:
+    def test_pinned_first_page_only(self, api, subscribed_user_factory, mixer):
+        posts = mixer.cycle(3).blend(Post, publication_status=Post.PUBLISHED)
+        user_1 = subscribed_user_factory()
+        pinned = mixer.blend(Post, author=user_1, publication_status=Post.PUBLISHED)
+        mixer.blend(PinnedPost, user=user_1, post=pinned)
+
+        pages = collect_pages(api, reverse("v1:posts:post-list") + "?page_size=2")
+
+        assert pages == [
+            [pinned.id, posts[2].id, posts[1].id],
+            [posts[0].id],
+        ]
+
+        # Pinned block is shown again, when returning to the first page
+        previous_url = api.get(
+            api.get(reverse("v1:posts:post-list") + "?page_size=2")["next"]
+        )["previous"]
+        assert api.get(previous_url)["results"][0]["id"] == pinned.id
+
+    def test_ascending_ordering(self, api, subscribed_user_factory, mixer):
+        posts = mixer.cycle(3).blend(Post, publication_status=Post.PUBLISHED)
+        user_1 = subscribed_user_factory()
+        pinned = mixer.blend(Post, author=user_1, publication_status=Post.PUBLISHED)
+        mixer.blend(PinnedPost, user=user_1, post=pinned)
+
+        pages = collect_pages(
+            api, reverse("v1:posts:post-list") + "?ordering=created&page_size=2"
+        )
+
+        assert pages == [
+            [pinned.id, posts[0].id, posts[1].id],
+            [posts[2].id],
+        ]
@@ -0,0 +1,221 @@
+import io
+
+import pytest
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.db.models import F, Q
+from django.db.models.signals import post_delete, pre_save
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from app.query_cache import get_dependencies, metrics
+from comments.models import Comment
+from main.importing import PostImporter
+from main.models import Category, Post, RelatedPost
+
+# Reads in transaction are not cached
+pytestmark = [pytest.mark.django_db(transaction=True)]
+
+
+@pytest.fixture(autouse=True)
+def reset_metrics():
+    metrics.reset()
+
+
+def fetch(queryset):
+    with CaptureQueriesContext(connection) as context:
+        results = list(queryset)
+    return results, len(context.captured_queries)
+
+
+def comments_of(post):
+    return Comment.objects.filter(post=post, is_active=True).order_by("-created")
+
+
+class TestQueryCache:
+    def test_hit(self, post, mixer):
+        comment = mixer.blend(Comment, post=post, is_active=True)
+
+        assert fetch(comments_of(post).cached()) == ([comment], 1)
+        assert fetch(comments_of(post).cached()) == ([comment], 0)
+        assert fetch(comments_of(post).cached().values("id")) == (
+            [{"id": comment.pk}],
+            1,
+        )
+        assert metrics.snapshot() | {"invalidations": 0} == {
+            "hits": 1,
+            "misses": 2,
+            "stale": 0,
+            "bypassed": 0,
+            "invalidations": 0,
+        }
+
+    def test_not_cached_without_flag_or_in_transaction(self, post):
+        list(comments_of(post))
+        with transaction.atomic():
+            list(comments_of(post).cached())
+
+        assert metrics.snapshot()["misses"] == 0
+
+    def test_filter_key_invalidation(self, post, user, mixer):
+        other_post = mixer.blend(Post, author=user)
+        comment = mixer.blend(Comment, post=post, author=user, is_active=True)
+        fetch(comments_of(post).cached())
+
+        # Comment of other post and counter updates don't change comments of post
+        mixer.blend(Comment, post=other_post, author=user, is_active=True)
+        Post.objects.filter(pk=post.pk).update(views_count=F("views_count") + 1)
+        assert fetch(comments_of(post).cached()) == ([comment], 0)
+
+        new_comment = mixer.blend(Comment, post=post, author=user, is_active=True)
+        assert fetch(comments_of(post).cached()) == ([new_comment, comment], 1)
+
+    def test_row_invalidation(self, post, user, mixer):
+        comment = mixer.blend(Comment, post=post, author=user, content="Old")
+        fetch(comments_of(post).cached())
+
+        comment.content = "New"
+        comment.save()
+
+        results, queries = fetch(comments_of(post).cached())
+        assert (results[0].content, queries) == ("New", 1)
+
+    def test_key_field_change(self, post, user, mixer):
+        other_post = mixer.blend(Post, author=user)
+        comment = mixer.blend(Comment, post=other_post, author=user, is_active=True)
+        fetch(comments_of(post).cached())
+
+        # Row moves into results, which didn't contain it
+        comment.post = post
+        comment.save()
+
+        assert fetch(comments_of(post).cached()) == ([comment], 1)
+
+    def test_volatile_fields(self, post):
+        fetch(Post.objects.for_feed().cached())
+
+        post.views_count = 10
+        post.save(update_fields=["views_count"])
+        assert fetch(Post.objects.for_feed().cached())[1] == 0
+
+        post.title = "Renamed"
+        post.save()
+        assert fetch(Post.objects.for_feed().cached())[1] == 1
+
+    def test_joined_table(self, post):
+        fetch(Post.objects.for_feed().cached())
+
+        post.category.name = "Renamed"
+        post.category.save()
+
+        results, queries = fetch(Post.objects.for_feed().cached())
+        assert (results[0].category.name, queries) == ("Renamed", 1)
+
+    def test_deleted_row(self, post, mixer):
+        comment = mixer.blend(Comment, post=post, is_active=True)
+        fetch(comments_of(post).cached())
+
+        comment.delete()
+
+        assert fetch(comments_of(post).cached()) == ([], 1)
+
+    def test_api(self, api, post, mixer):
+        mixer.blend(Comment, post=post, is_active=True, parent=None)
+        url = reverse("v1:comments:post-comments", kwargs={"post_id": post.pk})
+        api.get(url)
+        mixer.blend(Comment, post=post, is_active=True, parent=None)
+
+        response = api.get(url)
+
+        assert response["comments_count"] == 2
+        assert metrics.snapshot()["misses"] == 2
+
+    def test_feed_api(self, api, post):
+        url = reverse("v1:posts:post-list")
+        first = api.get(url)
+
+        with CaptureQueriesContext(connection) as context:
+            assert api.get(url) == first
+
+        assert not [
+            query for query in context.captured_queries if "posts" in query["sql"]
+        ]
+        assert metrics.snapshot()["hits"]
+
+    def test_disabled(self, settings, post):
+        settings.QUERY_CACHE_ENABLED = False
+
+        fetch(Post.objects.for_feed().cached())
+
+        assert metrics.snapshot()["misses"] == 0
+
+    def test_receivers_of_cached_models_only(self):
+        assert pre_save.has_listeners(Comment)
+        assert not pre_save.has_listeners(RelatedPost)
+        assert not post_delete.has_listeners(RelatedPost)
+
+    def test_imported_posts(self, post, user):
+        fetch(Post.objects.filter(author=user).cached())
+        fetch(Post.objects.filter(slug="imported").cached())
+
+        PostImporter(default_author=user).run(
+            [{"title": "Imported", "content": "Text"}], batch_size=10
+        )
+
+        assert len(fetch(Post.objects.filter(author=user).cached())[0]) == 2
+        assert len(fetch(Post.objects.filter(slug="imported").cached())[0]) == 1
+
+
+def test_benchmark_command(post, user):
+    output = io.StringIO()
+
+    call_command("benchmark_query_cache", iterations=2, reads=3, stdout=output)
+
+    assert "query cache  6 reads" in output.getvalue()
+    assert not Comment.objects.exists()
+
+
+class TestDependencies:
+    def test_filter_keys(self, post, category):
+        queryset = Post.objects.filter(category=category, publication_status="p")
+
+        assert get_dependencies(queryset, [post]) == [
+            f"obj:main.post:{post.pk!r}",
+            f"set:main.post:category_id={category.pk!r}",
+        ]
+
+    def test_ids(self, post):
+        queryset = Comment.objects.filter(pk__in=[1, 2])
+
+        assert get_dependencies(queryset, []) == [
+            "obj:comments.comment:1",
+            "obj:comments.comment:2",
+        ]
+
+    def test_or_and_joins(self, post):
+        queryset = Post.objects.for_feed(
+            Q(publication_status=Post.PUBLISHED) | Q(author=post.author)
+        ).values("id", "author__email")
+
+        assert get_dependencies(queryset, [{"id": post.pk}]) == [
+            "any:accounts.user",
+            "any:subscribe.pinnedpost",
+            f"obj:main.post:{post.pk!r}",
+            "set:main.post:*",
+        ]
+
+    def test_not_key_field(self):
+        queryset = Category.objects.filter(name="Python")
+
+        assert get_dependencies(queryset, []) == ["any:main.category"]
+
+    def test_not_cachable(self, post):
+        assert (
+            get_dependencies(Post.objects.filter(ranking_buckets__score=1), []) is None
+        )
+        assert (
+            get_dependencies(
+                Post.objects.filter(pk__in=Comment.objects.values("post_id")), []
+            )
+            is None
+        )
@@ -1,9 +1,11 @@
 from django.conf import settings
 from django.contrib import admin
-from django.urls import include, path
+from django.urls import include, path, re_path
 
 api = [
     path("v1/", include(("app.urls.v1", "v1"), namespace="v1")),
+    # Version is passed to views for URLPathVersioning
+    re_path(r"^(?P<version>v2)/", include(("app.urls.v2", "v2"), namespace="v2")),
 ]
 
 urlpatterns = [
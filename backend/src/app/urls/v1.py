@@ -11,6 +11,7 @@ urlpatterns = [
     path("comments/", include("comments.urls", namespace="comments")),
     path("subscribe/", include("subscribe.urls", namespace="subscribe")),
     path("payments/", include("payments.urls", namespace="payments")),
+    path("pages/", include("pages.urls", namespace="pages")),
     # Swagger
     path(
         "docs/schema/",
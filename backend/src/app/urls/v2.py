@@ -0,0 +1,24 @@
+from django.urls import include, path
+
+from comments.api.views import post_comments
+from main.api.views import PostListCreateView
+
+# Compact representations of v1 endpoints with side-loaded related objects,
+# views choose representation by request.version
+posts = [
+    # Posts are created with v1, v2 has no compact representation of created post
+    path(
+        "",
+        PostListCreateView.as_view(http_method_names=["get", "head", "options"]),
+        name="post-list",
+    ),
+]
+
+comments = [
+    path("post/<int:post_id>/", post_comments, name="post-comments"),
+]
+
+urlpatterns = [
+    path("posts/", include((posts, "posts"))),
+    path("comments/", include((comments, "comments"))),
+]
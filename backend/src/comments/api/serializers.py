@@ -1,15 +1,24 @@
-from typing import Any
+from typing import Any, ClassVar, Iterable, Mapping
 
 from drf_spectacular.utils import extend_schema_field
 from rest_framework import serializers
 from rest_framework.utils.serializer_helpers import ReturnDict
 
-from app.serializer import AuthorInfoSerializer
+from accounts.models import User
+from app.fragments import get_fragment_name
+from app.serializer import (
+    AuthorInfoRowSerializer,
+    AuthorInfoSerializer,
+    RowSerializer,
+    SideLoadingMixin,
+    format_datetime,
+)
+from app.sparse_fields import SparseFieldsSerializer
 from comments.models import Comment
 from main.models import Post
 
 
-class CommentSerializer(serializers.ModelSerializer[Comment]):
+class CommentSerializer(SparseFieldsSerializer[Comment]):
     """Base serializer for Comments"""
 
     post = serializers.StringRelatedField(source="post.slug", read_only=True)  # type: ignore[var-annotated]
@@ -33,6 +42,127 @@ class CommentSerializer(serializers.ModelSerializer[Comment]):
             "modified",
         ]
         read_only_fields = ["author", "is_active"]
+        # Columns of fields, which are not columns of the same name
+        field_projections = {
+            "post": ("post__slug",),
+            "author_info": tuple(
+                f"author__{column}"
+                for column in AuthorInfoRowSerializer.columns
+                if column != "id"
+            ),
+            "is_reply": ("parent",),
+        }
+
+
+class CommentRowSerializer(RowSerializer):
+    """Row serializer for Comments, output is the same as of CommentSerializer"""
+
+    schema_serializer = CommentSerializer
+
+    fragment_kind: ClassVar[str | None] = "comment"
+
+    field_values = {
+        "post": ("post_slug",),
+        "author": ("author_info_id",),
+        "author_info": tuple(
+            f"author_info_{column}" for column in AuthorInfoRowSerializer.columns
+        ),
+        "is_reply": ("parent",),
+    }
+
+    def __init__(
+        self,
+        context: Mapping[str, Any] | None = None,
+        fields: Iterable[str] | None = None,
+    ) -> None:
+        super().__init__(context, fields)
+        self.author_info = AuthorInfoRowSerializer(context, relation="author")
+
+    def get_values(self) -> dict[str, Any]:
+        return {
+            "id": "id",
+            "post_id": "post_id",
+            "post_slug": "post__slug",
+            "content": "content",
+            "parent": "parent",
+            "is_active": "is_active",
+            "replies_count": "replies_count",
+            "created": "created",
+            "modified": "modified",
+            **self.author_info.get_values(),
+        }
+
+    def to_representation(self, row: dict[str, Any]) -> dict[str, Any]:
+        return {
+            "id": row["id"],
+            "post": row["post_slug"],
+            "content": row["content"],
+            "author": row["author_info_id"],
+            "author_info": self.author_info.to_representation(row),
+            "parent": row["parent"],
+            "is_active": row["is_active"],
+            "is_reply": row["parent"] is not None,
+            "replies_count": row["replies_count"],
+            "created": format_datetime(row["created"]),
+            "modified": format_datetime(row["modified"]),
+        }
+
+    def get_dependencies(self, row: dict[str, Any]) -> list[str]:
+        return [
+            get_fragment_name(Comment, row["id"]),
+            get_fragment_name(Post, row["post_id"]),
+            get_fragment_name(User, row["author_info_id"]),
+        ]
+
+    def get_live_representation(self, row: dict[str, Any]) -> dict[str, Any]:
+        # Counter is updated without saving comment, admin toggles comments in bulk
+        return {"is_active": row["is_active"], "replies_count": row["replies_count"]}
+
+
+class CommentCompactRowSerializer(SideLoadingMixin, CommentRowSerializer):
+    """
+    Row serializer for Comments in API v2.
+    Authors are side-loaded by id instead of "author_info" of each comment.
+    """
+
+    included_kinds = ("users",)
+    # Side-loaded authors are collected while serializing
+    fragment_kind = None
+
+    field_values = {
+        **CommentRowSerializer.field_values,
+        "author": CommentRowSerializer.field_values["author_info"],
+    }
+
+    def __init__(
+        self,
+        context: Mapping[str, Any] | None = None,
+        fields: Iterable[str] | None = None,
+    ) -> None:
+        if fields is not None:
+            # Author info is side-loaded with author
+            fields = dict.fromkeys(
+                "author" if field == "author_info" else field for field in fields
+            )
+        super().__init__(context, fields)
+
+    def to_representation(self, row: dict[str, Any]) -> dict[str, Any]:
+        return {
+            "id": row["id"],
+            "post": row["post_slug"],
+            "content": row["content"],
+            "author": self.include(
+                "users",
+                row["author_info_id"],
+                lambda: self.author_info.to_representation(row),
+            ),
+            "parent": row["parent"],
+            "is_active": row["is_active"],
+            "is_reply": row["parent"] is not None,
+            "replies_count": row["replies_count"],
+            "created": format_datetime(row["created"]),
+            "modified": format_datetime(row["modified"]),
+        }
 
 
 class CommentCreateSerializer(serializers.ModelSerializer[Comment]):
@@ -95,11 +225,15 @@ class CommentDetailSerializer(CommentSerializer):
 
     class Meta(CommentSerializer.Meta):
         fields = CommentSerializer.Meta.fields + ["replies"]
+        field_projections = {
+            **CommentSerializer.Meta.field_projections,
+            "replies": ("parent",),
+        }
 
     @extend_schema_field(serializers.ListSerializer(child=CommentSerializer()))
     def get_replies(self, obj: Comment) -> ReturnDict | list[Any]:
         # Displaying replies only for main comments
-        if obj.parent is None:
+        if obj.parent_id is None:
             replies = obj.replies.all()
             return CommentSerializer(replies, many=True).data
         return []
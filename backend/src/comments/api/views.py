@@ -1,21 +1,33 @@
-from typing import TYPE_CHECKING, Type
+from typing import TYPE_CHECKING, Any, Type
 
+from django.conf import settings
 from django.contrib.auth.models import AnonymousUser
+from django.db import transaction
 from django.db.models import QuerySet
 from django.shortcuts import get_object_or_404
 from django_filters.rest_framework import DjangoFilterBackend
-from drf_spectacular.utils import extend_schema
+from drf_spectacular.utils import extend_schema, extend_schema_view
 from rest_framework import filters, generics, permissions
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.request import Request
 from rest_framework.response import Response
 from rest_framework.serializers import Serializer
 
+from app.conditional import conditional_get
+from app.pagination import KeysetPagination
 from app.permissions import IsAuthorOrReadOnly
+from app.sparse_fields import (
+    SparseFieldsMixin,
+    get_serializer_fields,
+    get_sparse_fields,
+    sparse_fields_parameters,
+)
 from comments.api.serializers import (
+    CommentCompactRowSerializer,
     CommentCreateSerializer,
     CommentDetailSerializer,
     CommentRepliesSerializer,
+    CommentRowSerializer,
     CommentSerializer,
     CommentUpdateSerializer,
     PostCommentsSerializer,
@@ -24,7 +36,10 @@ from comments.models import Comment
 from main.models import Post
 
 
-class CommentListCreateView(generics.ListCreateAPIView):
+@extend_schema_view(
+    get=extend_schema(parameters=sparse_fields_parameters(CommentSerializer))
+)
+class CommentListCreateView(SparseFieldsMixin, generics.ListCreateAPIView):
     """Listing and creating comments"""
 
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
@@ -41,10 +56,8 @@ class CommentListCreateView(generics.ListCreateAPIView):
     def get_queryset(self) -> QuerySet[Comment]:
         if self.request.method == "POST":
             return Comment.objects.filter(is_active=True).select_related("parent")
-        return (
-            Comment.objects.filter(is_active=True)
-            .select_related("author", "parent")
-            .with_replies_count()
+        return self.project_fields(
+            Comment.objects.filter(is_active=True).select_related("author", "parent")
         )
 
     def get_serializer_class(self) -> Type[Serializer]:
@@ -53,7 +66,10 @@ class CommentListCreateView(generics.ListCreateAPIView):
         return CommentSerializer
 
 
-class CommentDetailView(generics.RetrieveUpdateDestroyAPIView):
+@extend_schema_view(
+    get=extend_schema(parameters=sparse_fields_parameters(CommentDetailSerializer))
+)
+class CommentDetailView(SparseFieldsMixin, generics.RetrieveUpdateDestroyAPIView):
     """Detail view for retrieve, update, and delete comment"""
 
     permission_classes = [IsAuthorOrReadOnly]
@@ -61,12 +77,12 @@ class CommentDetailView(generics.RetrieveUpdateDestroyAPIView):
     def get_queryset(self) -> QuerySet[Comment]:
         if self.request.method in ["PUT", "PATCH"]:
             return Comment.objects.filter(is_active=True).select_related("author")
-        return (
-            Comment.objects.filter(is_active=True)
-            .select_related("author", "parent")
-            .with_replies()
-            .with_replies_count()
+        queryset = Comment.objects.filter(is_active=True).select_related(
+            "author", "parent"
         )
+        if self.is_field_requested("replies"):
+            queryset = queryset.with_replies()
+        return self.project_fields(queryset)
 
     def get_serializer_class(self) -> Type[Serializer]:
         if self.request.method in ["PUT", "PATCH"]:
@@ -79,11 +95,15 @@ class CommentDetailView(generics.RetrieveUpdateDestroyAPIView):
         instance.save()
 
 
-class UsersCommentsView(generics.ListAPIView):
+@extend_schema_view(
+    get=extend_schema(parameters=sparse_fields_parameters(CommentSerializer))
+)
+class UsersCommentsView(SparseFieldsMixin, generics.ListAPIView):
     """Comments of current user"""
 
     permission_classes = [permissions.IsAuthenticated]
     serializer_class = CommentSerializer
+    pagination_class = KeysetPagination
     filter_backends = [
         DjangoFilterBackend,
         filters.SearchFilter,
@@ -104,71 +124,87 @@ class UsersCommentsView(generics.ListAPIView):
         if getattr(self, "swagger_fake_view", False):
             return Comment.objects.none()
 
-        return (
-            Comment.objects.filter(author=self.request.user, is_active=True)
-            .select_related("parent", "author")
-            .with_replies_count()
+        return self.project_fields(
+            Comment.objects.filter(
+                author=self.request.user, is_active=True
+            ).select_related("parent", "author")
         )
 
 
-@extend_schema(responses={200: PostCommentsSerializer})
+def get_post_comments(
+    serializer: CommentRowSerializer, post_id: int
+) -> list[dict[str, Any]]:
+    """Returns serialized main comments of post, newest first"""
+    return serializer.serialize(
+        serializer.get_rows(
+            Comment.objects.filter(
+                post_id=post_id,
+                is_active=True,
+                parent=None,
+            )
+            .order_by("-created")
+            .cached()
+        )
+    )
+
+
+@transaction.non_atomic_requests
+@extend_schema(
+    parameters=sparse_fields_parameters(CommentSerializer),
+    responses={200: PostCommentsSerializer},
+)
 @api_view(["GET"])
 @permission_classes([permissions.AllowAny])
-def post_comments(request: Request, post_id: int) -> Response:
+@conditional_get(
+    lambda request, post_id, **kwargs: [f"comments:{post_id}", "users"],
+    max_age=settings.COMMENTS_CACHE_MAX_AGE,
+)
+def post_comments(request: Request, post_id: int, **kwargs: Any) -> Response:
     """GET comments of certain post"""
     post = get_object_or_404(Post, id=post_id, publication_status=Post.PUBLISHED)
-
-    # Fetching only main comments
-    comments = (
-        Comment.objects.filter(
-            post=post,
-            is_active=True,
-            parent=None,
-        )
-        .select_related("author")
-        .with_replies()
-        .with_replies_count()
-        .order_by("-created")
-    )
-
-    comments_serializer = CommentSerializer(
-        comments, many=True, context={"request": request}
+    serializer_class = CommentRowSerializer
+    if request.version == "v2":
+        serializer_class = CommentCompactRowSerializer
+    serializer = serializer_class(
+        {"request": request},
+        fields=get_sparse_fields(request, get_serializer_fields(CommentSerializer)),
     )
+    comments = get_post_comments(serializer, post.pk)
     data = {
         "post": {
             "id": post.pk,
             "title": post.title,
             "slug": post.slug,
         },
-        "comments": comments_serializer.data,
-        "comments_count": len(comments_serializer.data),
+        "comments": comments,
+        "comments_count": len(comments),
     }
 
+    if isinstance(serializer, CommentCompactRowSerializer):
+        # Authors are side-loaded in API v2
+        return Response(serializer.get_response_data(data, key="comments"))
     return Response(data)
 
 
+@transaction.non_atomic_requests
 @extend_schema(responses={200: CommentRepliesSerializer})
 @api_view(["GET"])
 @permission_classes([permissions.AllowAny])
 def comment_replies(request: Request, comment_id: int) -> Response:
     """GET comment`s replies"""
+    serializer = CommentRowSerializer({"request": request})
     parent_comment = get_object_or_404(
-        Comment.objects.select_related("author").with_replies_count().with_replies(),
-        id=comment_id,
+        serializer.get_rows(Comment.objects.all()), id=comment_id
     )
-
-    replies = parent_comment.replies
-
-    parent_comment_serializer = CommentSerializer(
-        parent_comment, context={"request": request}
-    )
-    replies_serializer = CommentSerializer(
-        replies, many=True, context={"request": request}
+    replies = serializer.get_rows(
+        Comment.objects.filter(parent_id=comment_id, is_active=True).order_by(
+            "-created"
+        )
     )
 
     data = {
-        "parent_comment": parent_comment_serializer.data,
-        "replies": replies_serializer.data,
+        "parent_comment": serializer.to_representation(parent_comment),
+        "replies": serializer.serialize(replies),
     }
 
     return Response(data)
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-17 07:52
+
+from django.db import migrations, models
+
+# Filling counter cache of existing rows
+FILL_COUNTERS = """
+UPDATE comments AS c SET replies_count = (
+    SELECT count(*) FROM comments AS r
+    WHERE r.parent_id = c.id AND r.is_active
+);
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("comments", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="comment",
+            name="replies_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunSQL(FILL_COUNTERS, migrations.RunSQL.noop),
+    ]
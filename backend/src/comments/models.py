@@ -1,32 +1,25 @@
 from django.conf import settings
 from django.db import models
-from django.db.models import Count, Prefetch, Q
+from django.db.models import Prefetch
 
+from app.counters import CounterCache, CounterCachedModel
 from app.models import TimeStampedModel
+from app.query_cache import CachedQuerySet, QueryCacheOptions
 
 
-class CommentQuerySet(models.QuerySet["Comment"]):
-    def with_replies_count(self) -> "CommentQuerySet":
-        return self.annotate(
-            replies_count=Count(
-                "replies",
-                filter=Q(replies__is_active=True),
-            )
-        )
-
+class CommentQuerySet(CachedQuerySet["Comment"]):
     def with_replies(self) -> "CommentQuerySet":
         return self.prefetch_related(
             Prefetch(
                 "replies",
                 queryset=Comment.objects.filter(is_active=True)
                 .select_related("author")
-                .with_replies_count()
                 .order_by("-created"),
             )
         )
 
 
-class Comment(TimeStampedModel):
+class Comment(CounterCachedModel, TimeStampedModel):
     """Model for comments"""
 
     post = models.ForeignKey(
@@ -49,9 +42,21 @@ class Comment(TimeStampedModel):
 
     content = models.TextField()
     is_active = models.BooleanField(default=True)
+    # Counter cache of active replies
+    replies_count = models.PositiveIntegerField(default=0, editable=False)
 
     objects = CommentQuerySet.as_manager()
 
+    counter_caches = (
+        CounterCache("post", "comments_count", {"is_active": True}),
+        CounterCache("parent", "replies_count", {"is_active": True}),
+        CounterCache("author", "comments_count"),
+    )
+    query_cache_options = QueryCacheOptions(
+        keys=("post_id", "parent_id", "author_id", "is_active", "created"),
+        volatile=("replies_count",),
+    )
+
     class Meta:
         db_table = "comments"
         verbose_name = "Comment"
@@ -68,4 +73,4 @@ class Comment(TimeStampedModel):
 
     @property
     def is_reply(self) -> bool:
-        return self.parent is not None
+        return self.parent_id is not None
@@ -1,4 +1,6 @@
 import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
 from comments.api.serializers import (
@@ -165,6 +167,37 @@ class TestCommentDetail:
         assert db_comment.is_active is False
 
 
+class TestCommentsSparseFields:
+    def test_list(self, api, comment):
+        response = api.get(
+            reverse("v1:comments:comment-list"), data={"fields": "id,content"}
+        )
+
+        assert response["results"] == [{"id": comment.pk, "content": comment.content}]
+
+    def test_detail_without_replies(self, api, comment):
+        url = reverse("v1:comments:comment-detail", kwargs={"pk": comment.pk})
+
+        with CaptureQueriesContext(connection) as context:
+            response = api.get(url, data={"omit": "replies,author_info"})
+
+        assert "replies" not in response
+        assert "author_info" not in response
+        selects = [
+            q["sql"] for q in context.captured_queries if q["sql"].startswith("SELECT")
+        ]
+        assert len(selects) == 1
+        assert '"users"' not in selects[0]
+
+    def test_post_comments(self, api, comment, post):
+        response = api.get(
+            reverse("v1:comments:post-comments", kwargs={"post_id": post.pk}),
+            data={"fields": "id,is_reply"},
+        )
+
+        assert response["comments"] == [{"id": comment.pk, "is_reply": False}]
+
+
 class TestUsersComments:
     def test_permission_for_not_authenticated(self, api, comment):
         response = api.get(
@@ -273,6 +306,28 @@ class TestPostComments:
 
         assert response["comments_count"] == 2
 
+    def test_compact_response(self, api, user, mixer, post):
+        comments = mixer.cycle(2).blend(
+            Comment, post=post, author=user, is_active=True, parent=None
+        )
+        url = reverse(
+            "v2:comments:post-comments", kwargs={"version": "v2", "post_id": post.pk}
+        )
+
+        response = api.get(url)
+        v1 = api.get(reverse("v1:comments:post-comments", kwargs={"post_id": post.pk}))
+
+        assert response["post"] == v1["post"]
+        assert response["comments_count"] == 2
+        assert {comment["id"] for comment in response["data"]} == {
+            comment.pk for comment in comments
+        }
+        assert response["data"][0]["author"] == str(user.pk)
+        assert "author_info" not in response["data"][0]
+        assert response["included"] == {
+            "users": {str(user.pk): v1["comments"][0]["author_info"]}
+        }
+
 
 class TestCommentReplies:
     def test_permission_and_methods(self, api, comment):
@@ -0,0 +1,24 @@
+import json
+
+import pytest
+from rest_framework.renderers import JSONRenderer
+
+from comments.api.serializers import CommentRowSerializer, CommentSerializer
+from comments.models import Comment
+
+pytestmark = [pytest.mark.django_db]
+
+
+class TestCommentRowSerializer:
+    def test_same_output(self, comment, mixer):
+        mixer.blend(Comment, post=comment.post, parent=comment)
+        comments = Comment.objects.select_related("author").order_by("id")
+
+        expected = CommentSerializer(comments, many=True).data
+        serializer = CommentRowSerializer()
+        data = serializer.serialize(serializer.get_rows(comments))
+
+        assert json.loads(JSONRenderer().render(data)) == json.loads(
+            JSONRenderer().render(expected)
+        )
+        assert data[1]["is_reply"]
@@ -3,12 +3,16 @@ from typing import Any
 
 import pytest
 from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
 from django.utils import timezone
 from mixer.backend.django import mixer as _mixer
 
 from accounts.models import User
 from app.test.api_clients import AppClient
 from comments.models import Comment
+from main import ranking as main_ranking
+from main import services as main_services
+from main import stats as main_stats
 from main.models import Category, Post
 from payments.models import Payment, Refund
 from subscribe.models import (
@@ -19,6 +23,12 @@ from subscribe.models import (
 )
 
 
+@pytest.fixture(autouse=True)
+def clear_cache() -> None:
+    # Cached data would outlive rolled back DB data of previous test
+    cache.clear()
+
+
 @pytest.fixture
 def api() -> AppClient:
     return AppClient()
@@ -29,6 +39,29 @@ def mixer():
     return _mixer
 
 
+@pytest.fixture(autouse=True)
+def ranking_store(monkeypatch) -> main_ranking.LocalRankingStore:
+    # Ranking of previous test would outlive its rolled back posts
+    store = main_ranking.LocalRankingStore()
+    monkeypatch.setattr(main_ranking, "_ranking_store", store)
+    return store
+
+
+@pytest.fixture(autouse=True)
+def stats_buffer(monkeypatch) -> main_stats.LocalStatsBuffer:
+    # Stats of previous test would be written for its rolled back posts
+    buffer = main_stats.LocalStatsBuffer()
+    monkeypatch.setattr(main_stats, "_stats_buffer", buffer)
+    return buffer
+
+
+@pytest.fixture
+def views_buffer(monkeypatch) -> main_services.LocalViewsBuffer:
+    buffer = main_services.LocalViewsBuffer()
+    monkeypatch.setattr(main_services, "_views_buffer", buffer)
+    return buffer
+
+
 @pytest.fixture
 def user(mixer) -> User:
     return mixer.blend(
@@ -13,10 +13,6 @@ class CategoryAdmin(admin.ModelAdmin):
     prepopulated_fields = {"slug": ("name",)}
     readonly_fields = ("created", "posts_count")
 
-    @admin.display(description="Posts Count")
-    def posts_count(self, obj: Category) -> int:
-        return obj.posts.count()
-
     fieldsets = (
         (None, {"fields": ("name", "slug", "description", "posts_count", "created")}),
     )
@@ -30,6 +26,7 @@ class PostAdmin(admin.ModelAdmin):
         "category",
         "publication_status",
         "views_count",
+        "unique_views_count",
         "comments_count",
         "created",
     )
@@ -41,7 +38,13 @@ class PostAdmin(admin.ModelAdmin):
     )
     search_fields = ("title", "content", "author__username")
     prepopulated_fields = {"slug": ("title",)}
-    readonly_fields = ("created", "modified", "views_count", "comments_count")
+    readonly_fields = (
+        "created",
+        "modified",
+        "views_count",
+        "unique_views_count",
+        "comments_count",
+    )
     raw_id_fields = ("author",)
 
     fieldsets = (
@@ -50,15 +53,17 @@ class PostAdmin(admin.ModelAdmin):
         (
             "Statistics",
             {
-                "fields": ("views_count", "comments_count", "created", "modified"),
+                "fields": (
+                    "views_count",
+                    "unique_views_count",
+                    "comments_count",
+                    "created",
+                    "modified",
+                ),
                 "classes": ("collapse",),
             },
         ),
     )
 
-    @admin.display(description="Comments Count")
-    def comments_count(self, obj: Post) -> int:
-        return obj.comments.count()
-
     def get_queryset(self, request: HttpRequest) -> QuerySet[Post]:
         return super().get_queryset(request).select_related("author", "category")
@@ -0,0 +1,148 @@
+from functools import wraps
+from typing import Any, Callable, Coroutine
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import transaction
+from django.http import HttpRequest, HttpResponse, JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_GET
+from rest_framework.exceptions import APIException
+from rest_framework.utils.urls import replace_query_param
+from rest_framework.views import APIView
+
+from app.conditional import conditional_get
+from app.db import gather_queries, run_query
+from main.api.serializers import CategorySerializer, PostListRowSerializer
+from main.api.views import (
+    FEATURED_PINNED_COUNT,
+    FEATURED_POPULAR_COUNT,
+    CategoryListCreateView,
+    get_pinned_posts_block,
+    get_popular_posts,
+    get_recent_posts,
+    get_recent_weekly_posts,
+    get_weekly_posts,
+)
+from main.models import Category
+
+# Async views return the same data as API views, while independent queries
+# of endpoint run concurrently on separate connections
+category_list_view = CategoryListCreateView.as_view()
+
+AsyncView = Callable[..., Coroutine[Any, Any, HttpResponse]]
+
+
+def check_throttles(request: HttpRequest) -> None:
+    """Authenticates request and applies throttles of API views"""
+    view = APIView()
+    view.check_throttles(view.initialize_request(request))
+
+
+def throttle(view: AsyncView) -> AsyncView:
+    """Decorator of async view, which limits rate of requests like API views"""
+
+    @wraps(view)
+    async def wrapper(request: HttpRequest, *args: Any, **kwargs: Any) -> HttpResponse:
+        try:
+            await run_query(check_throttles, request)
+        except APIException as exc:
+            # Invalid token or exceeded rate, like in API views
+            response = JsonResponse({"detail": exc.detail}, status=exc.status_code)
+            wait = getattr(exc, "wait", None)
+            if wait is not None:
+                response["Retry-After"] = str(int(wait))
+            return response
+        return await view(request, *args, **kwargs)
+
+    return wrapper
+
+
+@transaction.non_atomic_requests
+@require_GET
+@throttle
+async def popular_posts(request: HttpRequest) -> JsonResponse:
+    """10 most popular Posts by all-time views and comments"""
+    return JsonResponse(await run_query(get_popular_posts, request), safe=False)
+
+
+@transaction.non_atomic_requests
+@require_GET
+@throttle
+async def recent_posts(request: HttpRequest) -> JsonResponse:
+    """10 most recent Posts"""
+    return JsonResponse(await run_query(get_recent_posts, request), safe=False)
+
+
+@transaction.non_atomic_requests
+@require_GET
+@throttle
+async def featured_posts(request: HttpRequest) -> JsonResponse:
+    """
+    Recommended posts for main page, pinned and weekly popular posts
+    are loaded concurrently
+    """
+    serializer = PostListRowSerializer({"request": request})
+    # Popular posts are over-fetched, so pinned ones can be excluded afterwards
+    all_pinned_posts, weekly_posts = await gather_queries(
+        lambda: get_pinned_posts_block(request),
+        lambda: get_weekly_posts(
+            serializer, FEATURED_POPULAR_COUNT + FEATURED_PINNED_COUNT
+        ),
+    )
+
+    pinned_posts = all_pinned_posts[:FEATURED_PINNED_COUNT]
+    pinned_ids = [post["id"] for post in pinned_posts]
+    popular_posts_of_week = [
+        post for post in weekly_posts if post["id"] not in pinned_ids
+    ][:FEATURED_POPULAR_COUNT]
+    popular_posts_of_week += await run_query(
+        get_recent_weekly_posts,
+        serializer,
+        FEATURED_POPULAR_COUNT - len(popular_posts_of_week),
+        pinned_ids + [post["id"] for post in popular_posts_of_week],
+    )
+
+    data = {
+        "pinned": pinned_posts,
+        "popular": serializer.serialize(popular_posts_of_week),
+        "total_pinned": len(all_pinned_posts),
+    }
+    return JsonResponse(data)
+
+
+@conditional_get(
+    lambda request: ["categories"], max_age=settings.CATEGORIES_CACHE_MAX_AGE
+)
+@throttle
+async def first_categories_page(request: HttpRequest) -> JsonResponse:
+    """First page of categories, counted and fetched concurrently"""
+    page_size = settings.REST_FRAMEWORK["PAGE_SIZE"]
+    count, categories = await gather_queries(
+        Category.objects.count,
+        lambda: CategorySerializer(
+            Category.objects.order_by("name")[:page_size], many=True
+        ).data,
+    )
+
+    next_url = None
+    if count > page_size:
+        next_url = replace_query_param(request.build_absolute_uri(), "page", 2)
+    data = {
+        "count": count,
+        "next": next_url,
+        "previous": None,
+        "results": categories,
+    }
+    return JsonResponse(data)
+
+
+@csrf_exempt
+@transaction.non_atomic_requests
+async def category_list(
+    request: HttpRequest, *args: Any, **kwargs: Any
+) -> HttpResponse:
+    """Categories, writes, search and other pages are served by API view"""
+    if request.method != "GET" or request.GET:
+        return await sync_to_async(category_list_view)(request, *args, **kwargs)
+    return await first_categories_page(request)
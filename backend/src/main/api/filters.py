@@ -0,0 +1,26 @@
+from django.contrib.postgres.search import SearchQuery
+from django.db.models import QuerySet
+from rest_framework import filters
+from rest_framework.request import Request
+from rest_framework.views import APIView
+
+from main.models import SEARCH_CONFIG
+
+
+class PostFullTextSearchFilter(filters.SearchFilter):
+    """
+    Drop-in replacement for SearchFilter on posts views.
+    Matches "search" param against indexed search vector of post
+    instead of ILIKE over search_fields, supports websearch syntax:
+    "quoted phrases", OR and -excluded words.
+    """
+
+    def filter_queryset(
+        self, request: Request, queryset: QuerySet, view: APIView
+    ) -> QuerySet:
+        text = request.query_params.get(self.search_param, "").replace("\x00", "")
+        if not text.strip():
+            return queryset
+
+        query = SearchQuery(text, search_type="websearch", config=SEARCH_CONFIG)
+        return queryset.filter(search_vector=query)
@@ -1,16 +1,37 @@
-from typing import Any
+from typing import Any, ClassVar
 
+from django.db.models import Case, Q, Value, When
+from django.db.models.functions import Now, Substr
 from drf_spectacular.types import OpenApiTypes
 from drf_spectacular.utils import extend_schema_field
 from rest_framework import serializers
 
+from accounts.models import User
+from app.fragments import get_fragment_name
+from app.images import get_image_variant
 from app.serializer import (
     AuthorInfoSerializer,
     CategoryInfoSerializer,
+    ImageVariantField,
     PinnedBySerializer,
+    RowSerializer,
+    SideLoadingMixin,
+    format_datetime,
+)
+from app.sparse_fields import SparseFieldsSerializer
+from main.models import Category, Post, PostQuerySet
+from subscribe.models import PinnedPost, Subscription
+
+# Length of post content in cards
+EXCERPT_LENGTH = 200
+
+# Columns of pin info of post
+PIN_INFO_FIELDS = (
+    "pin_info__pinned_at",
+    "pin_info__user__username",
+    "pin_info__user__subscription__status",
+    "pin_info__user__subscription__end_date",
 )
-from main.models import Category, Post
-from subscribe.models import PinnedPost
 
 
 class PinInfoSerializer(serializers.ModelSerializer["PinnedPost"]):
@@ -23,7 +44,7 @@ class PinInfoSerializer(serializers.ModelSerializer["PinnedPost"]):
         fields = ["pinned_by", "pinned_at"]
 
 
-class CategorySerializer(serializers.ModelSerializer[Category]):
+class CategorySerializer(SparseFieldsSerializer[Category]):
     """Serializer for Category"""
 
     posts_count = serializers.IntegerField(read_only=True)
@@ -41,7 +62,7 @@ class CategorySerializer(serializers.ModelSerializer[Category]):
         read_only_fields = ["slug", "created"]
 
 
-class PostBaseSerializer(serializers.ModelSerializer[Post]):
+class PostBaseSerializer(SparseFieldsSerializer[Post]):
 
     comments_count = serializers.IntegerField(read_only=True)
     is_pinned = serializers.ReadOnlyField()
@@ -60,12 +81,13 @@ class PostBaseSerializer(serializers.ModelSerializer[Post]):
             "publication_status",
             "comments_count",
             "views_count",
+            "unique_views_count",
             "is_pinned",
             "pinned_info",
             "created",
             "modified",
         ]
-        read_only_fields = ["slug", "author", "views_count"]
+        read_only_fields = ["slug", "author", "views_count", "unique_views_count"]
 
     @extend_schema_field(PinInfoSerializer)
     def get_pinned_info(self, obj: Post) -> dict[str, Any] | None:
@@ -80,6 +102,19 @@ class PostListSerializer(PostBaseSerializer):
 
     author = serializers.StringRelatedField()  # type: ignore[var-annotated]
     category = serializers.StringRelatedField()  # type: ignore[var-annotated]
+    image = ImageVariantField("thumb", required=False, allow_null=True)
+
+    class Meta(PostBaseSerializer.Meta):
+        # Columns, that serializer reads
+        projection = PostQuerySet.CARD_FIELDS
+        # Columns of fields, which are not columns of the same name
+        field_projections = {
+            "image": ("image", "image_variants"),
+            "author": ("author__email",),
+            "category": ("category__name",),
+            "is_pinned": ("pin_info__pinned_at",),
+            "pinned_info": PIN_INFO_FIELDS,
+        }
 
     def create(self, validated_data: dict[str, Any]) -> Post:
         validated_data["author"] = self.context["request"].user
@@ -88,14 +123,174 @@ class PostListSerializer(PostBaseSerializer):
     def to_representation(self, instance: Post) -> dict[str, Any]:
         data = super().to_representation(instance)
         # For Posts cards better viewing
-        if len(data["content"]) > 200:
-            data["content"] = data["content"][:200] + "..."
+        if "content" in data and len(data["content"]) > EXCERPT_LENGTH:
+            data["content"] = data["content"][:EXCERPT_LENGTH] + "..."
+        return data
+
+
+class PostListRowSerializer(RowSerializer):
+    """
+    Row serializer for list of Posts, output is the same as of PostListSerializer.
+    Only excerpt of content is fetched from DB.
+    """
+
+    schema_serializer = PostListSerializer
+
+    fragment_kind: ClassVar[str | None] = "post"
+
+    image_field = Post._meta.get_field("image")
+
+    field_values = {
+        "content": ("excerpt",),
+        "image": ("image", "image_variants"),
+        "author": ("author_name",),
+        "category": ("category_name",),
+        "is_pinned": ("pinned_at",),
+        "pinned_info": (
+            "pinned_at",
+            "pinned_by_id",
+            "pinned_by_username",
+            "pinned_by_subscribed",
+        ),
+    }
+
+    values = {
+        "id": "id",
+        "title": "title",
+        "slug": "slug",
+        # One more character tells, that content is longer than excerpt
+        "excerpt": Substr("content", 1, EXCERPT_LENGTH + 1),
+        "image": "image",
+        "image_variants": "image_variants",
+        "author_id": "author_id",
+        "author_name": "author__email",
+        "category_id": "category_id",
+        "category_name": "category__name",
+        "publication_status": "publication_status",
+        "comments_count": "comments_count",
+        "views_count": "views_count",
+        "unique_views_count": "unique_views_count",
+        "pinned_at": "pin_info__pinned_at",
+        "pinned_by_id": "pin_info__user_id",
+        "pinned_by_username": "pin_info__user__username",
+        "pinned_by_subscribed": Case(
+            When(
+                Q(
+                    pin_info__user__subscription__status=Subscription.ACTIVE,
+                    pin_info__user__subscription__end_date__gt=Now(),
+                ),
+                then=Value(True),
+            ),
+            default=Value(False),
+        ),
+        "created": "created",
+        "modified": "modified",
+    }
+
+    def to_representation(self, row: dict[str, Any]) -> dict[str, Any]:
+        excerpt = row["excerpt"]
+        if excerpt and len(excerpt) > EXCERPT_LENGTH:
+            excerpt = excerpt[:EXCERPT_LENGTH] + "..."
+
+        return {
+            "id": row["id"],
+            "title": row["title"],
+            "slug": row["slug"],
+            "content": excerpt,
+            "image": self.get_file_url(
+                self.image_field,
+                get_image_variant(row["image"], row["image_variants"], "thumb"),
+            ),
+            "author": row["author_name"],
+            "category": row["category_name"],
+            "publication_status": row["publication_status"],
+            **self.get_live_representation(row),
+            "created": format_datetime(row["created"]),
+            "modified": format_datetime(row["modified"]),
+        }
+
+    def get_dependencies(self, row: dict[str, Any]) -> list[str]:
+        names = [
+            get_fragment_name(Post, row["id"]),
+            get_fragment_name(User, row["author_id"]),
+        ]
+        if row["category_id"] is not None:
+            names.append(get_fragment_name(Category, row["category_id"]))
+        return names
+
+    def get_live_representation(self, row: dict[str, Any]) -> dict[str, Any]:
+        # Counters are updated without saving post, pins change with subscriptions
+        is_pinned = row["pinned_at"] is not None
+        pinned_info = None
+        if is_pinned:
+            pinned_info = {
+                "pinned_by": {
+                    "id": row["pinned_by_id"],
+                    "username": row["pinned_by_username"],
+                    "has_active_subscription": row["pinned_by_subscribed"],
+                },
+                "pinned_at": format_datetime(row["pinned_at"]),
+            }
+        return {
+            "comments_count": row["comments_count"],
+            "views_count": row["views_count"],
+            "unique_views_count": row["unique_views_count"],
+            "is_pinned": is_pinned,
+            "pinned_info": pinned_info,
+        }
+
+
+class PostListCompactRowSerializer(SideLoadingMixin, PostListRowSerializer):
+    """
+    Row serializer for list of Posts in API v2.
+    Category is side-loaded by id. Author and user, who pinned post,
+    are referenced by username, as feed shows no other fields of users,
+    so random UUIDs are not repeated in posts and side-loaded users.
+    """
+
+    included_kinds = ("categories",)
+    # Side-loaded objects are collected while serializing
+    fragment_kind = None
+
+    # Aliases of v1 representation, replaced by compact ones
+    replaced_values = ("author_name", "pinned_by_id")
+
+    field_values = {
+        **PostListRowSerializer.field_values,
+        "author": ("author_username",),
+        "category": ("category_id", "category_name"),
+        "pinned_info": ("pinned_at", "pinned_by_username", "pinned_by_subscribed"),
+    }
+
+    def get_values(self) -> dict[str, Any]:
+        values = {
+            alias: value
+            for alias, value in self.values.items()
+            if alias not in self.replaced_values
+        }
+        return {**values, "author_username": "author__username"}
+
+    def to_representation(self, row: dict[str, Any]) -> dict[str, Any]:
+        data = super().to_representation({**row, **dict.fromkeys(self.replaced_values)})
+        data["author"] = row["author_username"]
+        data["category"] = self.include(
+            "categories",
+            row["category_id"],
+            lambda: {"id": row["category_id"], "name": row["category_name"]},
+        )
+        if data["pinned_info"] is not None:
+            data["pinned_info"] = {
+                "pinned_by": row["pinned_by_username"],
+                "pinned_by_has_active_subscription": row["pinned_by_subscribed"],
+                "pinned_at": data["pinned_info"]["pinned_at"],
+            }
         return data
 
 
 class PostDetailSerializer(PostBaseSerializer):
     """Serializer for Post details"""
 
+    image = ImageVariantField("large", required=False, allow_null=True)
     author_info = AuthorInfoSerializer(source="author", read_only=True)
     category_info = CategoryInfoSerializer(source="category", read_only=True)
     can_pin = serializers.SerializerMethodField()
@@ -106,6 +301,21 @@ class PostDetailSerializer(PostBaseSerializer):
             "category_info",
             "can_pin",
         ]
+        projection = PostQuerySet.DETAIL_FIELDS
+        field_projections = {
+            "image": ("image", "image_variants"),
+            "is_pinned": ("pin_info__pinned_at",),
+            "pinned_info": PIN_INFO_FIELDS,
+            "author_info": (
+                "author__username",
+                "author__first_name",
+                "author__last_name",
+                "author__avatar",
+                "author__avatar_variants",
+            ),
+            "category_info": ("category__name", "category__slug"),
+            "can_pin": ("author", "publication_status"),
+        }
 
     @extend_schema_field(OpenApiTypes.BOOL)
     def get_can_pin(self, obj: Post) -> bool:
@@ -168,6 +378,8 @@ class PostsByCategorySerializer(serializers.Serializer):
     category = CategorySerializer(read_only=True)
     posts = PostListSerializer(many=True, read_only=True)
     pinned_posts_count = serializers.IntegerField(read_only=True)
+    next = serializers.URLField(read_only=True, allow_null=True)
+    previous = serializers.URLField(read_only=True, allow_null=True)
 
 
 class FeaturedPostsSerializer(serializers.Serializer):
@@ -178,6 +390,34 @@ class FeaturedPostsSerializer(serializers.Serializer):
     total_pinned = serializers.IntegerField(read_only=True)
 
 
+class PostBatchSerializer(serializers.Serializer):
+    """Serializer for correct display of batch_posts view response data in OpenAPI."""
+
+    results = PostDetailSerializer(many=True, read_only=True)
+    missing = serializers.ListField(child=serializers.CharField(), read_only=True)
+
+
+class PostStatsTotalsSerializer(serializers.Serializer):
+    """Serializer for correct display of post stats totals in OpenAPI."""
+
+    views = serializers.IntegerField(read_only=True)
+    unique_views = serializers.IntegerField(read_only=True)
+    comments = serializers.IntegerField(read_only=True)
+
+
+class PostDailyStatsSerializer(PostStatsTotalsSerializer):
+    """Serializer for correct display of post stats of a day in OpenAPI."""
+
+    day = serializers.DateField(read_only=True)
+
+
+class PostStatsSerializer(serializers.Serializer):
+    """Serializer for correct display of post_stats and my_posts_stats views response data in OpenAPI."""
+
+    totals = PostStatsTotalsSerializer(read_only=True)
+    days = PostDailyStatsSerializer(many=True, read_only=True)
+
+
 class TogglePostPinStatusSerializer(serializers.Serializer):
     """Serializer for correct display of toggle_post_pin_status view response data in OpenAPI."""
 
@@ -186,6 +426,58 @@ class TogglePostPinStatusSerializer(serializers.Serializer):
     post = PostDetailSerializer(read_only=True)
 
 
+class PostSearchResultSerializer(PostListSerializer):
+    """Serializer for found Post with its rank and highlighted headline"""
+
+    rank = serializers.FloatField(read_only=True)
+    headline = serializers.CharField(read_only=True)
+
+    class Meta(PostListSerializer.Meta):
+        fields = PostListSerializer.Meta.fields + ["rank", "headline"]
+
+
+class SearchFacetSerializer(serializers.Serializer):
+    """Serializer for number of found posts in category"""
+
+    category_id = serializers.IntegerField(read_only=True, allow_null=True)
+    name = serializers.CharField(read_only=True, allow_null=True)
+    slug = serializers.CharField(read_only=True, allow_null=True)
+    posts_count = serializers.IntegerField(read_only=True)
+
+
+class PostSearchSerializer(serializers.Serializer):
+    """Serializer for correct display of search_posts view response data in OpenAPI."""
+
+    count = serializers.IntegerField(read_only=True)
+    next = serializers.URLField(read_only=True, allow_null=True)
+    previous = serializers.URLField(read_only=True, allow_null=True)
+    facets = SearchFacetSerializer(many=True, read_only=True)
+    results = PostSearchResultSerializer(many=True, read_only=True)
+
+
+class AutocompletePostSerializer(serializers.Serializer):
+    """Serializer for correct display of suggested post in OpenAPI."""
+
+    id = serializers.IntegerField(read_only=True)
+    title = serializers.CharField(read_only=True)
+    slug = serializers.SlugField(read_only=True)
+
+
+class AutocompleteCategorySerializer(serializers.Serializer):
+    """Serializer for correct display of suggested category in OpenAPI."""
+
+    id = serializers.IntegerField(read_only=True)
+    name = serializers.CharField(read_only=True)
+    slug = serializers.SlugField(read_only=True)
+
+
+class AutocompleteSerializer(serializers.Serializer):
+    """Serializer for correct display of autocomplete_posts view response data in OpenAPI."""
+
+    posts = AutocompletePostSerializer(many=True, read_only=True)
+    categories = AutocompleteCategorySerializer(many=True, read_only=True)
+
+
 class PinnedPostsOnlySerializer(serializers.Serializer):
     """Serializer for correct display of pinned_posts view response data in OpenAPI."""
 
@@ -1,35 +1,112 @@
-from typing import TYPE_CHECKING, Any, Type
+from datetime import date, timedelta
+from typing import TYPE_CHECKING, Any, Iterable, Type
 
+from django.conf import settings
 from django.db import transaction
 from django.db.models import Q, QuerySet
+from django.http import HttpRequest
 from django.shortcuts import get_object_or_404
+from django.utils import timezone
+from django.utils.decorators import method_decorator
 from django_filters.rest_framework import DjangoFilterBackend
-from drf_spectacular.utils import extend_schema
+from drf_spectacular.utils import OpenApiParameter, extend_schema, extend_schema_view
 from rest_framework import filters, generics, permissions, status
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import api_view, permission_classes, throttle_classes
+from rest_framework.pagination import LimitOffsetPagination
 from rest_framework.request import Request
 from rest_framework.response import Response
+from rest_framework.throttling import AnonRateThrottle
 
+from app.conditional import conditional_get
+from app.db import NonAtomicReadsMixin
+from app.models import project
+from app.pagination import FeedKeysetPagination, KeysetPagination
 from app.permissions import IsAuthorOrReadOnly
+from app.sparse_fields import (
+    SparseFieldsMixin,
+    get_projection,
+    get_serializer_fields,
+    get_sparse_fields,
+    sparse_fields_parameters,
+)
+from main.api.filters import PostFullTextSearchFilter
 from main.api.serializers import (
+    AutocompleteSerializer,
     CategorySerializer,
     FeaturedPostsSerializer,
     PinnedPostsOnlySerializer,
+    PostBatchSerializer,
     PostCreateUpdateSerializer,
     PostDetailSerializer,
+    PostListCompactRowSerializer,
+    PostListRowSerializer,
     PostListSerializer,
     PostPinningSerializer,
     PostsByCategorySerializer,
+    PostSearchResultSerializer,
+    PostSearchSerializer,
+    PostStatsSerializer,
     TogglePostPinStatusSerializer,
 )
-from main.models import Category, Post
+from main.models import Category, Post, PostDailyStats
+from main.ranking import PostRankingService
+from main.services import (
+    PinnedPostsCache,
+    PostAutocompleteService,
+    PostSearchService,
+    PostViewsService,
+    get_visitor_fingerprint,
+)
+from main.stats import PostStatsService
 
 if TYPE_CHECKING:
     from django.contrib.auth.models import AnonymousUser
     from rest_framework.serializers import Serializer
 
+# Columns of views counts, which are updated with pending views
+VIEWS_FIELDS = ("views_count", "unique_views_count")
+# Query params of days range of stats
+STATS_PARAMETERS = [
+    OpenApiParameter(
+        "from", date, description="First day, 30 days before last one by default"
+    ),
+    OpenApiParameter("to", date, description="Last day, today by default"),
+]
+# Numbers of pinned and popular posts in featured block
+FEATURED_PINNED_COUNT = 3
+FEATURED_POPULAR_COUNT = 6
+
+
+def get_feed_resources(request: Request, *args: Any, **kwargs: Any) -> list[str]:
+    """Returns resources, shown in posts feed"""
+    return ["posts", "categories", "users", "pinned"]
+
+
+def get_post_resources(request: Request, slug: str, **kwargs: Any) -> list[str]:
+    """Returns resources, shown in post details"""
+    return [f"post:{slug}", "categories", "users", "pinned"]
 
-class CategoryListCreateView(generics.ListCreateAPIView):
+
+def count_not_modified_post_view(request: Request, slug: str, **kwargs: Any) -> None:
+    """Counts view of post, revalidated by client"""
+    if settings.POST_VIEWS_COUNT_ON_GET and request.method == "GET":
+        post_id = Post.objects.filter(slug=slug).values_list("id", flat=True).first()
+        if post_id is not None:
+            PostViewsService.record_view(post_id, get_visitor_fingerprint(request))
+
+
+@method_decorator(
+    conditional_get(
+        lambda request: ["categories"], max_age=settings.CATEGORIES_CACHE_MAX_AGE
+    ),
+    name="get",
+)
+@extend_schema_view(
+    get=extend_schema(parameters=sparse_fields_parameters(CategorySerializer))
+)
+class CategoryListCreateView(
+    NonAtomicReadsMixin, SparseFieldsMixin, generics.ListCreateAPIView
+):
     """Api endpoint for listing and creating Categories"""
 
     serializer_class = CategorySerializer
@@ -40,15 +117,13 @@ class CategoryListCreateView(generics.ListCreateAPIView):
     ordering = ["name"]
 
     def get_queryset(self) -> QuerySet["Category"]:
-        return Category.objects.with_posts_count().all()
+        return self.project_fields(Category.objects.all())
 
-    def create(self, request: Request, *args: Any, **kwargs: Any) -> Response:
-        response = super().create(request, *args, **kwargs)
-        response.data["posts_count"] = 0
-        return response
 
-
-class CategoryDetailView(generics.RetrieveUpdateDestroyAPIView):
+@extend_schema_view(
+    get=extend_schema(parameters=sparse_fields_parameters(CategorySerializer))
+)
+class CategoryDetailView(SparseFieldsMixin, generics.RetrieveUpdateDestroyAPIView):
     """Api endpoint for concrete category"""
 
     serializer_class = CategorySerializer
@@ -56,10 +131,19 @@ class CategoryDetailView(generics.RetrieveUpdateDestroyAPIView):
     lookup_field = "slug"
 
     def get_queryset(self) -> QuerySet["Category"]:
-        return Category.objects.with_posts_count().all()
+        return self.project_fields(Category.objects.all())
 
 
-class PostListCreateView(generics.ListCreateAPIView):
+@method_decorator(
+    conditional_get(get_feed_resources, max_age=settings.FEED_CACHE_MAX_AGE),
+    name="get",
+)
+@extend_schema_view(
+    get=extend_schema(parameters=sparse_fields_parameters(PostListSerializer))
+)
+class PostListCreateView(
+    NonAtomicReadsMixin, SparseFieldsMixin, generics.ListCreateAPIView
+):
     """
     Api endpoint for listing and creating Posts with support for pinned posts.
     Pinned posts displayed first in "pinned_at" order.
@@ -67,9 +151,10 @@ class PostListCreateView(generics.ListCreateAPIView):
 
     serializer_class = PostListSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    pagination_class = FeedKeysetPagination
     filter_backends = [
         DjangoFilterBackend,
-        filters.SearchFilter,
+        PostFullTextSearchFilter,
         filters.OrderingFilter,
     ]
     filterset_fields = ["category", "title", "publication_status"]
@@ -84,21 +169,10 @@ class PostListCreateView(generics.ListCreateAPIView):
         if getattr(self, "swagger_fake_view", False):
             return Post.objects.none()
 
-        queryset = Post.objects.with_full_info().with_comments_count()
-
         # Filter using access right
-        if not self.request.user.is_authenticated:
-            queryset = queryset.filter(publication_status=Post.PUBLISHED)
-        else:
-            queryset = queryset.filter(
-                Q(publication_status=Post.PUBLISHED) | Q(author=self.request.user)
-            )
-
-        # Check if ordering with dependence on pinned posts
-        ordering = self.request.query_params.get("ordering", "")
-        show_pinned_first = not ordering or ordering in ["-created", "created"]
+        queryset = Post.objects.with_full_info().visible_to(self.request.user)
 
-        if show_pinned_first:
+        if self.show_pinned_first():
             return Post.objects.for_feed(
                 Q(publication_status=Post.PUBLISHED)
                 | (
@@ -106,24 +180,65 @@ class PostListCreateView(generics.ListCreateAPIView):
                     if self.request.user.is_authenticated
                     else Q()
                 )
-            )
+            ).cached()
 
-        return queryset
+        return queryset.cached()
+
+    def show_pinned_first(self) -> bool:
+        """Check if ordering with dependence on pinned posts"""
+        ordering = self.request.query_params.get("ordering", "")
+        return not ordering or ordering in ["-created", "created"]
 
     def get_serializer_class(self) -> Type["Serializer"]:
         if self.request.method == "POST":
             return PostCreateUpdateSerializer
         return PostListSerializer
 
+    def list(self, request: Request, *args: Any, **kwargs: Any) -> Response:
+        # Posts are listed from plain rows, without building model instances
+        serializer_class = PostListRowSerializer
+        if request.version == "v2":
+            serializer_class = PostListCompactRowSerializer
+        serializer = serializer_class(
+            self.get_serializer_context(), fields=self.get_sparse_fields()
+        )
+        queryset = serializer.get_rows(self.filter_queryset(self.get_queryset()))
+
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            response = self.get_paginated_response(serializer.serialize(page))
+        else:
+            response = Response(serializer.serialize(queryset))
+        if isinstance(serializer, PostListCompactRowSerializer):
+            # Categories are side-loaded in API v2
+            response.data = serializer.get_response_data(response.data)
+        return response
+
 
-class PostDetailView(generics.RetrieveUpdateDestroyAPIView):
+@method_decorator(
+    conditional_get(
+        get_post_resources,
+        max_age=settings.POST_CACHE_MAX_AGE,
+        on_not_modified=count_not_modified_post_view,
+    ),
+    name="get",
+)
+@extend_schema_view(
+    get=extend_schema(parameters=sparse_fields_parameters(PostDetailSerializer))
+)
+class PostDetailView(
+    NonAtomicReadsMixin, SparseFieldsMixin, generics.RetrieveUpdateDestroyAPIView
+):
     """Api endpoint for concrete post"""
 
-    queryset = Post.objects.with_full_info().with_comments_count()
     serializer_class = PostDetailSerializer
     permission_classes = [IsAuthorOrReadOnly]
     lookup_field = "slug"
 
+    def get_queryset(self) -> QuerySet[Post]:
+        # Views counts are updated by retrieve()
+        return self.project_fields(Post.objects.for_detail(), extra=VIEWS_FIELDS)
+
     def get_serializer_class(self) -> Type["Serializer"]:
         if self.request.method in ["PUT", "PATCH"]:
             return PostCreateUpdateSerializer
@@ -132,24 +247,30 @@ class PostDetailView(generics.RetrieveUpdateDestroyAPIView):
     def retrieve(
         self, request: Request, *args: Any, **kwargs: dict[str, Any]
     ) -> Response:
-        """Increasing views count on GET request"""
+        """Increasing views count on GET request, unless views are counted by beacon"""
         instance = self.get_object()
 
-        if request.method == "GET":
-            instance.increment_views()
+        if request.method == "GET" and settings.POST_VIEWS_COUNT_ON_GET:
+            instance.increment_views(get_visitor_fingerprint(request))
+        else:
+            instance.add_pending_views(PostViewsService.get_pending_views(instance.pk))
 
         serializer = self.get_serializer(instance)
         return Response(serializer.data)
 
 
-class UsersPostsView(generics.ListAPIView):
+@extend_schema_view(
+    get=extend_schema(parameters=sparse_fields_parameters(PostListSerializer))
+)
+class UsersPostsView(SparseFieldsMixin, generics.ListAPIView):
     """Api endpoint for listing current user's posts"""
 
     serializer_class = PostListSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = KeysetPagination
     filter_backends = [
         DjangoFilterBackend,
-        filters.SearchFilter,
+        PostFullTextSearchFilter,
         filters.OrderingFilter,
     ]
     filterset_fields = ["category", "publication_status"]
@@ -167,105 +288,448 @@ class UsersPostsView(generics.ListAPIView):
             if isinstance(self.request.user, AnonymousUser):
                 return Post.objects.none()
 
-        return (
-            Post.objects.filter(author=self.request.user)
-            .with_full_info()
-            .with_comments_count()
+        return self.project_fields(
+            Post.objects.filter(author=self.request.user).for_card()
         )
 
 
+@extend_schema(
+    request=None,
+    responses={
+        204: None,
+        404: {"properties": {"detail": {"type": "string"}}},
+    },
+)
+@api_view(["POST"])
+@permission_classes([permissions.AllowAny])
+def record_post_view(request: Request, slug: str) -> Response:
+    """Beacon for counting post view without loading the post"""
+    post = get_object_or_404(
+        Post.objects.only("id"),
+        slug=slug,
+        publication_status=Post.PUBLISHED,
+    )
+    PostViewsService.record_view(post.pk, get_visitor_fingerprint(request))
+    return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class PostSearchPagination(LimitOffsetPagination):
+    default_limit = 20
+    max_limit = 100
+
+
+def parse_batch_keys(value: str) -> list[str]:
+    """Returns unique keys of comma-separated list in their order"""
+    return list(dict.fromkeys(key.strip() for key in value.split(",") if key.strip()))
+
+
+@transaction.non_atomic_requests
+@extend_schema(
+    parameters=[
+        OpenApiParameter("ids", str, description="Comma-separated ids of posts"),
+        OpenApiParameter("slugs", str, description="Comma-separated slugs of posts"),
+        *sparse_fields_parameters(PostDetailSerializer),
+    ],
+    responses=PostBatchSerializer,
+)
+@api_view(["GET"])
+@permission_classes([permissions.AllowAny])
+def batch_posts(request: Request) -> Response:
+    """
+    Posts by ids and slugs in requested order, e.g. bookmarked posts.
+    Views are not counted. Keys of not found posts and of drafts
+    of other users are returned as missing.
+    """
+    ids = parse_batch_keys(request.query_params.get("ids", ""))
+    slugs = parse_batch_keys(request.query_params.get("slugs", ""))
+    if not ids and not slugs:
+        return Response(
+            {"error": "Ids or slugs are required"},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+    if len(ids) + len(slugs) > settings.POST_BATCH_MAX_SIZE:
+        return Response(
+            {"error": f"Up to {settings.POST_BATCH_MAX_SIZE} posts can be requested"},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+    if not all(key.isascii() and key.isdigit() and len(key) < 19 for key in ids):
+        return Response(
+            {"error": "Ids must be integers"},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    fields = get_sparse_fields(request, get_serializer_fields(PostDetailSerializer))
+    queryset: QuerySet[Post] = (
+        Post.objects.for_detail()
+        .visible_to(request.user)
+        .filter(Q(id__in=ids) | Q(slug__in=slugs))
+    )
+    if fields is not None:
+        # Slugs are matched with requested ones, pending views are added
+        queryset = project(
+            queryset,
+            ["slug", *VIEWS_FIELDS, *get_projection(PostDetailSerializer, fields)],
+        )
+    posts = list(queryset)
+    pending_views = PostViewsService.get_pending_views_many(post.pk for post in posts)
+    posts_by_id = {str(post.pk): post for post in posts}
+    posts_by_slug = {post.slug: post for post in posts}
+
+    found = [posts_by_id.get(key) for key in ids]
+    found += [posts_by_slug.get(key) for key in slugs]
+
+    results: dict[int, Post] = {}
+    missing = []
+    for key, post in zip(ids + slugs, found):
+        if post is None:
+            missing.append(key)
+        elif post.pk not in results:
+            post.add_pending_views(pending_views[post.pk])
+            results[post.pk] = post
+
+    serializer = PostDetailSerializer(
+        list(results.values()), many=True, context={"request": request}, fields=fields
+    )
+    return Response({"results": serializer.data, "missing": missing})
+
+
+@transaction.non_atomic_requests
+@extend_schema(
+    parameters=[
+        OpenApiParameter("q", str, required=True, description="Search query"),
+        OpenApiParameter("category", str, description="Category slug"),
+        OpenApiParameter("limit", int),
+        OpenApiParameter("offset", int),
+    ],
+    responses=PostSearchSerializer,
+)
+@api_view(["GET"])
+@permission_classes([permissions.AllowAny])
+def search_posts(request: Request) -> Response:
+    """Full-text search of published posts ordered by relevance"""
+    text = request.query_params.get("q", "").replace("\x00", "").strip()
+    if not text:
+        return Response(
+            {"error": "Search query is required"},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    paginator = PostSearchPagination()
+    limit = paginator.get_limit(request) or paginator.default_limit
+    offset = paginator.get_offset(request)
+
+    results = PostSearchService.search(
+        text,
+        category=request.query_params.get("category") or None,
+        limit=limit,
+        offset=offset,
+    )
+
+    # Paginator state for building links without COUNT(*) query
+    paginator.request = request
+    paginator.limit = limit
+    paginator.offset = offset
+    paginator.count = results.total
+
+    serializer = PostSearchResultSerializer(
+        results.posts, many=True, context={"request": request}
+    )
+    return Response(
+        {
+            "count": results.total,
+            "next": paginator.get_next_link(),
+            "previous": paginator.get_previous_link(),
+            "facets": [facet._asdict() for facet in results.facets],
+            "results": serializer.data,
+        }
+    )
+
+
+class AutocompleteRateThrottle(AnonRateThrottle):
+    scope = "autocomplete"
+
+
+@transaction.non_atomic_requests
+@extend_schema(
+    parameters=[
+        OpenApiParameter("q", str, required=True, description="Typed text"),
+        OpenApiParameter("limit", int, description="Max suggestions of each type"),
+    ],
+    responses=AutocompleteSerializer,
+)
+@api_view(["GET"])
+@permission_classes([permissions.AllowAny])
+@throttle_classes([AutocompleteRateThrottle])
+def autocomplete_posts(request: Request) -> Response:
+    """Suggestions of posts titles and categories for search box"""
+    try:
+        limit = int(request.query_params.get("limit", 8))
+    except ValueError:
+        limit = 8
+    limit = min(max(limit, 1), 20)
+
+    suggestions = PostAutocompleteService.suggest(
+        request.query_params.get("q", "").replace("\x00", ""), limit=limit
+    )
+    return Response(suggestions)
+
+
+def get_popular_posts(request: HttpRequest) -> list[dict[str, Any]]:
+    """Returns serialized 10 most popular posts"""
+    serializer = PostListRowSerializer({"request": request})
+    posts = PostRankingService.top_posts(
+        PostRankingService.ALL_TIME, 10, queryset=serializer.get_rows(Post.objects)
+    )
+    posts += get_most_viewed_posts(
+        serializer, 10 - len(posts), [post["id"] for post in posts]
+    )
+    return serializer.serialize(posts)
+
+
+def get_recent_posts(request: HttpRequest) -> list[dict[str, Any]]:
+    """Returns serialized 10 most recent posts"""
+    serializer = PostListRowSerializer({"request": request})
+    return serializer.serialize(
+        serializer.get_rows(
+            Post.objects.filter(publication_status=Post.PUBLISHED).order_by("-created")
+        )[:10]
+    )
+
+
+def get_weekly_posts(
+    serializer: PostListRowSerializer, limit: int, exclude: Iterable[int] = ()
+) -> list[dict[str, Any]]:
+    """Returns rows of popular posts of last week"""
+    return PostRankingService.top_posts(
+        PostRankingService.WEEK,
+        limit,
+        exclude=exclude,
+        queryset=serializer.get_rows(Post.objects),
+    )
+
+
+def get_recent_weekly_posts(
+    serializer: PostListRowSerializer, limit: int, exclude: list[int]
+) -> list[dict[str, Any]]:
+    """
+    Returns rows of recent posts of last week,
+    filling featured block, when there was not enough activity
+    """
+    if limit <= 0:
+        return []
+    return list(
+        serializer.get_rows(
+            Post.objects.filter(
+                publication_status=Post.PUBLISHED,
+                created__gte=timezone.now() - timedelta(days=7),
+            )
+            .exclude(id__in=exclude)
+            .order_by("-created")
+        )[:limit]
+    )
+
+
+def get_most_viewed_posts(
+    serializer: PostListRowSerializer, limit: int, exclude: list[int]
+) -> list[dict[str, Any]]:
+    """
+    Returns rows of most viewed published posts,
+    filling popular posts, when ranking has not enough posts, e.g. on new site
+    """
+    if limit <= 0:
+        return []
+    return list(
+        serializer.get_rows(
+            Post.objects.filter(publication_status=Post.PUBLISHED)
+            .exclude(id__in=exclude)
+            .order_by("-views_count", "-id")
+        )[:limit]
+    )
+
+
+@transaction.non_atomic_requests
 @extend_schema(responses=PostListSerializer(many=True))
 @api_view(["GET"])
 @permission_classes([permissions.AllowAny])
 def popular_posts(request: Request) -> Response:
-    """10 most popular Posts"""
-    posts = (
-        Post.objects.with_full_info()
-        .filter(publication_status=Post.PUBLISHED)
-        .with_comments_count()
-        .order_by("-views_count")[:10]
-    )
+    """10 most popular Posts by all-time views and comments"""
+    return Response(get_popular_posts(request))
+
 
-    serializer = PostListSerializer(
-        posts,
-        many=True,
-        context={"request": request},
+@transaction.non_atomic_requests
+@extend_schema(responses=PostListSerializer(many=True))
+@api_view(["GET"])
+@permission_classes([permissions.AllowAny])
+def trending_posts(request: Request) -> Response:
+    """10 trending Posts, recent views and comments weigh more"""
+    serializer = PostListRowSerializer({"request": request})
+    posts = PostRankingService.top_posts(
+        PostRankingService.TRENDING, 10, queryset=serializer.get_rows(Post.objects)
     )
 
-    return Response(serializer.data)
+    return Response(serializer.serialize(posts))
 
 
+@transaction.non_atomic_requests
 @extend_schema(responses=PostListSerializer(many=True))
 @api_view(["GET"])
 @permission_classes([permissions.AllowAny])
 def recent_posts(request: Request) -> Response:
     """10 most recent Posts"""
-    posts = (
-        Post.objects.with_full_info()
-        .filter(publication_status=Post.PUBLISHED)
-        .with_comments_count()
-        .order_by("-created")[:10]
-    )
+    return Response(get_recent_posts(request))
 
-    serializer = PostListSerializer(
-        posts,
-        many=True,
-        context={"request": request},
+
+@transaction.non_atomic_requests
+@extend_schema(responses=PostListSerializer(many=True))
+@api_view(["GET"])
+@permission_classes([permissions.AllowAny])
+def related_posts(request: Request, slug: str) -> Response:
+    """Posts similar to the Post by text and category, most similar first"""
+    serializer = PostListRowSerializer({"request": request})
+    posts = serializer.serialize(
+        serializer.get_rows(
+            Post.objects.filter(
+                related_to__post__slug=slug,
+                related_to__post__publication_status=Post.PUBLISHED,
+                publication_status=Post.PUBLISHED,
+            ).order_by("-related_to__score", "-id")
+        )
     )
+    if not posts:
+        # Post may be not indexed yet, e.g. just published, or not exist
+        get_object_or_404(Post.objects.visible_to(request.user), slug=slug)
+    return Response(posts)
+
+
+def parse_stats_days(request: Request) -> tuple[date, date]:
+    """Returns days range of "from" and "to" query params"""
+    try:
+        end = date.fromisoformat(request.query_params["to"])
+    except KeyError:
+        end = timezone.localdate()
+    try:
+        start = date.fromisoformat(request.query_params["from"])
+    except KeyError:
+        start = end - timedelta(days=settings.POST_STATS_DEFAULT_DAYS - 1)
+
+    if start > end:
+        raise ValueError('"from" must not be later than "to"')
+    if (end - start).days >= settings.POST_STATS_MAX_DAYS:
+        raise ValueError(f"Up to {settings.POST_STATS_MAX_DAYS} days can be requested")
+    return start, end
+
+
+def get_stats_response(
+    request: Request, queryset: QuerySet[PostDailyStats]
+) -> Response:
+    """Returns response of daily stats of posts of queryset"""
+    try:
+        start, end = parse_stats_days(request)
+    except ValueError as e:
+        # Also invalid date format
+        return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    days = PostStatsService.get_daily_stats(queryset, start, end)
+    totals = {
+        name: sum(day[name] for day in days)
+        for name in ("views", "unique_views", "comments")
+    }
+    return Response({"totals": totals, "days": days})
+
 
-    return Response(serializer.data)
+@transaction.non_atomic_requests
+@extend_schema(parameters=STATS_PARAMETERS, responses=PostStatsSerializer)
+@api_view(["GET"])
+@permission_classes([permissions.IsAuthenticated])
+def post_stats(request: Request, slug: str) -> Response:
+    """
+    Daily views and comments of the Post, available to its author and staff.
+    Stats are written periodically, so latest views may be not counted yet.
+    """
+    posts = Post.objects.all()
+    if not request.user.is_staff:
+        posts = posts.filter(author=request.user)
+    post = get_object_or_404(posts.only("id"), slug=slug)
+
+    return get_stats_response(request, PostDailyStats.objects.filter(post=post))
+
+
+@transaction.non_atomic_requests
+@extend_schema(parameters=STATS_PARAMETERS, responses=PostStatsSerializer)
+@api_view(["GET"])
+@permission_classes([permissions.IsAuthenticated])
+def my_posts_stats(request: Request) -> Response:
+    """Daily views and comments of all Posts of the user"""
+    return get_stats_response(
+        request, PostDailyStats.objects.filter(post__author_id=request.user.pk)
+    )
 
 
-@extend_schema(responses=PostsByCategorySerializer)
+@transaction.non_atomic_requests
+@extend_schema(
+    parameters=[
+        OpenApiParameter("cursor", str, description="The pagination cursor value."),
+        OpenApiParameter(
+            "page_size", int, description="Number of results to return per page."
+        ),
+    ],
+    responses=PostsByCategorySerializer,
+)
 @api_view(["GET"])
 @permission_classes([permissions.AllowAny])
 def posts_by_category(request: Request, category_slug: str) -> Response:
-    """Posts for defined category"""
-    category = get_object_or_404(
-        Category.objects.with_posts_count(), slug=category_slug
-    )
+    """Posts for defined category, pinned posts go first on the first page"""
+    category = get_object_or_404(Category, slug=category_slug)
 
-    # Retrieving posts depending on pinning
     posts = Post.objects.for_feed(
         category=category,
         publication_status=Post.PUBLISHED,
-    )
+    ).cached()
+
+    # Cards of posts are shared with feed and other lists in fragment cache
+    posts_serializer = PostListRowSerializer({"request": request})
+    paginator = FeedKeysetPagination()
+    page = paginator.paginate_queryset(posts_serializer.get_rows(posts), request)
 
     category_serializer = CategorySerializer(category)
-    posts_serializer = PostListSerializer(
-        posts,
-        many=True,
-        context={"request": request},
-    )
 
     data = {
         "category": category_serializer.data,
-        "posts": posts_serializer.data,
-        "pinned_posts_count": sum(
-            1 for post in posts_serializer.data if post.get("is_pinned", False)
-        ),
+        "posts": posts_serializer.serialize(page or []),
+        "pinned_posts_count": posts.filter(pin_info__isnull=False).count(),
+        "next": paginator.get_next_link(),
+        "previous": paginator.get_previous_link(),
     }
 
     return Response(data)
 
 
+def get_pinned_posts_block(request: HttpRequest) -> list[dict[str, Any]]:
+    """Returns serialized pinned posts in "pinned_at" order from cache"""
+
+    def build() -> list[dict[str, Any]]:
+        serializer = PostListRowSerializer({"request": request})
+        return serializer.serialize(serializer.get_rows(Post.objects.pinned()))
+
+    return PinnedPostsCache.get_block("posts", request, build)
+
+
+@transaction.non_atomic_requests
 @extend_schema(responses=PinnedPostsOnlySerializer)
 @api_view(["GET"])
 @permission_classes([permissions.AllowAny])
 def pinned_posts_only(request: Request) -> Response:
     """Return pinned posts"""
-    pinned_posts = Post.objects.with_full_info().pinned().with_comments_count()
-    serializer = PostListSerializer(
-        pinned_posts, many=True, context={"request": request}
-    )
+    pinned_posts = get_pinned_posts_block(request)
     return Response(
         {
             "count": len(pinned_posts),
-            "results": serializer.data,
+            "results": pinned_posts,
         }
     )
 
 
+@transaction.non_atomic_requests
 @extend_schema(responses=FeaturedPostsSerializer)
 @api_view(["GET"])
 @permission_classes([permissions.AllowAny])
@@ -273,45 +737,28 @@ def featured_posts(request: Request) -> Response:
     """
     Recommended posts for main page:
     - Pinned posts (3 max)
-    - Popular posts for last week
+    - Popular posts by views and comments for last week
     """
-    from datetime import timedelta  # noqa
-
-    from django.utils import timezone  # noqa
-
-    # Retrieving last 3 pinned posts
-    pinned_posts = Post.objects.with_full_info().pinned().with_comments_count()[:3]
-
-    # Retrieving popular posts (excluding pinned)
-    week_ago = timezone.now() - timedelta(days=7)
-    popular_posts_of_week = (
-        Post.objects.with_full_info()
-        .filter(
-            publication_status=Post.PUBLISHED,
-            created__gte=week_ago,
-        )
-        .exclude(
-            id__in=[post.id for post in pinned_posts],
-        )
-        .with_comments_count()
-        .order_by("-views_count")[:6]
-    )
-
-    pinned_serializer = PostListSerializer(
-        pinned_posts,
-        many=True,
-        context={"request": request},
+    all_pinned_posts = get_pinned_posts_block(request)
+    # Retrieving first 3 pinned posts
+    pinned_posts = all_pinned_posts[:FEATURED_PINNED_COUNT]
+
+    # Retrieving popular posts for last week (excluding pinned)
+    serializer = PostListRowSerializer({"request": request})
+    pinned_ids = [post["id"] for post in pinned_posts]
+    popular_posts_of_week = get_weekly_posts(
+        serializer, FEATURED_POPULAR_COUNT, pinned_ids
     )
-    popular_serializer = PostListSerializer(
-        popular_posts_of_week,
-        many=True,
-        context={"request": request},
+    popular_posts_of_week += get_recent_weekly_posts(
+        serializer,
+        FEATURED_POPULAR_COUNT - len(popular_posts_of_week),
+        pinned_ids + [post["id"] for post in popular_posts_of_week],
     )
 
     data = {
-        "pinned": pinned_serializer.data,
-        "popular": popular_serializer.data,
-        "total_pinned": Post.objects.with_pin_info().pinned().count(),
+        "pinned": pinned_posts,
+        "popular": serializer.serialize(popular_posts_of_week),
+        "total_pinned": len(all_pinned_posts),
     }
 
     return Response(data)
@@ -335,7 +782,7 @@ def toggle_post_pin_status(request: Request, slug: str) -> Response:
             return Response(status=status.HTTP_401_UNAUTHORIZED)
 
     post = get_object_or_404(
-        Post.objects.with_full_info().with_comments_count(),
+        Post.objects.for_detail(),
         slug=slug,
         publication_status=Post.PUBLISHED,
     )
@@ -0,0 +1,269 @@
+import csv
+import json
+import logging
+import sys
+from itertools import islice
+from typing import Any, Iterable, Iterator, NamedTuple, TextIO
+
+from cachalot.api import cachalot_disabled
+from cachalot.api import invalidate as invalidate_cachalot
+from django.conf import settings
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from slugify import slugify
+
+from accounts.models import User
+from app.conditional import ResourceVersions
+from app.query_cache import QueryCache, get_key_values, get_set_key, get_table_key
+from main.models import Category, Post
+
+logger = logging.getLogger(__name__)
+
+# Slug is shortened, so numeric suffix fits into the field
+SLUG_BASE_MAX_LENGTH = 240
+# Batch is retried, if its slug was taken by concurrent writer
+SLUG_CONFLICT_RETRIES = 3
+
+PUBLICATION_STATUSES = {
+    "p": Post.PUBLISHED,
+    "published": Post.PUBLISHED,
+    "d": Post.DRAFT,
+    "draft": Post.DRAFT,
+}
+
+
+class ImportResult(NamedTuple):
+    """Numbers of imported and skipped records"""
+
+    imported: int
+    skipped: int
+
+
+def read_records(stream: TextIO, file_format: str) -> Iterator[dict[str, Any]]:
+    """Yields records of JSONL or CSV stream one by one"""
+    if file_format == "csv":
+        # Content of articles may exceed default limit of field size
+        csv.field_size_limit(sys.maxsize)
+        yield from csv.DictReader(stream)
+        return
+
+    for line in stream:
+        if line.strip():
+            yield json.loads(line)
+
+
+class PostImporter:
+    """
+    Bulk import of posts, e.g. from archive of articles.
+    Records are dicts with "title", "content" and optional "slug",
+    "author" (email or username), "category" (slug or name),
+    "publication_status", "created" and "image" (storage name).
+
+    Posts are written by batches with COPY, so save() and signals are skipped:
+    slugs are allocated with one query per batch, authors and categories
+    are resolved from in-memory lookups, and counters and caches
+    are updated once after import.
+    """
+
+    def __init__(
+        self, default_author: User | None = None, create_categories: bool = True
+    ) -> None:
+        self.default_author_id = default_author.pk if default_author else None
+        self.create_categories = create_categories
+        self.authors: dict[str, Any] = {}
+        self.categories: dict[str, int] | None = None
+        # Next numeric suffix of slug base, so repeated titles don't probe from 1
+        self.slug_suffixes: dict[str, int] = {}
+
+    def run(self, records: Iterable[dict[str, Any]], batch_size: int) -> ImportResult:
+        """Imports records by batches, returns numbers of imported and skipped"""
+        imported = skipped = 0
+        iterator = iter(records)
+        # Cached reads would miss rows, written by COPY
+        with cachalot_disabled():
+            while batch := list(islice(iterator, batch_size)):
+                count = self.import_batch(batch)
+                imported += count
+                skipped += len(batch) - count
+                logger.info("Imported %s posts, skipped %s", imported, skipped)
+
+            if imported:
+                self.finish()
+        return ImportResult(imported, skipped)
+
+    def import_batch(self, records: list[dict[str, Any]]) -> int:
+        """Writes posts of batch in one transaction, returns their number"""
+        self.resolve_authors(records)
+        posts, bases = [], []
+        for record in records:
+            post = self.build_post(record)
+            if post is not None:
+                posts.append(post)
+                bases.append(self.get_slug_base(post, record))
+        if not posts:
+            return 0
+
+        for attempt in range(1, SLUG_CONFLICT_RETRIES + 1):
+            try:
+                with transaction.atomic():
+                    for post, slug in zip(posts, self.allocate_slugs(bases)):
+                        post.slug = slug
+                    self.copy_posts(posts)
+                self.touch_query_cache(posts)
+                return len(posts)
+            except IntegrityError:
+                if attempt == SLUG_CONFLICT_RETRIES:
+                    raise
+                logger.warning("Slug of imported post was taken, retrying batch")
+        return 0
+
+    def resolve_authors(self, records: list[dict[str, Any]]) -> None:
+        """Loads ids of batch authors, which were not seen before, with one query"""
+        missing = {
+            record["author"]
+            for record in records
+            if record.get("author") and record["author"] not in self.authors
+        }
+        if not missing:
+            return
+
+        for pk, email, username in User.objects.filter(
+            Q(email__in=missing) | Q(username__in=missing)
+        ).values_list("pk", "email", "username"):
+            self.authors[email] = self.authors[username] = pk
+        # Unknown authors are not queried again
+        for key in missing - self.authors.keys():
+            self.authors[key] = None
+
+    def get_category_id(self, key: str | None) -> int | None:
+        """Returns id of category by slug or name, creating missing one if allowed"""
+        if not key:
+            return None
+        if self.categories is None:
+            self.categories = {}
+            for pk, slug, name in Category.objects.values_list("pk", "slug", "name"):
+                self.categories.setdefault(slug, pk)
+                self.categories.setdefault(name, pk)
+
+        if key not in self.categories and self.create_categories:
+            category = Category.objects.create(name=key)
+            self.categories[key] = self.categories[category.slug] = category.pk
+        return self.categories.get(key)
+
+    def build_post(self, record: dict[str, Any]) -> Post | None:
+        """Returns unsaved post of record or None, if record is not valid"""
+        title = (record.get("title") or "").strip()
+        content = record.get("content") or ""
+        author_id = (
+            self.authors.get(record["author"])
+            if record.get("author")
+            else self.default_author_id
+        )
+        if not title or not content or author_id is None:
+            logger.warning("Skipped post record: %.100s", record)
+            return None
+
+        status = str(record.get("publication_status") or "p").lower()
+        created = parse_datetime(record.get("created") or "") or timezone.now()
+        if timezone.is_naive(created):
+            created = timezone.make_aware(created)
+
+        return Post(
+            title=title[: Post._meta.get_field("title").max_length],
+            content=content,
+            author_id=author_id,
+            category_id=self.get_category_id(record.get("category")),
+            publication_status=PUBLICATION_STATUSES.get(status, Post.PUBLISHED),
+            image=record.get("image") or None,
+            created=created,
+        )
+
+    def get_slug_base(self, post: Post, record: dict[str, Any]) -> str:
+        """Returns slug of record or slug of title, like on save()"""
+        base = slugify(record.get("slug") or post.slug_source) or "post"
+        return base[:SLUG_BASE_MAX_LENGTH].strip("-")
+
+    def allocate_slugs(self, bases: list[str]) -> list[str]:
+        """
+        Returns unique slugs for batch with one query of taken ones,
+        numbering repeated bases like Slugged.generate_unique_slug().
+        """
+        table = connection.ops.quote_name(Post._meta.db_table)
+        unique_bases = list(set(bases))
+        # Numbered slugs of base are in range ["<base>-", "<base>.") of slug index
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT slug FROM {table} WHERE slug = ANY(%s) "  # noqa: S608
+                "UNION ALL "
+                f"SELECT p.slug FROM unnest(%s::text[]) AS b(base) JOIN {table} AS p "
+                "ON p.slug ~>=~ (b.base || '-') AND p.slug ~<~ (b.base || '.')",
+                [unique_bases, unique_bases],
+            )
+            taken = {slug for (slug,) in cursor.fetchall()}
+
+        slugs = []
+        for base in bases:
+            slug = base
+            suffix = self.slug_suffixes.get(base, 1)
+            while slug in taken:
+                slug = f"{base}-{suffix}"
+                suffix += 1
+            self.slug_suffixes[base] = suffix
+            taken.add(slug)
+            slugs.append(slug)
+        return slugs
+
+    def copy_posts(self, posts: list[Post]) -> None:
+        """Writes posts with COPY, search vectors are filled by DB trigger"""
+        fields = [
+            field
+            for field in Post._meta.concrete_fields
+            if not field.primary_key and not getattr(field, "generated", False)
+        ]
+        columns = ", ".join(connection.ops.quote_name(str(f.column)) for f in fields)
+        table = connection.ops.quote_name(Post._meta.db_table)
+
+        with connection.cursor() as cursor:
+            with cursor.copy(f"COPY {table} ({columns}) FROM STDIN") as copy:
+                for post in posts:
+                    copy.write_row(
+                        [
+                            field.get_db_prep_save(
+                                getattr(post, field.attname), connection
+                            )
+                            for field in fields
+                        ]
+                    )
+
+    def touch_query_cache(self, posts: list[Post]) -> None:
+        """Marks cached results, filtered by key values of written posts, as changed"""
+        if not settings.QUERY_CACHE_ENABLED:
+            return
+        options = Post.query_cache_options
+        QueryCache.touch(
+            {
+                get_set_key(Post, name, value)
+                for post in posts
+                for name, value in get_key_values(Post, options, post.__dict__).items()
+            }
+        )
+
+    def finish(self) -> None:
+        """Updates counters of authors and categories and invalidates caches"""
+        for counter in Post.counter_caches:
+            fixed = counter.reconcile(Post)
+            logger.info("Reconciled %s: %s fixed", counter, fixed)
+
+        invalidate_cachalot(Post, Category, User)
+        if settings.QUERY_CACHE_ENABLED:
+            QueryCache.touch(
+                [
+                    get_table_key(Post),
+                    get_set_key(Post, "*", None),
+                    get_table_key(Category),
+                    get_table_key(User),
+                ]
+            )
+        ResourceVersions.touch("posts", "categories")
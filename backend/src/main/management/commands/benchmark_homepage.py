@@ -0,0 +1,137 @@
+import os
+import statistics
+import subprocess  # noqa: S404
+import sys
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+from django.urls import reverse
+from rest_framework_simplejwt.tokens import AccessToken
+
+from accounts.models import User
+
+HOMEPAGE_ENDPOINTS = [
+    "v1:posts:category-list",
+    "v1:posts:recent-posts",
+    "v1:posts:popular-posts",
+    "v1:posts:featured-posts",
+]
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare latency of sync and async homepage endpoints under ASGI server. "
+        "Uvicorn is started with ASYNC_HOMEPAGE_VIEWS off and on, and endpoints "
+        "are requested concurrently like by homepage of many clients"
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "--requests", type=int, default=200, help="Requests per endpoint"
+        )
+        parser.add_argument(
+            "--concurrency", type=int, default=20, help="Concurrent clients"
+        )
+        parser.add_argument("--port", type=int, default=8765, help="Server port")
+        parser.add_argument(
+            "--user",
+            help="Email of user of requests, so anonymous rate limit is not hit",
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        users = User.objects.filter(is_active=True)
+        if options["user"]:
+            users = users.filter(email=options["user"])
+        user = users.order_by("date_joined").first()
+        if user is None:
+            raise CommandError("User for requests not found")
+        self.authorization = f"Bearer {AccessToken.for_user(user)}"
+
+        paths = [reverse(name) for name in HOMEPAGE_ENDPOINTS]
+        self.stdout.write(
+            f"{options['requests']} requests per endpoint, "
+            f"{options['concurrency']} concurrent clients"
+        )
+        for mode, enabled in (("sync", "off"), ("async", "on")):
+            env = {**os.environ, "ASYNC_HOMEPAGE_VIEWS": enabled}
+            with Server(options["port"], env):
+                self.benchmark(mode, options, paths)
+
+    def benchmark(self, mode: str, options: dict[str, Any], paths: list[str]) -> None:
+        base_url = f"http://127.0.0.1:{options['port']}"
+        urls = [base_url + path for path in paths] * options["requests"]
+        # Warm up connections of pool and caches of server
+        for url in urls[: len(paths)]:
+            self.fetch(url)
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(options["concurrency"]) as executor:
+            latencies = sorted(executor.map(self.fetch, urls))
+        elapsed = time.perf_counter() - start
+
+        p50 = statistics.median(latencies) * 1000
+        p95 = latencies[int(len(latencies) * 0.95) - 1] * 1000
+        self.stdout.write(
+            f"{mode:<6} p50 {p50:7.1f} ms  p95 {p95:7.1f} ms  "
+            f"{len(urls) / elapsed:7.1f} req/s"
+        )
+
+    def fetch(self, url: str) -> float:
+        """Returns seconds of request"""
+        request = urllib.request.Request(
+            url, headers={"Authorization": self.authorization}
+        )
+        start = time.perf_counter()
+        with urllib.request.urlopen(request) as response:  # noqa: S310
+            response.read()
+        return time.perf_counter() - start
+
+
+class Server:
+    """Uvicorn process, started for block of benchmark"""
+
+    def __init__(self, port: int, env: dict[str, str]) -> None:
+        self.port = port
+        self.env = env
+        self.process: subprocess.Popen[bytes] | None = None
+
+    def __enter__(self) -> "Server":
+        self.process = subprocess.Popen(  # noqa: S603
+            [
+                sys.executable,
+                "-m",
+                "uvicorn",
+                "app.asgi:application",
+                "--port",
+                str(self.port),
+                "--log-level",
+                "warning",
+            ],
+            env=self.env,
+        )
+        self.wait_ready()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        assert self.process is not None
+        self.process.terminate()
+        self.process.wait()
+
+    def wait_ready(self, timeout: float = 30) -> None:
+        """Waits until server accepts requests"""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            try:
+                urllib.request.urlopen(  # noqa: S310
+                    f"http://127.0.0.1:{self.port}/", timeout=1
+                ).close()
+                return
+            except urllib.error.HTTPError:
+                return
+            except OSError:
+                time.sleep(0.2)
+        raise CommandError("Server has not started")
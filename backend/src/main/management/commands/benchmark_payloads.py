@@ -0,0 +1,146 @@
+import gzip
+import random
+from datetime import timedelta
+from typing import Any
+
+from django.core.management.base import BaseCommand, CommandParser
+from django.db import transaction
+from django.test.utils import override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from accounts.models import User
+from comments.models import Comment
+from main.models import Category, Post
+from subscribe.models import PinnedPost, Subscription, SubscriptionPlan
+
+WORDS = (
+    "django python cache query index post comment feed author category server "
+    "client request response latency payload database replica worker queue"
+).split()
+
+
+class Rollback(Exception):
+    """Raised for discarding benchmark data"""
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare payload sizes of v1 and compact v2 responses of feed and "
+        "post comments. Data is created in transaction, which is rolled back"
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument("--posts", type=int, default=200, help="Number of posts")
+        parser.add_argument(
+            "--comments", type=int, default=300, help="Number of comments of post"
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        try:
+            with transaction.atomic():
+                self.benchmark(options["posts"], options["comments"])
+                raise Rollback
+        except Rollback:
+            pass
+
+    def benchmark(self, posts_count: int, comments_count: int) -> None:
+        rng = random.Random(0)  # noqa: S311
+        users = User.objects.bulk_create(
+            User(
+                username=f"benchmark-user-{i}",
+                email=f"benchmark-{i}@example.com",
+                first_name="Benchmark",
+                last_name=f"User {i}",
+                avatar=f"avatars/benchmark-{i}.png",
+            )
+            for i in range(50)
+        )
+        categories = Category.objects.bulk_create(
+            Category(name=f"Benchmark category {i}", slug=f"benchmark-category-{i}")
+            for i in range(8)
+        )
+        # Few prolific authors write most of posts, as on real blogs
+        posts = Post.objects.bulk_create(
+            Post(
+                title=f"Benchmark post {i}",
+                slug=f"benchmark-post-{i}",
+                content=self.get_text(rng, 300),
+                author=users[min(int(rng.expovariate(0.3)), len(users) - 1)],
+                category=rng.choice(categories),
+                publication_status=Post.PUBLISHED,
+            )
+            for i in range(posts_count)
+        )
+
+        plan = SubscriptionPlan.objects.create(
+            name="Benchmark", price=10, stripe_price_id="benchmark-price"
+        )
+        now = timezone.now()
+        for user in users[:3]:
+            Subscription.objects.create(
+                user=user,
+                plan=plan,
+                status=Subscription.ACTIVE,
+                start_date=now,
+                end_date=now + timedelta(days=30),
+            )
+            post = next(post for post in reversed(posts) if post.author == user)
+            PinnedPost.objects.create(user=user, post=post)
+
+        post = posts[-1]
+        Comment.objects.bulk_create(
+            Comment(
+                post=post,
+                author=users[min(int(rng.expovariate(0.2)), len(users) - 1)],
+                content=self.get_text(rng, rng.randint(5, 60)),
+            )
+            for _ in range(comments_count)
+        )
+
+        cases = [
+            (
+                "Feed",
+                reverse("v1:posts:post-list"),
+                reverse("v2:posts:post-list", kwargs={"version": "v2"}),
+            ),
+            (
+                "Post comments",
+                reverse("v1:comments:post-comments", kwargs={"post_id": post.pk}),
+                reverse(
+                    "v2:comments:post-comments",
+                    kwargs={"version": "v2", "post_id": post.pk},
+                ),
+            ),
+        ]
+        client = APIClient()
+        self.stdout.write(
+            f"{posts_count} posts, {comments_count} comments of post, "
+            f"{len(users)} users"
+        )
+        # Requests are made with test client host
+        with override_settings(ALLOWED_HOSTS=["testserver"]):
+            for name, v1_url, v2_url in cases:
+                v1 = self.measure(client, v1_url)
+                v2 = self.measure(client, v2_url)
+                self.stdout.write(
+                    f"{name:<14} json {v1[0]:>8} -> {v2[0]:>8} bytes "
+                    f"({self.change(v1[0], v2[0])}), "
+                    f"gzip {v1[1]:>7} -> {v2[1]:>7} bytes "
+                    f"({self.change(v1[1], v2[1])})"
+                )
+
+    @staticmethod
+    def get_text(rng: random.Random, words: int) -> str:
+        return " ".join(rng.choice(WORDS) for _ in range(words))
+
+    @staticmethod
+    def measure(client: APIClient, url: str) -> tuple[int, int]:
+        """Returns sizes of JSON response and of its gzipped content"""
+        content = client.get(url).content
+        return len(content), len(gzip.compress(content))
+
+    @staticmethod
+    def change(before: int, after: int) -> str:
+        return f"{100 * (after - before) / before:+.1f}%"
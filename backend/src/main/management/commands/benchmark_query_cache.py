@@ -0,0 +1,142 @@
+import contextlib
+import random
+import time
+from typing import Any, Callable, Iterator
+
+from cachalot.settings import cachalot_settings
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+from django.db import connection
+from django.db.models import QuerySet
+from django.test.utils import override_settings
+
+from accounts.models import User
+from app.query_cache import metrics
+from comments.models import Comment
+from main.models import Post
+
+
+class ReadsCounter:
+    """Wrapper of DB queries, counting reads, which were not served from cache"""
+
+    def __init__(self) -> None:
+        self.count = 0
+
+    def __call__(
+        self, execute: Callable, sql: str, params: Any, many: bool, context: Any
+    ) -> Any:
+        if sql.lstrip().upper().startswith("SELECT"):
+            self.count += 1
+        return execute(sql, params, many, context)
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare query cache with cachalot on peak-like workload: "
+        "reads of feed, category posts and post comments, mixed with comment "
+        "inserts and views counter saves. Created comments are deleted after run"
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "--iterations", type=int, default=200, help="Writes in each mode"
+        )
+        parser.add_argument("--reads", type=int, default=10, help="Reads per write")
+        parser.add_argument(
+            "--posts", type=int, default=20, help="Number of latest posts to use"
+        )
+        parser.add_argument("--page-size", type=int, default=20, help="Posts per page")
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        self.posts = list(
+            Post.objects.filter(publication_status=Post.PUBLISHED)
+            .exclude(category=None)
+            .order_by("-created")
+            .values_list("id", "category_id")[: options["posts"]]
+        )
+        if not self.posts:
+            raise CommandError("Published posts with categories not found")
+        user = User.objects.filter(is_active=True).order_by("date_joined").first()
+        if user is None:
+            raise CommandError("User for comments not found")
+        self.user = user
+        self.page_size = options["page_size"]
+
+        self.stdout.write(
+            f"{options['iterations']} writes, {options['reads']} reads per write, "
+            f"{len(self.posts)} posts"
+        )
+        for mode, enabled in (("cachalot", False), ("query cache", True)):
+            with self.cache_mode(enabled):
+                self.benchmark(mode, options)
+
+    @contextlib.contextmanager
+    def cache_mode(self, query_cache: bool) -> Iterator[None]:
+        """Enables query cache or cachalot for posts and comments tables"""
+        uncachable = {"django_migrations"}
+        if query_cache:
+            uncachable |= {Post._meta.db_table, Comment._meta.db_table}
+        try:
+            with override_settings(
+                QUERY_CACHE_ENABLED=query_cache, CACHALOT_UNCACHABLE_TABLES=uncachable
+            ):
+                # Cachalot reads its settings once, so they are reloaded
+                cachalot_settings.load()
+                yield
+        finally:
+            cachalot_settings.load()
+
+    def get_reads(self, post_id: int, category_id: int) -> list[QuerySet]:
+        """Returns querysets of feed, category posts and post comments"""
+        return [
+            Post.objects.for_feed().cached()[: self.page_size],
+            Post.objects.for_feed(
+                category_id=category_id, publication_status=Post.PUBLISHED
+            ).cached()[: self.page_size],
+            Comment.objects.filter(post_id=post_id, is_active=True, parent=None)
+            .order_by("-created")
+            .cached(),
+        ]
+
+    def benchmark(self, mode: str, options: dict[str, Any]) -> None:
+        rng = random.Random(0)  # noqa: S311
+        # Warm up caches, e.g. left by previous run
+        for post_id, category_id in self.posts:
+            for queryset in self.get_reads(post_id, category_id):
+                list(queryset)
+
+        metrics.reset()
+        counter = ReadsCounter()
+        reads = 0
+        created = []
+        start = time.perf_counter()
+        for iteration in range(options["iterations"]):
+            for _ in range(options["reads"]):
+                queryset = rng.choice(self.get_reads(*rng.choice(self.posts)))
+                with connection.execute_wrapper(counter):
+                    list(queryset)
+                reads += 1
+
+            post_id, _ = rng.choice(self.posts)
+            if iteration % 2:
+                comment = Comment.objects.create(
+                    post_id=post_id, author=self.user, content="Benchmark comment"
+                )
+                created.append(comment.pk)
+            else:
+                post = Post.objects.only("id", "views_count").get(pk=post_id)
+                post.save(update_fields=["views_count"])
+        elapsed = time.perf_counter() - start
+        stats = metrics.snapshot()
+        Comment.objects.filter(pk__in=created).delete()
+
+        hit_rate = 100 * (reads - counter.count) / reads if reads else 0
+        self.stdout.write(
+            f"{mode:<12} {reads} reads, {counter.count} from DB, "
+            f"hit rate {hit_rate:5.1f}%, {elapsed:6.2f} s"
+        )
+        if settings.QUERY_CACHE_ENABLED:
+            self.stdout.write(
+                "             "
+                + ", ".join(f"{name} {count}" for name, count in stats.items())
+            )
@@ -0,0 +1,107 @@
+import time
+from typing import Any, Callable
+
+from django.core.management.base import BaseCommand, CommandParser
+from django.db import transaction
+from rest_framework.test import APIRequestFactory
+
+from accounts.models import User
+from comments.api.serializers import CommentRowSerializer, CommentSerializer
+from comments.models import Comment
+from main.api.serializers import PostListRowSerializer, PostListSerializer
+from main.models import Category, Post
+
+
+class Rollback(Exception):
+    """Raised for discarding benchmark data"""
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare per-item cost of DRF and row serializers on pages of posts "
+        "and comments. Data is created in transaction, which is rolled back"
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument("--size", type=int, default=1000, help="Page size")
+        parser.add_argument(
+            "--repeat", type=int, default=5, help="Best of this number of runs"
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        try:
+            with transaction.atomic():
+                self.benchmark(options["size"], options["repeat"])
+                raise Rollback
+        except Rollback:
+            pass
+
+    def benchmark(self, size: int, repeat: int) -> None:
+        author = User.objects.create(
+            username="benchmark-author", email="benchmark@example.com"
+        )
+        category = Category.objects.create(name="Benchmark", slug="benchmark")
+        posts = Post.objects.bulk_create(
+            Post(
+                title=f"Benchmark post {i}",
+                slug=f"benchmark-post-{i}",
+                content="Lorem ipsum dolor sit amet. " * 100,
+                author=author,
+                category=category,
+                publication_status=Post.PUBLISHED,
+            )
+            for i in range(size)
+        )
+        Comment.objects.bulk_create(
+            Comment(post=posts[i % len(posts)], author=author, content="Comment " * 20)
+            for i in range(size)
+        )
+
+        context = {"request": APIRequestFactory().get("/")}
+        post_rows = PostListRowSerializer(context)
+        comment_rows = CommentRowSerializer(context)
+        post_ids = [post.id for post in posts]
+        cases: list[tuple[str, Callable[[], Any]]] = [
+            (
+                "PostListSerializer",
+                lambda: PostListSerializer(
+                    Post.objects.with_full_info().filter(id__in=post_ids),
+                    many=True,
+                    context=context,
+                ).data,
+            ),
+            (
+                "PostListRowSerializer",
+                lambda: post_rows.serialize(
+                    post_rows.get_rows(Post.objects.filter(id__in=post_ids))
+                ),
+            ),
+            (
+                "CommentSerializer",
+                lambda: CommentSerializer(
+                    Comment.objects.select_related("author", "post").filter(
+                        author=author
+                    ),
+                    many=True,
+                    context=context,
+                ).data,
+            ),
+            (
+                "CommentRowSerializer",
+                lambda: comment_rows.serialize(
+                    comment_rows.get_rows(Comment.objects.filter(author=author))
+                ),
+            ),
+        ]
+
+        self.stdout.write(f"Page of {size} items, best of {repeat} runs")
+        for name, serialize in cases:
+            best = min(self.measure(serialize) for _ in range(repeat))
+            self.stdout.write(f"{name:<24} {best / size * 1e6:8.1f} us per item")
+
+    @staticmethod
+    def measure(serialize: Callable[[], Any]) -> float:
+        """Returns seconds of fetching and serializing page"""
+        start = time.perf_counter()
+        serialize()
+        return time.perf_counter() - start
@@ -0,0 +1,94 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import Any, Iterator
+
+from django.apps import apps
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandParser
+from django.db import models
+
+from app.images import ImageDerivatives, read_image, render_variants, save_variants
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate resized variants of post images and avatars, "
+        "which were uploaded without Celery or before variants were declared"
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "--workers", type=int, default=None, help="Processes for resizing"
+        )
+        parser.add_argument(
+            "--all", action="store_true", help="Regenerate up to date variants too"
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        workers = options["workers"] or os.cpu_count() or 1
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for model in apps.get_models():
+                for derivatives in getattr(model, "image_derivatives", ()):
+                    generated = self.generate(
+                        model, derivatives, pool, workers * 4, options["all"]
+                    )
+                    self.stdout.write(
+                        f"{model._meta.label}.{derivatives.field}: {generated} generated"
+                    )
+
+    def generate(
+        self,
+        model: type[models.Model],
+        derivatives: ImageDerivatives,
+        pool: ProcessPoolExecutor,
+        chunk_size: int,
+        regenerate: bool,
+    ) -> int:
+        """Resizes images in pool, writes variants in this process"""
+        instances = (
+            instance
+            for instance in model._base_manager.exclude(**{derivatives.field: ""})
+            .exclude(**{f"{derivatives.field}__isnull": True})
+            .only("pk", derivatives.field, derivatives.variants_field)
+            .iterator()
+            if regenerate or derivatives.is_outdated(instance)
+        )
+
+        generated = 0
+        # Images are read by chunks, so only part of them is held in memory
+        for chunk in self.chunked(instances, chunk_size):
+            sources, futures = [], []
+            for instance in chunk:
+                try:
+                    content = read_image(instance, derivatives)
+                except OSError as e:
+                    self.stderr.write(f"{instance.pk}: {e}")
+                    continue
+                sources.append(instance)
+                futures.append(
+                    pool.submit(
+                        render_variants,
+                        content,
+                        derivatives.sizes,
+                        settings.IMAGE_DERIVATIVES_FORMAT,
+                        settings.IMAGE_DERIVATIVES_QUALITY,
+                    )
+                )
+
+            for instance, future in zip(sources, futures):
+                try:
+                    rendered = future.result()
+                except Exception as e:
+                    self.stderr.write(f"{instance.pk}: {e}")
+                    continue
+                source = getattr(instance, derivatives.field).name
+                save_variants(instance, derivatives, source, rendered)
+                generated += 1
+        return generated
+
+    @staticmethod
+    def chunked(iterable: Iterator[Any], size: int) -> Iterator[list[Any]]:
+        iterator = iter(iterable)
+        while chunk := list(islice(iterator, size)):
+            yield chunk
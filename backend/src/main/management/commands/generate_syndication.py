@@ -0,0 +1,28 @@
+import time
+from typing import Any
+
+from django.core.management.base import BaseCommand, CommandParser
+
+from main.syndication import SyndicationService
+
+
+class Command(BaseCommand):
+    help = (
+        "Write sitemaps and RSS/Atom feeds of posts, which changed since "
+        "previous run, into storage, e.g. without Celery"
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "--full", action="store_true", help="Rewrite all sitemaps and feeds"
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        start = time.perf_counter()
+        result = SyndicationService.generate(full=options["full"])
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{result['written']} files written, {result['deleted']} deleted "
+                f"in {time.perf_counter() - start:.1f} s"
+            )
+        )
@@ -0,0 +1,65 @@
+import sys
+from pathlib import Path
+from typing import Any
+
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+
+from accounts.models import User
+from main.importing import PostImporter, read_records
+
+
+class Command(BaseCommand):
+    help = (
+        "Bulk import posts from JSONL or CSV file, e.g. archive of articles. "
+        "Records have title, content and optional slug, author, category, "
+        "publication_status, created and image"
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument("path", help='Path of file, "-" for stdin')
+        parser.add_argument(
+            "--format",
+            choices=["jsonl", "csv"],
+            help="Format of file, by extension by default",
+        )
+        parser.add_argument(
+            "--batch-size", type=int, default=5000, help="Posts per transaction"
+        )
+        parser.add_argument(
+            "--author", help="Email of author of records without author"
+        )
+        parser.add_argument(
+            "--no-create-categories",
+            action="store_true",
+            help="Import posts of unknown categories without category",
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        path = options["path"]
+        file_format = options["format"] or ("csv" if path.endswith(".csv") else "jsonl")
+
+        author = None
+        if options["author"]:
+            author = User.objects.filter(email=options["author"]).first()
+            if author is None:
+                raise CommandError(f"User {options['author']} not found")
+
+        importer = PostImporter(
+            default_author=author,
+            create_categories=not options["no_create_categories"],
+        )
+        if path == "-":
+            result = importer.run(
+                read_records(sys.stdin, file_format), options["batch_size"]
+            )
+        else:
+            with Path(path).open(encoding="utf-8", newline="") as stream:
+                result = importer.run(
+                    read_records(stream, file_format), options["batch_size"]
+                )
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Imported {result.imported} posts, skipped {result.skipped}"
+            )
+        )
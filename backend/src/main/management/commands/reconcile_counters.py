@@ -0,0 +1,32 @@
+from typing import Any
+
+from django.core.management.base import BaseCommand, CommandParser
+
+from app.counters import get_counter_caches, reconcile_counters
+
+
+class Command(BaseCommand):
+    help = "Fix drift of counter caches, e.g. after bulk operations"
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "counters",
+            nargs="*",
+            help='Counters to reconcile, e.g. "main.Post.comments_count", all by default',
+        )
+        parser.add_argument(
+            "--list", action="store_true", help="Show declared counters and exit"
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        if options["list"]:
+            for model, counter in get_counter_caches():
+                target = counter.get_target_model(model)._meta.label
+                self.stdout.write(
+                    f"{target}.{counter.field} <- {model._meta.label}.{counter.relation}"
+                )
+            return
+
+        for label, fixed in reconcile_counters(options["counters"]).items():
+            style = self.style.WARNING if fixed else self.style.SUCCESS
+            self.stdout.write(style(f"{label}: {fixed} fixed"))
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 07:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("main", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="post",
+            name="unique_views_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 5.2.18 on 2026-10-17 07:39
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.conf import settings
+from django.db import migrations
+
+# Search vector of post is updated on insert and on change of title or content,
+# existing posts are filled in place
+SEARCH_VECTOR_TRIGGER = """
+CREATE FUNCTION posts_search_vector_update() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector :=
+        setweight(to_tsvector('english', coalesce(NEW.title, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(NEW.content, '')), 'B');
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER posts_search_vector_trigger
+BEFORE INSERT OR UPDATE OF title, content ON posts
+FOR EACH ROW EXECUTE FUNCTION posts_search_vector_update();
+
+UPDATE posts SET title = title;
+"""
+
+DROP_SEARCH_VECTOR_TRIGGER = """
+DROP TRIGGER IF EXISTS posts_search_vector_trigger ON posts;
+DROP FUNCTION IF EXISTS posts_search_vector_update();
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("main", "0002_post_unique_views_count"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="post",
+            name="search_vector",
+            field=django.contrib.postgres.search.SearchVectorField(
+                blank=True, editable=False, null=True
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="post",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["search_vector"], name="posts_search_vector_idx"
+            ),
+        ),
+        migrations.RunSQL(SEARCH_VECTOR_TRIGGER, DROP_SEARCH_VECTOR_TRIGGER),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.18 on 2026-10-17 07:52
+
+from django.db import migrations, models
+
+# Filling counter caches of existing rows
+FILL_COUNTERS = """
+UPDATE categories AS c SET posts_count = (
+    SELECT count(*) FROM posts AS p
+    WHERE p.category_id = c.id AND p.publication_status = 'p'
+);
+UPDATE posts AS p SET comments_count = (
+    SELECT count(*) FROM comments AS c
+    WHERE c.post_id = p.id AND c.is_active
+);
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("main", "0004_autocomplete_prefix_indexes"),
+        ("comments", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="category",
+            name="posts_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="post",
+            name="comments_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunSQL(FILL_COUNTERS, migrations.RunSQL.noop),
+    ]
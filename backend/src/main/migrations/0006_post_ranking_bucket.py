@@ -0,0 +1,51 @@
+# Generated by Django 5.2.18 on 2026-10-17 08:07
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("main", "0005_category_posts_count_post_comments_count"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PostRankingBucket",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("hour", models.DateTimeField()),
+                ("score", models.FloatField(default=0)),
+                (
+                    "post",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="ranking_buckets",
+                        to="main.post",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Post Ranking Bucket",
+                "verbose_name_plural": "Post Ranking Buckets",
+                "db_table": "post_ranking_buckets",
+                "indexes": [
+                    models.Index(fields=["hour"], name="post_rankin_hour_ee5068_idx")
+                ],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("post", "hour"), name="unique_post_ranking_bucket"
+                    )
+                ],
+            },
+        ),
+    ]
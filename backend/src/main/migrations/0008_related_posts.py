@@ -0,0 +1,60 @@
+# Generated by Django 5.2.18 on 2026-10-17 09:22
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("main", "0007_image_variants"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RelatedPost",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("score", models.FloatField()),
+                (
+                    "post",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="related_posts",
+                        to="main.post",
+                    ),
+                ),
+                (
+                    "related",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="related_to",
+                        to="main.post",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Related Post",
+                "verbose_name_plural": "Related Posts",
+                "db_table": "related_posts",
+                "indexes": [
+                    models.Index(
+                        fields=["post", "-score"], name="related_pos_post_id_2b99e7_idx"
+                    )
+                ],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("post", "related"), name="unique_related_post"
+                    )
+                ],
+            },
+        ),
+    ]
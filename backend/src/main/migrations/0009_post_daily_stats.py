@@ -0,0 +1,50 @@
+# Generated by Django 5.2.18 on 2026-10-17 09:27
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("main", "0008_related_posts"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PostDailyStats",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("day", models.DateField()),
+                ("views", models.PositiveIntegerField(default=0)),
+                ("unique_views", models.PositiveIntegerField(default=0)),
+                ("comments", models.PositiveIntegerField(default=0)),
+                (
+                    "post",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="daily_stats",
+                        to="main.post",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Post Daily Stats",
+                "verbose_name_plural": "Post Daily Stats",
+                "db_table": "post_daily_stats",
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("post", "day"), name="unique_post_daily_stats"
+                    )
+                ],
+            },
+        ),
+    ]
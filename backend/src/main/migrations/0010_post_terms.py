@@ -0,0 +1,72 @@
+# Generated by Django 5.2.18 on 2026-10-17 09:27
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("main", "0009_post_daily_stats"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="IndexedTerm",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("term", models.CharField(max_length=64, unique=True)),
+                ("idf", models.FloatField()),
+            ],
+            options={
+                "verbose_name": "Indexed Term",
+                "verbose_name_plural": "Indexed Terms",
+                "db_table": "indexed_terms",
+            },
+        ),
+        migrations.CreateModel(
+            name="PostTerm",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("term", models.CharField(max_length=64)),
+                ("weight", models.FloatField()),
+                (
+                    "post",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="terms",
+                        to="main.post",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Post Term",
+                "verbose_name_plural": "Post Terms",
+                "db_table": "post_terms",
+                "indexes": [
+                    models.Index(fields=["term"], name="post_terms_term_13956c_idx")
+                ],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("post", "term"), name="unique_post_term"
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-17 11:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("main", "0010_post_terms"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="postterm",
+            name="post_terms_term_13956c_idx",
+        ),
+        migrations.AddIndex(
+            model_name="postterm",
+            index=models.Index(
+                fields=["term", "-weight"], name="post_terms_term_weight_idx"
+            ),
+        ),
+    ]
@@ -1,25 +1,26 @@
-from typing import TYPE_CHECKING, Any
+from typing import TYPE_CHECKING, Any, Iterable, cast
 
 from django.conf import settings
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
-from django.db.models import Count, Q
-from django.db.models.functions import Now
+from django.db.models import Q
+from django.db.models.functions import Now, Upper
 from django.urls import reverse
 
-from app.models import PublishedModel, SluggedModel, TimeStampedModel
+from app.counters import CounterCache, CounterCachedModel
+from app.images import ImageDerivatives
+from app.models import PublishedModel, SluggedModel, TimeStampedModel, project
+from app.query_cache import CachedQuerySet, QueryCacheOptions
 
 if TYPE_CHECKING:
-    from accounts.models import User
-
+    from django.contrib.auth.models import AnonymousUser
 
-class CategoryQuerySet(models.QuerySet["Category"]):
-    def with_posts_count(self) -> "CategoryQuerySet":
+    from accounts.models import User
+    from main.services import PendingViews
 
-        return self.annotate(
-            posts_count=Count(
-                "posts", filter=Q(posts__publication_status=Post.PUBLISHED)
-            )
-        )
+# Text search configuration for posts search vector and queries
+SEARCH_CONFIG = "english"
 
 
 class Category(SluggedModel):
@@ -28,14 +29,23 @@ class Category(SluggedModel):
     name = models.CharField(max_length=100)
     description = models.TextField(blank=True)
     created = models.DateTimeField(auto_now_add=True)
+    # Counter cache of published posts
+    posts_count = models.PositiveIntegerField(default=0, editable=False)
 
-    objects = CategoryQuerySet.as_manager()
+    query_cache_options = QueryCacheOptions(keys=("slug",), volatile=("posts_count",))
 
     class Meta:
         db_table = "categories"
         verbose_name = "Category"
         verbose_name_plural = "Categories"
         ordering = ["-created"]
+        indexes = [
+            # For autocomplete by name prefix (istartswith lookup)
+            models.Index(
+                OpClass(Upper("name"), name="text_pattern_ops"),
+                name="categories_name_prefix_idx",
+            ),
+        ]
 
     def __str__(self) -> str:
         return self.name
@@ -45,9 +55,40 @@ class Category(SluggedModel):
         return self.name
 
 
-class PostQuerySet(models.QuerySet["Post"]):
+class PostQuerySet(CachedQuerySet["Post"]):
     """QuerySet for Post model"""
 
+    # Columns of post cards in lists, with author and category names and pin info
+    CARD_FIELDS = (
+        "id",
+        "title",
+        "slug",
+        "content",
+        "image",
+        "image_variants",
+        "publication_status",
+        "comments_count",
+        "views_count",
+        "unique_views_count",
+        "created",
+        "modified",
+        "author__email",
+        "category__name",
+        "pin_info__pinned_at",
+        "pin_info__user__username",
+        "pin_info__user__subscription__status",
+        "pin_info__user__subscription__end_date",
+    )
+    # Columns of post page, with author and category info
+    DETAIL_FIELDS = CARD_FIELDS + (
+        "author__username",
+        "author__first_name",
+        "author__last_name",
+        "author__avatar",
+        "author__avatar_variants",
+        "category__slug",
+    )
+
     def with_pin_info(self) -> "PostQuerySet":
         return self.select_related(
             "pin_info",
@@ -82,6 +123,26 @@ class PostQuerySet(models.QuerySet["Post"]):
             "author__subscription",
         )
 
+    def project(self, fields: Iterable[str]) -> "PostQuerySet":
+        """Returns a queryset loading only given columns, see app.models.project()"""
+        return cast(PostQuerySet, project(self, fields))
+
+    def for_card(self) -> "PostQuerySet":
+        """Returns a queryset of posts with columns for cards in lists"""
+        return self.project(self.CARD_FIELDS)
+
+    def for_detail(self) -> "PostQuerySet":
+        """Returns a queryset of posts with columns for post page"""
+        return self.project(self.DETAIL_FIELDS)
+
+    def visible_to(self, user: "User | AnonymousUser") -> "PostQuerySet":
+        """Returns published posts and drafts of the user"""
+        if not user.is_authenticated:
+            return self.filter(publication_status=PublishedModel.PUBLISHED)
+        return self.filter(
+            Q(publication_status=PublishedModel.PUBLISHED) | Q(author=user)
+        )
+
     def for_feed(self, *args: Any, **kwargs: Any) -> "PostQuerySet":
         """Return a queryset of pinned and unpinned posts in "pinned_at" or "-created" order"""
         queryset = self.filter(publication_status=PublishedModel.PUBLISHED)
@@ -91,7 +152,7 @@ class PostQuerySet(models.QuerySet["Post"]):
         from django.db.models import Case, IntegerField, Value, When
 
         return (
-            queryset.with_full_info()
+            queryset.for_card()
             .annotate(
                 # Annotate for sort order: pinned posts first, then by created
                 post_type_order=Case(
@@ -100,21 +161,19 @@ class PostQuerySet(models.QuerySet["Post"]):
                     default=Value(2),
                     output_field=IntegerField(),
                 ),
-                comments_count=Count("comments", filter=Q(comments__is_active=True)),
             )
             .order_by("post_type_order", "pin_info__pinned_at", "-created")
         )
 
-    def with_comments_count(self) -> "PostQuerySet":
-        return self.annotate(
-            comments_count=Count(
-                "comments",
-                filter=Q(comments__is_active=True),
-            )
-        )
+
+class PostManager(models.Manager.from_queryset(PostQuerySet)):  # type: ignore[misc]
+    """Manager for Post model, not loading search vector by default"""
+
+    def get_queryset(self) -> PostQuerySet:
+        return super().get_queryset().defer("search_vector")
 
 
-class Post(SluggedModel, PublishedModel, TimeStampedModel):
+class Post(CounterCachedModel, SluggedModel, PublishedModel, TimeStampedModel):
     """Model for Posts with pinning possibility"""
 
     category = models.ForeignKey(
@@ -132,9 +191,37 @@ class Post(SluggedModel, PublishedModel, TimeStampedModel):
     title = models.CharField(max_length=200)
     content = models.TextField()
     image = models.ImageField(upload_to="posts/", null=True, blank=True)
+    # Resized images for cards and post page, generated in background
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
     views_count = models.PositiveIntegerField(default=0)
+    unique_views_count = models.PositiveIntegerField(default=0)
+    # Counter cache of active comments
+    comments_count = models.PositiveIntegerField(default=0, editable=False)
+    # Maintained by DB trigger: title is weighted higher than content
+    search_vector = SearchVectorField(null=True, blank=True, editable=False)
 
-    objects = PostQuerySet.as_manager()  # type: ignore
+    objects = PostManager()  # type: ignore
+
+    counter_caches = (
+        CounterCache(
+            "category",
+            "posts_count",
+            {"publication_status": PublishedModel.PUBLISHED},
+        ),
+        CounterCache("author", "posts_count"),
+    )
+    image_derivatives = (
+        ImageDerivatives(
+            "image",
+            {"thumb": 640, "large": 1600},
+            resources=("posts", "post:{instance.slug}"),
+        ),
+    )
+    # Views and comments counters are written often, so cached lists show them stale
+    query_cache_options = QueryCacheOptions(
+        keys=("slug", "author_id", "category_id", "publication_status", "created"),
+        volatile=("views_count", "unique_views_count", "comments_count"),
+    )
 
     class Meta:
         db_table = "posts"
@@ -146,6 +233,12 @@ class Post(SluggedModel, PublishedModel, TimeStampedModel):
             models.Index(fields=["publication_status", "-created"]),
             models.Index(fields=["category", "-created"]),
             models.Index(fields=["author", "-created"]),
+            GinIndex(fields=["search_vector"], name="posts_search_vector_idx"),
+            # For autocomplete by title prefix (istartswith lookup)
+            models.Index(
+                OpClass(Upper("title"), name="text_pattern_ops"),
+                name="posts_title_prefix_idx",
+            ),
         ]
 
     def __str__(self) -> str:
@@ -175,8 +268,8 @@ class Post(SluggedModel, PublishedModel, TimeStampedModel):
         if not user or not user.is_authenticated:
             return False
 
-        # Post should be authored by user
-        if self.author != user:
+        # Post should be authored by user, compared by id without loading author
+        if self.author_id != user.pk:
             return False
 
         # Post should be published
@@ -189,7 +282,143 @@ class Post(SluggedModel, PublishedModel, TimeStampedModel):
 
         return True
 
-    def increment_views(self) -> None:
-        """Increment the views count"""
-        self.views_count += 1
-        self.save(update_fields=["views_count"])
+    def increment_views(self, visitor: str | None = None) -> None:
+        """
+        Increment the views count and count visitor as unique reader.
+        View is buffered and written to DB periodically, so row is not locked.
+        """
+        from main.services import PostViewsService  # noqa
+
+        self.add_pending_views(PostViewsService.record_view(self.pk, visitor))
+
+    def add_pending_views(self, pending: "PendingViews") -> None:
+        """Adds views, that were not yet written to DB"""
+        self.views_count += pending.views
+        self.unique_views_count = max(self.unique_views_count, pending.unique_views)
+
+
+class PostRankingBucket(models.Model):
+    """Checkpoint of ranking score, that post gained during an hour"""
+
+    post = models.ForeignKey(
+        "Post",
+        on_delete=models.CASCADE,
+        related_name="ranking_buckets",
+    )
+    hour = models.DateTimeField()
+    score = models.FloatField(default=0)
+
+    class Meta:
+        db_table = "post_ranking_buckets"
+        verbose_name = "Post Ranking Bucket"
+        verbose_name_plural = "Post Ranking Buckets"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["post", "hour"], name="unique_post_ranking_bucket"
+            ),
+        ]
+        indexes = [models.Index(fields=["hour"])]
+
+    def __str__(self) -> str:
+        return f"{self.post_id} at {self.hour}: {self.score}"
+
+
+class RelatedPost(models.Model):
+    """Precomputed neighbour of post by similarity of text and category"""
+
+    post = models.ForeignKey(
+        "Post",
+        on_delete=models.CASCADE,
+        related_name="related_posts",
+    )
+    related = models.ForeignKey(
+        "Post",
+        on_delete=models.CASCADE,
+        related_name="related_to",
+    )
+    score = models.FloatField()
+
+    class Meta:
+        db_table = "related_posts"
+        verbose_name = "Related Post"
+        verbose_name_plural = "Related Posts"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["post", "related"], name="unique_related_post"
+            ),
+        ]
+        indexes = [models.Index(fields=["post", "-score"])]
+
+    def __str__(self) -> str:
+        return f"{self.post_id} -> {self.related_id}: {self.score}"
+
+
+class PostTerm(models.Model):
+    """Weight of term in TF-IDF vector of published post"""
+
+    post = models.ForeignKey(
+        "Post",
+        on_delete=models.CASCADE,
+        related_name="terms",
+    )
+    term = models.CharField(max_length=64)
+    weight = models.FloatField()
+
+    class Meta:
+        db_table = "post_terms"
+        verbose_name = "Post Term"
+        verbose_name_plural = "Post Terms"
+        constraints = [
+            models.UniqueConstraint(fields=["post", "term"], name="unique_post_term"),
+        ]
+        # Heaviest postings of term are read without sorting
+        indexes = [
+            models.Index(fields=["term", "-weight"], name="post_terms_term_weight_idx")
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.post_id}: {self.term} {self.weight}"
+
+
+class IndexedTerm(models.Model):
+    """Inverse document frequency of term, computed by rebuild of related posts"""
+
+    term = models.CharField(max_length=64, unique=True)
+    idf = models.FloatField()
+
+    class Meta:
+        db_table = "indexed_terms"
+        verbose_name = "Indexed Term"
+        verbose_name_plural = "Indexed Terms"
+
+    def __str__(self) -> str:
+        return f"{self.term}: {self.idf}"
+
+
+class PostDailyStats(models.Model):
+    """Rollup of views and comments of post during a day"""
+
+    post = models.ForeignKey(
+        "Post",
+        on_delete=models.CASCADE,
+        related_name="daily_stats",
+    )
+    day = models.DateField()
+    views = models.PositiveIntegerField(default=0)
+    # Estimate of unique visitors of the day
+    unique_views = models.PositiveIntegerField(default=0)
+    comments = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        db_table = "post_daily_stats"
+        verbose_name = "Post Daily Stats"
+        verbose_name_plural = "Post Daily Stats"
+        constraints = [
+            # Also index of days range of post
+            models.UniqueConstraint(
+                fields=["post", "day"], name="unique_post_daily_stats"
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.post_id} on {self.day}: {self.views} views"
@@ -0,0 +1,365 @@
+import heapq
+import logging
+import threading
+from collections import defaultdict
+from datetime import UTC, datetime
+from operator import itemgetter
+from typing import Any, Iterable
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F, QuerySet
+
+from main.models import Post, PostRankingBucket
+
+logger = logging.getLogger(__name__)
+
+HOUR = 3600
+# Weekly board is a rolling window of hour buckets, older buckets are dropped
+WEEK_HOURS = 7 * 24
+
+
+def get_hour(moment: datetime | None = None) -> int:
+    """Returns number of hours since epoch, which is bucket of moment"""
+    moment = moment or datetime.now(tz=UTC)
+    return int(moment.timestamp()) // HOUR
+
+
+def get_hour_start(hour: int) -> datetime:
+    """Returns start of hour bucket"""
+    return datetime.fromtimestamp(hour * HOUR, tz=UTC)
+
+
+class LocalRankingStore:
+    """
+    In-process ranking store, used when Redis cache is not configured.
+    Posts are ranked only by activity within current process.
+    """
+
+    def __init__(self) -> None:
+        self._all_time: defaultdict[int, float] = defaultdict(float)
+        self._buckets: defaultdict[int, defaultdict[int, float]] = defaultdict(
+            lambda: defaultdict(float)
+        )
+        self._restored = False
+        self._lock = threading.Lock()
+
+    def add(self, post_id: int, score: float, hour: int) -> None:
+        """Adds score to all-time board and to hour bucket"""
+        with self._lock:
+            self._all_time[post_id] += score
+            self._buckets[hour][post_id] += score
+            for old_hour in [h for h in self._buckets if h <= hour - WEEK_HOURS]:
+                del self._buckets[old_hour]
+
+    def top(
+        self, board: str, weights: dict[int, float] | None, count: int
+    ) -> list[int]:
+        """
+        Returns ids of top posts of all-time board,
+        or of union of hour buckets with weights.
+        """
+        with self._lock:
+            scores: dict[int, float] = self._all_time
+            if weights is not None:
+                scores = defaultdict(float)
+                for hour, weight in weights.items():
+                    for post_id, score in self._buckets.get(hour, {}).items():
+                        scores[post_id] += score * weight
+            top = heapq.nlargest(count, scores.items(), key=itemgetter(1))
+            return [post_id for post_id, _ in top]
+
+    def get_bucket(self, hour: int) -> dict[int, float]:
+        """Returns scores of posts, gained during hour"""
+        with self._lock:
+            return dict(self._buckets.get(hour, {}))
+
+    def load(
+        self, all_time: dict[int, float], buckets: dict[int, dict[int, float]]
+    ) -> None:
+        """Adds restored scores to boards"""
+        with self._lock:
+            for post_id, score in all_time.items():
+                self._all_time[post_id] += score
+            for hour, scores in buckets.items():
+                for post_id, score in scores.items():
+                    self._buckets[hour][post_id] += score
+
+    def remove(self, post_id: int, hours: Iterable[int]) -> None:
+        """Removes post from all boards"""
+        with self._lock:
+            self._all_time.pop(post_id, None)
+            for scores in self._buckets.values():
+                scores.pop(post_id, None)
+
+    def mark_restored(self) -> bool:
+        """Returns True only for the first call, so ranking is restored once"""
+        with self._lock:
+            if self._restored:
+                return False
+            self._restored = True
+            return True
+
+
+class RedisRankingStore:
+    """
+    Ranking store, shared between all processes through Redis sorted sets.
+    All-time scores are kept in one set, recent activity in a set per hour.
+    Weekly and trending boards are unions of hour sets, stored for a short time.
+    """
+
+    ALL_TIME_KEY = "posts:ranking:all"
+    BUCKET_KEY = "posts:ranking:hour:{}"
+    BOARD_KEY = "posts:ranking:board:{}:{}"
+    RESTORED_KEY = "posts:ranking:restored"
+
+    def __init__(self, client: Any) -> None:
+        self.client = client
+
+    def add(self, post_id: int, score: float, hour: int) -> None:
+        """Adds score to all-time board and to hour bucket"""
+        bucket_key = self.BUCKET_KEY.format(hour)
+
+        pipe = self.client.pipeline()
+        pipe.zincrby(self.ALL_TIME_KEY, score, post_id)
+        pipe.zincrby(bucket_key, score, post_id)
+        pipe.expireat(bucket_key, (hour + WEEK_HOURS + 1) * HOUR)
+        pipe.execute()
+
+    def top(
+        self, board: str, weights: dict[int, float] | None, count: int
+    ) -> list[int]:
+        """
+        Returns ids of top posts of all-time board,
+        or of union of hour buckets with weights.
+        """
+        key = self.ALL_TIME_KEY
+        if weights is not None:
+            # Key changes every hour, so stale union is not read after new hour starts
+            key = self.BOARD_KEY.format(board, max(weights))
+            if not self.client.exists(key):
+                pipe = self.client.pipeline()
+                pipe.zunionstore(
+                    key,
+                    {self.BUCKET_KEY.format(h): w for h, w in weights.items()},
+                )
+                pipe.expire(key, settings.POST_RANKING_BOARD_TIMEOUT)
+                pipe.execute()
+
+        return [int(post_id) for post_id in self.client.zrevrange(key, 0, count - 1)]
+
+    def get_bucket(self, hour: int) -> dict[int, float]:
+        """Returns scores of posts, gained during hour"""
+        return {
+            int(post_id): float(score)
+            for post_id, score in self.client.zrange(
+                self.BUCKET_KEY.format(hour), 0, -1, withscores=True
+            )
+        }
+
+    def load(
+        self, all_time: dict[int, float], buckets: dict[int, dict[int, float]]
+    ) -> None:
+        """Adds restored scores to boards"""
+        pipe = self.client.pipeline(transaction=False)
+        for post_id, score in all_time.items():
+            pipe.zincrby(self.ALL_TIME_KEY, score, post_id)
+        for hour, scores in buckets.items():
+            bucket_key = self.BUCKET_KEY.format(hour)
+            for post_id, score in scores.items():
+                pipe.zincrby(bucket_key, score, post_id)
+            pipe.expireat(bucket_key, (hour + WEEK_HOURS + 1) * HOUR)
+        pipe.execute()
+
+    def remove(self, post_id: int, hours: Iterable[int]) -> None:
+        """Removes post from all boards"""
+        pipe = self.client.pipeline(transaction=False)
+        pipe.zrem(self.ALL_TIME_KEY, post_id)
+        for hour in hours:
+            pipe.zrem(self.BUCKET_KEY.format(hour), post_id)
+        pipe.execute()
+
+    def mark_restored(self) -> bool:
+        """Returns True only for the first call, so ranking is restored once"""
+        return bool(self.client.set(self.RESTORED_KEY, 1, nx=True))
+
+
+RankingStore = LocalRankingStore | RedisRankingStore
+
+_ranking_store: RankingStore | None = None
+_ranking_store_lock = threading.Lock()
+
+
+def get_ranking_store() -> RankingStore:
+    """Returns Redis ranking store if Redis cache is configured, else local one"""
+    global _ranking_store
+
+    with _ranking_store_lock:
+        if _ranking_store is None:
+            if settings.CACHES["default"]["BACKEND"].startswith("django_redis"):
+                from django_redis import get_redis_connection  # noqa
+
+                _ranking_store = RedisRankingStore(get_redis_connection("default"))
+            else:
+                _ranking_store = LocalRankingStore()
+        return _ranking_store
+
+
+class PostRankingService:
+    """Service for ranking posts by views and comments: all-time, weekly and trending"""
+
+    ALL_TIME = "all_time"
+    WEEK = "week"
+    TRENDING = "trending"
+
+    CHECKPOINT_KEY = "posts:ranking:checkpoint"
+
+    @staticmethod
+    def record_view(post_id: int) -> None:
+        """Raises rank of viewed post"""
+        PostRankingService.record(post_id, settings.POST_RANKING_VIEW_SCORE)
+
+    @staticmethod
+    def record_comment(post_id: int) -> None:
+        """Raises rank of commented post"""
+        PostRankingService.record(post_id, settings.POST_RANKING_COMMENT_SCORE)
+
+    @staticmethod
+    def record(post_id: int, score: float, moment: datetime | None = None) -> None:
+        """Adds score of activity to post"""
+        get_ranking_store().add(post_id, score, get_hour(moment))
+
+    @staticmethod
+    def remove(post_id: int) -> None:
+        """Removes post from all boards"""
+        hour = get_hour()
+        get_ranking_store().remove(post_id, range(hour - WEEK_HOURS + 1, hour + 1))
+
+    @staticmethod
+    def get_weights(board: str, hour: int) -> dict[int, float] | None:
+        """Returns weights of hour buckets in board, None for all-time board"""
+        if board == PostRankingService.ALL_TIME:
+            return None
+        if board == PostRankingService.WEEK:
+            return {h: 1.0 for h in range(hour - WEEK_HOURS + 1, hour + 1)}
+        if board == PostRankingService.TRENDING:
+            # Activity score halves every half-life, after 8 half-lives it's negligible
+            half_life = settings.POST_RANKING_TRENDING_HALF_LIFE
+            return {
+                hour - age: 0.5 ** (age / half_life)
+                for age in range(min(half_life * 8, WEEK_HOURS))
+            }
+        raise ValueError(f"Unknown ranking board: {board}")
+
+    @staticmethod
+    def top_ids(board: str, count: int) -> list[int]:
+        """Returns ids of top posts of board"""
+        PostRankingService.ensure_restored()
+        weights = PostRankingService.get_weights(board, get_hour())
+        return get_ranking_store().top(board, weights, count)
+
+    @staticmethod
+    def top_posts(
+        board: str,
+        limit: int,
+        exclude: Iterable[int] = (),
+        queryset: QuerySet | None = None,
+    ) -> list[Any]:
+        """
+        Returns top published posts of board, fetched with one id__in query.
+        Ids are over-fetched, as ranked posts may be unpublished or excluded.
+        Posts are taken from queryset, which may be .values() one.
+        """
+        excluded = set(exclude)
+        ids = [
+            post_id
+            for post_id in PostRankingService.top_ids(board, limit * 2 + len(excluded))
+            if post_id not in excluded
+        ]
+        if queryset is None:
+            queryset = Post.objects.for_card()
+        posts = {
+            post["id"] if isinstance(post, dict) else post.id: post
+            for post in queryset.filter(id__in=ids, publication_status=Post.PUBLISHED)
+        }
+        return [posts[post_id] for post_id in ids if post_id in posts][:limit]
+
+    @staticmethod
+    def ensure_restored() -> None:
+        """Restores ranking from DB once, e.g. after Redis restart"""
+        if get_ranking_store().mark_restored():
+            PostRankingService.restore()
+
+    @staticmethod
+    def restore() -> None:
+        """
+        Loads all-time scores from posts views and comments counters,
+        and hour buckets of weekly window from the last checkpoint.
+        """
+        all_time = dict(
+            Post.objects.filter(publication_status=Post.PUBLISHED)
+            .annotate(
+                score=F("views_count") * settings.POST_RANKING_VIEW_SCORE
+                + F("comments_count") * settings.POST_RANKING_COMMENT_SCORE
+            )
+            .filter(score__gt=0)
+            .values_list("id", "score")
+        )
+
+        since = get_hour_start(get_hour() - WEEK_HOURS + 1)
+        buckets: defaultdict[int, dict[int, float]] = defaultdict(dict)
+        for post_id, hour, score in PostRankingBucket.objects.filter(
+            hour__gte=since
+        ).values_list("post_id", "hour", "score"):
+            buckets[get_hour(hour)][post_id] = score
+
+        get_ranking_store().load(all_time, buckets)
+        logger.info(
+            "Restored ranking of %s posts and %s hour buckets",
+            len(all_time),
+            len(buckets),
+        )
+
+    @staticmethod
+    def checkpoint(batch_size: int = 1000) -> int:
+        """
+        Writes hour buckets since the last checkpoint to DB
+        and deletes buckets, that left weekly window.
+        Returns number of written rows.
+        """
+        PostRankingService.ensure_restored()
+        store = get_ranking_store()
+        hour = get_hour()
+        first_hour = hour - WEEK_HOURS + 1
+        # Buckets of past hours don't change, current one is rewritten next time
+        since = max(cache.get(PostRankingService.CHECKPOINT_KEY, 0), first_hour)
+
+        rows = [
+            PostRankingBucket(post_id=post_id, hour=get_hour_start(h), score=score)
+            for h in range(since, hour + 1)
+            for post_id, score in store.get_bucket(h).items()
+        ]
+        # Posts could be deleted after activity
+        existing_ids = set(
+            Post.objects.filter(id__in={row.post_id for row in rows}).values_list(
+                "id", flat=True
+            )
+        )
+        rows = [row for row in rows if row.post_id in existing_ids]
+
+        with transaction.atomic():
+            PostRankingBucket.objects.bulk_create(
+                rows,
+                batch_size=batch_size,
+                update_conflicts=True,
+                unique_fields=["post", "hour"],
+                update_fields=["score"],
+            )
+            PostRankingBucket.objects.filter(
+                hour__lt=get_hour_start(first_hour)
+            ).delete()
+
+        cache.set(PostRankingService.CHECKPOINT_KEY, hour, timeout=None)
+        logger.info("Checkpointed %s post ranking buckets", len(rows))
+        return len(rows)
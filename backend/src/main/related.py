@@ -0,0 +1,358 @@
+import heapq
+import math
+import re
+import zlib
+from collections import Counter, defaultdict
+from itertools import batched
+from operator import itemgetter
+from typing import Iterable, Iterator, NamedTuple
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Count, Min, QuerySet
+
+from main.models import IndexedTerm, Post, PostTerm, RelatedPost
+
+# Words of 3 and more letters
+WORD_RE = re.compile(r"[^\W\d_]{3,}")
+STOP_WORDS = frozenset("""
+    about above after again all also and any are because been before being
+    between both but can could did does doing down during each few for from
+    further had has have having her here hers him his how into its itself just
+    more most not now off once only other our ours out over own same she should
+    some such than that the their theirs them then there these they this those
+    through too under until very was were what when where which while who whom
+    why will with would you your yours
+    """.split())
+# Title words count as this number of content words
+TITLE_WEIGHT = 3
+# Only heaviest terms of post are kept, so index stays compact
+MAX_TERMS = 64
+# Longer words don't fit term column
+MAX_TERM_LENGTH = 64
+
+
+def tokenize(text: str) -> list[str]:
+    """Returns lowercased words of text without stop words"""
+    return [
+        word
+        for word in WORD_RE.findall(text.lower())
+        if word not in STOP_WORDS and len(word) <= MAX_TERM_LENGTH
+    ]
+
+
+def get_term_counts(title: str, content: str) -> Counter[str]:
+    counts = Counter(tokenize(content))
+    for term in tokenize(title):
+        counts[term] += TITLE_WEIGHT
+    return counts
+
+
+def get_idf(documents_count: int, document_frequency: int) -> float:
+    """Returns smoothed inverse document frequency of term"""
+    return math.log((1 + documents_count) / (1 + document_frequency)) + 1
+
+
+class Document(NamedTuple):
+    id: int
+    title: str
+    content: str
+    category_id: int | None
+
+
+class SimilarityIndex:
+    """
+    Sparse TF-IDF vectors of published posts with inverted index of terms.
+    Similarity of posts is cosine of their vectors,
+    raised by RELATED_POSTS_CATEGORY_WEIGHT for posts of the same category.
+    """
+
+    def __init__(
+        self,
+        idf: dict[str, float],
+        documents_count: int,
+        vectors: dict[int, dict[str, float]],
+        categories: dict[int, int | None],
+    ) -> None:
+        self.idf = idf
+        self.documents_count = documents_count
+        self.vectors = vectors
+        self.categories = categories
+        # Term -> post id -> weight of term in post vector
+        self.postings: defaultdict[str, dict[int, float]] = defaultdict(dict)
+        for post_id, vector in vectors.items():
+            self._add_postings(post_id, vector)
+
+    @classmethod
+    def build(cls, documents: Iterable[Document]) -> "SimilarityIndex":
+        """Returns index of documents"""
+        term_counts: dict[int, Counter[str]] = {}
+        categories: dict[int, int | None] = {}
+        document_frequency: Counter[str] = Counter()
+        for document in documents:
+            counts = get_term_counts(document.title, document.content)
+            term_counts[document.id] = counts
+            categories[document.id] = document.category_id
+            document_frequency.update(counts.keys())
+
+        documents_count = len(term_counts)
+        index = cls(
+            {
+                term: get_idf(documents_count, frequency)
+                for term, frequency in document_frequency.items()
+            },
+            documents_count,
+            {},
+            categories,
+        )
+        for post_id, counts in term_counts.items():
+            index.vectors[post_id] = vector = index.vectorize(counts)
+            index._add_postings(post_id, vector)
+        return index
+
+    def vectorize(self, counts: Counter[str]) -> dict[str, float]:
+        """Returns normalized vector of heaviest terms"""
+        # Terms, which are new since build, are as rare as possible
+        new_term_idf = get_idf(self.documents_count, 1)
+        weights = {
+            term: (1 + math.log(count)) * self.idf.get(term, new_term_idf)
+            for term, count in counts.items()
+        }
+        heaviest = heapq.nlargest(MAX_TERMS, weights.items(), key=itemgetter(1))
+        norm = math.sqrt(sum(weight * weight for _, weight in heaviest))
+        return {term: weight / norm for term, weight in heaviest} if norm else {}
+
+    def add(self, document: Document) -> None:
+        """Adds or replaces vector of document, IDF is kept until rebuild"""
+        self.remove(document.id)
+        vector = self.vectorize(get_term_counts(document.title, document.content))
+        self.vectors[document.id] = vector
+        self.categories[document.id] = document.category_id
+        self._add_postings(document.id, vector)
+
+    def remove(self, post_id: int) -> None:
+        for term in self.vectors.pop(post_id, {}):
+            self.postings[term].pop(post_id, None)
+            if not self.postings[term]:
+                del self.postings[term]
+        self.categories.pop(post_id, None)
+
+    def scores(self, post_id: int) -> dict[int, float]:
+        """Returns similarity scores of posts, sharing terms with post"""
+        similarity: defaultdict[int, float] = defaultdict(float)
+        for term, weight in self.vectors.get(post_id, {}).items():
+            for other_id, other_weight in self.postings[term].items():
+                similarity[other_id] += weight * other_weight
+        similarity.pop(post_id, None)
+
+        category_weight = settings.RELATED_POSTS_CATEGORY_WEIGHT
+        category_id = self.categories.get(post_id)
+        return {
+            other_id: (1 - category_weight) * cosine
+            + (
+                category_weight
+                if category_id is not None
+                and self.categories.get(other_id) == category_id
+                else 0
+            )
+            for other_id, cosine in similarity.items()
+        }
+
+    def neighbours(self, post_id: int, count: int) -> list[tuple[int, float]]:
+        """Returns ids and scores of most similar posts"""
+        return heapq.nlargest(count, self.scores(post_id).items(), key=itemgetter(1))
+
+    def _add_postings(self, post_id: int, vector: dict[str, float]) -> None:
+        for term, weight in vector.items():
+            self.postings[term][post_id] = weight
+
+
+class RelatedPostsService:
+    """
+    Service for precomputing related posts of published posts.
+    Index is rebuilt periodically and kept in post_terms table, so a post change
+    writes only vector of the post, neighbours are stored in related_posts table.
+    Writes of index are serialized by transaction-level advisory lock.
+    """
+
+    LOCK_ID = zlib.crc32(b"posts:related")
+    BATCH_SIZE = 2000
+
+    @staticmethod
+    def get_documents(queryset: QuerySet[Post]) -> Iterator[Document]:
+        """Returns documents of published posts of queryset"""
+        rows = (
+            queryset.filter(publication_status=Post.PUBLISHED)
+            .values_list("id", "title", "content", "category_id")
+            .order_by()
+        )
+        return map(
+            Document._make, rows.iterator(chunk_size=RelatedPostsService.BATCH_SIZE)
+        )
+
+    @staticmethod
+    def lock() -> None:
+        """Waits for concurrent writes of index, lock is released on commit"""
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT pg_advisory_xact_lock(%s)", [RelatedPostsService.LOCK_ID]
+            )
+
+    @staticmethod
+    def rebuild() -> int:
+        """Builds index of all published posts and their neighbours, returns posts number"""
+        index = SimilarityIndex.build(RelatedPostsService.get_documents(Post.objects))
+        with transaction.atomic():
+            RelatedPostsService.lock()
+            RelatedPostsService.save_index(index)
+            RelatedPost.objects.all().delete()
+            RelatedPostsService.save_neighbours(index, index.vectors)
+        return len(index.vectors)
+
+    @staticmethod
+    def save_index(index: SimilarityIndex) -> None:
+        """Replaces stored terms rarity and vectors of posts"""
+        IndexedTerm.objects.all().delete()
+        PostTerm.objects.all().delete()
+        terms = (IndexedTerm(term=term, idf=idf) for term, idf in index.idf.items())
+        for terms_batch in batched(terms, RelatedPostsService.BATCH_SIZE):
+            IndexedTerm.objects.bulk_create(terms_batch)
+        rows = (
+            PostTerm(post_id=post_id, term=term, weight=weight)
+            for post_id, vector in index.vectors.items()
+            for term, weight in vector.items()
+        )
+        for batch in batched(rows, RelatedPostsService.BATCH_SIZE):
+            PostTerm.objects.bulk_create(batch)
+
+    @staticmethod
+    def load_index(post_ids: Iterable[int]) -> SimilarityIndex:
+        """
+        Returns part of index, which is enough for scoring given posts:
+        their vectors and heaviest postings of their terms.
+        Only RELATED_POSTS_MAX_POSTINGS postings of each term are read
+        by (term, weight) index, so a post costs at most
+        MAX_TERMS * RELATED_POSTS_MAX_POSTINGS rows, however frequent its terms are.
+        Posts, where term is lighter, get no score from it,
+        which is small, as frequent terms are light everywhere.
+        """
+        vectors: defaultdict[int, dict[str, float]] = defaultdict(dict)
+        categories: dict[int, int | None] = {}
+        rows = PostTerm.objects.filter(post_id__in=list(post_ids)).values_list(
+            "post_id", "term", "weight", "post__category_id"
+        )
+        for post_id, term, weight, category_id in rows:
+            vectors[post_id][term] = weight
+            categories[post_id] = category_id
+        terms = sorted({term for vector in vectors.values() for term in vector})
+        if not terms:
+            return SimilarityIndex({}, 0, vectors, categories)
+
+        scored = set(vectors)
+        table = PostTerm._meta.db_table
+        posts_table = Post._meta.db_table
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT t.post_id, t.term, t.weight, p.category_id "  # noqa: S608
+                "FROM unnest(%s::varchar[]) AS terms(term) "
+                "CROSS JOIN LATERAL ("
+                f"SELECT post_id, term, weight FROM {table} "
+                f"WHERE {table}.term = terms.term ORDER BY weight DESC LIMIT %s"
+                ") AS t "
+                f"JOIN {posts_table} AS p ON p.id = t.post_id",
+                [terms, settings.RELATED_POSTS_MAX_POSTINGS],
+            )
+            for post_id, term, weight, category_id in cursor:
+                if post_id not in scored:
+                    vectors[post_id][term] = weight
+                    categories[post_id] = category_id
+        return SimilarityIndex({}, 0, vectors, categories)
+
+    @staticmethod
+    def save_vector(document: Document) -> None:
+        """Replaces vector of post, terms rarity is kept until rebuild"""
+        counts = get_term_counts(document.title, document.content)
+        idf = dict(
+            IndexedTerm.objects.filter(term__in=counts).values_list("term", "idf")
+        )
+        documents_count = Post.objects.filter(publication_status=Post.PUBLISHED).count()
+        vector = SimilarityIndex(idf, documents_count, {}, {}).vectorize(counts)
+        PostTerm.objects.filter(post_id=document.id).delete()
+        PostTerm.objects.bulk_create(
+            PostTerm(post_id=document.id, term=term, weight=weight)
+            for term, weight in vector.items()
+        )
+
+    @staticmethod
+    def update(post_id: int, listing: Iterable[int] = ()) -> int:
+        """
+        Updates index with changed, unpublished or deleted post,
+        recomputes its neighbours and neighbours of posts, which list it
+        or should list it now. Returns number of recomputed posts.
+        Posts, listing deleted post, are given, as their rows are deleted with it.
+        """
+        with transaction.atomic():
+            RelatedPostsService.lock()
+            if not IndexedTerm.objects.exists():
+                # Index was never built
+                return RelatedPostsService.rebuild()
+
+            document = next(
+                RelatedPostsService.get_documents(Post.objects.filter(pk=post_id)),
+                None,
+            )
+            affected = set(listing)
+            affected.update(
+                RelatedPost.objects.filter(related_id=post_id).values_list(
+                    "post_id", flat=True
+                )
+            )
+            if document is None:
+                removed, _ = PostTerm.objects.filter(post_id=post_id).delete()
+                if not removed and not affected:
+                    # Draft, which was never published
+                    return 0
+            else:
+                RelatedPostsService.save_vector(document)
+                affected.update(
+                    RelatedPostsService.get_outranked(
+                        RelatedPostsService.load_index([post_id]), post_id
+                    )
+                )
+            affected.add(post_id)
+
+            index = RelatedPostsService.load_index(affected)
+            RelatedPost.objects.filter(post_id__in=affected).delete()
+            RelatedPostsService.save_neighbours(index, affected)
+        return len(affected)
+
+    @staticmethod
+    def get_outranked(index: SimilarityIndex, post_id: int) -> list[int]:
+        """Returns ids of posts, whose neighbours are less similar than post"""
+        scores = index.scores(post_id)
+        count = settings.RELATED_POSTS_COUNT
+        lists = {
+            row["post_id"]: row
+            for row in RelatedPost.objects.filter(post_id__in=scores)
+            .values("post_id")
+            .annotate(size=Count("id"), min_score=Min("score"))
+        }
+        return [
+            other_id
+            for other_id, score in scores.items()
+            if other_id not in lists
+            or lists[other_id]["size"] < count
+            or score > lists[other_id]["min_score"]
+        ]
+
+    @staticmethod
+    def save_neighbours(index: SimilarityIndex, post_ids: Iterable[int]) -> None:
+        """Writes neighbours of posts, which have no rows"""
+        count = settings.RELATED_POSTS_COUNT
+        rows = (
+            RelatedPost(post_id=post_id, related_id=related_id, score=score)
+            for post_id in post_ids
+            for related_id, score in index.neighbours(post_id, count)
+        )
+        for batch in batched(rows, RelatedPostsService.BATCH_SIZE):
+            RelatedPost.objects.bulk_create(batch)
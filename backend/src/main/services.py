@@ -0,0 +1,645 @@
+import hashlib
+import logging
+import math
+import re
+import threading
+import time
+from collections import Counter
+from typing import Any, Callable, ContextManager, Iterable, NamedTuple
+
+from django.conf import settings
+from django.contrib.postgres.search import SearchHeadline, SearchQuery
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import Min, Value
+from django.http import HttpRequest
+from django.utils import timezone
+from rest_framework.request import Request
+
+from app.conditional import ResourceVersions
+from app.locks import redis_lock, thread_lock
+from main.models import SEARCH_CONFIG, Category, Post
+from main.ranking import PostRankingService
+from main.sketches import HyperLogLog
+from main.stats import PostStatsService
+from subscribe.models import Subscription
+
+logger = logging.getLogger(__name__)
+
+
+class PendingViews(NamedTuple):
+    """Views of post, that were not yet written to DB"""
+
+    views: int
+    unique_views: int
+
+
+class LocalViewsBuffer:
+    """
+    In-process views buffer, used when Redis cache is not configured.
+    Unique views are estimated only within current process.
+    Sketches of flushed posts are dropped, keeping their estimate as base
+    of the next sketch, so only posts viewed since flush hold sketch memory,
+    and visitors, returning after flush, are counted again.
+    """
+
+    def __init__(self) -> None:
+        self._pending: Counter[int] = Counter()
+        self._flushing: Counter[int] = Counter()
+        self._sketches: dict[int, HyperLogLog] = {}
+        # Unique views of dropped sketches
+        self._unique_base: Counter[int] = Counter()
+        self._dirty: set[int] = set()
+        self._flushing_dirty: set[int] = set()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+
+    def add(
+        self, post_id: int, visitor: str | None = None, amount: int = 1
+    ) -> PendingViews:
+        """Adds views to buffer and returns pending views of the post"""
+        with self._lock:
+            self._pending[post_id] += amount
+            if visitor is not None:
+                self._sketches.setdefault(post_id, HyperLogLog()).add(visitor)
+                self._dirty.add(post_id)
+            return self._get(post_id)
+
+    def get(self, post_id: int) -> PendingViews:
+        """Returns pending views of the post"""
+        with self._lock:
+            return self._get(post_id)
+
+    def get_many(self, post_ids: Iterable[int]) -> dict[int, PendingViews]:
+        """Returns pending views of posts"""
+        with self._lock:
+            return {post_id: self._get(post_id) for post_id in post_ids}
+
+    def _get(self, post_id: int) -> PendingViews:
+        return PendingViews(
+            views=self._pending[post_id] + self._flushing[post_id],
+            unique_views=self._get_unique_views(post_id),
+        )
+
+    def _get_unique_views(self, post_id: int) -> int:
+        sketch = self._sketches.get(post_id)
+        return self._unique_base[post_id] + (sketch.count() if sketch else 0)
+
+    def drain(self) -> tuple[dict[int, int], dict[int, int]]:
+        """
+        Moves pending views to flushing state and returns them
+        with unique views of posts, that got new visitors.
+        """
+        with self._lock:
+            if not self._flushing:
+                self._flushing, self._pending = self._pending, Counter()
+            if not self._flushing_dirty:
+                self._flushing_dirty, self._dirty = self._dirty, set()
+            unique_views = {
+                post_id: self._get_unique_views(post_id)
+                for post_id in self._flushing_dirty
+            }
+            return dict(self._flushing), unique_views
+
+    def lock_flush(self) -> ContextManager[bool]:
+        """Returns lock of flush, which yields False, if concurrent flush holds it"""
+        return thread_lock(self._flush_lock)
+
+    def ack(self) -> None:
+        """Forgets views, that were written to DB, and sketches of flushed posts"""
+        with self._lock:
+            # Sketches of posts with visitors since drain keep not flushed ones
+            for post_id in self._flushing_dirty - self._dirty:
+                self._unique_base[post_id] = self._get_unique_views(post_id)
+                del self._sketches[post_id]
+            self._flushing = Counter()
+            self._flushing_dirty = set()
+
+
+class RedisViewsBuffer:
+    """
+    Views buffer, shared between all processes through Redis.
+    Views are counted in hash, unique visitors in HyperLogLog per post.
+    """
+
+    KEY = "posts:views:pending"
+    FLUSHING_KEY = "posts:views:flushing"
+    UNIQUE_KEY = "posts:views:unique:{}"
+    DIRTY_KEY = "posts:views:unique:dirty"
+    FLUSHING_DIRTY_KEY = "posts:views:unique:flushing"
+    FLUSH_LOCK_KEY = "posts:views:flush:lock"
+
+    def __init__(self, client: Any) -> None:
+        self.client = client
+
+    def add(
+        self, post_id: int, visitor: str | None = None, amount: int = 1
+    ) -> PendingViews:
+        """Adds views to buffer and returns pending views of the post"""
+        unique_key = self.UNIQUE_KEY.format(post_id)
+
+        pipe = self.client.pipeline()
+        pipe.hincrby(self.KEY, post_id, amount)
+        pipe.hget(self.FLUSHING_KEY, post_id)
+        if visitor is not None:
+            pipe.pfadd(unique_key, visitor)
+            pipe.sadd(self.DIRTY_KEY, post_id)
+        pipe.pfcount(unique_key)
+        pending, flushing, *_, unique_views = pipe.execute()
+
+        return PendingViews(
+            views=int(pending) + int(flushing or 0),
+            unique_views=int(unique_views),
+        )
+
+    def get(self, post_id: int) -> PendingViews:
+        """Returns pending views of the post"""
+        pipe = self.client.pipeline()
+        pipe.hget(self.KEY, post_id)
+        pipe.hget(self.FLUSHING_KEY, post_id)
+        pipe.pfcount(self.UNIQUE_KEY.format(post_id))
+        pending, flushing, unique_views = pipe.execute()
+
+        return PendingViews(
+            views=int(pending or 0) + int(flushing or 0),
+            unique_views=int(unique_views),
+        )
+
+    def get_many(self, post_ids: Iterable[int]) -> dict[int, PendingViews]:
+        """Returns pending views of posts with one round trip"""
+        post_ids = list(post_ids)
+        if not post_ids:
+            return {}
+
+        pipe = self.client.pipeline()
+        pipe.hmget(self.KEY, post_ids)
+        pipe.hmget(self.FLUSHING_KEY, post_ids)
+        for post_id in post_ids:
+            pipe.pfcount(self.UNIQUE_KEY.format(post_id))
+        pending, flushing, *unique_views = pipe.execute()
+
+        return {
+            post_id: PendingViews(
+                views=int(pending[i] or 0) + int(flushing[i] or 0),
+                unique_views=int(unique_views[i]),
+            )
+            for i, post_id in enumerate(post_ids)
+        }
+
+    def drain(self) -> tuple[dict[int, int], dict[int, int]]:
+        """
+        Moves pending views to flushing keys and returns them
+        with unique views of posts, that got new visitors.
+        Views left by failed flush are returned first.
+        """
+        # Renaming is atomic, so no views are lost between reading and deleting
+        self._rename_if_not_flushing(self.KEY, self.FLUSHING_KEY)
+        self._rename_if_not_flushing(self.DIRTY_KEY, self.FLUSHING_DIRTY_KEY)
+
+        views = {
+            int(post_id): int(count)
+            for post_id, count in self.client.hgetall(self.FLUSHING_KEY).items()
+        }
+
+        dirty_ids = [int(i) for i in self.client.smembers(self.FLUSHING_DIRTY_KEY)]
+        pipe = self.client.pipeline()
+        for post_id in dirty_ids:
+            pipe.pfcount(self.UNIQUE_KEY.format(post_id))
+        unique_views = dict(zip(dirty_ids, map(int, pipe.execute())))
+
+        return views, unique_views
+
+    def _rename_if_not_flushing(self, key: str, flushing_key: str) -> None:
+        from redis.exceptions import ResponseError  # noqa
+
+        if self.client.exists(flushing_key):
+            return
+        try:
+            self.client.rename(key, flushing_key)
+        except ResponseError:
+            # Nothing to flush
+            pass
+
+    def lock_flush(self) -> ContextManager[bool]:
+        """Returns lock of flush, which yields False, if concurrent flush holds it"""
+        return redis_lock(
+            self.client, self.FLUSH_LOCK_KEY, settings.POST_VIEWS_FLUSH_LOCK_TIMEOUT
+        )
+
+    def ack(self) -> None:
+        """Forgets views, that were written to DB"""
+        self.client.delete(self.FLUSHING_KEY, self.FLUSHING_DIRTY_KEY)
+
+
+ViewsBuffer = LocalViewsBuffer | RedisViewsBuffer
+
+_views_buffer: ViewsBuffer | None = None
+_views_buffer_lock = threading.Lock()
+
+
+def get_views_buffer() -> ViewsBuffer:
+    """Returns Redis views buffer if Redis cache is configured, else local one"""
+    global _views_buffer
+
+    with _views_buffer_lock:
+        if _views_buffer is None:
+            if settings.CACHES["default"]["BACKEND"].startswith("django_redis"):
+                from django_redis import get_redis_connection  # noqa
+
+                _views_buffer = RedisViewsBuffer(get_redis_connection("default"))
+            else:
+                _views_buffer = LocalViewsBuffer()
+        return _views_buffer
+
+
+def get_client_ip(request: Request) -> str:
+    """
+    Returns address of client, which the outermost trusted proxy appended
+    to X-Forwarded-For. Addresses before it are sent by client and may be forged.
+    """
+    proxies = settings.TRUSTED_PROXY_COUNT
+    forwarded_for = [
+        address.strip()
+        for address in request.META.get("HTTP_X_FORWARDED_FOR", "").split(",")
+        if address.strip()
+    ]
+    if proxies and forwarded_for:
+        return forwarded_for[-min(proxies, len(forwarded_for))]
+    return request.META.get("REMOTE_ADDR", "")
+
+
+def get_visitor_fingerprint(request: Request) -> str:
+    """Returns key of visitor for unique views counting"""
+    if request.user.is_authenticated:
+        return f"user:{request.user.pk}"
+
+    ip = get_client_ip(request)
+    user_agent = request.META.get("HTTP_USER_AGENT", "")
+    digest = hashlib.sha256(f"{ip}|{user_agent}".encode()).hexdigest()
+    return f"anon:{digest[:32]}"
+
+
+class PostViewsService:
+    """Service for write-behind counting of post views and unique views"""
+
+    _last_local_flush = time.monotonic()
+
+    @staticmethod
+    def record_view(post_id: int, visitor: str | None = None) -> PendingViews:
+        """Records post view in buffer and returns its pending views"""
+        buffer = get_views_buffer()
+        pending = buffer.add(post_id, visitor)
+        PostRankingService.record_view(post_id)
+        PostStatsService.record_view(post_id, visitor)
+
+        # Local buffer can't be reached by Celery worker, so it is flushed in-process
+        if isinstance(buffer, LocalViewsBuffer):
+            now = time.monotonic()
+            interval = settings.POST_VIEWS_FLUSH_INTERVAL
+            if now - PostViewsService._last_local_flush >= interval:
+                PostViewsService._last_local_flush = now
+                transaction.on_commit(PostViewsService.flush_views)
+                transaction.on_commit(PostStatsService.flush)
+
+        return pending
+
+    @staticmethod
+    def get_pending_views(post_id: int) -> PendingViews:
+        """Returns views of post, that were not yet written to DB"""
+        return get_views_buffer().get(post_id)
+
+    @staticmethod
+    def get_pending_views_many(post_ids: Iterable[int]) -> dict[int, PendingViews]:
+        """Returns views of posts, that were not yet written to DB"""
+        return get_views_buffer().get_many(post_ids)
+
+    @staticmethod
+    def flush_views(batch_size: int = 1000) -> int:
+        """
+        Writes buffered views and unique views estimates to DB
+        with bulk UPDATE ... FROM (VALUES ...) batches.
+        Returns number of updated posts.
+        """
+        buffer = get_views_buffer()
+        # Flushing hash is read by every flush until ack, so flushes don't overlap
+        with buffer.lock_flush() as locked:
+            if not locked:
+                return 0
+            views, unique_views = buffer.drain()
+            rows = [
+                (post_id, views.get(post_id, 0), unique_views.get(post_id))
+                for post_id in views.keys() | unique_views.keys()
+            ]
+            if not rows:
+                return 0
+
+            table = Post._meta.db_table
+            with transaction.atomic(), connection.cursor() as cursor:
+                for start in range(0, len(rows), batch_size):
+                    end = start + batch_size
+                    batch = rows[start:end]
+                    values = ", ".join(
+                        ["(%s::bigint, %s::integer, %s::integer)"] * len(batch)
+                    )
+                    # Estimate of unique views can't decrease, e.g. after Redis data loss
+                    cursor.execute(
+                        f"UPDATE {table} AS p "  # noqa: S608
+                        "SET views_count = p.views_count + v.delta, "
+                        "unique_views_count = GREATEST(p.unique_views_count, v.unique_views) "
+                        f"FROM (VALUES {values}) AS v(id, delta, unique_views) "
+                        "WHERE p.id = v.id",
+                        [param for row in batch for param in row],
+                    )
+
+            buffer.ack()
+            # Feed may be ordered by views, details show live counters anyway
+            ResourceVersions.touch("posts")
+            logger.info("Flushed views of %s posts", len(rows))
+            return len(rows)
+
+
+class SearchFacet(NamedTuple):
+    """Number of found posts in category"""
+
+    category_id: int | None
+    name: str | None
+    slug: str | None
+    posts_count: int
+
+
+class SearchResults(NamedTuple):
+    """Page of found posts with total count and category facets"""
+
+    total: int
+    posts: list[Post]
+    facets: list[SearchFacet]
+
+
+class PostSearchService:
+    """Service for full-text search of published posts"""
+
+    @staticmethod
+    def search(
+        text: str,
+        category: str | None = None,
+        limit: int = 20,
+        offset: int = 0,
+    ) -> SearchResults:
+        """
+        Returns page of posts ordered by rank with highlighted headlines.
+        Page ids, total count and facets are fetched with one query,
+        facets are counted over all matches, ignoring category filter.
+        """
+        posts_table = Post._meta.db_table
+        categories_table = Category._meta.db_table
+        category_filter = "AND c.slug = %(category)s" if category else ""
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"""
+                WITH matches AS (
+                    SELECT p.id, p.category_id, p.created,
+                           ts_rank(p.search_vector, q.query) AS rank
+                    FROM {posts_table} AS p,
+                         websearch_to_tsquery(%(config)s::regconfig, %(text)s)
+                            AS q(query)
+                    WHERE p.search_vector @@ q.query
+                      AND p.publication_status = %(published)s
+                ),
+                filtered AS (
+                    SELECT m.* FROM matches AS m
+                    LEFT JOIN {categories_table} AS c ON c.id = m.category_id
+                    WHERE TRUE {category_filter}
+                ),
+                page AS (
+                    SELECT id, rank FROM filtered
+                    ORDER BY rank DESC, created DESC, id DESC
+                    LIMIT %(limit)s OFFSET %(offset)s
+                )
+                SELECT 'hit', id, rank::float8, NULL, NULL FROM page
+                UNION ALL
+                SELECT 'facet', m.category_id, count(*)::float8, c.name, c.slug
+                FROM matches AS m
+                LEFT JOIN {categories_table} AS c ON c.id = m.category_id
+                GROUP BY m.category_id, c.name, c.slug
+                UNION ALL
+                SELECT 'total', NULL, count(*)::float8, NULL, NULL FROM filtered
+                """,  # noqa: S608
+                {
+                    "config": SEARCH_CONFIG,
+                    "text": text,
+                    "published": Post.PUBLISHED,
+                    "category": category,
+                    "limit": limit,
+                    "offset": offset,
+                },
+            )
+            rows = cursor.fetchall()
+
+        ranks: dict[int, float] = {}
+        facets: list[SearchFacet] = []
+        total = 0
+        for kind, key, value, name, slug in rows:
+            if kind == "hit":
+                ranks[key] = value
+            elif kind == "facet":
+                facets.append(SearchFacet(key, name, slug, int(value)))
+            else:
+                total = int(value)
+        facets.sort(key=lambda facet: (-facet.posts_count, facet.name or ""))
+
+        return SearchResults(
+            total=total,
+            posts=PostSearchService.get_posts(text, ranks),
+            facets=facets,
+        )
+
+    @staticmethod
+    def get_posts(text: str, ranks: dict[int, float]) -> list[Post]:
+        """Returns posts by ids with headlines in order of rank"""
+        if not ranks:
+            return []
+
+        query = SearchQuery(text, search_type="websearch", config=SEARCH_CONFIG)
+        posts = (
+            Post.objects.filter(id__in=ranks)
+            .for_card()
+            .annotate(
+                headline=SearchHeadline(
+                    "content",
+                    query,
+                    config=SEARCH_CONFIG,
+                    start_sel="<mark>",
+                    stop_sel="</mark>",
+                    max_words=35,
+                    min_words=15,
+                    max_fragments=2,
+                )
+            )
+        )
+        for post in posts:
+            post.rank = ranks[post.pk]
+        # Same order as in search query
+        return sorted(
+            posts,
+            key=lambda post: (-ranks[post.pk], -post.created.timestamp(), -post.pk),
+        )
+
+
+class PostAutocompleteService:
+    """
+    Service for suggesting posts and categories by typed text.
+    Served by prefix indexes only, short prefixes are cached.
+    """
+
+    CACHE_KEY = "posts:autocomplete:{}:{}"
+
+    @staticmethod
+    def suggest(text: str, limit: int = 8) -> dict[str, list[dict[str, Any]]]:
+        """Returns posts and categories (id, title/name, slug) matching text"""
+        normalized = " ".join(text.split()).lower()
+        if not normalized:
+            return {"posts": [], "categories": []}
+
+        # Short prefixes match most rows and are typed most often
+        cacheable = len(normalized) <= settings.POSTS_AUTOCOMPLETE_CACHE_MAX_LENGTH
+        cache_key = PostAutocompleteService.CACHE_KEY.format(
+            normalized.encode().hex(), limit
+        )
+        if cacheable:
+            suggestions = cache.get(cache_key)
+            if suggestions is not None:
+                return suggestions
+
+        suggestions = {
+            "posts": PostAutocompleteService.get_posts(normalized, limit),
+            "categories": PostAutocompleteService.get_categories(normalized, limit),
+        }
+        if cacheable:
+            cache.set(cache_key, suggestions, settings.POSTS_AUTOCOMPLETE_CACHE_TIMEOUT)
+        return suggestions
+
+    @staticmethod
+    def get_posts(text: str, limit: int) -> list[dict[str, Any]]:
+        """
+        Returns published posts, which title or one of title words starts with text.
+        Posts with title prefix go first, then the most viewed.
+        Both matches are limited separately, so each is served by its own index.
+        """
+        posts = Post.objects.filter(publication_status=Post.PUBLISHED).order_by(
+            "-views_count", "-id"
+        )
+        fields = ("id", "title", "slug", "views_count", "title_prefix_order")
+        matches = (
+            posts.filter(title__istartswith=text)
+            .annotate(title_prefix_order=Value(0))
+            .values(*fields)[:limit]
+        )
+
+        words = re.findall(r"\w+", text)
+        if words:
+            # Title lexemes have weight A in search vector, last word is a prefix
+            terms = [f"{word}:A" for word in words[:-1]] + [f"{words[-1]}:*A"]
+            query = SearchQuery(
+                " & ".join(terms), search_type="raw", config=SEARCH_CONFIG
+            )
+            word_matches = (
+                posts.filter(search_vector=query)
+                .exclude(title__istartswith=text)
+                .annotate(title_prefix_order=Value(1))
+                .values(*fields)[:limit]
+            )
+            matches = matches.union(word_matches, all=True).order_by(
+                "title_prefix_order", "-views_count", "-id"
+            )[:limit]
+
+        return [
+            {"id": post["id"], "title": post["title"], "slug": post["slug"]}
+            for post in matches
+        ]
+
+    @staticmethod
+    def get_categories(text: str, limit: int) -> list[dict[str, Any]]:
+        """Returns categories, which name starts with text"""
+        categories = (
+            Category.objects.filter(name__istartswith=text)
+            .order_by("name")
+            .values("id", "name", "slug")[:limit]
+        )
+        return [dict(category) for category in categories]
+
+
+class PinnedPostsCache:
+    """
+    Cache of precomputed pinned posts blocks, shared by feed endpoints.
+    Blocks are invalidated by PinnedPost, Subscription and pinned Post changes
+    and expire, when the earliest subscription of pinning users ends,
+    so no time comparisons are needed on read.
+    """
+
+    VERSION_KEY = "posts:pinned:version"
+    KEY = "posts:pinned:{}:{}:{}"
+
+    @staticmethod
+    def get_block(
+        name: str, request: HttpRequest, build: Callable[[], list[dict[str, Any]]]
+    ) -> list[dict[str, Any]]:
+        """Returns cached block, building it on miss"""
+        # Serialized data may contain absolute URLs
+        key = PinnedPostsCache.KEY.format(
+            PinnedPostsCache.get_version(), name, request.get_host()
+        )
+
+        block = cache.get(key)
+        if block is None:
+            block = build()
+            cache.set(key, block, PinnedPostsCache.get_timeout())
+        return block
+
+    @staticmethod
+    def get_version() -> int:
+        """
+        Returns current version of blocks.
+        Lost version is started from current time, so blocks cached
+        under previous versions are not used again.
+        """
+        return (
+            cache.get_or_set(PinnedPostsCache.VERSION_KEY, time.time_ns, timeout=None)
+            or time.time_ns()
+        )
+
+    @staticmethod
+    def get_timeout() -> int:
+        """Returns seconds until the earliest active subscription of pinning users ends"""
+        now = timezone.now()
+        end_date = Subscription.objects.filter(
+            user__pinned_post__isnull=False,
+            status=Subscription.ACTIVE,
+            end_date__gt=now,
+        ).aggregate(end_date=Min("end_date"))["end_date"]
+
+        timeout = settings.PINNED_POSTS_CACHE_TIMEOUT
+        if end_date is not None:
+            timeout = min(timeout, math.ceil((end_date - now).total_seconds()))
+        return max(timeout, 1)
+
+    @staticmethod
+    def invalidate() -> None:
+        """Makes all cached blocks outdated"""
+        try:
+            cache.incr(PinnedPostsCache.VERSION_KEY)
+        except ValueError:
+            cache.set(PinnedPostsCache.VERSION_KEY, time.time_ns(), timeout=None)
+
+    @staticmethod
+    def invalidate_on_commit() -> None:
+        """
+        Invalidates blocks now for reads in current transaction and after commit,
+        so block built by concurrent request from old data is not kept.
+        """
+        PinnedPostsCache.invalidate()
+        transaction.on_commit(PinnedPostsCache.invalidate)
+
+
+# Pinned posts in responses expire with blocks
+ResourceVersions.timeouts["pinned"] = PinnedPostsCache.get_timeout
@@ -0,0 +1,197 @@
+from functools import partial
+from typing import Any
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from accounts.models import User
+from app.conditional import ResourceVersions
+from app.fragments import FragmentCache, get_fragment_name
+from app.query_cache import get_options
+from comments.models import Comment
+from main.models import Category, Post, RelatedPost
+from main.ranking import PostRankingService
+from main.services import PinnedPostsCache
+from main.stats import PostStatsService
+from subscribe.models import PinnedPost, Subscription
+
+
+@receiver(post_save, sender=PinnedPost)
+@receiver(post_delete, sender=PinnedPost)
+@receiver(post_save, sender=Subscription)
+@receiver(post_delete, sender=Subscription)
+def invalidate_pinned_posts_cache(sender: type, **kwargs: Any) -> None:
+    """Handler of pinned posts or subscriptions change"""
+    PinnedPostsCache.invalidate_on_commit()
+
+
+@receiver(post_save, sender=Post)
+def invalidate_pinned_post_cache(
+    sender: type[Post], instance: Post, created: bool, **kwargs: Any
+) -> None:
+    """Handler of pinned post change, e.g. editing or unpublishing"""
+    # Counters in blocks are refreshed, when blocks expire
+    update_fields = kwargs.get("update_fields")
+    options = get_options(sender)
+    if created or (
+        update_fields and options and set(update_fields) <= set(options.volatile)
+    ):
+        return
+    if Post.pin_info.is_cached(instance):
+        # Pin was loaded with post, e.g. by for_detail()
+        is_pinned = hasattr(instance, "pin_info")
+    else:
+        is_pinned = PinnedPost.objects.filter(post_id=instance.pk).exists()
+    if is_pinned:
+        PinnedPostsCache.invalidate_on_commit()
+
+
+@receiver(post_save, sender=Comment)
+def rank_commented_post(
+    sender: type[Comment], instance: Comment, created: bool, **kwargs: Any
+) -> None:
+    """Handler of new comment, raising rank of commented post"""
+    if created and instance.is_active:
+        post_id = instance.post_id
+        transaction.on_commit(lambda: PostRankingService.record_comment(post_id))
+
+
+@receiver(post_save, sender=Comment)
+def count_post_comment(
+    sender: type[Comment], instance: Comment, created: bool, **kwargs: Any
+) -> None:
+    """Handler of new comment, counted in daily stats of post"""
+    if created and instance.is_active:
+        post_id = instance.post_id
+        transaction.on_commit(lambda: PostStatsService.record_comment(post_id))
+
+
+@receiver(post_delete, sender=Post)
+def remove_post_from_ranking(sender: type[Post], instance: Post, **kwargs: Any) -> None:
+    """Handler of post deletion"""
+    # Primary key is cleared after deletion
+    post_id = instance.pk
+    transaction.on_commit(lambda: PostRankingService.remove(post_id))
+
+
+# Fields of post, which its related posts are computed from
+RELATED_POSTS_SOURCE_FIELDS = {"title", "content", "category", "publication_status"}
+
+
+@receiver(post_save, sender=Post)
+def schedule_related_posts_update(
+    sender: type[Post], instance: Post, **kwargs: Any
+) -> None:
+    """Handler of post change, updating its related posts and posts listing it"""
+    if not settings.USE_CELERY:
+        # Related posts are rebuilt by "build_related_posts" command
+        return
+    update_fields = kwargs.get("update_fields")
+    if update_fields and not RELATED_POSTS_SOURCE_FIELDS.intersection(update_fields):
+        return
+
+    from main.tasks import update_related_posts  # noqa
+
+    transaction.on_commit(partial(update_related_posts.delay, instance.pk))
+
+
+@receiver(pre_delete, sender=Post)
+def schedule_related_posts_removal(
+    sender: type[Post], instance: Post, **kwargs: Any
+) -> None:
+    """Handler of post deletion, replacing it in posts listing it"""
+    if not settings.USE_CELERY:
+        return
+
+    from main.tasks import update_related_posts  # noqa
+
+    # Rows of deleted post are deleted with it, so they are read before
+    listing = list(
+        RelatedPost.objects.filter(related_id=instance.pk).values_list(
+            "post_id", flat=True
+        )
+    )
+    transaction.on_commit(partial(update_related_posts.delay, instance.pk, listing))
+
+
+@receiver(pre_save, sender=Post)
+def touch_renamed_post_version(
+    sender: type[Post], instance: Post, **kwargs: Any
+) -> None:
+    """Handler of post slug change, so post is not revalidated under old URL"""
+    if instance._state.adding:
+        return
+    old_slug = Post.objects.filter(pk=instance.pk).values_list("slug", flat=True)
+    for slug in old_slug:
+        if slug != instance.slug:
+            ResourceVersions.touch_on_commit(f"post:{slug}")
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def touch_post_versions(sender: type[Post], instance: Post, **kwargs: Any) -> None:
+    """Handler of post change, also changing posts counters of categories"""
+    ResourceVersions.touch_on_commit(
+        "posts", "categories", f"post:{instance.slug}", f"comments:{instance.pk}"
+    )
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def touch_comment_versions(
+    sender: type[Comment], instance: Comment, **kwargs: Any
+) -> None:
+    """Handler of comment change, also changing comments counter of post"""
+    slugs = Post.objects.filter(pk=instance.post_id).values_list("slug", flat=True)
+    ResourceVersions.touch_on_commit(
+        "posts", f"comments:{instance.post_id}", *(f"post:{slug}" for slug in slugs)
+    )
+
+
+@receiver(post_save, sender=PinnedPost)
+@receiver(post_delete, sender=PinnedPost)
+@receiver(post_save, sender=Subscription)
+@receiver(post_delete, sender=Subscription)
+def touch_pinned_versions(sender: type, **kwargs: Any) -> None:
+    """Handler of pinned posts or subscriptions change"""
+    ResourceVersions.touch_on_commit("pinned")
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def touch_category_versions(sender: type[Category], **kwargs: Any) -> None:
+    """Handler of category change, shown in posts"""
+    ResourceVersions.touch_on_commit("categories")
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def touch_user_versions(sender: type[User], **kwargs: Any) -> None:
+    """Handler of user change, shown as author of posts and comments"""
+    # Login doesn't change author info
+    update_fields = kwargs.get("update_fields")
+    if update_fields and set(update_fields) <= {"last_login"}:
+        return
+    ResourceVersions.touch_on_commit("users")
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def touch_fragment_versions(
+    sender: type[Post | Comment | User | Category], instance: Any, **kwargs: Any
+) -> None:
+    """Handler of object change, outdating cached cards, which show it"""
+    # Counters and login are rendered from rows, not from cached cards
+    update_fields = kwargs.get("update_fields")
+    options = get_options(sender)
+    if update_fields and options and set(update_fields) <= set(options.volatile):
+        return
+    FragmentCache.touch_on_commit(get_fragment_name(sender, instance.pk))
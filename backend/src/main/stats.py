@@ -0,0 +1,266 @@
+import logging
+import threading
+from collections import Counter
+from datetime import date, timedelta
+from typing import Any, ContextManager, NamedTuple
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import QuerySet, Sum
+from django.utils import timezone
+
+from app.locks import redis_lock, thread_lock
+from main.models import Post, PostDailyStats
+from main.sketches import HyperLogLog
+
+logger = logging.getLogger(__name__)
+
+# Views of a day may be flushed after midnight, so its unique visitors are kept longer
+UNIQUE_VISITORS_DAYS = 2
+
+
+class DailyStats(NamedTuple):
+    """Stats of post during a day, that were not yet written to DB"""
+
+    views: int
+    unique_views: int
+    comments: int
+
+
+# Post id and day
+StatsKey = tuple[int, date]
+
+
+class LocalStatsBuffer:
+    """
+    In-process daily stats buffer, used when Redis cache is not configured.
+    Unique visitors are estimated only within current process.
+    """
+
+    def __init__(self) -> None:
+        self._views: Counter[StatsKey] = Counter()
+        self._comments: Counter[StatsKey] = Counter()
+        self._sketches: dict[StatsKey, HyperLogLog] = {}
+        self._flushing: dict[StatsKey, DailyStats] = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+
+    def add_view(self, post_id: int, day: date, visitor: str | None = None) -> None:
+        with self._lock:
+            self._views[post_id, day] += 1
+            if visitor is not None:
+                self._sketches.setdefault((post_id, day), HyperLogLog()).add(visitor)
+
+    def add_comment(self, post_id: int, day: date) -> None:
+        with self._lock:
+            self._comments[post_id, day] += 1
+
+    def drain(self) -> dict[StatsKey, DailyStats]:
+        """Moves pending stats to flushing state and returns them"""
+        with self._lock:
+            if not self._flushing:
+                self._flushing = {
+                    key: DailyStats(
+                        views=self._views[key],
+                        unique_views=(
+                            self._sketches[key].count() if key in self._sketches else 0
+                        ),
+                        comments=self._comments[key],
+                    )
+                    for key in self._views.keys() | self._comments.keys()
+                }
+                self._views, self._comments = Counter(), Counter()
+            return dict(self._flushing)
+
+    def lock_flush(self) -> ContextManager[bool]:
+        """Returns lock of flush, which yields False, if concurrent flush holds it"""
+        return thread_lock(self._flush_lock)
+
+    def ack(self) -> None:
+        """Forgets stats, that were written to DB, and visitors of past days"""
+        first_day = timezone.localdate() - timedelta(days=UNIQUE_VISITORS_DAYS - 1)
+        with self._lock:
+            self._flushing = {}
+            for key in [key for key in self._sketches if key[1] < first_day]:
+                del self._sketches[key]
+
+
+class RedisStatsBuffer:
+    """
+    Daily stats buffer, shared between all processes through Redis.
+    Counters are kept in hash by post, day and name, visitors in HyperLogLog
+    per post and day, which expires after the day.
+    """
+
+    KEY = "posts:stats:pending"
+    FLUSHING_KEY = "posts:stats:flushing"
+    UNIQUE_KEY = "posts:stats:unique:{}:{}"
+    FLUSH_LOCK_KEY = "posts:stats:flush:lock"
+
+    def __init__(self, client: Any) -> None:
+        self.client = client
+
+    def add_view(self, post_id: int, day: date, visitor: str | None = None) -> None:
+        pipe = self.client.pipeline()
+        pipe.hincrby(self.KEY, f"{post_id}:{day}:views", 1)
+        if visitor is not None:
+            unique_key = self.UNIQUE_KEY.format(post_id, day)
+            pipe.pfadd(unique_key, visitor)
+            pipe.expire(unique_key, timedelta(days=UNIQUE_VISITORS_DAYS))
+        pipe.execute()
+
+    def add_comment(self, post_id: int, day: date) -> None:
+        self.client.hincrby(self.KEY, f"{post_id}:{day}:comments", 1)
+
+    def drain(self) -> dict[StatsKey, DailyStats]:
+        """
+        Moves pending stats to flushing key and returns them.
+        Stats left by failed flush are returned first.
+        """
+        from redis.exceptions import ResponseError  # noqa
+
+        # Renaming is atomic, so no stats are lost between reading and deleting
+        if not self.client.exists(self.FLUSHING_KEY):
+            try:
+                self.client.rename(self.KEY, self.FLUSHING_KEY)
+            except ResponseError:
+                # Nothing to flush
+                pass
+
+        counters: dict[StatsKey, Counter[str]] = {}
+        for field, count in self.client.hgetall(self.FLUSHING_KEY).items():
+            post_id, day, name = field.decode().split(":")
+            key = (int(post_id), date.fromisoformat(day))
+            counters.setdefault(key, Counter())[name] += int(count)
+
+        keys = list(counters)
+        pipe = self.client.pipeline()
+        for post_id, day in keys:
+            pipe.pfcount(self.UNIQUE_KEY.format(post_id, day))
+        unique_views = pipe.execute() if keys else []
+
+        return {
+            key: DailyStats(
+                views=counters[key]["views"],
+                unique_views=int(unique),
+                comments=counters[key]["comments"],
+            )
+            for key, unique in zip(keys, unique_views)
+        }
+
+    def lock_flush(self) -> ContextManager[bool]:
+        """Returns lock of flush, which yields False, if concurrent flush holds it"""
+        return redis_lock(
+            self.client, self.FLUSH_LOCK_KEY, settings.POST_VIEWS_FLUSH_LOCK_TIMEOUT
+        )
+
+    def ack(self) -> None:
+        """Forgets stats, that were written to DB"""
+        self.client.delete(self.FLUSHING_KEY)
+
+
+StatsBuffer = LocalStatsBuffer | RedisStatsBuffer
+
+_stats_buffer: StatsBuffer | None = None
+_stats_buffer_lock = threading.Lock()
+
+
+def get_stats_buffer() -> StatsBuffer:
+    """Returns Redis stats buffer if Redis cache is configured, else local one"""
+    global _stats_buffer
+
+    with _stats_buffer_lock:
+        if _stats_buffer is None:
+            if settings.CACHES["default"]["BACKEND"].startswith("django_redis"):
+                from django_redis import get_redis_connection  # noqa
+
+                _stats_buffer = RedisStatsBuffer(get_redis_connection("default"))
+            else:
+                _stats_buffer = LocalStatsBuffer()
+        return _stats_buffer
+
+
+class PostStatsService:
+    """Service for daily rollups of post views and comments"""
+
+    @staticmethod
+    def record_view(post_id: int, visitor: str | None = None) -> None:
+        get_stats_buffer().add_view(post_id, timezone.localdate(), visitor)
+
+    @staticmethod
+    def record_comment(post_id: int) -> None:
+        get_stats_buffer().add_comment(post_id, timezone.localdate())
+
+    @staticmethod
+    def flush(batch_size: int = 1000) -> int:
+        """
+        Writes buffered daily stats to DB with bulk INSERT ... ON CONFLICT batches.
+        Returns number of written rows.
+        """
+        buffer = get_stats_buffer()
+        # Stats are kept in flushing state until ack, so overlapping flush repeats them
+        with buffer.lock_flush() as locked:
+            if not locked:
+                return 0
+            rows = [
+                (post_id, day, *stats)
+                for (post_id, day), stats in buffer.drain().items()
+            ]
+            if not rows:
+                return 0
+
+            table = PostDailyStats._meta.db_table
+            posts_table = Post._meta.db_table
+            with transaction.atomic(), connection.cursor() as cursor:
+                for start in range(0, len(rows), batch_size):
+                    batch = rows[start : start + batch_size]
+                    values = ", ".join(
+                        [
+                            "(%s::bigint, %s::date, %s::integer, %s::integer, %s::integer)"
+                        ]
+                        * len(batch)
+                    )
+                    # Stats of deleted posts are skipped by join,
+                    # estimate of unique views can't decrease, e.g. after Redis data loss
+                    cursor.execute(
+                        f"INSERT INTO {table} AS s "  # noqa: S608
+                        "(post_id, day, views, unique_views, comments) "
+                        "SELECT v.post_id, v.day, v.views, v.unique_views, v.comments "
+                        f"FROM (VALUES {values}) "
+                        "AS v(post_id, day, views, unique_views, comments) "
+                        f"JOIN {posts_table} AS p ON p.id = v.post_id "
+                        "ON CONFLICT (post_id, day) DO UPDATE SET "
+                        "views = s.views + EXCLUDED.views, "
+                        "unique_views = GREATEST(s.unique_views, EXCLUDED.unique_views), "
+                        "comments = s.comments + EXCLUDED.comments",
+                        [param for row in batch for param in row],
+                    )
+
+            buffer.ack()
+            logger.info("Flushed %s daily stats of posts", len(rows))
+            return len(rows)
+
+    @staticmethod
+    def get_daily_stats(
+        queryset: QuerySet[PostDailyStats], start: date, end: date
+    ) -> list[dict[str, Any]]:
+        """
+        Returns stats of every day of range, summed for posts of queryset.
+        Unique views are summed too, so visitor of several days is counted each day.
+        """
+        rows: dict[date, Any] = {
+            row["day"]: row
+            for row in queryset.filter(day__range=(start, end))
+            .values("day")
+            .annotate(
+                views=Sum("views"),
+                unique_views=Sum("unique_views"),
+                comments=Sum("comments"),
+            )
+            .order_by()
+        }
+        days = (start + timedelta(days=i) for i in range((end - start).days + 1))
+        return [
+            rows.get(day, {"day": day, "views": 0, "unique_views": 0, "comments": 0})
+            for day in days
+        ]
@@ -0,0 +1,292 @@
+import io
+import json
+import logging
+from typing import Any, Mapping, Sequence
+from xml.sax.xmlreader import AttributesImpl  # noqa: S406, XML is only written
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db.models import Count, F, Max, QuerySet, Sum
+from django.db.models.functions import Coalesce
+from django.utils.feedgenerator import Atom1Feed, Rss201rev2Feed, SyndicationFeed
+from django.utils.text import Truncator
+from django.utils.xmlutils import SimplerXMLGenerator
+
+from main.models import Category, Post
+
+logger = logging.getLogger(__name__)
+
+SITEMAP_NAMESPACE = "http://www.sitemaps.org/schemas/sitemap/0.9"
+FEED_FORMATS: dict[str, type[SyndicationFeed]] = {
+    "rss": Rss201rev2Feed,
+    "atom": Atom1Feed,
+}
+# Number of characters of post content in feed item description
+DESCRIPTION_LENGTH = 300
+# Time of post last modification, new posts have no modification time
+LASTMOD = Coalesce("modified", "created")
+
+# Signature of posts set: count, last modification and sum of ids,
+# so editing, publishing, unpublishing or deleting any post changes it
+Signature = list[Any]
+
+
+def get_post_url(slug: str) -> str:
+    return f"{settings.FRONTEND_URL}/posts/{slug}"
+
+
+def get_category_url(slug: str) -> str:
+    return f"{settings.FRONTEND_URL}/categories/{slug}"
+
+
+def get_path(name: str) -> str:
+    """Returns storage path of generated file"""
+    return f"{settings.SYNDICATION_PATH}/{name}"
+
+
+def get_url(name: str) -> str:
+    """Returns public URL of generated file, e.g. of sitemap chunk in index"""
+    return f"{settings.SYNDICATION_URL.rstrip('/')}/{name}"
+
+
+def get_published_posts() -> QuerySet[Post]:
+    return Post.objects.filter(publication_status=Post.PUBLISHED)
+
+
+def get_signatures(group_by: str, **annotations: Any) -> dict[Any, Signature]:
+    """Returns signatures of published posts, grouped by expression"""
+    rows = (
+        get_published_posts()
+        .annotate(**annotations)
+        .values(group_by)
+        .annotate(count=Count("id"), last=Max(LASTMOD), ids=Sum("id"))
+        .order_by(group_by)
+    )
+    return {
+        row[group_by]: [row["count"], row["last"].isoformat(), int(row["ids"])]
+        for row in rows
+    }
+
+
+def write_file(name: str, content: bytes) -> None:
+    """Replaces file in storage, which doesn't overwrite files by default"""
+    path = get_path(name)
+    if default_storage.exists(path):
+        default_storage.delete(path)
+    default_storage.save(path, ContentFile(content))
+
+
+def delete_file(name: str) -> None:
+    path = get_path(name)
+    if default_storage.exists(path):
+        default_storage.delete(path)
+
+
+def render_sitemap(rows: Any) -> bytes:
+    """Renders sitemap of posts from (slug, lastmod) rows"""
+    output = io.StringIO()
+    xml = SimplerXMLGenerator(output, "utf-8")
+    xml.startDocument()
+    xml.startElement("urlset", AttributesImpl({"xmlns": SITEMAP_NAMESPACE}))
+    for slug, lastmod in rows:
+        xml.startElement("url", AttributesImpl({}))
+        xml.addQuickElement("loc", get_post_url(slug))
+        xml.addQuickElement("lastmod", lastmod.isoformat())
+        xml.endElement("url")
+    xml.endElement("urlset")
+    xml.endDocument()
+    return output.getvalue().encode()
+
+
+def render_sitemap_index(chunks: dict[str, Signature]) -> bytes:
+    """Renders index of sitemap chunks with time of their last change"""
+    output = io.StringIO()
+    xml = SimplerXMLGenerator(output, "utf-8")
+    xml.startDocument()
+    xml.startElement("sitemapindex", AttributesImpl({"xmlns": SITEMAP_NAMESPACE}))
+    for name, (_, last, _) in chunks.items():
+        xml.startElement("sitemap", AttributesImpl({}))
+        xml.addQuickElement("loc", get_url(name))
+        xml.addQuickElement("lastmod", last)
+        xml.endElement("sitemap")
+    xml.endElement("sitemapindex")
+    xml.endDocument()
+    return output.getvalue().encode()
+
+
+def render_feed(
+    feed_class: type[SyndicationFeed],
+    name: str,
+    posts: Sequence[Mapping[str, Any]],
+    category: dict[str, Any] | None = None,
+) -> bytes:
+    """Renders RSS or Atom feed of latest posts, e.g. of category"""
+    title = settings.FEEDS_TITLE
+    link = settings.FRONTEND_URL
+    description = f"Latest posts of {title}"
+    if category is not None:
+        title = f"{title}: {category['name']}"
+        link = get_category_url(category["slug"])
+        description = category["description"] or f"Latest posts of {category['name']}"
+    feed = feed_class(
+        title=title,
+        link=link,
+        description=description,
+        feed_url=get_url(name),
+        language=settings.LANGUAGE_CODE,
+    )
+    for post in posts:
+        url = get_post_url(post["slug"])
+        feed.add_item(
+            title=post["title"],
+            link=url,
+            description=Truncator(post["content"]).chars(DESCRIPTION_LENGTH),
+            unique_id=url,
+            pubdate=post["created"],
+            updateddate=post["lastmod"],
+            author_name=post["author__username"],
+            categories=[post["category__name"]] if post["category__name"] else (),
+        )
+    return feed.writeString("utf-8").encode()
+
+
+class SyndicationService:
+    """
+    Service for generating sitemaps and RSS/Atom feeds into default storage,
+    where they are served as static files.
+    Sitemap is split into chunks by ranges of post ids, so a post change
+    rewrites only sitemap of its chunk, feeds of its category and global feeds.
+    Signatures of written files are kept in manifest next to them.
+    """
+
+    MANIFEST = "manifest.json"
+    INDEX = "sitemap.xml"
+
+    @staticmethod
+    def get_chunk_name(chunk: int) -> str:
+        return f"sitemap-{chunk}.xml"
+
+    @staticmethod
+    def get_feed_names(directory: str) -> list[str]:
+        return [f"{directory}/{name}.xml" for name in FEED_FORMATS]
+
+    @staticmethod
+    def read_manifest() -> dict[str, dict[str, Signature]]:
+        path = get_path(SyndicationService.MANIFEST)
+        if not default_storage.exists(path):
+            return {"sitemaps": {}, "feeds": {}}
+        with default_storage.open(path, "rb") as manifest:
+            return json.loads(manifest.read())
+
+    @staticmethod
+    def get_chunks() -> dict[str, Signature]:
+        """Returns signatures of sitemap chunks, which have published posts"""
+        signatures = get_signatures(
+            "chunk", chunk=F("id") / settings.SITEMAP_CHUNK_SIZE
+        )
+        return {
+            SyndicationService.get_chunk_name(chunk): signature
+            for chunk, signature in signatures.items()
+        }
+
+    @staticmethod
+    def get_feeds() -> dict[str, tuple[Signature, dict[str, Any] | None]]:
+        """Returns signatures and categories of global and categories feeds"""
+        by_category = get_signatures("category_id")
+        signatures = list(by_category.values())
+        feeds: dict[str, tuple[Signature, dict[str, Any] | None]] = {
+            "feeds": (
+                [
+                    sum(signature[0] for signature in signatures),
+                    max((signature[1] for signature in signatures), default=None),
+                    sum(signature[2] for signature in signatures),
+                ],
+                None,
+            )
+        }
+        for category in Category.objects.values("id", "slug", "name", "description"):
+            signature = by_category.get(category["id"], [0, None, 0])
+            feeds[f"feeds/categories/{category['slug']}"] = (
+                [category["name"], category["description"], *signature],
+                dict(category),
+            )
+        return feeds
+
+    @staticmethod
+    def write_chunk(name: str) -> None:
+        chunk_size = settings.SITEMAP_CHUNK_SIZE
+        chunk = int(name.removeprefix("sitemap-").removesuffix(".xml"))
+        rows = (
+            get_published_posts()
+            .filter(id__gte=chunk * chunk_size, id__lt=(chunk + 1) * chunk_size)
+            .order_by("id")
+            .values_list("slug", LASTMOD)
+            .iterator(chunk_size=2000)
+        )
+        write_file(name, render_sitemap(rows))
+
+    @staticmethod
+    def write_feeds(directory: str, category: dict[str, Any] | None) -> None:
+        posts = get_published_posts()
+        if category is not None:
+            posts = posts.filter(category_id=category["id"])
+        latest = list(
+            posts.order_by("-created").values(
+                "title",
+                "slug",
+                "content",
+                "created",
+                "author__username",
+                "category__name",
+                lastmod=LASTMOD,
+            )[: settings.FEEDS_SIZE]
+        )
+        for name, feed_class in zip(
+            SyndicationService.get_feed_names(directory), FEED_FORMATS.values()
+        ):
+            write_file(name, render_feed(feed_class, name, latest, category))
+
+    @staticmethod
+    def generate(full: bool = False) -> dict[str, int]:
+        """
+        Writes sitemaps and feeds, whose posts changed since previous run,
+        and deletes outdated ones. Returns numbers of written and deleted files.
+        """
+        manifest = SyndicationService.read_manifest()
+        if full:
+            manifest = {"sitemaps": {}, "feeds": {}}
+        written, deleted = 0, 0
+
+        chunks = SyndicationService.get_chunks()
+        for name, signature in chunks.items():
+            if manifest["sitemaps"].get(name) != signature:
+                SyndicationService.write_chunk(name)
+                written += 1
+        for name in manifest["sitemaps"].keys() - chunks.keys():
+            delete_file(name)
+            deleted += 1
+        index_path = get_path(SyndicationService.INDEX)
+        if written or deleted or not default_storage.exists(index_path):
+            write_file(SyndicationService.INDEX, render_sitemap_index(chunks))
+            written += 1
+
+        feeds = SyndicationService.get_feeds()
+        for directory, (signature, category) in feeds.items():
+            if manifest["feeds"].get(directory) != signature:
+                SyndicationService.write_feeds(directory, category)
+                written += len(FEED_FORMATS)
+        for directory in manifest["feeds"].keys() - feeds.keys():
+            for name in SyndicationService.get_feed_names(directory):
+                delete_file(name)
+                deleted += 1
+
+        manifest = {
+            "sitemaps": chunks,
+            "feeds": {
+                directory: signature for directory, (signature, _) in feeds.items()
+            },
+        }
+        write_file(SyndicationService.MANIFEST, json.dumps(manifest).encode())
+        logger.info("Syndication files written: %s, deleted: %s", written, deleted)
+        return {"written": written, "deleted": deleted}
@@ -0,0 +1,85 @@
+from typing import Any
+
+from celery import shared_task
+from django.apps import apps
+
+from app.counters import reconcile_counters
+from app.db import use_replica
+from app.images import generate_derivatives, get_image_derivatives
+from main.ranking import PostRankingService
+from main.related import RelatedPostsService
+from main.services import PostViewsService
+from main.stats import PostStatsService
+from main.syndication import SyndicationService
+
+
+@shared_task
+def flush_post_views() -> dict[str, int]:
+    """Periodic task for writing buffered post views to DB"""
+    flushed_posts = PostViewsService.flush_views()
+    return {"flushed_posts": flushed_posts}
+
+
+@shared_task
+def flush_post_stats() -> dict[str, int]:
+    """Periodic task for writing buffered daily stats of posts to DB"""
+    return {"flushed_stats": PostStatsService.flush()}
+
+
+@shared_task
+def reconcile_counter_caches() -> dict[str, int]:
+    """Periodic task for fixing drift of denormalized counters"""
+    return reconcile_counters()
+
+
+@shared_task
+def checkpoint_post_ranking() -> dict[str, int]:
+    """
+    Periodic task for saving posts ranking buckets to DB.
+    Posts are checked on primary, as replica may miss new ones or keep deleted ones.
+    """
+    saved_buckets = PostRankingService.checkpoint()
+    return {"saved_buckets": saved_buckets}
+
+
+@shared_task
+@use_replica()
+def rebuild_related_posts() -> dict[str, int]:
+    """
+    Periodic task for rebuilding related posts, also updating terms rarity.
+    Posts are read from replica, index is written to primary in transaction.
+    """
+    return {"indexed_posts": RelatedPostsService.rebuild()}
+
+
+@shared_task
+def update_related_posts(
+    post_id: int, listing: list[int] | None = None
+) -> dict[str, int]:
+    """Task for updating related posts after post change"""
+    return {"updated_posts": RelatedPostsService.update(post_id, listing or ())}
+
+
+@shared_task
+@use_replica()
+def generate_syndication() -> dict[str, int]:
+    """
+    Periodic task for rewriting sitemaps and feeds with changed posts.
+    Posts are read from replica, lagging changes are written by the next run.
+    """
+    return SyndicationService.generate()
+
+
+@shared_task
+def generate_image_derivatives(
+    model_label: str, pk: Any, field: str
+) -> dict[str, str] | None:
+    """Task for generating resized variants of uploaded image"""
+    model = apps.get_model(model_label)
+    derivatives = get_image_derivatives(model, field)
+    instance = model._base_manager.filter(pk=pk).first()
+    if derivatives is None or instance is None:
+        return None
+    if not derivatives.is_outdated(instance):
+        return getattr(instance, derivatives.variants_field)
+    return generate_derivatives(instance, derivatives)
@@ -183,3 +183,27 @@ class TestPostsByCategory:
         assert response_posts[1]["title"] == post_1.title
 
         assert len(response_posts) == 2
+
+    def test_paginated_with_pinned_first(self, api, category, pinned_post, mixer):
+        posts = mixer.cycle(3).blend(
+            Post, category=category, publication_status=Post.PUBLISHED
+        )
+        url = reverse(
+            "v1:posts:posts-by-category", kwargs={"category_slug": category.slug}
+        )
+
+        response = api.get(url, data={"page_size": 2})
+
+        assert [post["id"] for post in response["posts"]] == [
+            pinned_post.post.id,
+            posts[2].id,
+            posts[1].id,
+        ]
+        assert response["pinned_posts_count"] == 1
+        assert response["previous"] is None
+
+        response = api.get(response["next"])
+
+        assert [post["id"] for post in response["posts"]] == [posts[0].id]
+        assert response["pinned_posts_count"] == 1
+        assert response["next"] is None
@@ -1,7 +1,13 @@
+import io
+from datetime import timedelta
 from random import randint
 
 import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django.utils import timezone
 from django.utils.dateparse import parse_datetime
 
 from accounts.models import User
@@ -10,7 +16,8 @@ from main.api.serializers import (
     PostDetailSerializer,
     PostListSerializer,
 )
-from main.models import Post
+from main.models import Category, Post
+from main.ranking import PostRankingService
 from subscribe.models import PinnedPost
 
 pytestmark = [pytest.mark.django_db]
@@ -80,6 +87,71 @@ class TestPostList:
         assert len(response_results) == 1
 
 
+class TestPostListCompact:
+    def test_side_loaded(self, api, mixer, category):
+        author = mixer.blend(User)
+        posts = mixer.cycle(3).blend(
+            Post,
+            author=author,
+            category=category,
+            publication_status=Post.PUBLISHED,
+        )
+
+        response = api.get(reverse("v2:posts:post-list", kwargs={"version": "v2"}))
+
+        assert response["next"] is None
+        assert [post["id"] for post in response["data"]] == [
+            post.pk for post in reversed(posts)
+        ]
+        for post in response["data"]:
+            assert post["author"] == author.username
+            assert post["category"] == category.pk
+            assert post["pinned_info"] is None
+        assert response["included"] == {
+            "categories": {str(category.pk): {"id": category.pk, "name": category.name}}
+        }
+
+    def test_same_fields_as_v1(self, api, post):
+        v1 = api.get(reverse("v1:posts:post-list"))["results"][0]
+        v2 = api.get(reverse("v2:posts:post-list", kwargs={"version": "v2"}))
+
+        assert v2["data"][0].keys() == v1.keys()
+        assert v2["data"][0]["author"] == post.author.username
+
+    def test_pinned_by(self, api, mixer, user, pinned_post):
+        response = api.get(reverse("v2:posts:post-list", kwargs={"version": "v2"}))
+
+        pinned_info = response["data"][0]["pinned_info"]
+        assert pinned_info["pinned_by"] == user.username
+        assert pinned_info["pinned_by_has_active_subscription"] is True
+
+    def test_read_only(self, api, auth_user, category):
+        api.post(
+            reverse("v2:posts:post-list", kwargs={"version": "v2"}),
+            data={"title": "Title", "content": "Content", "category": category.pk},
+            expected_status_code=405,
+        )
+
+    def test_sparse_fields(self, api, post):
+        response = api.get(
+            reverse("v2:posts:post-list", kwargs={"version": "v2"}),
+            data={"fields": "id,title"},
+        )
+
+        assert response["data"] == [{"id": post.pk, "title": post.title}]
+        assert response["included"] == {"categories": {}}
+
+
+def test_payloads_benchmark_command(post):
+    output = io.StringIO()
+
+    call_command("benchmark_payloads", posts=30, comments=20, stdout=output)
+
+    assert "Feed" in output.getvalue()
+    assert "Post comments" in output.getvalue()
+    assert Post.objects.count() == 1
+
+
 class TestPostDetail:
     def test_permission_for_not_authenticated(self, api, post):
         response = api.get(reverse("v1:posts:post-detail", kwargs={"slug": post.slug}))
@@ -155,6 +227,97 @@ class TestPostDetail:
         else:
             assert response.status_code == 400
 
+    def test_views_not_counted_on_get(self, api, post, views_buffer, settings):
+        settings.POST_VIEWS_COUNT_ON_GET = False
+
+        response = api.get(reverse("v1:posts:post-detail", kwargs={"slug": post.slug}))
+
+        assert response["views_count"] == post.views_count
+        assert views_buffer.get(post.id).views == 0
+
+
+class TestPostViewBeacon:
+    def test_post_only(self, api, post):
+        api.get(
+            reverse("v1:posts:post-view", kwargs={"slug": post.slug}),
+            expected_status_code=405,
+        )
+
+    def test_success(self, api, post, views_buffer):
+        response = api.api_client.post(
+            reverse("v1:posts:post-view", kwargs={"slug": post.slug})
+        )
+        assert response.status_code == 204
+        assert views_buffer.get(post.id) == (1, 1)
+
+        # Pending views are shown on detail, same visitor is not counted twice
+        response = api.get(reverse("v1:posts:post-detail", kwargs={"slug": post.slug}))
+        assert response["views_count"] == post.views_count + 2
+        assert response["unique_views_count"] == 1
+
+    def test_draft(self, api, mixer, views_buffer):
+        post_1 = mixer.blend(Post, publication_status=Post.DRAFT)
+
+        response = api.api_client.post(
+            reverse("v1:posts:post-view", kwargs={"slug": post_1.slug})
+        )
+        assert response.status_code == 404
+        assert views_buffer.get(post_1.id).views == 0
+
+
+class TestPostBatch:
+    def test_order_and_visibility(self, api, auth_user, mixer):
+        own_draft = mixer.blend(Post, publication_status=Post.DRAFT, author=auth_user)
+        other_draft = mixer.blend(Post, publication_status=Post.DRAFT)
+        post_1, post_2 = mixer.cycle(2).blend(Post, publication_status=Post.PUBLISHED)
+
+        response = api.get(
+            reverse("v1:posts:post-batch"),
+            data={
+                "ids": f"{post_2.id},{other_draft.id},{own_draft.id},{post_2.id}",
+                "slugs": f"{post_1.slug},unknown,{post_2.slug}",
+            },
+        )
+
+        assert [post["id"] for post in response["results"]] == [
+            post_2.id,
+            own_draft.id,
+            post_1.id,
+        ]
+        assert response["missing"] == [str(other_draft.id), "unknown"]
+        for field in PostDetailSerializer().fields:
+            assert field in response["results"][0]
+
+    def test_drafts_hidden_from_anonymous(self, api, mixer):
+        draft = mixer.blend(Post, publication_status=Post.DRAFT)
+
+        response = api.get(reverse("v1:posts:post-batch"), data={"slugs": draft.slug})
+
+        assert response == {"results": [], "missing": [draft.slug]}
+
+    def test_one_query_without_counting_views(self, api, mixer, views_buffer):
+        posts = mixer.cycle(5).blend(Post, publication_status=Post.PUBLISHED)
+        views_buffer.add(posts[0].id, "visitor")
+
+        with CaptureQueriesContext(connection) as context:
+            response = api.get(
+                reverse("v1:posts:post-batch"),
+                data={"ids": ",".join(str(post.id) for post in posts)},
+            )
+
+        assert len([q for q in context.captured_queries if "SELECT" in q["sql"]]) == 1
+        assert response["results"][0]["views_count"] == posts[0].views_count + 1
+        assert views_buffer.get(posts[1].id).views == 0
+
+    @pytest.mark.parametrize(
+        "data",
+        [{}, {"ids": " , "}, {"ids": "1,x"}, {"ids": "1", "slugs": "a,b,c"}],
+    )
+    def test_invalid(self, api, settings, data):
+        settings.POST_BATCH_MAX_SIZE = 3
+
+        api.get(reverse("v1:posts:post-batch"), data=data, expected_status_code=400)
+
 
 @pytest.mark.parametrize("view_name", ["recent-posts", "popular-posts"])
 class TestRecentAndPopularPosts:
@@ -222,6 +385,169 @@ class TestRecentAndPopularPosts:
             assert parse_datetime(response[i]["created"]) == ordered_posts[i].created
 
 
+def test_popular_posts_filled_by_views(api, mixer):
+    ranked = mixer.blend(Post, views_count=0, publication_status=Post.PUBLISHED)
+    PostRankingService.ensure_restored()
+    PostRankingService.record(ranked.id, 10)
+    # Posts, created after ranking was restored, are not ranked yet
+    viewed = mixer.blend(Post, views_count=5, publication_status=Post.PUBLISHED)
+    not_viewed = mixer.blend(Post, views_count=0, publication_status=Post.PUBLISHED)
+
+    response = api.get(reverse("v1:posts:popular-posts"))
+
+    assert [post["id"] for post in response] == [ranked.id, viewed.id, not_viewed.id]
+
+
+class TestTrendingPosts:
+    def test_recent_activity_first(self, api, mixer):
+        post_1, post_2 = mixer.cycle(2).blend(Post, publication_status=Post.PUBLISHED)
+        PostRankingService.record(post_1.id, 10, timezone.now() - timedelta(days=1))
+        PostRankingService.record(post_2.id, 2)
+
+        response = api.get(reverse("v1:posts:trending-posts"))
+
+        assert [post["id"] for post in response] == [post_2.id, post_1.id]
+
+
+class TestPostSearch:
+    @pytest.fixture
+    def found_posts(self, mixer, category):
+        other_category = mixer.blend(Category, name="Other", slug="other")
+        return [
+            mixer.blend(
+                Post,
+                title="Database indexing",
+                content="Some text about storage",
+                category=category,
+                publication_status=Post.PUBLISHED,
+            ),
+            mixer.blend(
+                Post,
+                title="Weekly news",
+                content="Indexes make databases fast",
+                category=other_category,
+                publication_status=Post.PUBLISHED,
+            ),
+            mixer.blend(
+                Post,
+                title="Drafted indexing",
+                content="Not published",
+                category=category,
+                publication_status=Post.DRAFT,
+            ),
+            mixer.blend(
+                Post,
+                title="Cooking",
+                content="Nothing related",
+                category=category,
+                publication_status=Post.PUBLISHED,
+            ),
+        ]
+
+    def test_ranking_and_facets(self, api, found_posts, category):
+        response = api.get(reverse("v1:posts:post-search"), data={"q": "indexes"})
+
+        # Match in title is ranked higher than match in content
+        assert [post["id"] for post in response["results"]] == [
+            found_posts[0].id,
+            found_posts[1].id,
+        ]
+        assert response["count"] == 2
+        assert response["results"][0]["rank"] > response["results"][1]["rank"]
+        assert "<mark>Indexes</mark>" in response["results"][1]["headline"]
+        assert {
+            facet["slug"]: facet["posts_count"] for facet in response["facets"]
+        } == {
+            category.slug: 1,
+            "other": 1,
+        }
+
+    def test_category_filter_and_pagination(self, api, found_posts):
+        response = api.get(
+            reverse("v1:posts:post-search"),
+            data={"q": "indexes", "category": "other"},
+        )
+        assert [post["id"] for post in response["results"]] == [found_posts[1].id]
+        # Facets are counted for all matches
+        assert len(response["facets"]) == 2
+
+        response = api.get(
+            reverse("v1:posts:post-search"), data={"q": "indexes", "limit": 1}
+        )
+        assert len(response["results"]) == 1
+        assert response["count"] == 2
+        assert response["next"]
+
+    def test_empty_query(self, api):
+        api.get(reverse("v1:posts:post-search"), expected_status_code=400)
+
+    def test_search_filter(self, api, auth_user, found_posts):
+        response = api.get(
+            reverse("v1:posts:post-list"), data={"search": "indexing -weekly"}
+        )
+        assert [post["id"] for post in response["results"]] == [found_posts[0].id]
+
+
+class TestPostAutocomplete:
+    def test_suggestions(self, api, mixer):
+        prefixed = mixer.blend(Post, title="Python tips", views_count=1)
+        word_prefixed = mixer.blend(Post, title="Fast python code", views_count=10)
+        mixer.blend(Post, title="Python draft", publication_status=Post.DRAFT)
+        mixer.blend(Post, title="Rust news")
+        category = mixer.blend(Category, name="Python")
+
+        response = api.get(reverse("v1:posts:post-autocomplete"), data={"q": "pyth"})
+
+        # Title prefix goes first
+        assert response["posts"] == [
+            {"id": prefixed.id, "title": prefixed.title, "slug": prefixed.slug},
+            {
+                "id": word_prefixed.id,
+                "title": word_prefixed.title,
+                "slug": word_prefixed.slug,
+            },
+        ]
+        assert response["categories"] == [
+            {"id": category.id, "name": category.name, "slug": category.slug}
+        ]
+
+    def test_several_words(self, api, mixer):
+        post = mixer.blend(Post, title="Fast python code")
+        mixer.blend(Post, title="Python is slow")
+
+        response = api.get(
+            reverse("v1:posts:post-autocomplete"), data={"q": "fast pyth"}
+        )
+        assert [suggestion["id"] for suggestion in response["posts"]] == [post.id]
+
+    def test_title_prefix_fills_limit(self, api, mixer):
+        prefixed = mixer.blend(Post, title="Python tips", views_count=1)
+        mixer.blend(Post, title="Fast python code", views_count=10)
+
+        response = api.get(
+            reverse("v1:posts:post-autocomplete"), data={"q": "pyth", "limit": 1}
+        )
+
+        assert [suggestion["id"] for suggestion in response["posts"]] == [prefixed.id]
+
+    def test_short_prefix_cached(self, api, mixer, settings):
+        settings.POSTS_AUTOCOMPLETE_CACHE_MAX_LENGTH = 2
+        post = mixer.blend(Post, title="Go generics")
+
+        response = api.get(reverse("v1:posts:post-autocomplete"), data={"q": "go"})
+        assert [suggestion["id"] for suggestion in response["posts"]] == [post.id]
+
+        mixer.blend(Post, title="Go channels")
+        response = api.get(reverse("v1:posts:post-autocomplete"), data={"q": "go"})
+        assert len(response["posts"]) == 1
+        response = api.get(reverse("v1:posts:post-autocomplete"), data={"q": "go c"})
+        assert len(response["posts"]) == 1
+
+    def test_empty_query(self, api, post):
+        response = api.get(reverse("v1:posts:post-autocomplete"), data={"q": " "})
+        assert response == {"posts": [], "categories": []}
+
+
 class TestUsersPosts:
 
     def test_permission_for_not_authenticated(self, api, post):
@@ -251,7 +577,8 @@ class TestUsersPosts:
         assert response_results[1]["id"] == post_1.id
         assert response_results[1]["title"] == post_1.title
 
-        assert len(response_results) == response["count"] == 2
+        assert len(response_results) == 2
+        assert response["next"] is None
 
 
 class TestPinnedPostsOnly:
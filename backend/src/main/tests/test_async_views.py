@@ -0,0 +1,78 @@
+import json
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import AnonymousUser
+from django.test import RequestFactory
+from django.urls import reverse
+from rest_framework.throttling import AnonRateThrottle
+
+from main.api import async_views
+from main.models import Category, Post
+
+# Queries of async views run on connections of other threads
+pytestmark = [pytest.mark.django_db(transaction=True)]
+
+
+def call(view, request):
+    request.user = AnonymousUser()
+    response = async_to_sync(view)(request)
+    if hasattr(response, "render"):
+        # Rendered by handler, when view is called through URL
+        response.render()
+    return response, json.loads(response.content or "null")
+
+
+@pytest.fixture
+def posts(mixer, user, category):
+    return mixer.cycle(5).blend(
+        Post, author=user, category=category, publication_status=Post.PUBLISHED
+    )
+
+
+@pytest.mark.parametrize(
+    ("view", "url_name"),
+    [
+        (async_views.recent_posts, "v1:posts:recent-posts"),
+        (async_views.popular_posts, "v1:posts:popular-posts"),
+        (async_views.featured_posts, "v1:posts:featured-posts"),
+    ],
+)
+def test_same_data_as_sync_views(api, posts, view, url_name):
+    url = reverse(url_name)
+    _, data = call(view, RequestFactory().get(url))
+    assert data == api.get(url)
+
+
+def test_first_categories_page(api, mixer):
+    mixer.cycle(3).blend(Category)
+    url = reverse("v1:posts:category-list")
+
+    response, data = call(async_views.category_list, RequestFactory().get(url))
+
+    assert data == api.get(url)
+    assert response.has_header("ETag")
+
+    request = RequestFactory().get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+    assert call(async_views.category_list, request)[0].status_code == 304
+
+
+def test_writes_and_filters_delegated_to_api_view(api, category):
+    url = reverse("v1:posts:category-list")
+
+    response, _ = call(async_views.category_list, RequestFactory().post(url, {}))
+    assert response.status_code == 401
+
+    request = RequestFactory().get(url, {"page": 2})
+    assert call(async_views.category_list, request)[0].status_code == 404
+
+
+def test_throttling(mocker, posts):
+    mocker.patch.object(AnonRateThrottle, "THROTTLE_RATES", {"anon": "1/hour"})
+    url = reverse("v1:posts:recent-posts")
+    call(async_views.recent_posts, RequestFactory().get(url))
+
+    response, _ = call(async_views.recent_posts, RequestFactory().get(url))
+
+    assert response.status_code == 429
+    assert response.has_header("Retry-After")
@@ -0,0 +1,105 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from comments.models import Comment
+from main.models import Category, Post
+
+pytestmark = [pytest.mark.django_db]
+
+
+def get_conditional(api, url, response):
+    return api.api_client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+
+
+class TestConditionalGet:
+    def test_not_modified(self, api, post):
+        url = reverse("v1:posts:post-list")
+        response = api.api_client.get(url)
+        assert response.status_code == 200
+        assert response["ETag"].startswith('"')
+        assert "Last-Modified" in response
+
+        with CaptureQueriesContext(connection) as context:
+            response = get_conditional(api, url, response)
+
+        # Only savepoints of atomic request
+        assert not [q for q in context.captured_queries if "SELECT" in q["sql"]]
+        assert response.status_code == 304
+        assert not response.content
+
+    def test_modified_by_change(self, api, post, category):
+        url = reverse("v1:posts:category-list")
+        response = api.api_client.get(url)
+
+        Category.objects.create(name="New category", slug="new-category")
+
+        response = get_conditional(api, url, response)
+        assert response.status_code == 200
+        assert len(response.json()["results"]) == 2
+
+    def test_post_detail_modified_by_comment(self, api, post, user):
+        url = reverse("v1:posts:post-detail", kwargs={"slug": post.slug})
+        response = api.api_client.get(url)
+        assert get_conditional(api, url, response).status_code == 304
+
+        Comment.objects.create(post=post, author=user, content="Comment")
+
+        response = get_conditional(api, url, response)
+        assert response.status_code == 200
+        assert response.json()["comments_count"] == 1
+
+    def test_post_detail_old_slug(self, api, post):
+        url = reverse("v1:posts:post-detail", kwargs={"slug": post.slug})
+        response = api.api_client.get(url)
+
+        post.slug = "renamed-post"
+        post.save()
+
+        assert get_conditional(api, url, response).status_code == 404
+
+    def test_not_modified_post_view_counted(self, api, post, views_buffer):
+        url = reverse("v1:posts:post-detail", kwargs={"slug": post.slug})
+        response = api.api_client.get(url)
+
+        assert get_conditional(api, url, response).status_code == 304
+        assert views_buffer.get(post.id).views == 2
+
+    def test_post_comments_modified_by_post(self, api, post):
+        url = reverse("v1:comments:post-comments", kwargs={"post_id": post.pk})
+        response = api.api_client.get(url)
+
+        Post.objects.filter(pk=post.pk).update(title="Not signalled")
+        assert get_conditional(api, url, response).status_code == 304
+
+        post.title = "New title"
+        post.save()
+
+        response = get_conditional(api, url, response)
+        assert response.status_code == 200
+        assert response.json()["post"]["title"] == "New title"
+
+    def test_cache_control(self, api, auth_user, post):
+        url = reverse("v1:posts:category-list")
+        response = api.api_client.get(url)
+        assert "private" in response["Cache-Control"]
+        assert "no-cache" in response["Cache-Control"]
+
+        api.api_client.force_authenticate(None)
+        anonymous = api.api_client.get(url)
+        assert anonymous["Cache-Control"] == "public, max-age=300"
+        assert anonymous["ETag"] != response["ETag"]
+        assert "Authorization" in anonymous["Vary"]
+
+    def test_fresh_version_on_replica(self, api, post, settings):
+        settings.DATABASE_REPLICAS = ["replica_1"]
+        url = reverse("v1:posts:post-list")
+
+        # Replica may not have the latest changes yet
+        response = api.api_client.get(url)
+        assert "ETag" not in response
+        assert "no-cache" in response["Cache-Control"]
+
+        settings.READ_YOUR_WRITES_WINDOW = 0
+        assert "ETag" in api.api_client.get(url)
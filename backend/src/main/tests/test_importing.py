@@ -0,0 +1,76 @@
+import json
+
+import pytest
+from django.core.management import call_command
+
+from main.importing import PostImporter
+from main.models import Category, Post
+
+pytestmark = [pytest.mark.django_db]
+
+
+class TestPostImporter:
+    def test_unique_slugs(self, post, user):
+        records = [
+            {"title": post.title, "content": "Imported", "author": user.email}
+            for _ in range(3)
+        ]
+        post.slug = "imported-post"
+        post.title = "Imported post"
+        post.save()
+        records += [
+            {"title": "Imported post", "content": "Imported", "author": user.email},
+            {"slug": "imported-post", "title": "Other", "content": "Imported"},
+        ]
+
+        result = PostImporter(default_author=user).run(records, batch_size=2)
+
+        assert result == (5, 0)
+        slugs = list(Post.objects.values_list("slug", flat=True))
+        assert len(slugs) == len(set(slugs)) == 6
+        assert {"imported-post-1", "imported-post-2"} <= set(slugs)
+
+    def test_lookups_and_counters(self, user, category):
+        records = [
+            {"title": "First", "content": "Text", "author": user.username},
+            {"title": "Second", "content": "Text", "category": category.slug},
+            {"title": "Third", "content": "Text", "category": "New category"},
+            {"title": "Draft", "content": "Text", "publication_status": "draft"},
+            {"title": "Unknown", "content": "Text", "author": "nobody@example.com"},
+            {"title": "", "content": "Text"},
+        ]
+
+        result = PostImporter(default_author=user).run(records, batch_size=100)
+
+        assert result == (4, 2)
+        user.refresh_from_db()
+        category.refresh_from_db()
+        assert user.posts_count == 4
+        assert category.posts_count == 1
+        assert Category.objects.get(name="New category").posts_count == 1
+        assert Post.objects.get(title="Draft").publication_status == Post.DRAFT
+        assert Post.objects.filter(search_vector__isnull=False).count() == 4
+
+    def test_batch_queries(self, user, category, django_assert_num_queries):
+        importer = PostImporter(default_author=user)
+        importer.get_category_id(category.slug)
+        records = [
+            {"title": f"Post {i}", "content": "Text", "category": category.slug}
+            for i in range(50)
+        ]
+
+        # Savepoints, slugs query and COPY
+        with django_assert_num_queries(4):
+            assert importer.import_batch(records) == 50
+
+    def test_command(self, user, tmp_path):
+        path = tmp_path / "posts.jsonl"
+        path.write_text(
+            "\n".join(
+                json.dumps({"title": f"Post {i}", "content": "Text"}) for i in range(3)
+            )
+        )
+
+        call_command("import_posts", str(path), "--author", user.email)
+
+        assert Post.objects.filter(author=user).count() == 3
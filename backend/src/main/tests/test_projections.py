@@ -0,0 +1,58 @@
+import pytest
+
+from app.models import project
+from app.sparse_fields import get_projection, get_serializer_fields
+from main.api.serializers import PostDetailSerializer, PostListSerializer
+from main.models import Post
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.mark.parametrize("serializer_class", [PostListSerializer, PostDetailSerializer])
+class TestPostProjections:
+    def test_no_deferred_fields_loaded(
+        self, serializer_class, pinned_post, mixer, django_assert_num_queries
+    ):
+        mixer.blend(Post, category=None)
+        queryset = Post.objects.project(serializer_class.Meta.projection)
+        posts = list(queryset)
+
+        # Touching deferred field or not joined relation would query DB
+        with django_assert_num_queries(0):
+            data = serializer_class(posts, many=True).data
+
+        assert len(data) == 2
+        assert any(post["pinned_info"] for post in data)
+
+    def test_heavy_columns_not_selected(self, serializer_class):
+        sql = str(Post.objects.project(serializer_class.Meta.projection).query)
+
+        for column in ("password", "bio", "search_vector"):
+            assert column not in sql
+
+
+@pytest.mark.parametrize(
+    ("serializer_class", "field"),
+    [
+        (serializer_class, field)
+        for serializer_class in (PostListSerializer, PostDetailSerializer)
+        for field in get_serializer_fields(serializer_class)
+    ],
+)
+def test_sparse_field_projection(
+    serializer_class, field, pinned_post, user, rf, django_assert_num_queries
+):
+    queryset = project(Post.objects.all(), get_projection(serializer_class, [field]))
+    posts = list(queryset)
+    request = rf.get("/")
+    request.user = user
+    # Subscription of user is loaded once per request
+    assert hasattr(user, "subscription")
+
+    # Columns of field are enough for rendering it
+    with django_assert_num_queries(0):
+        data = serializer_class(
+            posts, many=True, context={"request": request}, fields=[field]
+        ).data
+
+    assert list(data[0]) == [field]
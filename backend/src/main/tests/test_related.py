@@ -0,0 +1,226 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from main.models import Category, IndexedTerm, Post, PostTerm, RelatedPost
+from main.related import Document, RelatedPostsService, SimilarityIndex, tokenize
+from main.tasks import update_related_posts
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def posts(mixer, user):
+    python, django = mixer.cycle(2).blend(Category)
+    texts = [
+        (python, "Python generators", "Lazy generators and iterators in Python"),
+        (python, "Python iterators", "Iterators protocol and generators in Python"),
+        (django, "Django queries", "Querysets are lazy, like generators"),
+        (django, "Django templates", "Template inheritance and filters"),
+    ]
+    return [
+        mixer.blend(
+            Post,
+            author=user,
+            category=category,
+            title=title,
+            content=content,
+            publication_status=Post.PUBLISHED,
+        )
+        for category, title, content in texts
+    ]
+
+
+def get_related(post):
+    return list(
+        RelatedPost.objects.filter(post=post)
+        .order_by("-score")
+        .values_list("related_id", flat=True)
+    )
+
+
+class TestSimilarityIndex:
+    def test_tokenize(self):
+        assert tokenize("The Python's 3 generators, and it") == ["python", "generators"]
+
+    def test_neighbours(self):
+        index = SimilarityIndex.build(
+            [
+                Document(1, "Python generators", "Lazy iterators", 1),
+                Document(2, "Python iterators", "Generators", 1),
+                Document(3, "Cooking pasta", "Boil water", 2),
+                Document(4, "Python", "Python", 2),
+            ]
+        )
+
+        neighbours = index.neighbours(1, 10)
+
+        assert [post_id for post_id, _ in neighbours] == [2, 4]
+        assert neighbours[0][1] <= 1
+
+    def test_category_affinity(self, settings):
+        settings.RELATED_POSTS_CATEGORY_WEIGHT = 0.5
+        index = SimilarityIndex.build(
+            [
+                Document(1, "Python", "Python", 1),
+                Document(2, "Python", "Python", 2),
+                Document(3, "Python", "Python", 1),
+            ]
+        )
+
+        assert [post_id for post_id, _ in index.neighbours(1, 10)] == [3, 2]
+
+    def test_add_and_remove(self):
+        index = SimilarityIndex.build([Document(1, "Python", "Generators", None)])
+
+        index.add(Document(2, "Python", "Generators", None))
+        assert [post_id for post_id, _ in index.neighbours(1, 10)] == [2]
+
+        index.remove(2)
+        assert index.neighbours(1, 10) == []
+        assert "python" not in index.postings or 2 not in index.postings["python"]
+
+
+class TestRelatedPostsService:
+    def test_rebuild(self, posts, mixer):
+        mixer.blend(Post, title="Python", publication_status=Post.DRAFT)
+
+        assert RelatedPostsService.rebuild() == 4
+
+        assert get_related(posts[0])[:2] == [posts[1].pk, posts[2].pk]
+        # Posts share only category and "Django" word
+        assert get_related(posts[3]) == [posts[2].pk]
+
+    def test_update_edited_post(self, posts):
+        RelatedPostsService.rebuild()
+        post = posts[3]
+        post.content = "Generators of templates in Python"
+        post.save()
+
+        update_related_posts(post.pk)
+
+        assert posts[0].pk in get_related(post)
+        assert post.pk in get_related(posts[0])
+
+    def test_update_unpublished_post(self, posts):
+        RelatedPostsService.rebuild()
+        post = posts[1]
+        post.publication_status = Post.DRAFT
+        post.save()
+
+        update_related_posts(post.pk)
+
+        assert get_related(post) == []
+        assert post.pk not in get_related(posts[0])
+        assert posts[2].pk in get_related(posts[0])
+
+    def test_update_deleted_post(self, posts):
+        RelatedPostsService.rebuild()
+        listing = list(
+            RelatedPost.objects.filter(related=posts[1]).values_list(
+                "post_id", flat=True
+            )
+        )
+        post_id = posts[1].pk
+        posts[1].delete()
+
+        update_related_posts(post_id, listing)
+
+        assert get_related(posts[0]) == [posts[2].pk]
+
+    def test_update_without_index(self, posts):
+        assert RelatedPostsService.update(posts[0].pk) == 4
+
+        assert get_related(posts[0])
+
+    def test_update_writes_only_vector_of_post(self, posts, mocker):
+        RelatedPostsService.rebuild()
+        other_terms = set(
+            PostTerm.objects.exclude(post=posts[3]).values_list("id", "weight")
+        )
+        rebuild = mocker.spy(RelatedPostsService, "rebuild")
+        posts[3].content = "Generators of templates in Python"
+        posts[3].save()
+
+        update_related_posts(posts[3].pk)
+
+        rebuild.assert_not_called()
+        assert (
+            set(PostTerm.objects.exclude(post=posts[3]).values_list("id", "weight"))
+            == other_terms
+        )
+        assert PostTerm.objects.filter(post=posts[3], term="generators").exists()
+
+    def test_load_index_reads_heaviest_postings(self, posts, settings):
+        RelatedPostsService.rebuild()
+        settings.RELATED_POSTS_MAX_POSTINGS = 1
+
+        index = RelatedPostsService.load_index([posts[0].pk])
+
+        assert index.vectors[posts[0].pk] == dict(
+            PostTerm.objects.filter(post=posts[0]).values_list("term", "weight")
+        )
+        heaviest = (
+            PostTerm.objects.filter(term="generators")
+            .order_by("-weight")
+            .values_list("post_id", flat=True)
+            .first()
+        )
+        assert set(index.postings["generators"]) == {posts[0].pk, heaviest}
+
+    def test_rebuild_replaces_index(self, posts):
+        RelatedPostsService.rebuild()
+        Post.objects.filter(pk=posts[3].pk).update(publication_status=Post.DRAFT)
+
+        assert RelatedPostsService.rebuild() == 3
+
+        assert not PostTerm.objects.filter(post=posts[3]).exists()
+        assert not IndexedTerm.objects.filter(term="templates").exists()
+
+    def test_scheduled_on_change(
+        self, settings, mocker, post, django_capture_on_commit_callbacks
+    ):
+        settings.USE_CELERY = True
+        delay = mocker.patch("main.tasks.update_related_posts.delay")
+
+        with django_capture_on_commit_callbacks(execute=True):
+            post.save(update_fields=["views_count"])
+            post.save()
+        delay.assert_called_once_with(post.pk)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            post_id = post.pk
+            post.delete()
+        delay.assert_called_with(post_id, [])
+
+
+class TestRelatedPostsApi:
+    def test_related(self, api, posts):
+        RelatedPostsService.rebuild()
+        url = reverse("v1:posts:related-posts", kwargs={"slug": posts[0].slug})
+
+        with CaptureQueriesContext(connection) as context:
+            response = api.get(url)
+
+        assert [post["id"] for post in response][:2] == [posts[1].pk, posts[2].pk]
+        assert response[0]["title"] == posts[1].title
+        assert len(context.captured_queries) == 1
+
+    def test_not_indexed(self, api, post):
+        url = reverse("v1:posts:related-posts", kwargs={"slug": post.slug})
+        assert api.get(url) == []
+
+    def test_draft_not_found(self, api, mixer):
+        draft = mixer.blend(Post, publication_status=Post.DRAFT)
+
+        api.get(
+            reverse("v1:posts:related-posts", kwargs={"slug": draft.slug}),
+            expected_status_code=404,
+        )
+
+    def test_not_found(self, api):
+        api.get(
+            reverse("v1:posts:related-posts", kwargs={"slug": "missing"}),
+            expected_status_code=404,
+        )
@@ -0,0 +1,31 @@
+import json
+
+import pytest
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIRequestFactory
+
+from main.api.serializers import PostListRowSerializer, PostListSerializer
+from main.models import Post
+
+pytestmark = [pytest.mark.django_db]
+
+
+def rendered(data):
+    return json.loads(JSONRenderer().render(data))
+
+
+class TestPostListRowSerializer:
+    def test_same_output(self, pinned_post, mixer):
+        mixer.blend(Post, category=None, content="Short", image="posts/image.png")
+        Post.objects.filter(pk=pinned_post.post_id).update(content="Long " * 100)
+        context = {"request": APIRequestFactory().get("/")}
+        posts = Post.objects.with_full_info().order_by("id")
+
+        expected = PostListSerializer(posts, many=True, context=context).data
+        serializer = PostListRowSerializer(context)
+        data = serializer.serialize(serializer.get_rows(posts))
+
+        assert rendered(data) == rendered(expected)
+        assert data[0]["pinned_info"] is not None
+        assert data[0]["content"].endswith("...")
+        assert data[1]["image"].startswith("http://testserver/")
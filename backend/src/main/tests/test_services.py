@@ -0,0 +1,297 @@
+from datetime import timedelta
+
+import pytest
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from comments.models import Comment
+from main import ranking
+from main.models import Post, PostRankingBucket
+from main.ranking import PostRankingService
+from main.services import (
+    LocalViewsBuffer,
+    PendingViews,
+    PinnedPostsCache,
+    PostViewsService,
+    get_visitor_fingerprint,
+)
+from main.sketches import HyperLogLog
+from main.tasks import flush_post_views
+
+pytestmark = [pytest.mark.django_db]
+
+
+class TestPostViewsService:
+    def test_record_view(self, post, views_buffer):
+        assert PostViewsService.record_view(post.id, "user:1") == (1, 1)
+        assert PostViewsService.record_view(post.id, "user:1") == (2, 1)
+        assert PostViewsService.record_view(post.id, "user:2") == (3, 2)
+
+        # Row is not touched until flush
+        post.refresh_from_db()
+        assert post.views_count == 0
+
+    def test_flush_views(self, mixer, views_buffer):
+        post_1 = mixer.blend(Post, views_count=10)
+        post_2 = mixer.blend(Post, views_count=0)
+
+        views_buffer.add(post_1.id, amount=3)
+        views_buffer.add(post_2.id, "user:1")
+
+        assert PostViewsService.flush_views(batch_size=1) == 2
+
+        post_1.refresh_from_db()
+        post_2.refresh_from_db()
+        assert post_1.views_count == 13
+        assert post_2.views_count == 1
+        assert post_2.unique_views_count == 1
+        assert views_buffer.get(post_1.id).views == 0
+
+    def test_flush_unique_views_never_decrease(self, mixer, views_buffer):
+        post_1 = mixer.blend(Post, unique_views_count=10)
+        views_buffer.add(post_1.id, "user:1")
+
+        PostViewsService.flush_views()
+
+        post_1.refresh_from_db()
+        assert post_1.unique_views_count == 10
+
+    def test_flush_views_task(self, post, views_buffer):
+        views_buffer.add(post.id, amount=5)
+
+        assert flush_post_views() == {"flushed_posts": 1}
+        assert flush_post_views() == {"flushed_posts": 0}
+
+        post.refresh_from_db()
+        assert post.views_count == 5
+
+    def test_overlapping_flush_skipped(self, post, views_buffer):
+        views_buffer.add(post.id, amount=5)
+
+        with views_buffer.lock_flush():
+            assert PostViewsService.flush_views() == 0
+        assert PostViewsService.flush_views() == 1
+
+        post.refresh_from_db()
+        assert post.views_count == 5
+
+
+class TestLocalViewsBuffer:
+    def test_views_added_during_flush_are_kept(self):
+        buffer = LocalViewsBuffer()
+        buffer.add(1, "user:1", amount=2)
+
+        assert buffer.drain() == ({1: 2}, {1: 1})
+        buffer.add(1, "user:2")
+        assert buffer.get(1) == PendingViews(views=3, unique_views=2)
+
+        buffer.ack()
+        assert buffer.get(1).views == 1
+        assert buffer.drain() == ({1: 1}, {1: 2})
+
+    def test_sketches_dropped_on_flush(self):
+        buffer = LocalViewsBuffer()
+        buffer.add(1, "user:1")
+        buffer.add(2, "user:1")
+        buffer.drain()
+        buffer.add(2, "user:2")
+
+        buffer.ack()
+
+        assert list(buffer._sketches) == [2]
+        assert buffer.get(1).unique_views == 1
+        buffer.add(1, "user:2")
+        assert buffer.drain()[1] == {1: 2, 2: 2}
+
+
+class TestHyperLogLog:
+    @pytest.mark.parametrize("unique_count", [0, 10, 1000, 50000])
+    def test_count(self, unique_count):
+        sketch = HyperLogLog()
+        for i in range(unique_count):
+            # Every visitor is counted twice
+            sketch.add(f"user:{i}")
+            sketch.add(f"user:{i}")
+
+        assert sketch.count() == pytest.approx(unique_count, rel=0.03)
+
+
+class TestVisitorFingerprint:
+    def test_authenticated(self, rf, user):
+        request = rf.get("/")
+        request.user = user
+
+        assert get_visitor_fingerprint(request) == f"user:{user.pk}"
+
+    def test_anonymous(self, rf):
+        from django.contrib.auth.models import AnonymousUser
+
+        request_1 = rf.get("/", HTTP_USER_AGENT="agent", REMOTE_ADDR="1.1.1.1")
+        request_2 = rf.get("/", HTTP_USER_AGENT="agent", REMOTE_ADDR="2.2.2.2")
+        request_1.user = request_2.user = AnonymousUser()
+
+        assert get_visitor_fingerprint(request_1) != get_visitor_fingerprint(request_2)
+        assert get_visitor_fingerprint(request_1).startswith("anon:")
+
+    def test_forwarded_for(self, rf, settings):
+        from django.contrib.auth.models import AnonymousUser
+
+        def get_fingerprint(forwarded_for):
+            request = rf.get(
+                "/", HTTP_X_FORWARDED_FOR=forwarded_for, REMOTE_ADDR="10.0.0.1"
+            )
+            request.user = AnonymousUser()
+            return get_visitor_fingerprint(request)
+
+        # Client can't change address, appended by proxy
+        assert get_fingerprint("6.6.6.6, 1.1.1.1") == get_fingerprint("1.1.1.1")
+        assert get_fingerprint("1.1.1.1") != get_fingerprint("2.2.2.2")
+
+        settings.TRUSTED_PROXY_COUNT = 2
+        assert get_fingerprint("6.6.6.6, 1.1.1.1, 3.3.3.3") == get_fingerprint(
+            "1.1.1.1, 4.4.4.4"
+        )
+
+        settings.TRUSTED_PROXY_COUNT = 0
+        assert get_fingerprint("1.1.1.1") == get_fingerprint("2.2.2.2")
+
+
+class TestPinnedPostsCache:
+    def test_timeout_until_subscription_end(self, pinned_post, subscription, settings):
+        subscription.end_date = timezone.now() + timedelta(minutes=10)
+        subscription.save()
+
+        assert 590 <= PinnedPostsCache.get_timeout() <= 600
+
+        settings.PINNED_POSTS_CACHE_TIMEOUT = 60
+        assert PinnedPostsCache.get_timeout() == 60
+
+    def test_block_cached(self, api, pinned_post):
+        url = reverse("v1:posts:pinned-posts-only")
+        response = api.get(url)
+        assert [post["id"] for post in response["results"]] == [pinned_post.post.id]
+
+        with CaptureQueriesContext(connection) as context:
+            api.get(url)
+
+        # Only savepoints of atomic request are left
+        assert not [q for q in context.captured_queries if "SELECT" in q["sql"]]
+
+    @pytest.mark.parametrize(
+        "change",
+        [
+            lambda pinned_post: pinned_post.delete(),
+            lambda pinned_post: pinned_post.user.subscription.expire(),
+            lambda pinned_post: Post.objects.get(pk=pinned_post.post_id).save(),
+        ],
+    )
+    def test_invalidation(self, api, pinned_post, change):
+        api.get(reverse("v1:posts:featured-posts"))
+        version = PinnedPostsCache.get_version()
+
+        change(pinned_post)
+
+        assert PinnedPostsCache.get_version() > version
+
+    def test_volatile_save_keeps_blocks(self, pinned_post):
+        version = PinnedPostsCache.get_version()
+
+        pinned_post.post.save(update_fields=["views_count"])
+
+        assert PinnedPostsCache.get_version() == version
+
+    def test_loaded_pin_checked_without_query(self, mixer, pinned_post):
+        post = mixer.blend(Post)
+        posts = Post.objects.with_pin_info().in_bulk([pinned_post.post_id, post.pk])
+        version = PinnedPostsCache.get_version()
+
+        with CaptureQueriesContext(connection) as context:
+            posts[post.pk].save()
+            assert PinnedPostsCache.get_version() == version
+            posts[pinned_post.post_id].save()
+
+        assert PinnedPostsCache.get_version() > version
+        assert not [
+            q for q in context.captured_queries if "subscribe_pinnedpost" in q["sql"]
+        ]
+
+    def test_lost_version_not_reused(self):
+        version = PinnedPostsCache.get_version()
+        cache.delete(PinnedPostsCache.VERSION_KEY)
+
+        PinnedPostsCache.invalidate()
+
+        assert PinnedPostsCache.get_version() > version
+
+
+class TestPostRankingService:
+    @pytest.fixture
+    def posts(self, mixer):
+        return mixer.cycle(3).blend(Post, publication_status=Post.PUBLISHED)
+
+    def test_boards(self, posts):
+        now = timezone.now()
+        # Heavy, but old activity
+        PostRankingService.record(posts[0].id, 10, now - timedelta(days=8))
+        PostRankingService.record(posts[1].id, 6, now - timedelta(days=5))
+        PostRankingService.record(posts[2].id, 4, now)
+
+        assert PostRankingService.top_ids(PostRankingService.ALL_TIME, 3) == [
+            posts[0].id,
+            posts[1].id,
+            posts[2].id,
+        ]
+        assert PostRankingService.top_ids(PostRankingService.WEEK, 3) == [
+            posts[1].id,
+            posts[2].id,
+        ]
+        assert PostRankingService.top_ids(PostRankingService.TRENDING, 3) == [
+            posts[2].id
+        ]
+
+    def test_top_posts_published_only(self, posts):
+        posts[0].publication_status = Post.DRAFT
+        posts[0].save()
+        for score, post in enumerate(posts):
+            PostRankingService.record(post.id, score + 1)
+
+        top_posts = PostRankingService.top_posts(
+            PostRankingService.ALL_TIME, 5, exclude=[posts[2].id]
+        )
+
+        assert top_posts == [posts[1]]
+
+    def test_events(
+        self, post, views_buffer, mixer, django_capture_on_commit_callbacks
+    ):
+        PostViewsService.record_view(post.id)
+        with django_capture_on_commit_callbacks(execute=True):
+            mixer.blend(Comment, post=post, is_active=True)
+        assert PostRankingService.top_ids(PostRankingService.WEEK, 1) == [post.id]
+
+        with django_capture_on_commit_callbacks(execute=True):
+            post.delete()
+        assert PostRankingService.top_ids(PostRankingService.ALL_TIME, 1) == []
+
+    def test_checkpoint_and_restore(self, posts, monkeypatch):
+        posts[0].views_count = 50
+        posts[0].save()
+        PostRankingService.record(posts[1].id, 3)
+        PostRankingService.record(posts[2].id, 2, timezone.now() - timedelta(days=2))
+
+        assert PostRankingService.checkpoint() == 2
+        assert PostRankingBucket.objects.count() == 2
+
+        # Redis restart
+        monkeypatch.setattr(ranking, "_ranking_store", ranking.LocalRankingStore())
+
+        assert PostRankingService.top_ids(PostRankingService.WEEK, 3) == [
+            posts[1].id,
+            posts[2].id,
+        ]
+        assert PostRankingService.top_ids(PostRankingService.ALL_TIME, 1) == [
+            posts[0].id
+        ]
@@ -0,0 +1,87 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from main.models import Post
+
+pytestmark = [pytest.mark.django_db]
+
+
+def get_selects(context):
+    return [q["sql"] for q in context.captured_queries if q["sql"].startswith("SELECT")]
+
+
+class TestPostsSparseFields:
+    def test_feed(self, api, pinned_post, mixer):
+        mixer.cycle(2).blend(Post, publication_status=Post.PUBLISHED)
+        url = reverse("v1:posts:post-list")
+
+        with CaptureQueriesContext(connection) as context:
+            response = api.get(url, data={"fields": "id,title", "page_size": 1})
+
+        assert [list(post) for post in response["results"]] == [["id", "title"]] * 2
+        # Joins of pin info are only used for ordering of pinned posts first
+        for sql in get_selects(context):
+            assert '"users"' not in sql
+            assert '"categories"' not in sql
+
+        # Cursor is built from keys, which were not requested
+        response = api.get(response["next"])
+        assert [list(post) for post in response["results"]] == [["id", "title"]]
+
+    def test_feed_omit(self, api, post):
+        response = api.get(
+            reverse("v1:posts:post-list"), data={"omit": "content,pinned_info"}
+        )
+
+        result = response["results"][0]
+        assert "content" not in result
+        assert "pinned_info" not in result
+        assert result["title"] == post.title
+
+    def test_detail(self, api, pinned_post):
+        url = reverse("v1:posts:post-detail", kwargs={"slug": pinned_post.post.slug})
+
+        with CaptureQueriesContext(connection) as context:
+            response = api.get(url, data={"omit": "author_info,pinned_info,content"})
+
+        assert "author_info" not in response
+        assert "pinned_info" not in response
+        assert response["views_count"] == pinned_post.post.views_count + 1
+        (sql,) = [sql for sql in get_selects(context) if '"posts"' in sql]
+        assert '"subscriptions"' not in sql
+        assert '"content"' not in sql
+
+    def test_users_posts(self, api, auth_user, mixer):
+        mixer.cycle(2).blend(Post, author=auth_user)
+
+        response = api.get(
+            reverse("v1:posts:my-posts"), data={"fields": "slug", "page_size": 1}
+        )
+        assert list(response["results"][0]) == ["slug"]
+
+        response = api.get(response["next"])
+        assert list(response["results"][0]) == ["slug"]
+
+    def test_batch(self, api, post):
+        response = api.get(
+            reverse("v1:posts:post-batch"),
+            data={"slugs": post.slug, "fields": "id,views_count"},
+        )
+
+        assert response["results"] == [{"id": post.id, "views_count": post.views_count}]
+
+    def test_categories(self, api, category):
+        response = api.get(reverse("v1:posts:category-list"), data={"fields": "name"})
+
+        assert response["results"] == [{"name": category.name}]
+
+    def test_unknown_field(self, api, post):
+        response = api.get(
+            reverse("v1:posts:post-list"),
+            data={"fields": "id,password"},
+            expected_status_code=400,
+        )
+
+        assert "password" in str(response["fields"])
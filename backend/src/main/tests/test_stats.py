@@ -0,0 +1,207 @@
+from datetime import date, timedelta
+
+import pytest
+from django.urls import reverse
+from django.utils import timezone
+
+from accounts.models import User
+from comments.models import Comment
+from main.models import Post, PostDailyStats
+from main.services import PostViewsService
+from main.stats import DailyStats, LocalStatsBuffer, PostStatsService
+from main.tasks import flush_post_stats
+
+pytestmark = [pytest.mark.django_db]
+
+DAY = date(2025, 1, 10)
+
+
+class TestLocalStatsBuffer:
+    def test_drain(self):
+        buffer = LocalStatsBuffer()
+        buffer.add_view(1, DAY, "user:1")
+        buffer.add_view(1, DAY, "user:1")
+        buffer.add_view(1, DAY + timedelta(days=1))
+        buffer.add_comment(2, DAY)
+
+        assert buffer.drain() == {
+            (1, DAY): DailyStats(views=2, unique_views=1, comments=0),
+            (1, DAY + timedelta(days=1)): DailyStats(
+                views=1, unique_views=0, comments=0
+            ),
+            (2, DAY): DailyStats(views=0, unique_views=0, comments=1),
+        }
+
+    def test_stats_added_during_flush_are_kept(self):
+        buffer = LocalStatsBuffer()
+        today = timezone.localdate()
+        buffer.add_view(1, today, "user:1")
+        buffer.drain()
+        buffer.add_view(1, today, "user:2")
+
+        # Failed flush is retried with the same stats
+        assert buffer.drain() == {(1, today): DailyStats(1, 1, 0)}
+
+        buffer.ack()
+        assert buffer.drain() == {(1, today): DailyStats(1, 2, 0)}
+
+    def test_visitors_of_past_days_are_forgotten(self):
+        buffer = LocalStatsBuffer()
+        buffer.add_view(1, DAY, "user:1")
+        buffer.drain()
+        buffer.ack()
+
+        # Late view of past day is counted, but its visitors are estimated again
+        buffer.add_view(1, DAY, "user:2")
+        assert buffer.drain() == {(1, DAY): DailyStats(1, 1, 0)}
+
+
+class TestPostStatsService:
+    def test_flush(self, post, mixer, stats_buffer):
+        PostDailyStats.objects.create(
+            post=post, day=DAY, views=10, unique_views=5, comments=1
+        )
+        deleted = mixer.blend(Post)
+        stats_buffer.add_view(post.id, DAY, "user:1")
+        stats_buffer.add_comment(post.id, DAY)
+        stats_buffer.add_view(post.id, DAY + timedelta(days=1), "user:1")
+        stats_buffer.add_view(deleted.id, DAY)
+        deleted.delete()
+
+        assert PostStatsService.flush(batch_size=1) == 3
+
+        assert list(
+            PostDailyStats.objects.order_by("day").values_list(
+                "post_id", "day", "views", "unique_views", "comments"
+            )
+        ) == [
+            # Unique views estimate is not decreased
+            (post.id, DAY, 11, 5, 2),
+            (post.id, DAY + timedelta(days=1), 1, 1, 0),
+        ]
+        assert flush_post_stats() == {"flushed_stats": 0}
+
+    def test_overlapping_flush_skipped(self, post, stats_buffer):
+        stats_buffer.add_view(post.id, DAY)
+
+        with stats_buffer.lock_flush():
+            assert PostStatsService.flush() == 0
+        assert PostStatsService.flush() == 1
+
+        assert PostDailyStats.objects.get(post=post, day=DAY).views == 1
+
+    def test_views_and_comments_recorded(
+        self, post, user, mixer, django_capture_on_commit_callbacks
+    ):
+        PostViewsService.record_view(post.id, "user:1")
+        with django_capture_on_commit_callbacks(execute=True):
+            mixer.blend(Comment, post=post, author=user, is_active=True)
+            mixer.blend(Comment, post=post, author=user, is_active=False)
+
+        PostStatsService.flush()
+
+        stats = PostDailyStats.objects.get(post=post)
+        assert stats.day == timezone.localdate()
+        assert (stats.views, stats.unique_views, stats.comments) == (1, 1, 1)
+
+    def test_daily_stats(self, post, mixer):
+        post_2 = mixer.blend(Post, author=post.author)
+        PostDailyStats.objects.create(post=post, day=DAY, views=3, unique_views=2)
+        PostDailyStats.objects.create(post=post_2, day=DAY, views=1, unique_views=1)
+        PostDailyStats.objects.create(post=post, day=DAY + timedelta(days=5), views=9)
+
+        days = PostStatsService.get_daily_stats(
+            PostDailyStats.objects.all(), DAY - timedelta(days=1), DAY + timedelta(1)
+        )
+
+        assert days == [
+            {
+                "day": DAY - timedelta(days=1),
+                "views": 0,
+                "unique_views": 0,
+                "comments": 0,
+            },
+            {"day": DAY, "views": 4, "unique_views": 3, "comments": 0},
+            {
+                "day": DAY + timedelta(days=1),
+                "views": 0,
+                "unique_views": 0,
+                "comments": 0,
+            },
+        ]
+
+
+class TestPostStatsApi:
+    def test_post_stats(self, api, auth_user, post):
+        PostDailyStats.objects.create(post=post, day=DAY, views=3, comments=1)
+
+        response = api.get(
+            reverse("v1:posts:post-stats", kwargs={"slug": post.slug}),
+            data={"from": "2025-01-09", "to": "2025-01-10"},
+        )
+
+        assert response == {
+            "totals": {"views": 3, "unique_views": 0, "comments": 1},
+            "days": [
+                {"day": "2025-01-09", "views": 0, "unique_views": 0, "comments": 0},
+                {"day": "2025-01-10", "views": 3, "unique_views": 0, "comments": 1},
+            ],
+        }
+
+    def test_default_days(self, api, auth_user, post, settings):
+        settings.POST_STATS_DEFAULT_DAYS = 7
+
+        response = api.get(reverse("v1:posts:post-stats", kwargs={"slug": post.slug}))
+
+        assert len(response["days"]) == 7
+        assert response["days"][-1]["day"] == timezone.localdate().isoformat()
+
+    @pytest.mark.parametrize(
+        "params",
+        [
+            {"from": "2025-01-10", "to": "2025-01-09"},
+            {"from": "2024-01-01", "to": "2025-01-10"},
+            {"from": "yesterday"},
+        ],
+    )
+    def test_invalid_days(self, api, auth_user, post, params):
+        response = api.get(
+            reverse("v1:posts:post-stats", kwargs={"slug": post.slug}),
+            data=params,
+            expected_status_code=400,
+        )
+
+        assert response["error"]
+
+    def test_not_authenticated(self, api, post):
+        api.get(
+            reverse("v1:posts:post-stats", kwargs={"slug": post.slug}),
+            expected_status_code=401,
+        )
+
+    def test_not_author(self, api, post, mixer):
+        api.api_client.force_authenticate(mixer.blend(User))
+
+        api.get(
+            reverse("v1:posts:post-stats", kwargs={"slug": post.slug}),
+            expected_status_code=404,
+        )
+
+    def test_staff(self, api, post, mixer):
+        api.api_client.force_authenticate(mixer.blend(User, is_staff=True))
+
+        response = api.get(reverse("v1:posts:post-stats", kwargs={"slug": post.slug}))
+
+        assert response["totals"]["views"] == 0
+
+    def test_my_posts_stats(self, api, auth_user, post, mixer):
+        post_2 = mixer.blend(Post, author=auth_user)
+        other_post = mixer.blend(Post)
+        for item in (post, post_2, other_post):
+            PostDailyStats.objects.create(post=item, day=DAY, views=2, comments=1)
+
+        response = api.get(
+            reverse("v1:posts:my-posts-stats"), data={"from": DAY, "to": DAY}
+        )
+
+        assert response["totals"] == {"views": 4, "unique_views": 0, "comments": 2}
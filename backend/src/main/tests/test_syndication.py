@@ -0,0 +1,100 @@
+import io
+from xml.etree import ElementTree
+
+import pytest
+from django.core.management import call_command
+
+from main.models import Post
+from main.syndication import SyndicationService
+from main.tasks import generate_syndication
+
+pytestmark = [pytest.mark.django_db]
+
+NS = {"s": "http://www.sitemaps.org/schemas/sitemap/0.9"}
+
+
+@pytest.fixture(autouse=True)
+def media_root(settings, tmp_path):
+    settings.MEDIA_ROOT = tmp_path
+    settings.SYNDICATION_URL = "https://example.com/syndication/"
+    settings.FRONTEND_URL = "https://example.com"
+
+
+@pytest.fixture
+def posts(mixer, user, category, settings):
+    posts = mixer.cycle(3).blend(
+        Post, author=user, category=category, publication_status=Post.PUBLISHED
+    )
+    # Each post gets its own chunk
+    settings.SITEMAP_CHUNK_SIZE = 1
+    return posts
+
+
+def read(tmp_path, name):
+    return (tmp_path / "syndication" / name).read_bytes()
+
+
+def get_locs(content):
+    return [
+        loc.text for loc in ElementTree.fromstring(content).iterfind(".//s:loc", NS)
+    ]
+
+
+class TestSyndication:
+    def test_generate(self, tmp_path, posts, category):
+        result = generate_syndication()
+
+        # Index, chunks, global and category RSS and Atom feeds
+        assert result == {"written": 1 + 3 + 4, "deleted": 0}
+        assert get_locs(read(tmp_path, "sitemap.xml")) == [
+            f"https://example.com/syndication/sitemap-{post.pk}.xml" for post in posts
+        ]
+        assert get_locs(read(tmp_path, f"sitemap-{posts[0].pk}.xml")) == [
+            f"https://example.com/posts/{posts[0].slug}"
+        ]
+        rss = read(tmp_path, f"feeds/categories/{category.slug}/rss.xml").decode()
+        assert all(post.title in rss for post in posts)
+        atom = read(tmp_path, "feeds/atom.xml").decode()
+        assert atom.count("<entry>") == 3
+
+    def test_only_changed_files_rewritten(self, tmp_path, posts, mixer, user):
+        SyndicationService.generate()
+        chunk = tmp_path / "syndication" / f"sitemap-{posts[1].pk}.xml"
+        mtime = chunk.stat().st_mtime_ns
+
+        # Counters don't change sitemaps and feeds
+        Post.objects.filter(pk=posts[1].pk).update(views_count=10)
+        assert SyndicationService.generate() == {"written": 0, "deleted": 0}
+
+        posts[0].title = "Renamed"
+        posts[0].save()
+        other_category_post = mixer.blend(
+            Post, author=user, publication_status=Post.PUBLISHED
+        )
+        # Chunks of changed and new posts, index, global and two category feeds
+        assert SyndicationService.generate() == {"written": 2 + 1 + 6, "deleted": 0}
+        assert chunk.stat().st_mtime_ns == mtime
+        assert b"Renamed" in read(tmp_path, "feeds/rss.xml")
+        assert get_locs(read(tmp_path, f"sitemap-{other_category_post.pk}.xml"))
+
+    def test_unpublished_and_deleted(self, tmp_path, posts, category):
+        SyndicationService.generate()
+
+        posts[0].publication_status = Post.DRAFT
+        posts[0].save()
+        category.delete()
+
+        result = SyndicationService.generate()
+
+        assert result["deleted"] == 1 + 2
+        assert not (tmp_path / "syndication" / f"sitemap-{posts[0].pk}.xml").exists()
+        assert not list((tmp_path / "syndication" / "feeds").glob("categories/*/*"))
+        assert len(get_locs(read(tmp_path, "sitemap.xml"))) == 2
+
+    def test_command(self, posts):
+        SyndicationService.generate()
+        output = io.StringIO()
+
+        call_command("generate_syndication", full=True, stdout=output)
+
+        assert "8 files written, 0 deleted" in output.getvalue()
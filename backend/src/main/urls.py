@@ -1,24 +1,52 @@
+from typing import Any, Callable
+
+from django.conf import settings
 from django.urls import path
 
+from main.api import async_views
 from main.api.views import (
     CategoryDetailView,
     CategoryListCreateView,
     PostDetailView,
     PostListCreateView,
     UsersPostsView,
+    autocomplete_posts,
+    batch_posts,
     featured_posts,
+    my_posts_stats,
     pinned_posts_only,
     popular_posts,
+    post_stats,
     posts_by_category,
     recent_posts,
+    record_post_view,
+    related_posts,
+    search_posts,
     toggle_post_pin_status,
+    trending_posts,
 )
 
 app_name = "main"
 
+category_list: Callable[..., Any]
+featured: Callable[..., Any]
+popular: Callable[..., Any]
+recent: Callable[..., Any]
+if settings.ASYNC_HOMEPAGE_VIEWS:
+    # Homepage endpoints are served by async views under ASGI server
+    category_list = async_views.category_list
+    featured = async_views.featured_posts
+    popular = async_views.popular_posts
+    recent = async_views.recent_posts
+else:
+    category_list = CategoryListCreateView.as_view()
+    featured = featured_posts
+    popular = popular_posts
+    recent = recent_posts
+
 urlpatterns = [
     # Categories
-    path("categories/", CategoryListCreateView.as_view(), name="category-list"),
+    path("categories/", category_list, name="category-list"),
     path(
         "categories/<slug:slug>",
         CategoryDetailView.as_view(),
@@ -31,15 +59,23 @@ urlpatterns = [
     ),
     # Posts
     path("", PostListCreateView.as_view(), name="post-list"),
-    path("recent/", recent_posts, name="recent-posts"),
-    path("popular/", popular_posts, name="popular-posts"),
+    path("recent/", recent, name="recent-posts"),
+    path("popular/", popular, name="popular-posts"),
+    path("trending/", trending_posts, name="trending-posts"),
     path("pinned/", pinned_posts_only, name="pinned-posts-only"),
-    path("featured/", featured_posts, name="featured-posts"),
+    path("featured/", featured, name="featured-posts"),
+    path("search/", search_posts, name="post-search"),
+    path("autocomplete/", autocomplete_posts, name="post-autocomplete"),
+    path("batch/", batch_posts, name="post-batch"),
     path(
         "toggle-pin-status/<slug:slug>",
         toggle_post_pin_status,
         name="toggle-pin-status",
     ),
     path("my-posts/", UsersPostsView.as_view(), name="my-posts"),
+    path("my-posts/stats/", my_posts_stats, name="my-posts-stats"),
     path("<slug:slug>/", PostDetailView.as_view(), name="post-detail"),
+    path("<slug:slug>/view/", record_post_view, name="post-view"),
+    path("<slug:slug>/related/", related_posts, name="related-posts"),
+    path("<slug:slug>/stats/", post_stats, name="post-stats"),
 ]
@@ -0,0 +1,46 @@
+from rest_framework import serializers
+
+from comments.api.serializers import CommentSerializer
+from main.api.serializers import (
+    CategorySerializer,
+    FeaturedPostsSerializer,
+    PostDetailSerializer,
+    PostListSerializer,
+)
+from subscribe.api.serializers import UserSubscriptionStatusSerializer
+
+
+class CategoriesPageSerializer(serializers.Serializer):
+    """Serializer for correct display of the first page of categories in OpenAPI."""
+
+    count = serializers.IntegerField(read_only=True)
+    next = serializers.URLField(read_only=True, allow_null=True)
+    previous = serializers.URLField(read_only=True, allow_null=True)
+    results = CategorySerializer(many=True, read_only=True)
+
+
+class HomePageSerializer(serializers.Serializer):
+    """Serializer for correct display of home_page view response data in OpenAPI."""
+
+    recent = PostListSerializer(many=True, read_only=True)
+    popular = PostListSerializer(many=True, read_only=True)
+    featured = FeaturedPostsSerializer(read_only=True)
+    categories = CategoriesPageSerializer(read_only=True)
+    subscription = UserSubscriptionStatusSerializer(read_only=True, allow_null=True)
+
+
+class PinChecksSerializer(serializers.Serializer):
+    """Serializer for correct display of can_pin_post view response data in OpenAPI."""
+
+    post_id = serializers.IntegerField(read_only=True)
+    can_pin = serializers.BooleanField(read_only=True)
+    checks = serializers.DictField(child=serializers.BooleanField(), read_only=True)
+    msg = serializers.CharField(read_only=True)
+
+
+class PostPageSerializer(serializers.Serializer):
+    """Serializer for correct display of post_page view response data in OpenAPI."""
+
+    post = PostDetailSerializer(read_only=True)
+    comments = CommentSerializer(many=True, read_only=True)
+    can_pin = PinChecksSerializer(read_only=True, allow_null=True)
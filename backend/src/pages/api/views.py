@@ -0,0 +1,33 @@
+from django.db import transaction
+from drf_spectacular.utils import extend_schema
+from rest_framework import permissions
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.request import Request
+from rest_framework.response import Response
+
+from pages.api.serializers import HomePageSerializer, PostPageSerializer
+from pages.services import HomePageService, PostPageService
+
+
+@transaction.non_atomic_requests
+@extend_schema(responses=HomePageSerializer)
+@api_view(["GET"])
+@permission_classes([permissions.AllowAny])
+def home_page(request: Request) -> Response:
+    """
+    All data of home page in one request:
+    recent, popular and featured posts, categories and subscription status of user
+    """
+    return Response(HomePageService.get_page(request))
+
+
+@transaction.non_atomic_requests
+@extend_schema(responses=PostPageSerializer)
+@api_view(["GET"])
+@permission_classes([permissions.AllowAny])
+def post_page(request: Request, slug: str) -> Response:
+    """
+    All data of post page in one request:
+    post, its main comments and, for authenticated user, whether it can be pinned
+    """
+    return Response(PostPageService.get_page(request, slug))
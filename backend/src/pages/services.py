@@ -0,0 +1,331 @@
+import hashlib
+import time
+from datetime import timedelta
+from typing import Any, Callable, Iterable, NamedTuple, cast
+
+from django.conf import settings
+from django.core.cache import cache
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.request import Request
+from rest_framework.utils.urls import replace_query_param
+
+from app.conditional import ResourceVersions
+from app.db import is_replica_read
+from comments.api.serializers import CommentRowSerializer
+from comments.api.views import get_post_comments
+from main.api.serializers import (
+    CategorySerializer,
+    PostDetailSerializer,
+    PostListRowSerializer,
+)
+from main.api.views import (
+    FEATURED_PINNED_COUNT,
+    FEATURED_POPULAR_COUNT,
+    get_feed_resources,
+    get_most_viewed_posts,
+    get_pinned_posts_block,
+    get_recent_weekly_posts,
+)
+from main.models import Category, Post
+from main.ranking import PostRankingService
+from main.services import PostViewsService, get_visitor_fingerprint
+from subscribe.api.serializers import UserSubscriptionStatusSerializer
+from subscribe.api.views import get_pin_checks
+
+# Numbers of posts in recent and popular sections, as in their endpoints
+RECENT_COUNT = 10
+POPULAR_COUNT = 10
+
+
+class Section(NamedTuple):
+    """Cacheable section of page"""
+
+    # Resources, shown in section, e.g. "posts" or "comments:<id>"
+    resources: list[str]
+    # Section expires not later than this timeout, e.g. when it shows ranking
+    timeout: int
+
+
+class PageSectionsCache:
+    """
+    Cache of page sections, shared by all users.
+    Section is kept under versions of resources it shows, so a change
+    makes outdated only sections, which show the changed resource.
+    """
+
+    KEY = "pages:section:{}:{}:{}"
+
+    @staticmethod
+    def get_many(
+        request: Request,
+        sections: dict[str, Section],
+        build: Callable[[list[str]], dict[str, Any]],
+    ) -> dict[str, Any]:
+        """Returns data of sections, missing ones are built together by one call"""
+        versions = ResourceVersions.get(
+            {name for section in sections.values() for name in section.resources}
+        )
+        keys = {
+            name: PageSectionsCache.get_key(request, name, section, versions)
+            for name, section in sections.items()
+        }
+        cached = cache.get_many([key for key in keys.values() if key is not None])
+        data = {name: cached[key] for name, key in keys.items() if key in cached}
+
+        missing = [name for name in sections if name not in data]
+        if missing:
+            built = build(missing)
+            for name in missing:
+                key = keys[name]
+                if key is not None:
+                    cache.set(key, built[name], sections[name].timeout)
+            data.update(built)
+        return data
+
+    @staticmethod
+    def get_key(
+        request: Request, name: str, section: Section, versions: dict[str, float]
+    ) -> str | None:
+        """
+        Returns key of section by versions of its resources.
+        Returns None, if replica may lag behind new version.
+        """
+        section_versions = [versions[resource] for resource in section.resources]
+        if (
+            is_replica_read()
+            and time.time() - max(section_versions) < settings.READ_YOUR_WRITES_WINDOW
+        ):
+            return None
+        # Sections of different objects, e.g. comments of posts, differ by resources
+        digest = hashlib.sha256(
+            repr(list(zip(section.resources, section_versions))).encode()
+        ).hexdigest()[:32]
+        # Serialized data may contain absolute URLs
+        return PageSectionsCache.KEY.format(name, request.get_host(), digest)
+
+
+class HomePostsLoader:
+    """
+    Rows of posts, shown in several home page sections.
+    Ranked posts of all sections are fetched with one id__in query,
+    recent posts are fetched once and also fill featured section.
+    """
+
+    def __init__(self, request: Request) -> None:
+        self.serializer = PostListRowSerializer({"request": request})
+        self.rows: dict[int, dict[str, Any]] = {}
+        self.loaded: set[int] = set()
+        self._recent: list[dict[str, Any]] | None = None
+
+    def get_recent(self) -> list[dict[str, Any]]:
+        """Returns rows of the most recent published posts"""
+        if self._recent is None:
+            self._recent = list(
+                self.serializer.get_rows(
+                    Post.objects.filter(publication_status=Post.PUBLISHED).order_by(
+                        "-created"
+                    )
+                )[:RECENT_COUNT]
+            )
+            self.rows.update((row["id"], row) for row in self._recent)
+        return self._recent
+
+    def load(self, ids: Iterable[int]) -> None:
+        """Fetches rows of published posts, which were not loaded yet"""
+        missing = set(ids) - self.loaded - self.rows.keys()
+        if missing:
+            self.rows.update(
+                (row["id"], row)
+                for row in self.serializer.get_rows(Post.objects).filter(
+                    id__in=missing, publication_status=Post.PUBLISHED
+                )
+            )
+            self.loaded |= missing
+
+    def pick(
+        self, ids: Iterable[int], limit: int, exclude: Iterable[int] = ()
+    ) -> list[dict[str, Any]]:
+        """Returns loaded rows of posts in order of ids"""
+        excluded = set(exclude)
+        return [
+            self.rows[post_id]
+            for post_id in ids
+            if post_id in self.rows and post_id not in excluded
+        ][:limit]
+
+    def get_recent_weekly(self, limit: int, exclude: list[int]) -> list[dict[str, Any]]:
+        """Returns rows of recent posts of last week, taken from recent posts if possible"""
+        if limit <= 0:
+            return []
+        week_start = timezone.now() - timedelta(days=7)
+        recent = self.get_recent()
+        rows = [
+            row
+            for row in recent
+            if row["created"] >= week_start and row["id"] not in exclude
+        ][:limit]
+        if (
+            len(rows) < limit
+            and len(recent) == RECENT_COUNT
+            and recent[-1]["created"] >= week_start
+        ):
+            # Older posts of the week are not among recent ones
+            return get_recent_weekly_posts(self.serializer, limit, exclude)
+        return rows
+
+
+def build_home_posts(request: Request, names: list[str]) -> dict[str, Any]:
+    """Returns serialized recent, popular and featured sections of home page"""
+    loader = HomePostsLoader(request)
+    serialize = loader.serializer.serialize
+    ranked_ids: list[int] = []
+    if "recent" in names:
+        loader.get_recent()
+    if "popular" in names:
+        popular_ids = PostRankingService.top_ids(
+            PostRankingService.ALL_TIME, POPULAR_COUNT * 2
+        )
+        ranked_ids += popular_ids
+    if "featured" in names:
+        all_pinned_posts = get_pinned_posts_block(request)
+        pinned_posts = all_pinned_posts[:FEATURED_PINNED_COUNT]
+        pinned_ids = [post["id"] for post in pinned_posts]
+        # Ids are over-fetched, as ranked posts may be unpublished or pinned
+        weekly_ids = PostRankingService.top_ids(
+            PostRankingService.WEEK, FEATURED_POPULAR_COUNT * 2 + len(pinned_ids)
+        )
+        ranked_ids += weekly_ids
+    loader.load(ranked_ids)
+
+    data: dict[str, Any] = {}
+    if "recent" in names:
+        data["recent"] = serialize(loader.get_recent())
+    if "popular" in names:
+        popular_posts = loader.pick(popular_ids, POPULAR_COUNT)
+        popular_posts += get_most_viewed_posts(
+            loader.serializer,
+            POPULAR_COUNT - len(popular_posts),
+            [post["id"] for post in popular_posts],
+        )
+        data["popular"] = serialize(popular_posts)
+    if "featured" in names:
+        popular_posts_of_week = loader.pick(
+            weekly_ids, FEATURED_POPULAR_COUNT, exclude=pinned_ids
+        )
+        popular_posts_of_week += loader.get_recent_weekly(
+            FEATURED_POPULAR_COUNT - len(popular_posts_of_week),
+            pinned_ids + [post["id"] for post in popular_posts_of_week],
+        )
+        data["featured"] = {
+            "pinned": pinned_posts,
+            "popular": serialize(popular_posts_of_week),
+            "total_pinned": len(all_pinned_posts),
+        }
+    return data
+
+
+def build_categories(request: Request) -> dict[str, Any]:
+    """Returns the first page of categories, as returned by categories endpoint"""
+    page_size = cast(int, settings.REST_FRAMEWORK["PAGE_SIZE"])
+    count = Category.objects.count()
+    next_url = None
+    if count > page_size:
+        next_url = replace_query_param(
+            request.build_absolute_uri(reverse("v1:posts:category-list")), "page", 2
+        )
+    return {
+        "count": count,
+        "next": next_url,
+        "previous": None,
+        "results": CategorySerializer(
+            Category.objects.order_by("name")[:page_size],
+            many=True,
+            context={"request": request},
+        ).data,
+    }
+
+
+class HomePageService:
+    """Service for building all sections of home page in one request"""
+
+    @staticmethod
+    def get_sections(request: Request) -> dict[str, Section]:
+        feed = get_feed_resources(request)
+        timeout = settings.PAGE_SECTIONS_CACHE_TIMEOUT
+        # Rankings change without writes, so they are rebuilt like boards
+        ranking_timeout = min(timeout, settings.POST_RANKING_BOARD_TIMEOUT)
+        return {
+            "recent": Section(feed, timeout),
+            "popular": Section(feed, ranking_timeout),
+            "featured": Section(feed, ranking_timeout),
+            "categories": Section(["categories"], timeout),
+        }
+
+    @staticmethod
+    def build(request: Request, names: list[str]) -> dict[str, Any]:
+        """Builds missing sections, sharing posts between them"""
+        data = build_home_posts(
+            request, [name for name in names if name != "categories"]
+        )
+        if "categories" in names:
+            data["categories"] = build_categories(request)
+        return data
+
+    @staticmethod
+    def get_page(request: Request) -> dict[str, Any]:
+        """Returns shared sections from cache and personal ones"""
+        data = PageSectionsCache.get_many(
+            request,
+            HomePageService.get_sections(request),
+            lambda names: HomePageService.build(request, names),
+        )
+        data["subscription"] = None
+        if request.user.is_authenticated:
+            data["subscription"] = UserSubscriptionStatusSerializer(
+                context={"request": request}
+            ).data
+        return data
+
+
+class PostPageService:
+    """Service for building post page: post, its comments and pin checks"""
+
+    @staticmethod
+    def get_page(request: Request, slug: str) -> dict[str, Any]:
+        """Returns page of post, which is loaded once for all sections"""
+        post = get_object_or_404(Post.objects.for_detail(), slug=slug)
+        # Views are counted like in post details, so post itself is not cached
+        if settings.POST_VIEWS_COUNT_ON_GET:
+            post.increment_views(get_visitor_fingerprint(request))
+        else:
+            post.add_pending_views(PostViewsService.get_pending_views(post.pk))
+
+        data: dict[str, Any] = {
+            "post": PostDetailSerializer(post, context={"request": request}).data,
+            "comments": [],
+            "can_pin": None,
+        }
+        if post.publication_status != Post.PUBLISHED:
+            # Drafts have no comments and can't be pinned
+            return data
+
+        sections = {
+            "comments": Section(
+                [f"comments:{post.pk}", "users"],
+                settings.PAGE_SECTIONS_CACHE_TIMEOUT,
+            )
+        }
+        data |= PageSectionsCache.get_many(
+            request,
+            sections,
+            lambda names: {
+                "comments": get_post_comments(
+                    CommentRowSerializer({"request": request}), post.pk
+                )
+            },
+        )
+        if request.user.is_authenticated:
+            data["can_pin"] = get_pin_checks(request.user, post)
+        return data
@@ -0,0 +1,160 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from comments.models import Comment
+from main.models import Post
+from main.ranking import PostRankingService
+from pages.services import PageSectionsCache, Section
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def posts(mixer, user, category):
+    posts = mixer.cycle(5).blend(
+        Post, author=user, category=category, publication_status=Post.PUBLISHED
+    )
+    for post in posts:
+        PostRankingService.record_view(post.pk)
+    return posts
+
+
+class TestHomePage:
+    url = reverse("v1:pages:home-page")
+
+    def test_same_data_as_endpoints(self, api, posts, pinned_post):
+        data = api.get(self.url)
+
+        assert data == {
+            "recent": api.get(reverse("v1:posts:recent-posts")),
+            "popular": api.get(reverse("v1:posts:popular-posts")),
+            "featured": api.get(reverse("v1:posts:featured-posts")),
+            "categories": api.get(reverse("v1:posts:category-list")),
+            "subscription": None,
+        }
+        assert data["popular"]
+        assert data["featured"]["pinned"]
+
+    def test_subscription_status(self, api, auth_user, subscription):
+        data = api.get(self.url)
+
+        assert data["subscription"] == api.get(
+            reverse("v1:subscribe:subscription-status")
+        )
+
+    def test_posts_fetched_once(self, api, posts):
+        with CaptureQueriesContext(connection) as context:
+            api.get(self.url)
+
+        # Recent posts, ranked ones of both popular sections, most viewed ones
+        # filling popular section of less than 10 ranked posts and pinned posts block
+        posts_queries = [
+            query
+            for query in context.captured_queries
+            if query["sql"].startswith('SELECT "posts"."id"')
+        ]
+        assert len(posts_queries) == 4
+
+    def test_popular_without_ranking(self, api, mixer):
+        mixer.cycle(2).blend(Post, publication_status=Post.PUBLISHED)
+        PostRankingService.ensure_restored()
+        # Posts, created after ranking was restored, are not ranked yet
+        mixer.cycle(2).blend(Post, publication_status=Post.PUBLISHED)
+
+        data = api.get(self.url)
+
+        assert len(data["popular"]) == 4
+        assert data["popular"] == api.get(reverse("v1:posts:popular-posts"))
+
+    def test_sections_cached(self, api, posts, mixer):
+        first = api.get(self.url)
+
+        with CaptureQueriesContext(connection) as context:
+            assert api.get(self.url) == first
+        assert not context.captured_queries
+
+        mixer.blend(Post, publication_status=Post.PUBLISHED)
+        data = api.get(self.url)
+        assert len(data["recent"]) == len(first["recent"]) + 1
+        assert data["categories"]["count"] == first["categories"]["count"] + 1
+
+
+class TestPostPage:
+    def get_url(self, post):
+        return reverse("v1:pages:post-page", kwargs={"slug": post.slug})
+
+    def test_same_data_as_endpoints(self, api, settings, post, mixer):
+        settings.POST_VIEWS_COUNT_ON_GET = False
+        post.publication_status = Post.PUBLISHED
+        post.save()
+        mixer.blend(Comment, post=post, is_active=True, parent=None)
+
+        data = api.get(self.get_url(post))
+
+        assert data == {
+            "post": api.get(
+                reverse("v1:posts:post-detail", kwargs={"slug": post.slug})
+            ),
+            "comments": api.get(
+                reverse("v1:comments:post-comments", kwargs={"post_id": post.pk})
+            )["comments"],
+            "can_pin": None,
+        }
+        assert data["comments"]
+
+    def test_can_pin(self, api, auth_user, subscription, post):
+        post.publication_status = Post.PUBLISHED
+        post.save()
+
+        data = api.get(self.get_url(post))
+
+        assert data["can_pin"] == api.get(
+            reverse("v1:subscribe:can-pin-post", kwargs={"post_id": post.pk})
+        )
+        assert data["can_pin"]["can_pin"]
+
+    def test_comments_cached(self, api, post, mixer):
+        post.publication_status = Post.PUBLISHED
+        post.save()
+        mixer.blend(Comment, post=post, is_active=True, parent=None)
+        api.get(self.get_url(post))
+
+        with CaptureQueriesContext(connection) as context:
+            api.get(self.get_url(post))
+        assert not [
+            query
+            for query in context.captured_queries
+            if 'FROM "comments"' in query["sql"]
+        ]
+
+        mixer.blend(Comment, post=post, is_active=True, parent=None)
+        assert len(api.get(self.get_url(post))["comments"]) == 2
+
+    def test_comments_of_posts_keys(self, rf):
+        versions = {"comments:1": 1.0, "comments:2": 1.0, "users": 1.0}
+        request = rf.get("/")
+
+        keys = {
+            PageSectionsCache.get_key(
+                request, "comments", Section([name, "users"], 60), versions
+            )
+            for name in ("comments:1", "comments:2")
+        }
+
+        assert len(keys) == 2
+
+    def test_draft(self, api, post):
+        post.publication_status = Post.DRAFT
+        post.save()
+
+        data = api.get(self.get_url(post))
+
+        assert (data["comments"], data["can_pin"]) == ([], None)
+
+    def test_not_found(self, api):
+        api.get(
+            reverse("v1:pages:post-page", kwargs={"slug": "missing"}),
+            expected_status_code=404,
+        )
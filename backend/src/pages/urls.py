@@ -0,0 +1,10 @@
+from django.urls import path
+
+from pages.api.views import home_page, post_page
+
+app_name = "pages"
+
+urlpatterns = [
+    path("home/", home_page, name="home-page"),
+    path("post/<slug:slug>/", post_page, name="post-page"),
+]
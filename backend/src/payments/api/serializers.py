@@ -4,6 +4,7 @@ from django.db.models import Sum
 from drf_spectacular.utils import extend_schema_field
 from rest_framework import serializers
 
+from app.sparse_fields import SparseFieldsSerializer
 from payments.models import Payment, PaymentAttempt, Refund, WebhookEvent
 
 
@@ -44,7 +45,7 @@ class PaymentInfoSerializer(serializers.Serializer):
     user = serializers.CharField(read_only=True)
 
 
-class PaymentSerializer(serializers.ModelSerializer[Payment]):
+class PaymentSerializer(SparseFieldsSerializer[Payment]):
     """Serializer for Payments"""
 
     user_info = serializers.SerializerMethodField()
@@ -82,6 +83,19 @@ class PaymentSerializer(serializers.ModelSerializer[Payment]):
             "modified",
             "processed_at",
         ]
+        # Columns of fields, which are not columns of the same name
+        field_projections = {
+            "user_info": ("user__username", "user__email"),
+            "subscription_info": (
+                "subscription__plan__name",
+                "subscription__start_date",
+                "subscription__end_date",
+                "subscription__status",
+            ),
+            "is_pending": ("status",),
+            "is_successful": ("status",),
+            "can_be_refunded": ("status", "payment_method"),
+        }
 
     @extend_schema_field(UserInfoSerializer)
     def get_user_info(self, obj: Payment) -> dict[str, Any]:
@@ -157,7 +171,7 @@ class PaymentAttemptSerializer(serializers.ModelSerializer[PaymentAttempt]):
         read_only_fields = ["id", "created"]
 
 
-class RefundSerializer(serializers.ModelSerializer[Refund]):
+class RefundSerializer(SparseFieldsSerializer[Refund]):
     """Serializer for Refund"""
 
     payment_info = serializers.SerializerMethodField()
@@ -180,6 +194,16 @@ class RefundSerializer(serializers.ModelSerializer[Refund]):
             "processed_at",
         ]
         read_only_fields = ["id", "status", "created", "processed_at"]
+        field_projections = {
+            "payment_info": (
+                "payment__amount",
+                "payment__currency",
+                "payment__status",
+                "payment__user__username",
+            ),
+            "is_partial": ("amount", "payment__amount"),
+            "created_by_info": ("created_by__username",),
+        }
 
     @extend_schema_field(PaymentInfoSerializer)
     def get_payment_info(self, obj: Refund) -> dict[str, Any]:
@@ -309,5 +333,6 @@ class PaymentAnalyticsSerializer(serializers.Serializer):
 class UserPaymentHistorySerializer(serializers.Serializer):
     """Serializer for correct display of user_payment_history view response data in OpenAPI."""
 
-    count = serializers.IntegerField(read_only=True)
+    next = serializers.URLField(read_only=True, allow_null=True)
+    previous = serializers.URLField(read_only=True, allow_null=True)
     results = PaymentSerializer(many=True, read_only=True)
@@ -9,12 +9,14 @@ from django.http import HttpResponse
 from django.shortcuts import get_object_or_404
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_POST
-from drf_spectacular.utils import extend_schema
+from drf_spectacular.utils import OpenApiParameter, extend_schema, extend_schema_view
 from rest_framework import generics, permissions, status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.request import Request
 from rest_framework.response import Response
 
+from app.pagination import KeysetPagination
+from app.sparse_fields import SparseFieldsMixin, sparse_fields_parameters
 from payments.api.serializers import (
     PaymentAnalyticsSerializer,
     PaymentCreateSerializer,
@@ -34,7 +36,7 @@ if TYPE_CHECKING:
     from django.contrib.auth.models import AnonymousUser
 
 
-class PaymentBase(generics.GenericAPIView):
+class PaymentBase(SparseFieldsMixin, generics.GenericAPIView):
     serializer_class = PaymentSerializer
     permission_classes = [permissions.IsAuthenticated]
 
@@ -49,11 +51,16 @@ class PaymentBase(generics.GenericAPIView):
         if getattr(self, "swagger_fake_view", False):
             return Payment.objects.none()
 
-        return Payment.objects.filter(user=self.request.user).select_related(
-            "subscription", "subscription__plan"
+        return self.project_fields(
+            Payment.objects.filter(user=self.request.user).select_related(
+                "subscription", "subscription__plan"
+            )
         )
 
 
+@extend_schema_view(
+    get=extend_schema(parameters=sparse_fields_parameters(PaymentSerializer))
+)
 class PaymentListView(PaymentBase, generics.ListAPIView):
     """List of user payments."""
 
@@ -61,6 +68,9 @@ class PaymentListView(PaymentBase, generics.ListAPIView):
         return super().get_base_queryset().order_by("-created")
 
 
+@extend_schema_view(
+    get=extend_schema(parameters=sparse_fields_parameters(PaymentSerializer))
+)
 class PaymentDetailView(PaymentBase, generics.RetrieveAPIView):
     """Detail information about a payment."""
 
@@ -223,7 +233,7 @@ def cancel_payment(request: Request, payment_id: "UUID") -> Response:
         )
 
 
-class RefundBaseView(generics.GenericAPIView):
+class RefundBaseView(SparseFieldsMixin, generics.GenericAPIView):
     serializer_class = RefundSerializer
     permission_classes = [permissions.IsAdminUser]
 
@@ -237,11 +247,16 @@ class RefundBaseView(generics.GenericAPIView):
         if getattr(self, "swagger_fake_view", False):
             return Refund.objects.none()
 
-        return Refund.objects.all().select_related(
-            "payment", "payment__user", "created_by"
+        return self.project_fields(
+            Refund.objects.all().select_related(
+                "payment", "payment__user", "created_by"
+            )
         )
 
 
+@extend_schema_view(
+    get=extend_schema(parameters=sparse_fields_parameters(RefundSerializer))
+)
 class RefundListView(RefundBaseView, generics.ListAPIView):
     """List of refunds for administrators only."""
 
@@ -249,6 +264,9 @@ class RefundListView(RefundBaseView, generics.ListAPIView):
         return super().get_base_queryset().order_by("-created")
 
 
+@extend_schema_view(
+    get=extend_schema(parameters=sparse_fields_parameters(RefundSerializer))
+)
 class RefundDetailView(RefundBaseView, generics.RetrieveAPIView):
     """Detail information about a refund."""
 
@@ -359,6 +377,12 @@ def payment_analytics(request: Request) -> Response:
 
 
 @extend_schema(
+    parameters=[
+        OpenApiParameter("cursor", str, description="The pagination cursor value."),
+        OpenApiParameter(
+            "page_size", int, description="Number of results to return per page."
+        ),
+    ],
     responses={
         200: UserPaymentHistorySerializer,
     },
@@ -372,19 +396,14 @@ def user_payment_history(request: Request) -> Response:
         if isinstance(request.user, AnonymousUser):
             return Response(status=status.HTTP_401_UNAUTHORIZED)
 
-    payments = (
-        Payment.objects.filter(user=request.user)
-        .select_related("subscription", "subscription__plan")
-        .order_by("-created")
+    payments = Payment.objects.filter(user=request.user).select_related(
+        "subscription", "subscription__plan"
     )
 
-    serializer = PaymentSerializer(payments, many=True)
-    return Response(
-        {
-            "count": len(payments),
-            "results": serializer.data,
-        }
-    )
+    paginator = KeysetPagination()
+    page = paginator.paginate_queryset(payments, request)
+    serializer = PaymentSerializer(page, many=True)
+    return paginator.get_paginated_response(serializer.data)
 
 
 @extend_schema(
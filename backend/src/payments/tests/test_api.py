@@ -43,6 +43,16 @@ class TestPaymentList:
         for field in expected_fields:
             assert field in response_results[0]
 
+    def test_sparse_fields(self, api, auth_user, payment_w_sub):
+        response = api.get(
+            reverse("v1:payments:payment-list"),
+            data={"fields": "id,subscription_info"},
+        )
+
+        (result,) = response["results"]
+        assert list(result) == ["id", "subscription_info"]
+        assert result["id"] == str(payment_w_sub.pk)
+
 
 class TestPaymentDetail:
     def test_permissions_not_authenticated(self, api, payment_w_sub):
@@ -252,7 +262,7 @@ class TestUserPaymentHistory:
         response = api.get(reverse("v1:payments:payment-history"))
 
         assert response["results"] == []
-        assert response["count"] == 0
+        assert response["next"] is None
 
     def test_success_fields(self, api, auth_user, payment_w_sub):
         response = api.get(reverse("v1:payments:payment-history"))
@@ -264,7 +274,7 @@ class TestUserPaymentHistory:
         for field in expected_fields:
             assert field in response_results[0]
 
-        assert response["count"] == len(response_results)
+        assert len(response_results) == 1
 
 
 class TestRetryPayment:
@@ -2,7 +2,7 @@ from typing import TYPE_CHECKING, Any
 
 from django.contrib.auth.models import AnonymousUser
 from django.db import transaction
-from django.db.models import Count, Q, QuerySet
+from django.db.models import QuerySet
 from django.utils import timezone
 from drf_spectacular.utils import extend_schema
 from rest_framework import generics, permissions, status
@@ -10,8 +10,11 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.request import Request
 from rest_framework.response import Response
 
+from app.images import get_image_variant
+from app.pagination import KeysetPagination
 from app.serializer import PinnedPostsListSerializer
 from main.models import Post
+from main.services import PinnedPostsCache
 from subscribe.api.serializers import (
     PinnedPostSerializer,
     SubscriptionHistorySerializer,
@@ -26,6 +29,9 @@ from subscribe.models import (
     SubscriptionPlan,
 )
 
+if TYPE_CHECKING:
+    from accounts.models import User
+
 
 class SubscriptionPlanListView(generics.ListAPIView):
     """List of available subscription plans"""
@@ -87,6 +93,7 @@ class SubscriptionHistoryView(generics.ListAPIView):
 
     serializer_class = SubscriptionHistorySerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = KeysetPagination
 
     def get_queryset(self) -> QuerySet[SubscriptionHistory]:
         """Returns current user's subscription history"""
@@ -263,11 +270,14 @@ def cancel_subscription(request: Request) -> Response:
         )
 
 
-@extend_schema(responses={200: PinnedPostsListSerializer})
-@api_view(["GET"])
-@permission_classes([permissions.AllowAny])
-def pinned_posts_list(request: Request) -> Response:
-    """Retrieves list of all pinned posts"""
+def get_image_url(image: Any, variants: dict[str, str]) -> str | None:
+    """Returns URL of thumbnail of image, if it is generated"""
+    name = get_image_variant(image.name, variants, "thumb")
+    return image.storage.url(name) if name else None
+
+
+def build_pinned_posts_list() -> list[dict[str, Any]]:
+    """Returns data of pinned posts of users with active subscription"""
     # Retrieve pinned post only from user`s with active subscription
     pinned_posts = (
         PinnedPost.objects.select_related(
@@ -281,12 +291,6 @@ def pinned_posts_list(request: Request) -> Response:
             user__subscription__end_date__gt=timezone.now(),
             post__publication_status=Post.PUBLISHED,
         )
-        .annotate(
-            comments_count=Count(
-                "post__comments",
-                filter=Q(post__comments__is_active=True),
-            )
-        )
         .order_by("pinned_at")
     )
 
@@ -304,22 +308,35 @@ def pinned_posts_list(request: Request) -> Response:
                     if len(post.content) > 200
                     else post.content
                 ),
-                "image": post.image.url if post.image else None,
+                "image": get_image_url(post.image, post.image_variants),
                 "category": post.category.name if post.category else None,
                 "author": {
                     "id": post.author.id,
                     "username": post.author.username,
                     "full_name": post.author.full_name,
-                    "avatar": post.author.avatar.url if post.author.avatar else None,
+                    "avatar": get_image_url(
+                        post.author.avatar, post.author.avatar_variants
+                    ),
                 },
                 "views_count": post.views_count,
-                "comments_count": pinned_post.comments_count,
+                "comments_count": post.comments_count,
                 "created": post.created,
                 "pinned_at": pinned_post.pinned_at,
                 "is_pinned": True,
             }
         )
 
+    return posts_data
+
+
+@transaction.non_atomic_requests
+@extend_schema(responses={200: PinnedPostsListSerializer})
+@api_view(["GET"])
+@permission_classes([permissions.AllowAny])
+def pinned_posts_list(request: Request) -> Response:
+    """Retrieves list of all pinned posts"""
+    posts_data = PinnedPostsCache.get_block("list", request, build_pinned_posts_list)
+
     return Response(
         {
             "count": len(posts_data),
@@ -328,6 +345,33 @@ def pinned_posts_list(request: Request) -> Response:
     )
 
 
+def get_pin_checks(user: "User", post: Post) -> dict[str, Any]:
+    """Returns checks, whether user can pin published post"""
+    checks = {
+        "post_exists": True,
+        # Compared by id without loading author
+        "is_authored": post.author_id == user.pk,
+        "has_subscription": hasattr(user, "subscription"),
+        "has_active_subscription": False,
+        "can_pin": False,
+    }
+    if checks["has_subscription"]:
+        checks["has_active_subscription"] = user.subscription.is_active
+
+    checks["can_pin"] = (
+        checks["is_authored"]
+        and checks["has_subscription"]
+        and checks["has_active_subscription"]
+    )
+
+    return {
+        "post_id": post.pk,
+        "can_pin": checks["can_pin"],
+        "checks": checks,
+        "msg": "Can pin post." if checks["can_pin"] else "Can`t pin post.",
+    }
+
+
 @extend_schema(
     request={
         "application/json": {
@@ -369,30 +413,7 @@ def can_pin_post(request: Request, post_id: int) -> Response:
             if isinstance(request.user, AnonymousUser):
                 return Response(status=status.HTTP_401_UNAUTHORIZED)
 
-        checks = {
-            "post_exists": True,
-            "is_authored": post.author == request.user,
-            "has_subscription": hasattr(request.user, "subscription"),
-            "has_active_subscription": False,
-            "can_pin": False,
-        }
-        if checks["has_subscription"]:
-            checks["has_active_subscription"] = request.user.subscription.is_active
-
-        checks["can_pin"] = (
-            checks["is_authored"]
-            and checks["has_subscription"]
-            and checks["has_active_subscription"]
-        )
-
-        return Response(
-            {
-                "post_id": post_id,
-                "can_pin": checks["can_pin"],
-                "checks": checks,
-                "msg": "Can pin post." if checks["can_pin"] else "Can`t pin post.",
-            }
-        )
+        return Response(get_pin_checks(request.user, post))
 
     except Post.DoesNotExist:
         return Response(
@@ -7,6 +7,7 @@ from django.db import models
 from django.utils import timezone
 
 from app.models import TimeStampedModel
+from app.query_cache import QueryCacheOptions
 
 
 class SubscriptionPlan(TimeStampedModel):
@@ -64,6 +65,8 @@ class Subscription(TimeStampedModel):
     stripe_subscription_id = models.CharField(max_length=255, blank=True, null=True)
     auto_renew = models.BooleanField(default=True)
 
+    query_cache_options = QueryCacheOptions(keys=("user_id", "status", "end_date"))
+
     class Meat:
         db_table = "subscriptions"
         verbose_name = "Subscription"
@@ -135,6 +138,8 @@ class PinnedPost(models.Model):
     )
     pinned_at = models.DateTimeField(auto_now_add=True)
 
+    query_cache_options = QueryCacheOptions(keys=("post_id", "user_id", "pinned_at"))
+
     class Meta:
         db_table = "pinned_post"
         verbose_name = "Pinned Post"
@@ -4,6 +4,7 @@ from typing import Any
 from celery import shared_task
 from django.utils import timezone
 
+from app.db import use_replica
 from subscribe.models import PinnedPost, Subscription, SubscriptionHistory
 
 logger = logging.getLogger(__name__)
@@ -48,6 +49,7 @@ def check_expired_subscriptions() -> dict[str, Any]:
 
 
 @shared_task
+@use_replica()
 def send_subscription_expire_reminder() -> dict[str, Any]:
     """Sending notification about an expiring of subscription"""
     from datetime import timedelta